@@ -2,13 +2,17 @@
 """
 Veramon Reunited - Health Check Script
 Verifies that the bot's critical systems are functioning correctly
+
+The bot process is checked through its local metrics endpoint (enabled by
+METRICS_PORT), which reports event loop and database pool health without
+opening the database file.
 """
 
 import os
 import sys
 import socket
-import sqlite3
 import logging
+import urllib.request
 from pathlib import Path
 
 # Configure logging
@@ -20,7 +24,6 @@ logger = logging.getLogger("veramon-healthcheck")
 
 # Check paths
 DATA_DIR = Path("/app/data")
-DB_PATH = DATA_DIR / "veramon_reunited.db"
 BATTLE_DIR = Path("/app/battle-system-data")
 TRADE_DIR = Path("/app/trading-data")
 FACTION_DIR = Path("/app/faction-data")
@@ -28,6 +31,11 @@ EVENT_DIR = Path("/app/event-data")
 QUEST_DIR = Path("/app/quest-data")
 TOURNAMENT_DIR = Path("/app/tournament-data")
 
+# Metrics endpoint served by the bot (src/utils/metrics_exporter.py)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+MAX_LOOP_HEARTBEAT_AGE = 30  # seconds
+
 def check_discord_connection():
     """Test connectivity to Discord"""
     try:
@@ -38,75 +46,52 @@ def check_discord_connection():
         logger.error(f"Discord connectivity failed: {e}")
         return False
 
-def check_database():
-    """Verify database is accessible and properly structured"""
-    try:
-        if not DB_PATH.exists():
-            logger.error(f"Database file not found at {DB_PATH}")
-            return False
-            
-        conn = sqlite3.connect(str(DB_PATH))
-        cursor = conn.cursor()
-        
-        # Check for battle tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='battles'")
-        has_battle_table = cursor.fetchone() is not None
-        
-        # Check for trade tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='trades'")
-        has_trade_table = cursor.fetchone() is not None
+def read_metrics(host=METRICS_HOST, port=METRICS_PORT, timeout=5):
+    """Fetch the bot's metrics endpoint and return its samples by name"""
+    with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=timeout) as response:
+        text = response.read().decode("utf-8")
         
-        # Check for faction tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='factions'")
-        has_faction_table = cursor.fetchone() is not None
-        
-        # Check for event tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='events'")
-        has_event_table = cursor.fetchone() is not None
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name, _, value = line.rpartition(" ")
+        samples[name] = float(value)
+    return samples
+
+def check_bot_metrics(host=METRICS_HOST, port=METRICS_PORT):
+    """Verify the bot process is responsive through its metrics endpoint"""
+    try:
+        samples = read_metrics(host, port)
+    except Exception as e:
+        logger.error(f"Metrics endpoint unavailable on {host}:{port}: {e}")
+        return False
         
-        # Check for quest tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='quests'")
-        has_quest_table = cursor.fetchone() is not None
+    # The event loop monitor stops beating while the loop is blocked
+    heartbeat_age = samples.get("veramon_event_loop_heartbeat_age_seconds")
+    if samples.get("veramon_event_loop_monitored") != 1 or heartbeat_age is None:
+        logger.error("Event loop is not being monitored")
+        return False
+    if heartbeat_age > MAX_LOOP_HEARTBEAT_AGE:
+        logger.error(f"Event loop stalled for {heartbeat_age:.1f}s")
+        return False
+    logger.info(f"Event loop: OK (heartbeat {heartbeat_age:.1f}s ago)")
+    
+    max_connections = samples.get("veramon_db_pool_max_connections")
+    if max_connections is None:
+        logger.error("Database pool metrics missing")
+        return False
+    in_use = samples.get('veramon_db_pool_connections{state="in_use"}', 0)
+    if in_use >= max_connections:
+        logger.warning(f"Database pool saturated: {in_use:.0f}/{max_connections:.0f} connections in use")
+    else:
+        logger.info(f"Database pool: OK ({in_use:.0f}/{max_connections:.0f} connections in use)")
         
-        # Check for tournament tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='tournaments'")
-        has_tournament_table = cursor.fetchone() is not None
+    collector_errors = samples.get("veramon_metrics_collector_errors_total", 0)
+    if collector_errors:
+        logger.warning(f"{collector_errors:.0f} metric collections failed")
         
-        if has_battle_table:
-            logger.info("Battle system database: OK")
-        else:
-            logger.warning("Battle system tables not found in database")
-            
-        if has_trade_table:
-            logger.info("Trading system database: OK")
-        else:
-            logger.warning("Trading system tables not found in database")
-            
-        if has_faction_table:
-            logger.info("Faction system database: OK")
-        else:
-            logger.warning("Faction system tables not found in database")
-            
-        if has_event_table:
-            logger.info("Event system database: OK")
-        else:
-            logger.warning("Event system tables not found in database")
-            
-        if has_quest_table:
-            logger.info("Quest system database: OK")
-        else:
-            logger.warning("Quest system tables not found in database")
-            
-        if has_tournament_table:
-            logger.info("Tournament system database: OK")
-        else:
-            logger.warning("Tournament system tables not found in database")
-            
-        conn.close()
-        return has_battle_table and has_trade_table and has_faction_table and has_event_table and has_quest_table and has_tournament_table
-    except Exception as e:
-        logger.error(f"Database check failed: {e}")
-        return False
+    return True
 
 def check_filesystem():
     """Verify that all required directories exist and are writable"""
@@ -186,10 +171,10 @@ if __name__ == "__main__":
     logger.info("Starting Veramon Reunited health check")
     
     discord_ok = check_discord_connection()
-    db_ok = check_database()
+    metrics_ok = check_bot_metrics()
     fs_ok = check_filesystem()
     
-    if discord_ok and db_ok and fs_ok:
+    if discord_ok and metrics_ok and fs_ok:
         logger.info("All checks passed!")
         sys.exit(0)
     else:
@@ -8,6 +8,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Union, Literal
 
 from src.db.db import get_connection
+from src.utils.name_index import get_capture_index
 from src.models.permissions import require_permission_level, PermissionLevel, is_admin
 
 # Load data files
@@ -480,6 +481,7 @@ class AdminCog(commands.Cog):
         capture_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        get_capture_index().add_capture(str(player.id), capture_id, veramon_name, nickname, level, shiny)
         
         # Confirmation message
         veramon = veramon_data[veramon_name]
@@ -7,6 +7,7 @@ including backups, restores, and maintenance functions.
 """
 
 import os
+import sqlite3
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -29,7 +30,12 @@ class DatabaseAdminCog(commands.Cog):
     
     @app_commands.command(name="db_backup", description="Create a backup of the database")
     @app_commands.default_permissions(administrator=True)
-    async def db_backup(self, interaction: discord.Interaction, backup_name: Optional[str] = None):
+    @app_commands.describe(
+        backup_name="Name of the backup file",
+        differential="Only store the pages changed since the newest full backup"
+    )
+    async def db_backup(self, interaction: discord.Interaction, backup_name: Optional[str] = None,
+                        differential: bool = False):
         """Create a backup of the current database."""
         # Validate admin permissions (admin access only)
         validation = await self.security.validate_db_command_access(
@@ -47,7 +53,11 @@ class DatabaseAdminCog(commands.Cog):
             backup_name = f"backup_{timestamp}"
         
         # Create the backup
-        backup_path = self.db_manager.create_backup(backup_name)
+        try:
+            backup_path = await self.db_manager.create_backup_async(backup_name, differential=differential)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            await interaction.followup.send(f"❌ Failed to create backup: {e}", ephemeral=True)
+            return
         
         # Check if file is small enough to upload (Discord limit is 8MB for normal, 50MB for Nitro)
         file_size_mb = os.path.getsize(backup_path) / (1024 * 1024)
@@ -103,7 +113,7 @@ class DatabaseAdminCog(commands.Cog):
             # Add to current embed
             current_embed.add_field(
                 name=f"{i+1}. {backup['filename']}",
-                value=f"Created: {backup['created']}\nSize: {backup['size_mb']} MB",
+                value=f"Created: {backup['created']}\nSize: {backup['size_mb']} MB\nType: {backup['type']}",
                 inline=False
             )
             
@@ -209,7 +219,11 @@ class DatabaseAdminCog(commands.Cog):
         
         # Proceed with restore
         # This is a highly critical operation that requires a full confirmation string
-        success = self.db_manager.restore_backup(backup_path, confirm_text="CONFIRM_RESTORE")
+        try:
+            success = await self.db_manager.restore_backup_async(backup_path, confirm_text="CONFIRM_RESTORE")
+        except (OSError, ValueError, sqlite3.Error) as e:
+            await interaction.followup.send(f"❌ Failed to restore database from backup: {e}", ephemeral=True)
+            return
         
         if success:
             await interaction.followup.send("✅ Database successfully restored from backup!", ephemeral=True)
@@ -791,7 +805,13 @@ class DatabaseAdminCog(commands.Cog):
                         await modal_interaction.response.defer(ephemeral=True)
                         
                         name = self.backup_name.value if self.backup_name.value else None
-                        backup_path = self.cog.db_manager.create_backup(name)
+                        try:
+                            backup_path = await self.cog.db_manager.create_backup_async(name)
+                        except (OSError, ValueError, sqlite3.Error) as e:
+                            await modal_interaction.followup.send(
+                                f"❌ Failed to create backup: {e}", ephemeral=True
+                            )
+                            return
                         
                         await modal_interaction.followup.send(
                             f"✅ Backup created successfully: `{os.path.basename(backup_path)}`", 
@@ -827,7 +847,7 @@ class DatabaseAdminCog(commands.Cog):
                     if i < 10:
                         embed.add_field(
                             name=f"{i+1}. {backup['filename']}",
-                            value=f"Created: {backup['created']}\nSize: {backup['size_mb']} MB",
+                            value=f"Created: {backup['created']}\nSize: {backup['size_mb']} MB\nType: {backup['type']}",
                             inline=False
                         )
                 
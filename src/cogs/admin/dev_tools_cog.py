@@ -777,8 +777,8 @@ class DevToolsCog(commands.Cog):
             name="🔶 Object Cache",
             value=f"Total Items: {object_cache.get('total_items', 0)}\n"
                   f"Utilization: {object_cache.get('utilization', 0):.2%}\n"
-                  f"Avg Age: {object_cache.get('avg_age_seconds', 0):.1f}s\n"
-                  f"Avg Accesses: {object_cache.get('avg_accesses', 0):.1f}",
+                  f"Hit Rate: {object_cache.get('hit_rate', 0):.2%}\n"
+                  f"Evictions: {object_cache.get('evictions', 0)}",
             inline=True
         )
         
@@ -792,6 +792,19 @@ class DevToolsCog(commands.Cog):
             inline=False
         )
         
+        # Memory of every cache namespace
+        tiered = cache_stats.get("tiered", {})
+        if tiered.get("namespaces"):
+            embed.add_field(
+                name="🧠 Cache Memory",
+                value="\n".join(
+                    f"{name}: {stats['bytes'] / 1024:.0f}/{stats['max_bytes'] / 1024:.0f} KB, "
+                    f"{stats['evictions']} evictions"
+                    for name, stats in tiered["namespaces"].items()
+                ),
+                inline=False
+            )
+        
         # Table dependencies
         if "query_cache" in cache_stats and "table_dependencies" in query_cache:
             table_deps = query_cache["table_dependencies"]
@@ -808,6 +821,18 @@ class DevToolsCog(commands.Cog):
                     inline=False
                 )
         
+        # Connection pool stats
+        pool_stats = self.db_manager.get_pool_stats()
+        embed.add_field(
+            name="🔌 Connection Pool",
+            value=f"In Use: {pool_stats['in_use_connections']}/{pool_stats['max_connections']}\n"
+                  f"Avg Wait: {pool_stats['avg_wait_time'] * 1000:.2f}ms\n"
+                  f"Max Wait: {pool_stats['max_wait_time'] * 1000:.2f}ms\n"
+                  f"Exhaustion Events: {pool_stats['exhaustion_events']}\n"
+                  f"Oldest Connection: {pool_stats['max_connection_age']:.0f}s",
+            inline=False
+        )
+        
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
     @app_commands.command(name="clear_cache", description="Clear specific or all caches")
@@ -900,6 +925,7 @@ class DevToolsCog(commands.Cog):
                 name="⏱️ Battle Duration",
                 value=f"Average: {battle_stats.get('average_duration', 0):.2f}s\n"
                       f"Min: {battle_stats.get('min_duration', 0):.2f}s\n"
+                      f"p95: {battle_stats.get('p95_duration', 0):.2f}s\n"
                       f"Max: {battle_stats.get('max_duration', 0):.2f}s\n"
                       f"Avg Turns: {battle_stats.get('average_turns', 0):.1f}",
                 inline=True
@@ -912,10 +938,26 @@ class DevToolsCog(commands.Cog):
                 name="🎯 Move Calculations",
                 value=f"Count: {move_calc.get('count', 0)}\n"
                       f"Average: {move_calc.get('average', 0) * 1000:.2f}ms\n"
+                      f"p50/p95/p99: {move_calc.get('p50', 0) * 1000:.2f}/{move_calc.get('p95', 0) * 1000:.2f}/"
+                      f"{move_calc.get('p99', 0) * 1000:.2f}ms\n"
                       f"Max: {move_calc.get('max', 0) * 1000:.2f}ms",
                 inline=False
             )
         
+        # Battle operations
+        operation_stats = sorted(metrics.get("operation_stats", {}).items(),
+                                 key=lambda item: item[1]["count"], reverse=True)
+        if operation_stats:
+            embed.add_field(
+                name="⚙️ Operations (p50/p95/p99)",
+                value="\n".join(
+                    f"{operation}: {stats['p50'] * 1000:.2f}/{stats['p95'] * 1000:.2f}/"
+                    f"{stats['p99'] * 1000:.2f}ms ({stats['count']})"
+                    for operation, stats in operation_stats[:5]
+                ),
+                inline=False
+            )
+        
         # Status effects and field conditions
         status_effect = metrics.get("status_effect_stats", {})
         field_condition = metrics.get("field_condition_stats", {})
@@ -992,7 +1034,7 @@ class DevToolsCog(commands.Cog):
         
         if metric_type == "all" or metric_type == "cache":
             # Reset cache statistics (not clearing the cache itself)
-            self.cache_manager.get_cache_stats()  # This resets the internal stats counters
+            self.cache_manager.reset_cache_stats()
         
         await interaction.response.send_message(f"✅ Reset {metric_type} metrics successfully.", ephemeral=True)
 
@@ -21,11 +21,11 @@ from discord.ext import commands
 
 import psutil
 
-from src.utils.env_config import get_env_value
 from src.db.db import get_connection
 from src.utils.cache import clear_cache, get_cache_stats
 from src.utils.config_manager import get_config
 from src.utils.performance_monitor import get_performance_stats
+from src.utils.battle_metrics import get_battle_metrics
 
 # Set up logging
 logger = logging.getLogger("veramon.diagnostic")
@@ -160,6 +160,11 @@ class DiagnosticCog(commands.Cog):
         except Exception as e:
             report["performance"] = {"error": str(e)}
         
+        try:
+            report["battle_metrics"] = get_battle_metrics().get_metrics_summary()
+        except Exception as e:
+            report["battle_metrics"] = {"error": str(e)}
+        
         # Create the diagnostic report embed
         embed = discord.Embed(
             title="📊 Diagnostic Report",
@@ -232,16 +237,32 @@ class DiagnosticCog(commands.Cog):
         if "error" not in report["performance"]:
             perf = report["performance"]
             
-            # Format the response time metrics
+            # Format the response time metrics (in ms)
             response_times = perf.get("response_times", {})
-            avg_response = response_times.get("average", 0) * 1000  # convert to ms
+            if response_times.get("count", 0):
+                response_text = (
+                    f"**Commands:** {response_times['count']}\n"
+                    f"**Avg Response Time:** {response_times['average']:.2f} ms\n"
+                    f"**p50/p95/p99:** {response_times['p50']:.2f} / {response_times['p95']:.2f} / "
+                    f"{response_times['p99']:.2f} ms\n"
+                    f"**Max:** {response_times['max']:.2f} ms"
+                )
+            else:
+                response_text = "No commands recorded yet"
+            
+            # Slowest command and query by p99
+            slowest = []
+            for label, series in (("Command", perf.get("commands", {})), ("Query", perf.get("queries", {}))):
+                if series:
+                    name, stats = max(series.items(), key=lambda item: item[1].get("p99", 0))
+                    slowest.append(f"**Slowest {label}:** `{name[:60]}` ({stats['p99']:.2f} ms p99)")
+            
+            battle_metrics = report["battle_metrics"]
+            active_battles = battle_metrics.get("active_battles", 0) if "error" not in battle_metrics else "?"
             
             embed.add_field(
                 name="Performance Metrics",
-                value=f"**Avg Response Time:** {avg_response:.2f} ms\n"
-                      f"**Recent API Calls:** {perf.get('api_calls', {}).get('recent', 0)}\n"
-                      f"**Active Battles:** {perf.get('active_sessions', {}).get('battles', 0)}\n"
-                      f"**Active Trades:** {perf.get('active_sessions', {}).get('trades', 0)}",
+                value="\n".join([response_text] + slowest + [f"**Active Battles:** {active_battles}"]),
                 inline=False
             )
         
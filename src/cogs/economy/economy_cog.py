@@ -6,9 +6,11 @@ import os
 import json
 from typing import Dict, List, Optional, Union, Literal
 from src.db.db import get_connection  # This function should return an SQLite connection
+from src.db.async_db import run_in_db_executor, run_with_connection
 from src.models.permissions import require_permission_level, PermissionLevel, is_admin, get_permission_level
 from datetime import datetime
 from src.core.security_integration import get_security_integration
+from src.models.quest_engine import get_quest_engine
 
 def initialize_economy_db():
     """
@@ -127,15 +129,18 @@ class EconomyCog(commands.Cog):
         self.bot = bot
         initialize_economy_db()  # Create/update the economy tables on load
         # Load items data
-        items_path = os.path.join(os.path.dirname(__file__), "..", "data", "items.json")
+        items_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "items.json")
         with open(items_path, "r") as f:
             self.items = json.load(f)
             
         # Load quests data
-        quests_path = os.path.join(os.path.dirname(__file__), "..", "data", "quests.json")
+        quests_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "quests.json")
         with open(quests_path, "r") as f:
             self.quests = json.load(f)
         
+        # In-memory index of active quests by event type
+        self.quest_engine = get_quest_engine()
+        
         # Cache for user multipliers
         self.token_multipliers = {}
         self.xp_multipliers = {}
@@ -218,11 +223,8 @@ class EconomyCog(commands.Cog):
         
         return total_multiplier
 
-    @app_commands.command(name="balance", description="Check your current token balance and economy stats.")
-    @require_permission_level(PermissionLevel.USER)
-    async def balance(self, interaction: discord.Interaction):
-        user_id = str(interaction.user.id)
-        conn = get_connection()
+    def _load_balance(self, conn, user_id: str):
+        """Load a user's tokens, XP, streak and active boosts. Runs on the database executor."""
         cursor = conn.cursor()
         cursor.execute("SELECT tokens, xp FROM users WHERE user_id = ?", (user_id,))
         row = cursor.fetchone()
@@ -252,11 +254,19 @@ class EconomyCog(commands.Cog):
         
         active_boosts = cursor.fetchall()
         
-        conn.close()
+        return tokens, xp, current_streak, max_streak, active_boosts
+
+    @app_commands.command(name="balance", description="Check your current token balance and economy stats.")
+    @require_permission_level(PermissionLevel.USER)
+    async def balance(self, interaction: discord.Interaction):
+        user_id = str(interaction.user.id)
+        tokens, xp, current_streak, max_streak, active_boosts = await run_with_connection(
+            self._load_balance, user_id
+        )
         
         # Get multipliers
-        token_multiplier = self.get_user_token_multiplier(user_id)
-        xp_multiplier = self.get_user_xp_multiplier(user_id)
+        token_multiplier = await run_in_db_executor(self.get_user_token_multiplier, user_id)
+        xp_multiplier = await run_in_db_executor(self.get_user_xp_multiplier, user_id)
         
         # Create response embed
         embed = discord.Embed(
@@ -1174,135 +1184,30 @@ class EconomyCog(commands.Cog):
         
         conn.commit()
         conn.close()
+        
+        # Load the new quests on the user's next event
+        self.quest_engine.invalidate(str(user_id))
 
     async def update_quest_progress(self, user_id: str, quest_type: str, count: int = 1, **kwargs):
         """
         Update a user's progress on quests of a specific type.
         
+        Only the user's active quests of this type are checked, from the
+        quest engine's in-memory index, and all resulting progress and
+        rewards are written in one job.
+        
         Args:
             user_id: The user's Discord ID
             quest_type: The type of action (catch, battle_win, etc.)
             count: How much to increment progress by
             **kwargs: Additional criteria for specific quest types
-        """
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Get all of the user's active quests of this type
-        cursor.execute("""
-            SELECT q.quest_id, q.requirements, uq.progress, q.token_reward, q.xp_reward, q.item_rewards
-            FROM quests q
-            JOIN user_quests uq ON q.quest_id = uq.quest_id
-            WHERE uq.user_id = ? AND uq.completed = 0
-        """, (user_id,))
-        
-        quest_rows = cursor.fetchall()
-        completed_quests = []
-        
-        for quest_row in quest_rows:
-            quest_id, requirements_json, progress_json, token_reward, xp_reward, item_rewards_json = quest_row
             
-            try:
-                requirements = json.loads(requirements_json)
-                progress = json.loads(progress_json)
-                item_rewards = json.loads(item_rewards_json) if item_rewards_json else []
-            except:
-                continue
-                
-            # Check if this quest matches the quest_type
-            if requirements.get("type") == quest_type:
-                # Check additional criteria if any
-                matches_criteria = True
-                
-                # For rarity-specific quests
-                if "min_rarity" in requirements and "rarity" in kwargs:
-                    rarity_levels = ["common", "uncommon", "rare", "legendary", "mythic"]
-                    min_index = rarity_levels.index(requirements["min_rarity"])
-                    actual_index = rarity_levels.index(kwargs["rarity"]) if kwargs["rarity"] in rarity_levels else -1
-                    
-                    if actual_index < min_index:
-                        matches_criteria = False
-                
-                # For type-specific quests
-                if "type_name" in requirements and "type_name" in kwargs:
-                    if requirements["type_name"] != "random" and requirements["type_name"] != kwargs["type_name"]:
-                        matches_criteria = False
-                
-                # For biome-specific quests
-                if "biome" in requirements and "biome" in kwargs:
-                    if requirements["biome"] != kwargs["biome"]:
-                        matches_criteria = False
-                        
-                # For battle type specific quests
-                if "battle_type" in requirements and "battle_type" in kwargs:
-                    if requirements["battle_type"] != kwargs["battle_type"]:
-                        matches_criteria = False
-                
-                # If all criteria match, update progress
-                if matches_criteria:
-                    # Initialize current progress if not present
-                    if "current" not in progress:
-                        progress["current"] = 0
-                    
-                    # For biome exploration, track unique biomes
-                    if quest_type == "explore_unique_biomes" and "biome" in kwargs:
-                        if "biomes" not in progress:
-                            progress["biomes"] = []
-                            
-                        if kwargs["biome"] not in progress["biomes"]:
-                            progress["biomes"].append(kwargs["biome"])
-                            progress["current"] = len(progress["biomes"])
-                    else:
-                        # For normal counters, just increment
-                        progress["current"] += count
-                    
-                    # Check if quest is now complete
-                    if progress["current"] >= requirements.get("count", 1):
-                        # Mark as completed
-                        completion_date = datetime.datetime.now().isoformat()
-                        cursor.execute("""
-                            UPDATE user_quests
-                            SET progress = ?, completed = 1, completion_date = ?
-                            WHERE user_id = ? AND quest_id = ?
-                        """, (json.dumps(progress), completion_date, user_id, quest_id))
-                        
-                        # Add to list of completed quests to process rewards
-                        completed_quests.append({
-                            "quest_id": quest_id,
-                            "token_reward": token_reward,
-                            "xp_reward": xp_reward,
-                            "item_rewards": item_rewards
-                        })
-                    else:
-                        # Just update progress
-                        cursor.execute("""
-                            UPDATE user_quests
-                            SET progress = ?
-                            WHERE user_id = ? AND quest_id = ?
-                        """, (json.dumps(progress), user_id, quest_id))
-        
-        # Process rewards for completed quests
-        for quest in completed_quests:
-            # Add tokens and XP
-            cursor.execute("""
-                UPDATE users 
-                SET tokens = tokens + ?, xp = xp + ?
-                WHERE user_id = ?
-            """, (quest["token_reward"], quest["xp_reward"], user_id))
-            
-            # Add any item rewards
-            for item_reward in quest["item_rewards"]:
-                item_id = item_reward.get("item_id")
-                quantity = item_reward.get("quantity", 1)
-                
-                if item_id in self.items:
-                    await self._add_item_to_inventory(user_id, item_id, quantity)
-        
-        conn.commit()
-        conn.close()
-        
-        # Return info about completed quests for notifications
-        return completed_quests
+        Returns:
+            List of completed quests with their rewards
+        """
+        return await self.quest_engine.process(
+            str(user_id), quest_type, count, known_items=self.items, **kwargs
+        )
 
     @app_commands.command(name="transfer", description="Transfer tokens to another player")
     @app_commands.describe(
@@ -14,6 +14,7 @@ from src.utils.ui_theme import theme_manager, ThemeColorType, create_themed_embe
 from src.utils.interactive_components import NavigationView, MenuButton, PageTracker
 from src.models.permissions import require_permission_level, PermissionLevel
 from src.db.db import Database
+from src.utils.user_resolver import get_user_resolver
 
 logger = logging.getLogger('veramon.event')
 
@@ -721,6 +722,8 @@ class EventCog(commands.Cog):
         if not results:
             return
             
+        users = await get_user_resolver(self.bot).fetch_many(result['user_id'] for result in results)
+            
         for result in results:
             user_id = result['user_id']
             event_id = result['event_id']
@@ -732,7 +735,7 @@ class EventCog(commands.Cog):
                 
             # Send DM reminder
             try:
-                user = await self.bot.fetch_user(int(user_id))
+                user = users.get(str(user_id))
                 if not user:
                     continue
                     
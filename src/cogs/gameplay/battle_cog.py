@@ -20,6 +20,7 @@ from src.models.battle import Battle, BattleType, BattleStatus, ParticipantStatu
 from src.models.battle_manager import BattleManager
 from src.utils.actor_system import get_actor_system
 from src.utils.data_loader import load_all_veramon_data, load_abilities_data
+from src.utils.name_index import get_capture_index
 from src.utils.performance_monitor import PerformanceMonitor
 from src.utils.battle_metrics import BattleMetrics
 from src.core.security_integration import get_security_integration
@@ -1891,6 +1892,13 @@ class EnhancedBattleCog(commands.Cog):
                 conn.commit()
                 conn.close()
                 
+                capture_index = get_capture_index()
+                for entry in xp_entries:
+                    changes = {"level": entry["new_level"]}
+                    if entry["evolved"] and entry["evolution_name"]:
+                        changes["veramon_name"] = entry["evolution_name"]
+                    capture_index.update_capture(winner_id, entry["capture_id"], **changes)
+                
                 # Create winner embed
                 embed.add_field(
                     name="Winner",
@@ -18,8 +18,12 @@ from discord import app_commands
 from discord.ext import commands
 
 from src.utils.helpers import weighted_choice
+from src.utils.spawn_tables import SpawnTableCompiler
 from src.utils.data_loader import load_all_veramon_data, load_biomes_data, load_items_data
+from src.utils.species_registry import get_species_registry
+from src.utils.name_index import get_capture_index
 from src.db.db import get_connection
+from src.db.async_db import fetch_all
 from src.models.permissions import require_permission_level, PermissionLevel
 from src.models.veramon import Veramon
 from src.utils.config_manager import get_config
@@ -77,6 +81,9 @@ class CatchingCog(commands.Cog):
         
         # Add RARITY_WEIGHTS as a class attribute for tests
         self.RARITY_WEIGHTS = RARITY_WEIGHTS
+        
+        # Spawn weights are compiled once per biome/area/weather/time combination
+        self.spawn_tables = SpawnTableCompiler(self.biomes, self.veramon_data, self.RARITY_WEIGHTS)
 
     def _get_current_time_of_day(self):
         """Get the current time of day based on real-world time."""
@@ -135,43 +142,25 @@ class CatchingCog(commands.Cog):
         Returns:
             dict: A dictionary containing spawn information
         """
-        # Get biome data
-        biome_data = self.biomes.get(biome_key, {})
-        if not biome_data:
-            return None
-            
-        # Get spawn table for this biome
-        spawn_table = biome_data.get('spawn_table', {})
-        if not spawn_table:
+        # Get the compiled rarity and species tables for the current weather
+        weather = self.current_weather.get(biome_key)
+        self.spawn_tables.update_sources(self.biomes, self.veramon_data, get_species_registry().refresh())
+        compiled = self.spawn_tables.rarity_tables(biome_key, weather)
+        if not compiled:
             return None
             
-        # Apply weather effects on spawn rates
-        weather = self.current_weather.get(biome_key)
-        type_modifiers = {}
-        
-        if weather and weather in biome_data.get('weather_effects', {}):
-            weather_effects = biome_data['weather_effects'][weather]
-            type_modifiers = weather_effects.get('spawn_modifiers', {})
+        rarity_table, species_tables, spawn_table = compiled
         
         # Choose a rarity tier based on weights
-        rarity_weights = []
-        for rarity, weight in self.RARITY_WEIGHTS.items():
-            if rarity in spawn_table:
-                rarity_weights.append((rarity, weight))
-                
-        if not rarity_weights:
-            # Fallback to common if no rarity weights were found
-            chosen_rarity = "common"
+        if rarity_table:
+            chosen_rarity = rarity_table.sample()
         else:
-            chosen_rarity = weighted_choice(rarity_weights)
-            
-        if not chosen_rarity or chosen_rarity not in spawn_table:
             # Fallback to first available rarity
             chosen_rarity = next(iter(spawn_table.keys()), "common")
             
-        # Choose a Veramon from the rarity tier
-        potential_spawns = spawn_table.get(chosen_rarity, [])
-        if not potential_spawns:
+        # Choose a Veramon from the rarity tier, weighted by weather type modifiers
+        species_table = species_tables.get(chosen_rarity)
+        if not species_table:
             # Return a default spawn if no potential spawns
             return {
                 'id': 'bulbasaur',  # Default fallback
@@ -183,37 +172,7 @@ class CatchingCog(commands.Cog):
                 'biome': biome_key
             }
             
-        # Apply type modifiers to the spawn weights
-        spawn_weights = []
-        for veramon_id in potential_spawns:
-            veramon_data = self.veramon_data.get(veramon_id)
-            if not veramon_data:
-                continue
-                
-            # Start with base weight of 1
-            weight = 1.0
-            
-            # Apply type modifiers
-            for type_name in veramon_data.get('type', []):
-                if type_name.lower() in type_modifiers:
-                    weight *= type_modifiers[type_name.lower()]
-                    
-            spawn_weights.append((veramon_id, weight))
-            
-        # Safeguard for empty spawn_weights
-        if not spawn_weights:
-            # Return a default spawn if no spawn weights
-            return {
-                'id': 'bulbasaur',  # Default fallback
-                'name': 'Bulbasaur',
-                'types': ['Grass', 'Poison'],
-                'rarity': chosen_rarity,
-                'shiny': False,
-                'level': 1,
-                'biome': biome_key
-            }
-            
-        chosen_veramon_id = weighted_choice(spawn_weights)
+        chosen_veramon_id = species_table.sample()
         veramon_data = self.veramon_data.get(chosen_veramon_id, {})
         
         # Check for shiny
@@ -444,31 +403,18 @@ class CatchingCog(commands.Cog):
             area_desc = biome_data.get('description', '')
             area_image = biome_data.get('image')
         
-        # Apply weather effects to encounter rate and spawn tables
+        # Apply weather effects to encounter rate
         if current_weather and current_weather in biome_data.get('weather_effects', {}):
             weather_data = biome_data['weather_effects'][current_weather]
             encounter_rate_modifier *= weather_data.get('encounter_rate', 1.0)
             weather_desc = weather_data.get('description', f"Current weather: {current_weather}")
-            
-            # Apply type spawn modifiers from weather
-            spawn_modifiers = weather_data.get('spawn_modifiers', {})
         else:
             weather_desc = "Weather: Clear"
-            spawn_modifiers = {}
             
-        # Apply time of day effects
+        # Time of day effects (their spawn modifiers are part of the compiled table)
         if time_of_day.value in biome_data.get('time_effects', {}):
             time_data = biome_data['time_effects'][time_of_day.value]
             time_desc = time_data.get('description', f"Time: {time_of_day.name.title()}")
-            
-            # Combine time-based spawn modifiers with weather modifiers
-            time_modifiers = time_data.get('spawn_modifiers', {})
-            for type_name, modifier in time_modifiers.items():
-                if type_name in spawn_modifiers:
-                    # Combine modifiers multiplicatively
-                    spawn_modifiers[type_name] *= modifier
-                else:
-                    spawn_modifiers[type_name] = modifier
         else:
             time_desc = f"Time: {time_of_day.name.title()}"
         
@@ -489,31 +435,20 @@ class CatchingCog(commands.Cog):
             await interaction.response.send_message(embed=embed)
             return
         
-        # Build choices list from spawn table with proper weights
-        choices = []
-        for rarity, names in spawn_table.items():
-            weight = RARITY_WEIGHTS.get(rarity.lower(), 1)
-            for name in names:
-                if name in self.veramon_data:
-                    veramon_types = self.veramon_data[name].get('type', [])
-                    
-                    # Apply type-based spawn modifiers from weather and time
-                    type_modifier = 1.0
-                    for vtype in veramon_types:
-                        if vtype in spawn_modifiers:
-                            type_modifier *= spawn_modifiers[vtype]
-                    
-                    adjusted_weight = weight * type_modifier
-                    choices.append((name, adjusted_weight))
+        # Pick from the compiled table for this area, weather and time of day
+        self.spawn_tables.update_sources(self.biomes, self.veramon_data, get_species_registry().refresh())
+        encounter_table = self.spawn_tables.encounter_table(
+            biome_key, area_id if special_area else None, current_weather, time_of_day.value
+        )
         
-        if not choices:
+        if not encounter_table:
             await interaction.response.send_message(
                 f"No creatures to spawn in {area_name}.",
                 ephemeral=True
             )
             return
             
-        chosen = weighted_choice(choices)
+        chosen = encounter_table.sample()
         data = self.veramon_data.get(chosen)
         
         if not data:
@@ -564,11 +499,9 @@ class CatchingCog(commands.Cog):
         embed.add_field(name='Flavor', value=data.get('flavor', ''), inline=False)
         
         # Get user's inventory for convenience
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT item_id, quantity FROM inventory WHERE user_id = ? AND quantity > 0", (str(user_id),))
-        inventory = cursor.fetchall()
-        conn.close()
+        inventory = await fetch_all(
+            "SELECT item_id, quantity FROM inventory WHERE user_id = ? AND quantity > 0", (str(user_id),)
+        )
         
         # Show inventory hint
         if inventory:
@@ -661,6 +594,7 @@ class CatchingCog(commands.Cog):
                 "INSERT INTO captures (user_id, veramon_name, caught_at, shiny, biome, active_form) VALUES (?, ?, ?, ?, ?, ?)" ,
                 (user_id, spawn['name'], datetime.utcnow().isoformat(), int(spawn['shiny']), spawn['biome'], None)
             )
+            capture_id = cursor.lastrowid
             
             # Grant XP to the user
             rarity = self.veramon_data[spawn['name']].get('rarity', 'common')
@@ -681,6 +615,7 @@ class CatchingCog(commands.Cog):
                 new_xp = xp_gain
                 
             conn.commit()
+            get_capture_index().add_capture(user_id, capture_id, spawn['name'], shiny=spawn['shiny'])
             
             result_msg = f"You caught {'✨ ' if spawn['shiny'] else ''}{spawn['name']}! 🎉"
             color = discord.Color.green()
@@ -748,6 +683,7 @@ class CatchingCog(commands.Cog):
         
         conn.commit()
         conn.close()
+        get_capture_index().update_capture(user_id, capture_id, nickname=nickname)
         
         if nickname:
             embed = discord.Embed(
@@ -1040,6 +976,7 @@ class CatchingCog(commands.Cog):
         
         conn.commit()
         conn.close()
+        get_capture_index().update_capture(user_id, capture_id, veramon_name=evolves_to)
         
         # Update quest progress for evolution
         quest_cog = self.bot.get_cog("QuestCog")
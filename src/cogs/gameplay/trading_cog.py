@@ -18,6 +18,7 @@ from src.db.db import get_connection
 from src.models.permissions import require_permission_level, PermissionLevel
 from src.utils.data_loader import load_all_veramon_data
 from src.core.security_integration import get_security_integration
+from src.utils.metrics_exporter import register_gauge, unregister_gauge
 
 class TradeView(discord.ui.View):
     """Interactive view for trade offers."""
@@ -74,6 +75,12 @@ class TradingCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.active_trade_views = {}
+        register_gauge("veramon_active_trades", "Trades with an open trade view",
+                       lambda: len(self.active_trade_views))
+        
+    def cog_unload(self):
+        """Stop exporting the active trades gauge."""
+        unregister_gauge("veramon_active_trades")
         
     @app_commands.command(name="trade_create", description="Create a new trade with another player")
     @app_commands.describe(
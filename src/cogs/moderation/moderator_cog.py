@@ -9,6 +9,7 @@ from typing import Dict, List, Optional, Union, Literal
 
 from src.db.db import get_connection
 from src.models.permissions import require_permission_level, PermissionLevel, is_mod
+from src.utils.user_resolver import get_user_resolver
 
 class ModeratorCog(commands.Cog):
     """
@@ -189,8 +190,9 @@ class ModeratorCog(commands.Cog):
         await interaction.response.send_message(embed=embed)
         
         # Try to notify both parties
-        initiator = await self.bot.fetch_user(int(trade['initiator_id']))
-        recipient = await self.bot.fetch_user(int(trade['recipient_id']))
+        users = await get_user_resolver(self.bot).fetch_many([trade['initiator_id'], trade['recipient_id']])
+        initiator = users.get(str(trade['initiator_id']))
+        recipient = users.get(str(trade['recipient_id']))
         
         if initiator:
             try:
@@ -352,7 +354,7 @@ class ModeratorCog(commands.Cog):
         
         # Try to DM the user
         try:
-            target_user = await self.bot.fetch_user(int(user_id))
+            target_user = (await get_user_resolver(self.bot).fetch_many([user_id])).get(str(user_id))
             if target_user:
                 user_embed = discord.Embed(
                     title="Warning Notice",
@@ -452,7 +454,7 @@ class ModeratorCog(commands.Cog):
         
         # Try to DM the user
         try:
-            target_user = await self.bot.fetch_user(int(user_id))
+            target_user = (await get_user_resolver(self.bot).fetch_many([user_id])).get(str(user_id))
             if target_user:
                 user_embed = discord.Embed(
                     title="You Have Been Muted",
@@ -537,7 +539,7 @@ class ModeratorCog(commands.Cog):
         
         # Try to DM the user
         try:
-            target_user = await self.bot.fetch_user(int(user_id))
+            target_user = (await get_user_resolver(self.bot).fetch_many([user_id])).get(str(user_id))
             if target_user:
                 user_embed = discord.Embed(
                     title="You Have Been Unmuted",
@@ -1,19 +1,49 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import sqlite3
-from typing import List, Optional, Dict, Literal
+import logging
+import itertools
+from typing import List, Optional, Dict, Literal, Tuple
 from datetime import datetime, timedelta
 
 from src.db.db import get_connection
+from src.db.async_db import run_with_connection, run_in_db_executor, run_write_async
 from src.models.permissions import require_permission_level, PermissionLevel
+from src.utils.leaderboard_index import get_leaderboard_index
+from src.utils.user_resolver import get_user_resolver
+
+logger = logging.getLogger('veramon.leaderboard')
+
+# Stats shown on /leaderboard and /mystats
+LEADERBOARD_STATS = ["battles_won", "total_catches", "total_trades", "tokens", "xp", "login_streak"]
 
 class LeaderboardCog(commands.Cog):
     """Cog for managing leaderboards and rankings in Veramon Reunited."""
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.leaderboard_index = get_leaderboard_index()
+        # Numbers stat writes in commit order, so rankings skip values older than one already applied
+        self._write_sequence = itertools.count(1)
+        self._applied_writes: Dict[Tuple[str, str], int] = {}
         self._initialize_leaderboard_db()
+        
+    async def cog_load(self):
+        """Start loading and periodically reconciling the in-memory rankings."""
+        self.reconcile_rankings.start()
+        
+    def cog_unload(self):
+        """Clean up when the cog is unloaded."""
+        self.reconcile_rankings.cancel()
+        
+    @tasks.loop(minutes=15)
+    async def reconcile_rankings(self):
+        """Reload the rankings from the database to correct any drift."""
+        try:
+            await run_in_db_executor(self.leaderboard_index.reconcile, LEADERBOARD_STATS)
+        except Exception as e:
+            logger.error(f"Error reconciling leaderboard rankings: {e}")
     
     def _initialize_leaderboard_db(self):
         """Initialize the leaderboard database tables if they don't exist."""
@@ -31,6 +61,12 @@ class LeaderboardCog(commands.Cog):
         )
         """)
         
+        # Rankings load one stat at a time, and timeframe leaderboards sort by value
+        cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_leaderboard_stats_stat
+        ON leaderboard_stats (stat_name, stat_value)
+        """)
+        
         # Create seasonal_rankings table for seasonal competitions
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS seasonal_rankings (
@@ -67,40 +103,40 @@ class LeaderboardCog(commands.Cog):
             stat_name: The name of the stat to update
             value: The value to add/set
             mode: "increment" to add to existing value, "set" to replace
+            
+        Returns:
+            The stat's new value
         """
-        conn = get_connection()
+        stat_value, sequence = await run_write_async(self._write_stat, user_id, stat_name, value, mode)
+        
+        # Rankings only change once the write is committed
+        key = (user_id, stat_name)
+        if sequence > self._applied_writes.get(key, 0):
+            self._applied_writes[key] = sequence
+            self.leaderboard_index.update(user_id, stat_name, stat_value)
+        return stat_value
+        
+    def _write_stat(self, conn, user_id: str, stat_name: str, value: int, mode: str) -> Tuple[int, int]:
+        """Write job that upserts a stat and returns its new value and write sequence number."""
         cursor = conn.cursor()
+        new_value = "stat_value + excluded.stat_value" if mode == "increment" else "excluded.stat_value"
+        
+        cursor.execute(f"""
+            INSERT INTO leaderboard_stats (user_id, stat_name, stat_value, last_updated)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id, stat_name) DO UPDATE SET
+            stat_value = {new_value},
+            last_updated = excluded.last_updated
+        """, (user_id, stat_name, value, datetime.now().isoformat()))
         
-        # Check if stat exists
         cursor.execute("""
             SELECT stat_value FROM leaderboard_stats
             WHERE user_id = ? AND stat_name = ?
         """, (user_id, stat_name))
+        stat_value = cursor.fetchone()[0]
         
-        existing = cursor.fetchone()
-        now = datetime.now().isoformat()
-        
-        if existing:
-            if mode == "increment":
-                new_value = existing[0] + value
-            else:
-                new_value = value
-                
-            cursor.execute("""
-                UPDATE leaderboard_stats
-                SET stat_value = ?, last_updated = ?
-                WHERE user_id = ? AND stat_name = ?
-            """, (new_value, now, user_id, stat_name))
-        else:
-            cursor.execute("""
-                INSERT INTO leaderboard_stats (user_id, stat_name, stat_value, last_updated)
-                VALUES (?, ?, ?, ?)
-            """, (user_id, stat_name, value, now))
-        
-        conn.commit()
-        conn.close()
-        
-        return value if mode == "set" else (existing[0] + value if existing else value)
+        # The upsert holds the write lock until commit, so this follows commit order
+        return stat_value, next(self._write_sequence)
     
     @app_commands.command(name="leaderboard", description="View the leaderboard for different categories")
     @app_commands.describe(category="The category to view leaderboard for", timeframe="Timeframe for the leaderboard")
@@ -139,26 +175,13 @@ class LeaderboardCog(commands.Cog):
             start_date = None
             title_timeframe = "All-time"
         
-        # Get leaderboard data from database
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT user_id, stat_value 
-            FROM leaderboard_stats
-            WHERE stat_name = ?
-        """
-        
-        params = [stat_name]
-        
+        # All-time rankings are kept in memory, timeframes filter by last update
         if start_date:
-            query += " AND last_updated >= ?"
-            params.append(start_date)
-            
-        query += " ORDER BY stat_value DESC LIMIT 10"
-        
-        cursor.execute(query, tuple(params))
-        leaderboard_rows = cursor.fetchall()
+            leaderboard_rows = await run_with_connection(
+                self._load_timeframe_rows, stat_name, start_date
+            )
+        else:
+            leaderboard_rows = await run_in_db_executor(self.leaderboard_index.top, stat_name, 10)
         
         # If there's no data for this specific timeframe/category, let the user know
         if not leaderboard_rows:
@@ -167,7 +190,6 @@ class LeaderboardCog(commands.Cog):
                 f"Be the first to get on this leaderboard!",
                 ephemeral=True
             )
-            conn.close()
             return
         
         # Create leaderboard embed
@@ -187,13 +209,10 @@ class LeaderboardCog(commands.Cog):
         }
         
         leaderboard_text = ""
+        names = await get_user_resolver(self.bot).resolve_many(user_id for user_id, _ in leaderboard_rows)
         
         for i, (user_id, stat_value) in enumerate(leaderboard_rows, 1):
-            try:
-                user = await self.bot.fetch_user(int(user_id))
-                display_name = user.display_name
-            except:
-                display_name = f"User {user_id[:6]}..."
+            display_name = names.get(user_id, f"User {user_id[:6]}...")
             
             # Format based on category
             if category == "tokens":
@@ -220,6 +239,17 @@ class LeaderboardCog(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
     
+    def _load_timeframe_rows(self, conn, stat_name: str, start_date: str):
+        """Load the top 10 users updated since a date. Runs on the database executor."""
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT user_id, stat_value 
+            FROM leaderboard_stats
+            WHERE stat_name = ? AND last_updated >= ?
+            ORDER BY stat_value DESC LIMIT 10
+        """, (stat_name, start_date))
+        return cursor.fetchall()
+    
     async def update_battlewins_stat(self, user_id: str, count: int = 1):
         """Update the battle wins statistic."""
         return await self.update_stat(user_id, "battles_won", count)
@@ -236,13 +266,8 @@ class LeaderboardCog(commands.Cog):
         """Update the login streak statistic."""
         return await self.update_stat(user_id, "login_streak", streak, mode="set")
         
-    @app_commands.command(name="mystats", description="View your personal stats and rankings")
-    @require_permission_level(PermissionLevel.USER)
-    async def mystats(self, interaction: discord.Interaction):
-        """View your personal stats and where you rank on the leaderboards."""
-        user_id = str(interaction.user.id)
-        
-        conn = get_connection()
+    def _load_stats_with_ranks(self, conn, user_id: str):
+        """Load a user's stats and their rank for each one. Runs on the database executor."""
         cursor = conn.cursor()
         
         # Get all stats for this user
@@ -254,23 +279,19 @@ class LeaderboardCog(commands.Cog):
         
         user_stats = cursor.fetchall()
         
-        # Get user's ranks for each stat
-        stats_with_ranks = []
+        # Rank is the count of users with a higher value + 1, from the in-memory rankings
+        return [
+            (stat_name, stat_value, self.leaderboard_index.rank(stat_name, stat_value))
+            for stat_name, stat_value in user_stats
+        ]
         
-        for stat_name, stat_value in user_stats:
-            # Get count of users with higher stat value
-            cursor.execute("""
-                SELECT COUNT(*) 
-                FROM leaderboard_stats
-                WHERE stat_name = ? AND stat_value > ?
-            """, (stat_name, stat_value))
-            
-            count = cursor.fetchone()[0]
-            rank = count + 1  # User's rank is count of users with higher value + 1
-            
-            stats_with_ranks.append((stat_name, stat_value, rank))
+    @app_commands.command(name="mystats", description="View your personal stats and rankings")
+    @require_permission_level(PermissionLevel.USER)
+    async def mystats(self, interaction: discord.Interaction):
+        """View your personal stats and where you rank on the leaderboards."""
+        user_id = str(interaction.user.id)
         
-        conn.close()
+        stats_with_ranks = await run_with_connection(self._load_stats_with_ranks, user_id)
         
         # Create user stats embed
         embed = discord.Embed(
@@ -8,11 +8,11 @@ to prevent exploits, duplication glitches, and spawn manipulation.
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any, Union
 import json
-import random
-import hashlib
 
 from src.db.db import get_connection
+from src.db.audit_writer import get_audit_writer
 from src.utils.config_manager import get_config
+from src.utils.rng import RNGService, get_rng_service
 from src.core.security_manager import get_security_manager
 
 
@@ -205,9 +205,9 @@ class CatchSecurity:
         Returns:
             str: Secure catch seed
         """
-        # Generate a deterministic but unpredictable seed
-        input_string = f"{user_id}:{spawn_id}:{timestamp}:{random.randint(1000, 9999)}"
-        return hashlib.sha256(input_string.encode()).hexdigest()[:16]
+        # Deterministic for a given master seed, unpredictable without it
+        seed = get_rng_service().seed_for("catch", f"{user_id}:{spawn_id}:{timestamp}")
+        return format(seed, "016x")
     
     @staticmethod
     def calculate_catch_rate(user_id: str, veramon_id: str, rarity: str, 
@@ -296,14 +296,15 @@ class CatchSecurity:
             bool: Whether the catch was successful
         """
         # Use the catch seed to deterministically decide success
-        # This prevents result manipulation by the client
-        random.seed(catch_seed)
-        roll = random.random()
+        # This prevents result manipulation by the client, and the roll is
+        # taken from its own generator so the global random state is untouched
+        roll = RNGService.from_seed(catch_seed).random()
         return roll <= catch_rate
     
     @staticmethod
     def log_catch_attempt(user_id: str, spawn_id: str, item_id: str, 
-                       success: bool, veramon_id: str, rarity: str) -> None:
+                       success: bool, veramon_id: str, rarity: str,
+                       catch_seed: Optional[str] = None) -> None:
         """
         Log a catch attempt for auditing.
         
@@ -314,27 +315,29 @@ class CatchSecurity:
             success: Whether the catch was successful
             veramon_id: ID of the Veramon
             rarity: Rarity of the Veramon
+            catch_seed: Seed the catch roll was made with, to replay it
         """
-        conn = get_connection()
-        cursor = conn.cursor()
+        get_audit_writer().log("""
+            INSERT INTO catch_attempts (
+                user_id, spawn_id, item_id, success, veramon_id, 
+                rarity, timestamp, catch_seed
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            user_id, spawn_id, item_id, 1 if success else 0,
+            veramon_id, rarity, datetime.utcnow().isoformat(), catch_seed
+        ))
         
-        try:
-            cursor.execute("""
-                INSERT INTO catch_attempts (
-                    user_id, spawn_id, item_id, success, veramon_id, 
-                    rarity, timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                user_id, spawn_id, item_id, 1 if success else 0,
-                veramon_id, rarity, datetime.utcnow().isoformat()
-            ))
-            
-            conn.commit()
-            
-            # Check for suspicious catch patterns
-            if success and rarity in ["legendary", "mythic"]:
-                security_manager = get_security_manager()
-                
+        # Check for suspicious catch patterns
+        if success and rarity in ["legendary", "mythic"]:
+            security_manager = get_security_manager()
+            
+            # Rare catches are counted from the table, so write pending rows first
+            get_audit_writer().flush()
+            
+            conn = get_connection()
+            cursor = conn.cursor()
+            
+            try:
                 # Count recent legendary/mythic catches
                 one_hour_ago = (datetime.utcnow() - timedelta(hours=1)).isoformat()
                 cursor.execute("""
@@ -345,18 +348,17 @@ class CatchSecurity:
                 """, (user_id, one_hour_ago))
                 
                 rare_catch_count = cursor.fetchone()[0]
+            finally:
+                conn.close()
                 
-                # Flag suspicious activity
-                if rare_catch_count >= 3:
-                    security_manager.log_security_alert(
-                        user_id=user_id,
-                        alert_type="unusual_catch_rate",
-                        severity="medium",
-                        details=f"Caught {rare_catch_count} legendary/mythic Veramon in the last hour"
-                    )
-                
-        finally:
-            conn.close()
+            # Flag suspicious activity
+            if rare_catch_count >= 3:
+                security_manager.log_security_alert(
+                    user_id=user_id,
+                    alert_type="unusual_catch_rate",
+                    severity="medium",
+                    details=f"Caught {rare_catch_count} legendary/mythic Veramon in the last hour"
+                )
 
 
 # Create the tables needed for catch security
@@ -376,10 +378,16 @@ def initialize_catch_security_tables():
                 veramon_id TEXT NOT NULL,
                 rarity TEXT NOT NULL,
                 success INTEGER NOT NULL,
-                timestamp TEXT NOT NULL
+                timestamp TEXT NOT NULL,
+                catch_seed TEXT
             )
         """)
         
+        # Older databases predate the catch seed column
+        cursor.execute("PRAGMA table_info(catch_attempts)")
+        if "catch_seed" not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE catch_attempts ADD COLUMN catch_seed TEXT")
+        
         # Create index for querying
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_catch_attempts_user_time
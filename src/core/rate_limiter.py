@@ -0,0 +1,227 @@
+"""
+Rate Limiter for Veramon Reunited
+
+This module provides an in-memory token bucket rate limiter keyed by user
+and action type. Checks are O(1) and never touch the database; bucket state
+can optionally be snapshotted to SQLite so limits survive restarts.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Any
+
+from src.db.db import get_connection, run_write
+
+# Set up logging
+logger = logging.getLogger("rate_limiter")
+
+# Bucket layout: [tokens, updated_at, denied, capacity, refill_rate]
+_TOKENS, _UPDATED, _DENIED, _CAPACITY, _RATE = range(5)
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter.
+
+    Each (user_id, action_type) pair gets a bucket holding up to max_actions
+    tokens that refills at max_actions per window. An action is allowed when
+    a whole token is available. Buckets are kept in least-recently-used order;
+    full buckets carry no state and are evicted by maintenance, and the
+    oldest bucket is dropped once max_entries is reached.
+    """
+
+    def __init__(self, max_entries: int = 100000, snapshot_interval: float = 0,
+                 maintenance_interval: float = 60.0):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            max_entries: Maximum number of buckets kept in memory
+            snapshot_interval: Seconds between SQLite snapshots (0 disables them)
+            maintenance_interval: Seconds between idle bucket evictions
+        """
+        self.max_entries = max_entries
+        self.snapshot_interval = snapshot_interval
+        self.maintenance_interval = maintenance_interval
+        self._buckets: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_snapshot = time.time()
+        self.stats = {
+            "checks": 0,
+            "denied": 0,
+            "evicted": 0,
+            "snapshots": 0
+        }
+
+        if self.snapshot_interval:
+            self.restore_snapshot()
+
+        if self.maintenance_interval:
+            self.maintenance_thread = threading.Thread(
+                target=self._maintenance_loop,
+                name="veramon-rate-limiter",
+                daemon=True
+            )
+            self.maintenance_thread.start()
+
+    def check(self, user_id: str, action_type: str, max_actions: int,
+              time_window_seconds: float) -> Tuple[bool, int]:
+        """
+        Consume a token for an action if one is available.
+
+        Args:
+            user_id: Discord ID of the user
+            action_type: Name of the action
+            max_actions: Maximum actions allowed per window
+            time_window_seconds: Window length in seconds
+
+        Returns:
+            Tuple of (allowed, consecutive denied attempts)
+        """
+        key = (user_id, action_type)
+        now = time.time()
+        capacity = float(max_actions)
+        rate = capacity / time_window_seconds if time_window_seconds > 0 else float("inf")
+
+        with self._lock:
+            self.stats["checks"] += 1
+            bucket = self._buckets.get(key)
+
+            if bucket is None:
+                bucket = [capacity, now, 0, capacity, rate]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_entries:
+                    self._buckets.popitem(last=False)
+                    self.stats["evicted"] += 1
+            else:
+                self._buckets.move_to_end(key)
+                # Limits may change between calls; the latest caller wins
+                bucket[_CAPACITY] = capacity
+                bucket[_RATE] = rate
+                bucket[_TOKENS] = min(capacity, bucket[_TOKENS] + (now - bucket[_UPDATED]) * rate)
+                bucket[_UPDATED] = now
+
+            if bucket[_TOKENS] >= 1:
+                bucket[_TOKENS] -= 1
+                bucket[_DENIED] = 0
+                return True, 0
+
+            bucket[_DENIED] += 1
+            self.stats["denied"] += 1
+            return False, int(bucket[_DENIED])
+
+    def reset(self, user_id: str, action_type: Optional[str] = None) -> None:
+        """
+        Clear the buckets of a user.
+
+        Args:
+            user_id: Discord ID of the user
+            action_type: Only clear this action (all actions if None)
+        """
+        with self._lock:
+            if action_type is not None:
+                self._buckets.pop((user_id, action_type), None)
+                return
+
+            for key in [key for key in self._buckets if key[0] == user_id]:
+                del self._buckets[key]
+
+    def evict_idle(self) -> int:
+        """
+        Drop buckets that have refilled completely.
+
+        Returns:
+            Number of buckets evicted
+        """
+        now = time.time()
+
+        with self._lock:
+            idle = [
+                key for key, bucket in self._buckets.items()
+                if bucket[_TOKENS] + (now - bucket[_UPDATED]) * bucket[_RATE] >= bucket[_CAPACITY]
+            ]
+            for key in idle:
+                del self._buckets[key]
+            self.stats["evicted"] += len(idle)
+
+        return len(idle)
+
+    def snapshot(self) -> int:
+        """
+        Save the state of all non-idle buckets to SQLite.
+
+        Returns:
+            Number of buckets saved
+        """
+        self.evict_idle()
+
+        with self._lock:
+            rows = [
+                (user_id, action_type, bucket[_TOKENS], bucket[_CAPACITY],
+                 bucket[_RATE], int(bucket[_DENIED]), bucket[_UPDATED])
+                for (user_id, action_type), bucket in self._buckets.items()
+            ]
+
+        run_write(self._write_snapshot, rows)
+        self._last_snapshot = time.time()
+        self.stats["snapshots"] += 1
+        return len(rows)
+
+    def _write_snapshot(self, conn, rows: List[Tuple]) -> None:
+        """Write job that replaces the stored snapshot."""
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM rate_limit_state")
+        cursor.executemany("""
+        INSERT INTO rate_limit_state
+            (user_id, action_type, tokens, capacity, refill_rate, denied, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+    def restore_snapshot(self) -> int:
+        """
+        Load bucket state saved by snapshot().
+
+        Returns:
+            Number of buckets restored
+        """
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+            SELECT user_id, action_type, tokens, capacity, refill_rate, denied, updated_at
+            FROM rate_limit_state
+            ORDER BY updated_at
+            """)
+            rows = cursor.fetchall()
+        except Exception as e:
+            logger.warning(f"Could not restore rate limit snapshot: {e}")
+            return 0
+        finally:
+            conn.close()
+
+        with self._lock:
+            for user_id, action_type, tokens, capacity, rate, denied, updated_at in rows:
+                self._buckets[(user_id, action_type)] = [tokens, updated_at, denied, capacity, rate]
+
+        # Buckets that refilled while the bot was offline are not needed
+        self.evict_idle()
+        return len(self._buckets)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get rate limiter statistics."""
+        with self._lock:
+            return {**self.stats, "buckets": len(self._buckets)}
+
+    def _maintenance_loop(self) -> None:
+        """Background thread that evicts idle buckets and takes snapshots."""
+        while True:
+            time.sleep(self.maintenance_interval)
+            try:
+                if self.snapshot_interval and time.time() - self._last_snapshot >= self.snapshot_interval:
+                    self.snapshot()
+                else:
+                    self.evict_idle()
+            except Exception as e:
+                logger.error(f"Error in rate limiter maintenance: {e}")
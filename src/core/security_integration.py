@@ -94,7 +94,8 @@ class SecurityIntegration:
                 item_id, 
                 success, 
                 result["veramon_id"], 
-                result["rarity"]
+                result["rarity"],
+                catch_seed
             )
             
             # Add catch results to the validation result
@@ -15,6 +15,8 @@ from enum import Enum, auto
 from typing import Dict, List, Optional, Tuple, Any, Union
 
 from src.db.db import get_connection
+from src.db.audit_writer import get_audit_writer
+from src.core.rate_limiter import RateLimiter
 from src.utils.config_manager import get_config
 
 
@@ -56,6 +58,10 @@ class SecurityManager:
     def __init__(self):
         """Initialize the security manager and ensure DB tables exist."""
         self._initialize_database()
+        self.rate_limiter = RateLimiter(
+            max_entries=get_config("security", "rate_limit_max_entries", 100000),
+            snapshot_interval=get_config("security", "rate_limit_snapshot_interval", 0)
+        )
         
     def _initialize_database(self):
         """Set up required security database tables."""
@@ -75,6 +81,20 @@ class SecurityManager:
             )
             """)
             
+            # Snapshot of in-memory rate limiter buckets
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limit_state (
+                user_id TEXT NOT NULL,
+                action_type TEXT NOT NULL,
+                tokens REAL NOT NULL,
+                capacity REAL NOT NULL,
+                refill_rate REAL NOT NULL,
+                denied INTEGER DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (user_id, action_type)
+            )
+            """)
+            
             # Transaction log for audit trail
             cursor.execute("""
             CREATE TABLE IF NOT EXISTS transaction_log (
@@ -122,66 +142,31 @@ class SecurityManager:
         if isinstance(action_type, ActionType):
             action_type = action_type.name
             
-        conn = get_connection()
-        cursor = conn.cursor()
+        allowed, denied = self.rate_limiter.check(user_id, action_type, max_actions, time_window_seconds)
         
-        try:
-            current_time = datetime.utcnow()
-            time_window_start = (current_time - timedelta(seconds=time_window_seconds)).isoformat()
-            
-            # Get current usage
-            cursor.execute("""
-            SELECT count, first_action_time, last_action_time 
-            FROM rate_limits
-            WHERE user_id = ? AND action_type = ?
-            """, (user_id, action_type))
-            
-            result = cursor.fetchone()
-            
-            if not result:
-                # First action, create new record
-                cursor.execute("""
-                INSERT INTO rate_limits (user_id, action_type, count, first_action_time, last_action_time)
-                VALUES (?, ?, 1, ?, ?)
-                """, (user_id, action_type, current_time.isoformat(), current_time.isoformat()))
-                conn.commit()
-                return True
-                
-            count, first_action_time, last_action_time = result
+        # Log potential abuse once a user keeps trying after hitting the limit
+        if denied == 4:
+            self.log_security_alert(
+                user_id=user_id,
+                alert_type="rate_limit_abuse",
+                severity="medium",
+                details=f"Attempted {action_type} {denied} times after hitting rate limit"
+            )
             
-            # Reset counter if window has passed
-            if first_action_time < time_window_start:
-                cursor.execute("""
-                UPDATE rate_limits
-                SET count = 1, first_action_time = ?, last_action_time = ?
-                WHERE user_id = ? AND action_type = ?
-                """, (current_time.isoformat(), current_time.isoformat(), user_id, action_type))
-                conn.commit()
-                return True
-                
-            # Check if limit exceeded
-            if count >= max_actions:
-                # Log potential abuse attempt
-                if count > max_actions + 3:  # Multiple attempts after hitting limit
-                    self.log_security_alert(
-                        user_id=user_id,
-                        alert_type="rate_limit_abuse",
-                        severity="medium",
-                        details=f"Attempted {action_type} {count - max_actions} times after hitting rate limit"
-                    )
-                return False
-                
-            # Increment count
-            cursor.execute("""
-            UPDATE rate_limits
-            SET count = count + 1, last_action_time = ?
-            WHERE user_id = ? AND action_type = ?
-            """, (current_time.isoformat(), user_id, action_type))
-            conn.commit()
-            return True
+        return allowed
+        
+    def reset_rate_limits(self, user_id: str, action_type: Union[ActionType, str, None] = None) -> None:
+        """
+        Clear rate limits for a user.
+        
+        Args:
+            user_id: Discord ID of the user
+            action_type: Only clear this action (all actions if None)
+        """
+        if isinstance(action_type, ActionType):
+            action_type = action_type.name
             
-        finally:
-            conn.close()
+        self.rate_limiter.reset(user_id, action_type)
             
     def log_transaction(self, user_id: str, action_type: Union[ActionType, str], 
                        details: Dict[str, Any], ip_address: Optional[str] = None,
@@ -199,21 +184,14 @@ class SecurityManager:
         if isinstance(action_type, ActionType):
             action_type = action_type.name
             
-        conn = get_connection()
-        cursor = conn.cursor()
+        details_json = json.dumps(details)
+        current_time = datetime.utcnow().isoformat()
         
-        try:
-            details_json = json.dumps(details)
-            current_time = datetime.utcnow().isoformat()
-            
-            cursor.execute("""
-            INSERT INTO transaction_log (user_id, action_type, details, timestamp, ip_address, client_version)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """, (user_id, action_type, details_json, current_time, ip_address, client_version))
-            
-            conn.commit()
-        finally:
-            conn.close()
+        # Written in the background with the rest of the audit batch
+        get_audit_writer().log("""
+        INSERT INTO transaction_log (user_id, action_type, details, timestamp, ip_address, client_version)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, action_type, details_json, current_time, ip_address, client_version))
             
     def log_security_alert(self, user_id: str, alert_type: str, 
                          severity: str, details: str):
@@ -226,20 +204,12 @@ class SecurityManager:
             severity: Severity level (low, medium, high, critical)
             details: Details about the alert
         """
-        conn = get_connection()
-        cursor = conn.cursor()
+        current_time = datetime.utcnow().isoformat()
         
-        try:
-            current_time = datetime.utcnow().isoformat()
-            
-            cursor.execute("""
-            INSERT INTO security_alerts (user_id, alert_type, severity, details, timestamp)
-            VALUES (?, ?, ?, ?, ?)
-            """, (user_id, alert_type, severity, details, current_time))
-            
-            conn.commit()
-        finally:
-            conn.close()
+        get_audit_writer().log("""
+        INSERT INTO security_alerts (user_id, alert_type, severity, details, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+        """, (user_id, alert_type, severity, details, current_time))
             
     def validate_transaction(self, user_id: str, item_type: str, 
                            item_id: Any, action: str) -> bool:
@@ -338,6 +308,9 @@ class SecurityManager:
         Returns:
             bool: True if suspicious activity detected, False otherwise
         """
+        # Make sure recently logged transactions are visible to the checks below
+        get_audit_writer().flush()
+        
         conn = get_connection()
         cursor = conn.cursor()
         
@@ -11,8 +11,10 @@ import json
 import hashlib
 
 from src.db.db import get_connection
+from src.db.audit_writer import get_audit_writer
 from src.utils.config_manager import get_config
 from src.core.security_manager import get_security_manager, ActionType
+from src.utils.name_index import get_capture_index
 
 
 class TradeSecurity:
@@ -547,7 +549,7 @@ class TradeSecurity:
             ]
             
             # Log in trade history
-            cursor.execute("""
+            get_audit_writer().log("""
                 INSERT INTO trade_history (
                     trade_id, user_a_id, user_b_id,
                     user_a_items, user_b_items,
@@ -562,8 +564,6 @@ class TradeSecurity:
                 datetime.utcnow().isoformat()
             ))
             
-            conn.commit()
-            
             # Monitor potential suspicious activity
             security_manager = get_security_manager()
             
@@ -643,6 +643,7 @@ class TradeSecurity:
                 """, (trade_id,))
                 
                 items = cursor.fetchall()
+                transferred = []
                 
                 # Process transfers
                 for user_id, item_type, item_id in items:
@@ -671,6 +672,8 @@ class TradeSecurity:
                             WHERE capture_id = ?
                         """, (item_id,))
                         
+                        transferred.append((item_id, user_id, recipient_id))
+                        
                     elif item_type == 'item':
                         # Remove from sender inventory
                         cursor.execute("""
@@ -696,6 +699,11 @@ class TradeSecurity:
                 
                 cursor.execute("COMMIT")
                 
+                # Move traded Veramon between the owners' autocomplete indexes
+                capture_index = get_capture_index()
+                for item_id, from_user_id, to_user_id in transferred:
+                    capture_index.transfer_capture(item_id, from_user_id, to_user_id)
+                
                 # Log trade completion for auditing
                 TradeSecurity.log_trade_completion(trade_id)
                 
@@ -0,0 +1,201 @@
+"""
+Async Database Access for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+This module lets cogs await database work instead of running sqlite3 queries
+directly on the discord.py event loop. Queries run on a dedicated thread pool
+whose size matches the connection pool in src.db.db, so every worker thread can
+always check out a pooled connection and the pool limits stay the same.
+
+Usage:
+    row = await fetch_one("SELECT tokens FROM users WHERE user_id = ?", (user_id,))
+
+    def _load(conn, user_id):
+        cursor = conn.cursor()
+        ...
+        return result
+
+    result = await run_with_connection(_load, user_id)
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, List, Optional, Tuple, TypeVar
+
+from src.db import db
+from src.db.db import get_connection, run_write, PooledConnection
+
+# Set up logging
+logger = logging.getLogger("async_db")
+
+T = TypeVar("T")
+
+# Dedicated executor for database work
+_db_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool used for database work, creating it if needed.
+
+    Returns:
+        The shared database ThreadPoolExecutor
+    """
+    global _db_executor
+
+    with _executor_lock:
+        if _db_executor is None:
+            _db_executor = ThreadPoolExecutor(
+                max_workers=db.MAX_CONNECTIONS,
+                thread_name_prefix="veramon-db"
+            )
+        return _db_executor
+
+def shutdown_db_executor(wait: bool = True) -> None:
+    """
+    Shut down the database executor.
+
+    Args:
+        wait: Whether to wait for queued database work to finish
+    """
+    global _db_executor
+
+    with _executor_lock:
+        if _db_executor is not None:
+            _db_executor.shutdown(wait=wait)
+            _db_executor = None
+            logger.info("Database executor shut down")
+
+async def run_in_db_executor(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a blocking callable on the database executor.
+
+    Args:
+        func: Callable to run
+        *args: Positional arguments for the callable
+        **kwargs: Keyword arguments for the callable
+
+    Returns:
+        The callable's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), partial(func, *args, **kwargs))
+
+def _call_with_connection(func: Callable[..., T], *args, **kwargs) -> T:
+    """Check out a pooled connection, call func with it and return it to the pool."""
+    conn = get_connection()
+    try:
+        return func(conn, *args, **kwargs)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+async def run_with_connection(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a function that takes a pooled connection on the database executor.
+
+    The function receives the connection as its first argument. The connection
+    is returned to the pool afterwards and rolled back if the function raises,
+    so callers only need to commit their own writes.
+
+    Args:
+        func: Callable taking (conn, *args, **kwargs)
+        *args: Extra positional arguments
+        **kwargs: Extra keyword arguments
+
+    Returns:
+        The function's return value
+    """
+    return await run_in_db_executor(_call_with_connection, func, *args, **kwargs)
+
+async def run_write_async(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a write job without blocking the event loop.
+
+    The job receives a connection as its first argument and is committed by
+    db.run_write, which routes it through the single writer connection when
+    the active connection profile uses one.
+
+    Args:
+        func: Callable taking (conn, *args, **kwargs)
+        *args: Extra positional arguments
+        **kwargs: Extra keyword arguments
+
+    Returns:
+        The job's return value
+    """
+    return await run_in_db_executor(run_write, func, *args, **kwargs)
+
+def _fetch(conn: PooledConnection, query: str, params: Tuple, fetch: str) -> Any:
+    """Run a read query on a connection."""
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    if fetch == "one":
+        return cursor.fetchone()
+    return cursor.fetchall()
+
+def _execute(conn: PooledConnection, query: str, params: Tuple, many: bool) -> int:
+    """Write job that runs a statement once or for each parameter tuple."""
+    cursor = conn.cursor()
+    if many:
+        cursor.executemany(query, params)
+    else:
+        cursor.execute(query, params)
+    return cursor.rowcount
+
+async def fetch_one(query: str, params: Tuple = ()) -> Any:
+    """
+    Fetch a single row without blocking the event loop.
+
+    Args:
+        query: SQL query to execute
+        params: Query parameters
+
+    Returns:
+        The first result row or None
+    """
+    return await run_with_connection(_fetch, query, params, "one")
+
+async def fetch_all(query: str, params: Tuple = ()) -> List[Any]:
+    """
+    Fetch all rows without blocking the event loop.
+
+    Args:
+        query: SQL query to execute
+        params: Query parameters
+
+    Returns:
+        List of result rows
+    """
+    return await run_with_connection(_fetch, query, params, "all")
+
+async def execute(query: str, params: Tuple = ()) -> int:
+    """
+    Execute and commit a write query without blocking the event loop.
+
+    Args:
+        query: SQL statement to execute
+        params: Statement parameters
+
+    Returns:
+        Number of rows affected
+    """
+    return await run_write_async(_execute, query, params, False)
+
+async def execute_many(query: str, params_seq: Iterable[Tuple]) -> int:
+    """
+    Execute and commit a statement for each parameter tuple in one transaction.
+
+    Args:
+        query: SQL statement to execute
+        params_seq: Iterable of parameter tuples
+
+    Returns:
+        Number of rows affected
+    """
+    return await run_write_async(_execute, query, list(params_seq), True)
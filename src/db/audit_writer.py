@@ -0,0 +1,212 @@
+"""
+Audit Log Writer for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+Audit records (transaction log, security alerts, catch attempts and trade
+history) are write-only from the command path's point of view. This module
+queues them and writes them from a background thread, so commands no longer
+pay for an INSERT and a commit per record.
+
+Queued rows are flushed with executemany in a single transaction once
+batch_size rows are waiting or flush_interval has passed. The queue is
+bounded: when it is full the caller writes its own row synchronously, which
+slows producers down instead of dropping records.
+"""
+
+import time
+import logging
+import threading
+from queue import Queue, Empty, Full
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.db.db import run_write
+from src.utils.config_manager import get_config
+
+# Set up logging
+logger = logging.getLogger("audit_writer")
+
+# Marks the end of the queue when stopping the writer
+_STOP = object()
+
+
+class AuditLogWriter:
+    """
+    Buffers audit INSERTs and writes them in batches on a background thread.
+    """
+
+    def __init__(self, flush_interval: float = 0.25, batch_size: int = 500,
+                 max_queue_size: int = 10000):
+        """
+        Initialize the audit log writer.
+
+        Args:
+            flush_interval: Maximum seconds a row waits before being written
+            batch_size: Number of waiting rows that triggers a flush
+            max_queue_size: Maximum number of queued rows
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue: Queue = Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "rows_written": 0,
+            "batches": 0,
+            "sync_writes": 0,
+            "failed_rows": 0,
+            "max_queue_depth": 0
+        }
+
+    def start(self) -> None:
+        """Start the background writer thread if it is not running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="veramon-audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Write everything still queued and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            if not thread:
+                return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+
+    def log(self, query: str, params: Tuple) -> None:
+        """
+        Queue an audit INSERT.
+
+        Args:
+            query: INSERT statement
+            params: Statement parameters
+        """
+        self.start()
+
+        try:
+            self._queue.put_nowait((query, params))
+        except Full:
+            # Backpressure: the caller writes its own row while the queue drains
+            self.stats["sync_writes"] += 1
+            run_write(self._write_rows, [(query, params)])
+            return
+
+        depth = self._queue.qsize()
+        if depth > self.stats["max_queue_depth"]:
+            self.stats["max_queue_depth"] = depth
+
+    def flush(self) -> None:
+        """
+        Block until every row queued so far has been written.
+
+        The writer is woken to write them at once instead of waiting for
+        the flush interval, so a flush costs one batch write.
+        """
+        if self._thread and self._thread.is_alive():
+            written = threading.Event()
+            self._queue.put(written)
+            written.wait()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get audit writer statistics."""
+        return {
+            **self.stats,
+            "queued": self._queue.qsize(),
+            "avg_batch": self.stats["rows_written"] / self.stats["batches"] if self.stats["batches"] else 0
+        }
+
+    def _run(self) -> None:
+        """Writer thread main loop."""
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+            if isinstance(item, threading.Event):
+                # Flush request with nothing queued before it
+                item.set()
+                self._queue.task_done()
+                continue
+
+            # Collect rows until the batch is full or the oldest row is due
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop_after_batch = False
+            flushed: Optional[threading.Event] = None
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stop_after_batch = True
+                    break
+                if isinstance(item, threading.Event):
+                    # Everything queued before the flush request is in this batch
+                    flushed = item
+                    break
+                batch.append(item)
+
+            self._write_batch(batch)
+            for _ in batch:
+                self._queue.task_done()
+            if flushed is not None:
+                flushed.set()
+                self._queue.task_done()
+
+            if stop_after_batch:
+                break
+
+    def _write_batch(self, batch: List[Tuple[str, Tuple]]) -> None:
+        """Write a batch of rows in one transaction."""
+        try:
+            run_write(self._write_rows, batch)
+            self.stats["rows_written"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} audit rows: {e}")
+            self.stats["failed_rows"] += len(batch)
+
+    def _write_rows(self, conn, rows: List[Tuple[str, Tuple]]) -> None:
+        """Write job that inserts rows with one executemany per statement."""
+        grouped: Dict[str, List[Tuple]] = {}
+        for query, params in rows:
+            grouped.setdefault(query, []).append(params)
+
+        cursor = conn.cursor()
+        for query, params_seq in grouped.items():
+            cursor.executemany(query, params_seq)
+
+
+# Global instance
+_audit_writer = None
+
+def get_audit_writer() -> AuditLogWriter:
+    """
+    Get the global audit log writer instance.
+
+    Returns:
+        The global AuditLogWriter instance
+    """
+    global _audit_writer
+    if _audit_writer is None:
+        _audit_writer = AuditLogWriter(
+            flush_interval=get_config("security", "audit_flush_interval_ms", 250) / 1000,
+            batch_size=get_config("security", "audit_batch_size", 500),
+            max_queue_size=get_config("security", "audit_queue_size", 10000)
+        )
+    return _audit_writer
+
+def shutdown_audit_writer() -> None:
+    """Flush queued audit rows and stop the writer thread."""
+    global _audit_writer
+    if _audit_writer is not None:
+        _audit_writer.stop()
+        _audit_writer = None
+        logger.info("Audit log writer shut down")
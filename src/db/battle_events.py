@@ -0,0 +1,419 @@
+"""
+Battle Event Log for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+Battle actors used to persist their whole state, including every Veramon and
+the ever-growing battle log, as one JSON blob on every save. This module
+stores each save as a small delta against the previous one in an append-only
+table instead. Every snapshot_interval events, the full state is written as a
+compact snapshot and the events it covers are deleted. Loading a battle reads
+its snapshot and replays the events after it.
+"""
+
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from enum import Enum
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.db.db import get_connection, run_write
+from src.db.async_db import run_in_db_executor
+from src.utils.config_manager import get_config
+
+# Set up logging
+logger = logging.getLogger("battle_events")
+
+
+def _json_default(value: Any) -> Any:
+    """Encode the enums and Veramon objects that battle state holds."""
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def encode_state(state: Dict[str, Any]) -> str:
+    """
+    Encode a state as JSON the way the event log compares and stores it.
+
+    Encoding is also a cheap private copy: the live battle can keep
+    changing while the encoded state is decoded and diffed elsewhere.
+    """
+    return json.dumps(state, default=_json_default)
+
+
+def diff_state(old: Any, new: Any, path: Optional[List[Any]] = None) -> List[List[Any]]:
+    """
+    Compute the operations that turn one JSON value into another.
+
+    Operations are ["s", path, value] to set a key or index, ["d", path] to
+    delete a key and ["a", path, items] to extend a list. Lists that only
+    grew are extended, and lists of the same length that changed in a few
+    places are patched per index, so a growing battle log or a team whose
+    Veramon took damage produce small deltas.
+
+    Args:
+        old: Previous value
+        new: Current value
+        path: Keys and indexes leading to the values
+
+    Returns:
+        List of operations, empty if the values are equal
+    """
+    path = path or []
+    ops: List[List[Any]] = []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            if key not in old:
+                ops.append(["s", path + [key], value])
+            elif old[key] != value:
+                ops.extend(diff_state(old[key], value, path + [key]))
+        for key in old:
+            if key not in new:
+                ops.append(["d", path + [key]])
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        size = len(old)
+        if len(new) >= size and new[:size] == old:
+            if len(new) > size:
+                ops.append(["a", path, new[size:]])
+            return ops
+        if len(new) == size:
+            changed = [i for i in range(size) if old[i] != new[i]]
+            if len(changed) * 2 <= size:
+                for i in changed:
+                    ops.extend(diff_state(old[i], new[i], path + [i]))
+                return ops
+
+    if old != new:
+        ops.append(["s", path, new])
+    return ops
+
+
+def apply_delta(state: Any, ops: List[List[Any]]) -> Any:
+    """
+    Apply operations from diff_state to a JSON value.
+
+    Args:
+        state: Value to change in place
+        ops: Operations to apply
+
+    Returns:
+        The changed value (a new object if the root itself was replaced)
+    """
+    for op in ops:
+        kind, path = op[0], op[1]
+        if not path:
+            if kind == "s":
+                state = op[2]
+            elif kind == "a":
+                state.extend(op[2])
+            continue
+
+        parent = state
+        for key in path[:-1]:
+            parent = parent[key]
+        key = path[-1]
+
+        if kind == "s":
+            parent[key] = op[2]
+        elif kind == "d":
+            del parent[key]
+        elif kind == "a":
+            parent[key].extend(op[2])
+    return state
+
+
+class BattleEventLog:
+    """
+    Append-only, snapshotted persistence for battle state.
+
+    Each stream (one per battle actor) keeps its last saved state in memory
+    so the next save can be stored as a delta. A stream without that state,
+    e.g. a new battle or one saved for the first time since a restart that
+    did not load it, starts with a snapshot.
+
+    Saves of one stream are ordered by that stream's lock. Saves of
+    different streams write concurrently, so the write queue can commit
+    them together.
+    """
+
+    def __init__(self, snapshot_interval: int = 20):
+        """
+        Initialize the event log.
+
+        Args:
+            snapshot_interval: Number of events after which a snapshot is written
+        """
+        self.snapshot_interval = max(1, snapshot_interval)
+        self._streams: Dict[str, Dict[str, Any]] = {}
+        # stream_id -> [lock, number of threads holding or waiting for it]
+        self._stream_locks: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "events": 0,
+            "snapshots": 0,
+            "bytes_written": 0,
+            "loads": 0
+        }
+
+    @staticmethod
+    def _create_tables(cursor) -> None:
+        """
+        Create the event and snapshot tables if they don't exist.
+
+        Every stream starts with a snapshot or a load, so this only runs on
+        those and not on every appended event.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS battle_events (
+                stream_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                event_type TEXT NOT NULL,
+                delta TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (stream_id, seq)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS battle_snapshots (
+                stream_id TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+
+    @contextmanager
+    def _stream_lock(self, stream_id: str) -> Iterator[None]:
+        """
+        Hold the lock that orders the saves of a stream.
+
+        A stream's lock is dropped once no thread holds or waits for it, so
+        finished battles leave nothing behind and no two threads ever use
+        different locks for one stream.
+        """
+        with self._lock:
+            entry = self._stream_locks.get(stream_id)
+            if entry is None:
+                entry = self._stream_locks[stream_id] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._stream_locks[stream_id]
+
+    def append(self, stream_id: str, state: Dict[str, Any], event_type: str = "update") -> bool:
+        """
+        Save a stream's current state.
+
+        Args:
+            stream_id: ID of the stream, e.g. the battle actor ID
+            state: JSON-serializable current state
+            event_type: What caused the change, stored with the event
+
+        Returns:
+            bool: Whether anything was written
+        """
+        return self.append_encoded(stream_id, encode_state(state), event_type)
+
+    def append_encoded(self, stream_id: str, encoded: str, event_type: str = "update") -> bool:
+        """
+        Save a stream's current state, given as JSON from encode_state.
+
+        Args:
+            stream_id: ID of the stream, e.g. the battle actor ID
+            encoded: Current state encoded with encode_state
+            event_type: What caused the change, stored with the event
+
+        Returns:
+            bool: Whether anything was written
+        """
+        # Work on a JSON-normalized copy, so later changes to the live state
+        # don't leak into the baseline and keys compare as they are stored
+        current = json.loads(encoded)
+
+        with self._stream_lock(stream_id):
+            with self._lock:
+                stream = self._streams.get(stream_id)
+            if stream is None:
+                self._write_snapshot(stream_id, current, 0)
+                return True
+
+            ops = diff_state(stream["state"], current)
+            if not ops:
+                return False
+
+            seq = stream["seq"] + 1
+            if stream["events"] + 1 >= self.snapshot_interval:
+                self._write_snapshot(stream_id, current, seq)
+                return True
+
+            delta = json.dumps(ops, separators=(",", ":"))
+            run_write(self._insert_event, stream_id, seq, event_type, delta)
+
+            # The baseline only moves once the event is committed
+            with self._lock:
+                stream["state"] = current
+                stream["seq"] = seq
+                stream["events"] += 1
+                self.stats["events"] += 1
+                self.stats["bytes_written"] += len(delta)
+            return True
+
+    async def append_async(self, stream_id: str, encoded: str, event_type: str = "update") -> bool:
+        """
+        Save a stream's current state without blocking the event loop.
+
+        Callers encode the state with encode_state on the loop, where it is
+        changed; decoding, diffing and the write run on the database
+        executor. Saves of one stream must not overlap, as they are applied
+        in the order they reach the executor.
+
+        Args:
+            stream_id: ID of the stream, e.g. the battle actor ID
+            encoded: Current state encoded with encode_state
+            event_type: What caused the change, stored with the event
+
+        Returns:
+            bool: Whether anything was written
+        """
+        return await run_in_db_executor(self.append_encoded, stream_id, encoded, event_type)
+
+    @staticmethod
+    def _insert_event(conn, stream_id: str, seq: int, event_type: str, delta: str) -> None:
+        """Write job that appends one event."""
+        conn.cursor().execute("""
+            INSERT INTO battle_events (stream_id, seq, event_type, delta, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (stream_id, seq, event_type, delta, datetime.utcnow().isoformat()))
+
+    def _write_snapshot(self, stream_id: str, state: Dict[str, Any], seq: int) -> None:
+        """
+        Replace a stream's snapshot and drop the events it covers.
+
+        Callers hold the stream's lock; the baseline is replaced once the
+        snapshot is committed.
+        """
+        encoded = json.dumps(state, separators=(",", ":"))
+
+        def write(conn):
+            cursor = conn.cursor()
+            self._create_tables(cursor)
+            cursor.execute("""
+                INSERT INTO battle_snapshots (stream_id, seq, state, created_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(stream_id) DO UPDATE SET
+                seq = excluded.seq,
+                state = excluded.state,
+                created_at = excluded.created_at
+            """, (stream_id, seq, encoded, datetime.utcnow().isoformat()))
+            cursor.execute("DELETE FROM battle_events WHERE stream_id = ?", (stream_id,))
+
+        run_write(write)
+        with self._lock:
+            self._streams[stream_id] = {"state": state, "seq": seq, "events": 0}
+            self.stats["snapshots"] += 1
+            self.stats["bytes_written"] += len(encoded)
+
+    def load(self, stream_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild a stream's state from its snapshot and the events after it.
+
+        Args:
+            stream_id: ID of the stream
+
+        Returns:
+            The saved state, or None if the stream has never been saved
+        """
+        with self._stream_lock(stream_id):
+            return self._load(stream_id)
+
+    def _load(self, stream_id: str) -> Optional[Dict[str, Any]]:
+        """Rebuild a stream's state while holding the stream's lock."""
+        run_write(lambda conn: self._create_tables(conn.cursor()))
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT seq, state FROM battle_snapshots WHERE stream_id = ?
+            """, (stream_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+
+            seq, encoded = row
+            cursor.execute("""
+                SELECT seq, delta FROM battle_events
+                WHERE stream_id = ? AND seq > ?
+                ORDER BY seq
+            """, (stream_id, seq))
+            events = cursor.fetchall()
+        finally:
+            conn.close()
+
+        state = json.loads(encoded)
+        for seq, delta in events:
+            state = apply_delta(state, json.loads(delta))
+
+        with self._lock:
+            # Keep a private copy as the baseline for the next delta
+            self._streams[stream_id] = {
+                "state": json.loads(json.dumps(state)),
+                "seq": seq,
+                "events": len(events)
+            }
+            self.stats["loads"] += 1
+        return state
+
+    def close(self, stream_id: str) -> None:
+        """Compact a finished stream into a snapshot and forget its baseline."""
+        with self._stream_lock(stream_id):
+            with self._lock:
+                stream = self._streams.pop(stream_id, None)
+            if stream is not None and stream["events"]:
+                self._write_snapshot(stream_id, stream["state"], stream["seq"])
+                with self._lock:
+                    self._streams.pop(stream_id, None)
+
+    def reset(self) -> None:
+        """
+        Forget every stream's baseline, e.g. after a restore replaced the tables.
+
+        The next save of each stream writes a snapshot, which creates the
+        tables if they are missing.
+        """
+        with self._lock:
+            self._streams.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get event log statistics."""
+        with self._lock:
+            return {**self.stats, "open_streams": len(self._streams)}
+
+
+# Global instance
+_battle_event_log = None
+
+def get_battle_event_log() -> BattleEventLog:
+    """
+    Get the global battle event log instance.
+
+    Returns:
+        The global BattleEventLog instance
+    """
+    global _battle_event_log
+    if _battle_event_log is None:
+        _battle_event_log = BattleEventLog(
+            snapshot_interval=get_config("general", "battle_snapshot_interval", 20)
+        )
+    return _battle_event_log
@@ -3,264 +3,93 @@ Cache Manager for Veramon Reunited
 © 2025 killerdash117 | https://github.com/killerdash117
 
 This module provides a caching system for frequently accessed database data,
-reducing query load and improving performance.
+reducing query load and improving performance. Its caches are namespaces of
+the tiered cache in tiered_cache.py, which bounds their memory by bytes and
+reports their statistics together with the other caches of the bot.
 """
 
+import sys
 import time
 import logging
 import threading
 import json
-from typing import Dict, Any, Optional, List, Tuple, Callable, Set
-from collections import OrderedDict, defaultdict
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Tuple, Set, Callable
+from collections import defaultdict
+from datetime import datetime
+
+from src.db.tiered_cache import CacheNamespace, get_tiered_cache, estimate_size
 
 # Set up logging
 logger = logging.getLogger("cache")
 
-class CacheEntry:
-    """Represents a single cached entry with metadata."""
+class QueryEntry:
+    """A cached query result with the table generations it was read at."""
     
-    def __init__(self, key: str, value: Any, ttl: int = 300):
-        self.key = key
-        self.value = value
-        self.created_at = time.time()
-        self.last_accessed = time.time()
-        self.access_count = 0
-        self.ttl = ttl  # Time to live in seconds
-    
-    def is_expired(self) -> bool:
-        """Check if this cache entry has expired."""
-        return time.time() > (self.created_at + self.ttl)
-    
-    def access(self) -> Any:
-        """Access this entry and return its value."""
-        self.last_accessed = time.time()
-        self.access_count += 1
-        return self.value
-    
-    def update(self, value: Any, reset_ttl: bool = True) -> None:
-        """Update the entry's value and optionally reset its TTL."""
+    __slots__ = ("value", "dependencies")
+    
+    def __init__(self, value: Any, dependencies: Tuple[Tuple[str, int], ...]):
         self.value = value
-        if reset_ttl:
-            self.created_at = time.time()
-        self.last_accessed = time.time()
-        self.access_count += 1
+        self.dependencies = dependencies  # ((table, generation), ...)
 
-class LRUCache:
-    """
-    LRU (Least Recently Used) cache implementation.
-    
-    This cache has a maximum size and evicts the least recently used items
-    when it reaches capacity.
+class QueryCache:
     """
+    Specialized cache for database queries.
     
-    def __init__(self, max_size: int = 1000):
-        self.max_size = max_size
-        self.cache: OrderedDict[str, CacheEntry] = OrderedDict()
-        self.lock = threading.RLock()
-    
-    def get(self, key: str) -> Any:
-        """
-        Get an item from the cache.
-        
-        Args:
-            key: The cache key
-            
-        Returns:
-            The cached value or None if not found/expired
-        """
-        with self.lock:
-            if key not in self.cache:
-                return None
-                
-            entry = self.cache[key]
-            
-            # Check if expired
-            if entry.is_expired():
-                del self.cache[key]
-                return None
-                
-            # Move to end (most recently used)
-            self.cache.move_to_end(key)
-            
-            # Return value
-            return entry.access()
-    
-    def put(self, key: str, value: Any, ttl: int = 300) -> None:
-        """
-        Add or update an item in the cache.
-        
-        Args:
-            key: The cache key
-            value: The value to cache
-            ttl: Time to live in seconds
-        """
-        with self.lock:
-            if key in self.cache:
-                # Update existing entry
-                self.cache[key].update(value, reset_ttl=True)
-                # Move to end (most recently used)
-                self.cache.move_to_end(key)
-            else:
-                # Add new entry
-                self.cache[key] = CacheEntry(key, value, ttl)
-                
-            # Check if over capacity
-            if len(self.cache) > self.max_size:
-                # Remove the first item (least recently used)
-                self.cache.popitem(last=False)
+    Every table has a generation counter. An entry records the generations
+    of the tables it was read from, and invalidating a table only bumps its
+    counter, so entries read before the change are skipped (and dropped)
+    the next time they are looked up instead of being searched for. A
+    reverse index from (table, generation) to keys, cleaned whenever an
+    entry leaves the cache, gives invalidation counts and per-table
+    statistics without invalidation having to touch the keys.
     
-    def invalidate(self, key: str) -> bool:
-        """
-        Remove an item from the cache.
-        
-        Args:
-            key: The cache key to remove
-            
-        Returns:
-            True if the key was removed, False if not found
-        """
-        with self.lock:
-            if key in self.cache:
-                del self.cache[key]
-                return True
-            return False
+    Keys are (normalized SQL, params) tuples. The normalized form of each
+    query string is computed once and interned.
+    """
     
-    def invalidate_pattern(self, pattern: str) -> int:
+    def __init__(self, max_size: int = 500, default_ttl: int = 300, max_queries: int = 1024,
+                 cache: Optional[CacheNamespace] = None):
         """
-        Remove all items matching a pattern from the cache.
+        Initialize the query cache.
         
         Args:
-            pattern: The pattern to match against cache keys
-            
-        Returns:
-            Number of items removed
-        """
-        with self.lock:
-            # Find keys matching the pattern
-            keys_to_remove = [k for k in self.cache.keys() if pattern in k]
-            
-            # Remove matching keys
-            for key in keys_to_remove:
-                del self.cache[key]
-                
-            return len(keys_to_remove)
-    
-    def clear(self) -> int:
-        """
-        Clear all items from the cache.
-        
-        Returns:
-            Number of items removed
+            max_size: Maximum number of cached results
+            default_ttl: Default time to live in seconds
+            max_queries: Maximum number of normalized query strings kept
+            cache: Namespace to keep results in (a private 64 MB one if None)
         """
-        with self.lock:
-            count = len(self.cache)
-            self.cache.clear()
-            return count
-    
-    def cleanup_expired(self) -> int:
-        """
-        Remove all expired items from the cache.
-        
-        Returns:
-            Number of expired items removed
-        """
-        with self.lock:
-            # Find expired keys
-            now = time.time()
-            keys_to_remove = [
-                k for k, v in self.cache.items() 
-                if now > (v.created_at + v.ttl)
-            ]
-            
-            # Remove expired keys
-            for key in keys_to_remove:
-                del self.cache[key]
-                
-            return len(keys_to_remove)
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """
-        Get statistics about the cache.
-        
-        Returns:
-            Dictionary with cache statistics
-        """
-        with self.lock:
-            total_items = len(self.cache)
-            expired_items = sum(1 for entry in self.cache.values() if entry.is_expired())
-            
-            # Calculate age statistics
-            now = time.time()
-            if total_items > 0:
-                ages = [(now - entry.created_at) for entry in self.cache.values()]
-                avg_age = sum(ages) / len(ages)
-                max_age = max(ages) if ages else 0
-            else:
-                avg_age = 0
-                max_age = 0
-                
-            # Calculate access statistics
-            access_counts = [entry.access_count for entry in self.cache.values()]
-            avg_accesses = sum(access_counts) / len(access_counts) if access_counts else 0
-            max_accesses = max(access_counts) if access_counts else 0
-            
-            return {
-                "total_items": total_items,
-                "capacity": self.max_size,
-                "utilization": total_items / self.max_size if self.max_size > 0 else 0,
-                "expired_items": expired_items,
-                "avg_age_seconds": avg_age,
-                "max_age_seconds": max_age,
-                "avg_accesses": avg_accesses,
-                "max_accesses": max_accesses
-            }
-
-class QueryCache:
-    """
-    Specialized cache for database queries.
-    
-    This cache is designed specifically for caching database query results,
-    with features for managing table dependencies and invalidation.
-    """
-    
-    def __init__(self, max_size: int = 500, default_ttl: int = 300):
-        self.cache = LRUCache(max_size)
+        self.max_size = max_size
         self.default_ttl = default_ttl
-        self.table_dependencies: Dict[str, Set[str]] = defaultdict(set)
-        self.stats = {
-            "hits": 0,
-            "misses": 0,
-            "inserts": 0,
-            "invalidations": 0
-        }
+        self.max_queries = max_queries
+        if cache is None:
+            cache = CacheNamespace("queries", 64 * 1024 * 1024, max_entries=max_size)
+        self.cache = cache
+        self.cache.add_listener(self._on_removed)
+        self.generations: Dict[str, int] = defaultdict(int)
+        self.dependents: Dict[Tuple[str, int], Set[Tuple]] = {}
+        self._normalized: Dict[str, str] = {}
+        self.lock = threading.RLock()
+        self.invalidations = 0
     
-    def get(self, query: str, params: Optional[Tuple] = None) -> Optional[Any]:
+    def get(self, query: str, params: Optional[Tuple] = None, default: Any = None) -> Any:
         """
         Get a cached query result.
         
         Args:
             query: SQL query string
             params: Query parameters
+            default: Value to return if not found, so a cached None can be
+                told apart from a miss
             
         Returns:
-            Cached result or None if not found
+            Cached result or default if not found
         """
-        # Create cache key
-        key = self._make_key(query, params)
-        
-        # Try to get from cache
-        result = self.cache.get(key)
-        
-        if result is not None:
-            self.stats["hits"] += 1
-            return result
-            
-        self.stats["misses"] += 1
-        return None
+        entry = self.cache.get(self._make_key(query, params), validate=self._is_current)
+        return entry.value if entry is not None else default
     
     def put(self, query: str, params: Optional[Tuple], result: Any, 
-            ttl: Optional[int] = None, tables: Optional[List[str]] = None) -> None:
+            ttl: Optional[int] = None, tables: Optional[List[str]] = None,
+            generations: Optional[Tuple[int, ...]] = None) -> None:
         """
         Cache a query result.
         
@@ -270,6 +99,9 @@ class QueryCache:
             result: Query result to cache
             ttl: Time to live in seconds (optional)
             tables: List of tables this query depends on (optional)
+            generations: Generations of the tables taken with snapshot before
+                the query ran (optional). A result read before a concurrent
+                invalidation is then never served.
         """
         # Create cache key
         key = self._make_key(query, params)
@@ -277,41 +109,51 @@ class QueryCache:
         # Use default TTL if not specified
         if ttl is None:
             ttl = self.default_ttl
-            
-        # Track table dependencies if provided
-        if tables:
-            for table in tables:
-                self.table_dependencies[table].add(key)
+        tables = tuple(tables) if tables else ()
         
-        # Insert into cache
-        self.cache.put(key, result, ttl)
-        self.stats["inserts"] += 1
+        with self.lock:
+            if generations is None:
+                generations = tuple(self.generations[table] for table in tables)
+            entry = QueryEntry(result, tuple(zip(tables, generations)))
+            size = estimate_size(result) + sys.getsizeof(key) + sys.getsizeof(key[1]) + sys.getsizeof(entry)
+            if self.cache.put(key, entry, ttl, size):
+                for dependency in entry.dependencies:
+                    self.dependents.setdefault(dependency, set()).add(key)
+    
+    def snapshot(self, tables: Optional[List[str]]) -> Tuple[int, ...]:
+        """
+        Get the current generations of tables, to pass to put.
+        
+        Args:
+            tables: List of table names
+            
+        Returns:
+            Tuple of generations in the order of tables
+        """
+        if not tables:
+            return ()
+        with self.lock:
+            return tuple(self.generations[table] for table in tables)
     
     def invalidate_table(self, table: str) -> int:
         """
         Invalidate all queries dependent on a specific table.
         
+        Bumps the table's generation; dependent entries are dropped when
+        they are next looked up, evicted or cleaned up.
+        
         Args:
             table: Table name
             
         Returns:
             Number of entries invalidated
         """
-        # Get keys dependent on this table
-        keys = self.table_dependencies.get(table, set())
-        
-        # Invalidate each key
-        count = 0
-        for key in keys:
-            if self.cache.invalidate(key):
-                count += 1
-                
-        # Clear dependencies
-        if table in self.table_dependencies:
-            self.table_dependencies[table].clear()
-            
-        self.stats["invalidations"] += count
-        return count
+        with self.lock:
+            keys = self.dependents.get((table, self.generations[table]))
+            count = len(keys) if keys else 0
+            self.generations[table] += 1
+            self.invalidations += count
+            return count
     
     def invalidate_tables(self, tables: List[str]) -> int:
         """
@@ -335,46 +177,72 @@ class QueryCache:
         Returns:
             Number of entries invalidated
         """
-        count = self.cache.clear()
-        self.table_dependencies.clear()
-        self.stats["invalidations"] += count
-        return count
+        with self.lock:
+            count = self.cache.clear()
+            self.dependents.clear()
+            self.invalidations += count
+            return count
     
     def cleanup(self) -> int:
         """
-        Remove expired entries and update dependencies.
+        Remove expired and invalidated entries.
         
         Returns:
             Number of entries removed
         """
-        return self.cache.cleanup_expired()
+        with self.lock:
+            count = self.cache.cleanup_expired()
+            count += len(self.cache.remove_if(lambda key, entry: not self._is_current(entry), "stale"))
+            return count
     
     def get_stats(self) -> Dict[str, Any]:
         """
         Get cache statistics.
         
+        Memory figures are the estimated sizes of the cached rows, keys and
+        entries. The interned query strings are shared and not counted per
+        entry.
+        
         Returns:
             Dictionary with cache statistics
         """
-        cache_stats = self.cache.get_stats()
-        
-        # Calculate hit rate
-        total_requests = self.stats["hits"] + self.stats["misses"]
-        hit_rate = self.stats["hits"] / total_requests if total_requests > 0 else 0
-        
-        return {
-            **cache_stats,
-            "hits": self.stats["hits"],
-            "misses": self.stats["misses"],
-            "hit_rate": hit_rate,
-            "inserts": self.stats["inserts"],
-            "invalidations": self.stats["invalidations"],
-            "table_dependencies": {
-                table: len(keys) for table, keys in self.table_dependencies.items()
+        stats = self.cache.get_stats()
+        with self.lock:
+            return {
+                **stats,
+                "capacity": self.max_size,
+                "invalidations": self.invalidations,
+                "normalized_queries": len(self._normalized),
+                "estimated_bytes": stats["bytes"],
+                "table_dependencies": {
+                    table: len(keys) for (table, generation), keys in self.dependents.items()
+                    if generation == self.generations[table]
+                }
             }
-        }
     
-    def _make_key(self, query: str, params: Optional[Tuple]) -> str:
+    def _is_current(self, entry: QueryEntry) -> bool:
+        """Check that none of an entry's tables changed since it was read."""
+        generations = self.generations
+        for table, generation in entry.dependencies:
+            if generations[table] != generation:
+                return False
+        return True
+    
+    def _on_removed(self, key: Tuple, entry: QueryEntry, reason: str) -> None:
+        """Drop an entry that left the cache from the reverse index."""
+        with self.lock:
+            current = self.cache.peek(key)
+            for dependency in entry.dependencies:
+                # A replacement stored under the same key keeps its references
+                if current is not None and dependency in current.dependencies:
+                    continue
+                keys = self.dependents.get(dependency)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.dependents[dependency]
+    
+    def _make_key(self, query: str, params: Optional[Tuple]) -> Tuple:
         """
         Create a cache key from a query and parameters.
         
@@ -383,33 +251,122 @@ class QueryCache:
             params: Query parameters
             
         Returns:
-            Cache key string
+            (normalized query, params) tuple
+        """
+        # Normalize query by removing whitespace, once per distinct string
+        normalized_query = self._normalized.get(query)
+        if normalized_query is None:
+            normalized_query = sys.intern(" ".join(query.split()))
+            if len(self._normalized) >= self.max_queries:
+                self._normalized.clear()
+            self._normalized[query] = normalized_query
+        
+        if not params:
+            return (normalized_query, ())
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        elif not isinstance(params, tuple):
+            params = tuple(params)
+        
+        key = (normalized_query, params)
+        try:
+            hash(key)
+        except TypeError:
+            # Unhashable parameter values fall back to their JSON form
+            key = (normalized_query, json.dumps(params, sort_keys=True, default=str))
+        return key
+
+
+class _Flight:
+    """A call in progress and the result its waiters will share."""
+    
+    __slots__ = ("done", "result", "error")
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Runs one call per key at a time across threads.
+    
+    Callers that arrive while a call for their key is running wait for it
+    and get its result (or exception) instead of running their own.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Any, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "shared": 0
+        }
+    
+    def do(self, key: Any, func: Callable[..., Any], *args: Any) -> Any:
         """
-        # Normalize query by removing whitespace
-        normalized_query = " ".join(query.split())
+        Call func(*args), or wait for the call already running for key.
         
-        # Create key with query and parameters
-        if params:
-            param_str = json.dumps(params, sort_keys=True)
-            return f"{normalized_query}:{param_str}"
-        else:
-            return normalized_query
-
+        Args:
+            key: Key of identical calls
+            func: Function to call
+            *args: Arguments for func
+            
+        Returns:
+            The result of the call
+        """
+        with self._lock:
+            flight = self._calls.get(key)
+            if flight is None:
+                flight = self._calls[key] = _Flight()
+                self.stats["calls"] += 1
+                leader = True
+            else:
+                self.stats["shared"] += 1
+                leader = False
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        
+        try:
+            flight.result = func(*args)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            flight.done.set()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of calls run and of callers that shared one."""
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._calls)}
 
 class CacheManager:
     """
     Central manager for all caching in the application.
     
     This class provides a unified interface for working with different types
-    of caches and handles cache maintenance.
+    of caches and handles cache maintenance. Each cache is a namespace of
+    the tiered cache with a share of its memory budget; objects also go to
+    the disk tier when one is configured.
     """
     
     def __init__(self):
         # Initialize caches
-        self.query_cache = QueryCache(max_size=500, default_ttl=300)  # 5 minutes TTL
-        self.object_cache = LRUCache(max_size=1000)  # For general objects
-        self.user_cache = LRUCache(max_size=200)     # For user data
-        self.veramon_cache = LRUCache(max_size=300)  # For Veramon data
+        self.tiered_cache = get_tiered_cache()
+        self.query_cache = QueryCache(  # 5 minutes TTL
+            max_size=500, default_ttl=300,
+            cache=self.tiered_cache.namespace("queries", share=0.25, max_entries=500)
+        )
+        self.object_cache = self.tiered_cache.namespace("objects", share=0.2, persistent=True)  # For general objects
+        self.user_cache = self.tiered_cache.namespace("users", share=0.1)        # For user data
+        self.veramon_cache = self.tiered_cache.namespace("veramon", share=0.15)  # For Veramon data
         
         # Start maintenance task
         self.maintenance_thread = threading.Thread(
@@ -420,21 +377,36 @@ class CacheManager:
         
         logger.info("Cache manager initialized")
     
-    def get_query_result(self, query: str, params: Optional[Tuple] = None) -> Optional[Any]:
+    def get_query_result(self, query: str, params: Optional[Tuple] = None, default: Any = None) -> Any:
         """
         Get a cached query result.
         
+        Args:
+            query: SQL query string
+            params: Query parameters
+            default: Value to return if not found
+            
+        Returns:
+            Cached result or default if not found
+        """
+        return self.query_cache.get(query, params, default)
+    
+    def query_key(self, query: str, params: Optional[Tuple] = None) -> Tuple:
+        """
+        Get the cache key of a query, which identical queries share.
+        
         Args:
             query: SQL query string
             params: Query parameters
             
         Returns:
-            Cached result or None if not found
+            (normalized query, params) tuple
         """
-        return self.query_cache.get(query, params)
+        return self.query_cache._make_key(query, params)
     
     def cache_query_result(self, query: str, params: Optional[Tuple], result: Any,
-                          ttl: Optional[int] = None, tables: Optional[List[str]] = None) -> None:
+                          ttl: Optional[int] = None, tables: Optional[List[str]] = None,
+                          generations: Optional[Tuple[int, ...]] = None) -> None:
         """
         Cache a query result.
         
@@ -444,8 +416,22 @@ class CacheManager:
             result: Query result to cache
             ttl: Time to live in seconds (optional)
             tables: List of tables this query depends on (optional)
+            generations: Table generations from query_generations taken before
+                the query ran (optional)
         """
-        self.query_cache.put(query, params, result, ttl, tables)
+        self.query_cache.put(query, params, result, ttl, tables, generations)
+    
+    def query_generations(self, tables: Optional[List[str]]) -> Tuple[int, ...]:
+        """
+        Get the current generations of tables for cache_query_result.
+        
+        Args:
+            tables: List of table names
+            
+        Returns:
+            Tuple of generations in the order of tables
+        """
+        return self.query_cache.snapshot(tables)
     
     def invalidate_tables(self, tables: List[str]) -> None:
         """
@@ -564,9 +550,7 @@ class CacheManager:
     def clear_all_caches(self) -> None:
         """Clear all caches."""
         self.query_cache.invalidate_all()
-        self.object_cache.clear()
-        self.user_cache.clear()
-        self.veramon_cache.clear()
+        self.tiered_cache.clear()
         logger.info("All caches cleared")
     
     def get_cache_stats(self) -> Dict[str, Any]:
@@ -574,24 +558,29 @@ class CacheManager:
         Get statistics for all caches.
         
         Returns:
-            Dictionary with cache statistics
+            Dictionary with cache statistics, and the statistics of every
+            namespace of the tiered cache under "tiered"
         """
         return {
             "query_cache": self.query_cache.get_stats(),
             "object_cache": self.object_cache.get_stats(),
             "user_cache": self.user_cache.get_stats(),
-            "veramon_cache": self.veramon_cache.get_stats()
+            "veramon_cache": self.veramon_cache.get_stats(),
+            "tiered": self.tiered_cache.get_stats()
         }
     
+    def reset_cache_stats(self) -> None:
+        """Reset the hit, miss and eviction counters of all caches."""
+        self.tiered_cache.reset_stats()
+    
     def _maintenance_loop(self) -> None:
         """Background thread for cache maintenance."""
         while True:
             try:
-                # Clean up expired entries
+                # Clean up expired entries and write pending disk entries
                 self.query_cache.cleanup()
-                self.object_cache.cleanup_expired()
-                self.user_cache.cleanup_expired()
-                self.veramon_cache.cleanup_expired()
+                self.tiered_cache.cleanup_expired()
+                self.tiered_cache.flush()
                 
                 # Log statistics every hour
                 if datetime.now().minute == 0:
@@ -1,25 +1,71 @@
 import os
 import sqlite3
 import threading
-from typing import Dict, Union, Optional
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Union, Optional
 from queue import Queue, Empty
 import time
 
+logger = logging.getLogger("db")
+
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "db", "veramon.db")
 
 # Connection pool settings
 MAX_CONNECTIONS = 10
 TIMEOUT = 5.0  # seconds to wait for a connection before timeout
+IDLE_CHECK_INTERVAL = 60.0  # seconds between health checks of idle connections
 _connection_pool = Queue(maxsize=MAX_CONNECTIONS)
 _pool_lock = threading.RLock()
 _active_connections = 0
 
+# Creation and last-return times of every open pooled connection
+_connection_created: Dict[sqlite3.Connection, float] = {}
+_connection_returned: Dict[sqlite3.Connection, float] = {}
+_maintenance_thread: Optional[threading.Thread] = None
+_pool_stats = {
+    "checkouts": 0,
+    "total_wait_time": 0.0,
+    "max_wait_time": 0.0,
+    "exhaustion_events": 0,
+    "connections_created": 0,
+    "connections_discarded": 0,
+    "validations": 0
+}
+
+# Connection profiles select the PRAGMAs applied to every new connection and
+# whether writes are funnelled through a single writer connection
+CONNECTION_PROFILES = {
+    # SQLite defaults: rollback journal, no busy timeout
+    "default": {
+        "pragmas": {},
+        "single_writer": False
+    },
+    # Write-ahead logging lets readers run alongside the writer; one writer
+    # connection with group commit avoids "database is locked" under load
+    "wal": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -16000,     # Negative values are KiB, so ~16 MB
+            "mmap_size": 268435456,   # 256 MB
+            "temp_store": "MEMORY"
+        },
+        "single_writer": True
+    }
+}
+_connection_profile = "default"
+_write_queue = None
+
 class PooledConnection:
     """A wrapper for SQLite connections that returns them to the pool when closed."""
     
     def __init__(self, connection):
         self.connection = connection
         self.closed = False
+        # Set when something went wrong, so the connection is checked on return
+        self.needs_validation = False
         
     def cursor(self):
         """Get a cursor from the connection."""
@@ -37,13 +83,15 @@ class PooledConnection:
         """Rollback changes to the database."""
         if self.closed:
             raise sqlite3.Error("Connection has been closed")
+        # Rollbacks follow failed work, so check the connection when it comes back
+        self.needs_validation = True
         return self.connection.rollback()
         
     def close(self):
         """Return the connection to the pool instead of closing it."""
         if not self.closed:
             self.closed = True
-            return_connection_to_pool(self.connection)
+            return_connection_to_pool(self.connection, validate=self.needs_validation)
             
     def __enter__(self):
         """Context manager entry."""
@@ -51,32 +99,77 @@ class PooledConnection:
         
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
+        if exc_type is not None and issubclass(exc_type, sqlite3.Error):
+            self.needs_validation = True
         self.close()
 
 def _create_connection():
     """Create a new SQLite connection."""
-    connection = sqlite3.connect(DB_PATH)
+    # Pooled connections are handed to whichever thread checks them out
+    # (including the async_db executor), but only one thread uses a
+    # connection at a time
+    connection = sqlite3.connect(DB_PATH, check_same_thread=False)
     connection.row_factory = sqlite3.Row
+    _apply_pragmas(connection)
     return connection
 
-def initialize_pool():
-    """Initialize the connection pool."""
+def _apply_pragmas(connection: sqlite3.Connection) -> None:
+    """Apply the PRAGMAs of the active connection profile to a connection."""
+    pragmas = CONNECTION_PROFILES[_connection_profile]["pragmas"]
+    for name, value in pragmas.items():
+        connection.execute(f"PRAGMA {name} = {value}")
+
+def _add_pool_connection() -> sqlite3.Connection:
+    """Create a connection owned by the pool and start tracking its age."""
+    global _active_connections
+    
+    connection = _create_connection()
+    _connection_created[connection] = time.time()
+    _active_connections += 1
+    _pool_stats["connections_created"] += 1
+    return connection
+
+def _discard_connection(connection: sqlite3.Connection) -> None:
+    """Close a pooled connection and stop tracking it."""
     global _active_connections
     
+    try:
+        connection.close()
+    except sqlite3.Error:
+        pass
+        
+    with _pool_lock:
+        if _connection_created.pop(connection, None) is not None:
+            _active_connections -= 1
+        _connection_returned.pop(connection, None)
+        _pool_stats["connections_discarded"] += 1
+
+def _is_healthy(connection: sqlite3.Connection) -> bool:
+    """Run a trivial statement to check that a connection still works."""
+    _pool_stats["validations"] += 1
+    try:
+        connection.execute("SELECT 1").fetchone()
+        return True
+    except sqlite3.Error:
+        return False
+
+def initialize_pool():
+    """Initialize the connection pool."""
     with _pool_lock:
         # Clear any existing connections
         while not _connection_pool.empty():
             try:
-                conn = _connection_pool.get_nowait()
-                conn.close()
+                _discard_connection(_connection_pool.get_nowait())
             except Empty:
                 break
                 
         # Create initial connections
         for _ in range(MAX_CONNECTIONS // 2):  # Start with half capacity
-            connection = _create_connection()
+            connection = _add_pool_connection()
+            _connection_returned[connection] = time.time()
             _connection_pool.put(connection)
-            _active_connections += 1
+            
+    _start_pool_maintenance()
 
 def get_connection(timeout: float = 5.0) -> PooledConnection:
     """
@@ -91,51 +184,160 @@ def get_connection(timeout: float = 5.0) -> PooledConnection:
     Raises:
         sqlite3.Error: If the connection pool is exhausted and no new connections can be created.
     """
-    global _active_connections
-    
     # Initialize pool if needed
     if _connection_pool.empty() and _active_connections == 0:
         initialize_pool()
+        
+    start_time = time.perf_counter()
     
-    # Try to get a connection from the pool
     try:
-        connection = _connection_pool.get(block=True, timeout=timeout)
-        return PooledConnection(connection)
+        connection = _connection_pool.get_nowait()
     except Empty:
-        # If pool is empty but we can create more connections
+        connection = None
+        
+    # Grow the pool before making the caller wait for a connection
+    if connection is None:
         with _pool_lock:
             if _active_connections < MAX_CONNECTIONS:
-                connection = _create_connection()
-                _active_connections += 1
-                return PooledConnection(connection)
-            else:
-                # No available connections and at max capacity
-                raise sqlite3.Error("Connection pool exhausted, try again later")
-
-def return_connection_to_pool(connection):
-    """Return a connection to the pool."""
-    # Check if connection is healthy before returning to pool
-    try:
-        cursor = connection.cursor()
-        cursor.execute("SELECT 1")
-        cursor.fetchone()
-        _connection_pool.put(connection)
-    except sqlite3.Error:
-        # If connection is bad, close it and create a new one
+                connection = _add_pool_connection()
+                
+    if connection is None:
         try:
-            connection.close()
-        except:
-            pass
+            connection = _connection_pool.get(block=True, timeout=timeout)
+        except Empty:
+            # No available connections and at max capacity
+            _pool_stats["exhaustion_events"] += 1
+            raise sqlite3.Error("Connection pool exhausted, try again later")
             
+    wait_time = time.perf_counter() - start_time
+    _pool_stats["checkouts"] += 1
+    _pool_stats["total_wait_time"] += wait_time
+    _pool_stats["max_wait_time"] = max(_pool_stats["max_wait_time"], wait_time)
+    _connection_returned.pop(connection, None)
+    
+    return PooledConnection(connection)
+
+def return_connection_to_pool(connection, validate: bool = False):
+    """
+    Return a connection to the pool.
+    
+    Connections are only health checked when validate is set (after an error
+    on the connection); idle connections are checked in the background by
+    validate_idle_connections().
+    
+    Args:
+        connection: Raw sqlite3 connection being returned
+        validate: Whether to check the connection before reusing it
+    """
+    if validate and not _is_healthy(connection):
+        logger.warning("Discarding unhealthy pooled database connection")
+        _discard_connection(connection)
+        
+        # Create a replacement connection if below minimum threshold
         with _pool_lock:
-            global _active_connections
-            _active_connections -= 1
-            
-            # Create a replacement connection if below minimum threshold
             if _active_connections < MAX_CONNECTIONS // 2:
-                new_connection = _create_connection()
-                _connection_pool.put(new_connection)
-                _active_connections += 1
+                replacement = _add_pool_connection()
+                _connection_returned[replacement] = time.time()
+                _connection_pool.put(replacement)
+        return
+        
+    if connection not in _connection_created:
+        # The pool was closed while this connection was checked out
+        connection.close()
+        return
+        
+    _connection_returned[connection] = time.time()
+    _connection_pool.put(connection)
+
+def validate_idle_connections(min_idle_seconds: float = IDLE_CHECK_INTERVAL) -> int:
+    """
+    Health check connections that have sat idle in the pool.
+    
+    Args:
+        min_idle_seconds: Only check connections idle for at least this long
+        
+    Returns:
+        Number of connections discarded
+    """
+    now = time.time()
+    idle = []
+    
+    # Take idle connections out of the pool so nobody checks them out mid-check
+    while True:
+        try:
+            idle.append(_connection_pool.get_nowait())
+        except Empty:
+            break
+            
+    discarded = 0
+    for connection in idle:
+        idle_for = now - _connection_returned.get(connection, now)
+        if idle_for >= min_idle_seconds and not _is_healthy(connection):
+            _discard_connection(connection)
+            discarded += 1
+        else:
+            _connection_pool.put(connection)
+            
+    if discarded:
+        logger.warning(f"Discarded {discarded} unhealthy idle database connections")
+    return discarded
+
+def _pool_maintenance_loop() -> None:
+    """Background thread that periodically checks idle connections."""
+    while True:
+        time.sleep(IDLE_CHECK_INTERVAL)
+        try:
+            validate_idle_connections()
+        except Exception as e:
+            logger.error(f"Error in connection pool maintenance: {e}")
+
+def _start_pool_maintenance() -> None:
+    """Start the idle connection checker if it is not running."""
+    global _maintenance_thread
+    
+    with _pool_lock:
+        if _maintenance_thread is None or not _maintenance_thread.is_alive():
+            _maintenance_thread = threading.Thread(
+                target=_pool_maintenance_loop,
+                name="veramon-db-pool-maintenance",
+                daemon=True
+            )
+            _maintenance_thread.start()
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Get connection pool statistics.
+    
+    Returns:
+        Dictionary with checkout wait times, usage, exhaustion events and
+        connection ages
+    """
+    now = time.time()
+    ages = [now - created for created in list(_connection_created.values())]
+    checkouts = _pool_stats["checkouts"]
+    idle = _connection_pool.qsize()
+    
+    stats = {
+        "profile": _connection_profile,
+        "max_connections": MAX_CONNECTIONS,
+        "open_connections": _active_connections,
+        "idle_connections": idle,
+        "in_use_connections": max(0, _active_connections - idle),
+        "checkouts": checkouts,
+        "avg_wait_time": _pool_stats["total_wait_time"] / checkouts if checkouts else 0,
+        "max_wait_time": _pool_stats["max_wait_time"],
+        "exhaustion_events": _pool_stats["exhaustion_events"],
+        "connections_created": _pool_stats["connections_created"],
+        "connections_discarded": _pool_stats["connections_discarded"],
+        "validations": _pool_stats["validations"],
+        "avg_connection_age": sum(ages) / len(ages) if ages else 0,
+        "max_connection_age": max(ages) if ages else 0
+    }
+    
+    if _write_queue is not None:
+        stats["write_queue"] = _write_queue.get_stats()
+        
+    return stats
 
 def close_all_connections():
     """Close all connections in the pool."""
@@ -150,8 +352,301 @@ def close_all_connections():
             except Empty:
                 break
                 
+        # Connections still checked out are closed when they are returned
+        _connection_created.clear()
+        _connection_returned.clear()
         _active_connections = 0
 
+class _WriterConnection:
+    """
+    Connection handed to write jobs running on the writer thread.
+    
+    The write queue owns the transaction, so commit() is a no-op and
+    rollback() only undoes the current job.
+    """
+    
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        
+    def cursor(self):
+        """Get a cursor from the writer connection."""
+        return self.connection.cursor()
+        
+    def execute(self, sql: str, params=()):
+        """Execute a statement on the writer connection."""
+        return self.connection.execute(sql, params)
+        
+    def executemany(self, sql: str, params_seq):
+        """Execute a statement for each parameter set on the writer connection."""
+        return self.connection.executemany(sql, params_seq)
+        
+    def commit(self):
+        """Changes are committed by the write queue together with the rest of the batch."""
+        
+    def rollback(self):
+        """Undo the changes made by the current job."""
+        self.connection.execute("ROLLBACK TO write_job")
+        
+    def close(self):
+        """The writer connection stays open for the lifetime of the queue."""
+
+class WriteQueue:
+    """
+    Serializes database writes through one dedicated writer connection.
+    
+    Write jobs are callables that receive the writer connection. A background
+    thread runs queued jobs in batches inside a single transaction (group
+    commit), so many small writes share one fsync. Each job runs in its own
+    savepoint, which means a failing job is rolled back on its own and its
+    exception is raised to the caller without affecting the rest of the batch.
+    """
+    
+    def __init__(self, max_batch_size: int = 128):
+        self.max_batch_size = max_batch_size
+        self._queue: Queue = Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "jobs": 0,
+            "failed_jobs": 0,
+            "batches": 0,
+            "max_batch": 0
+        }
+        
+    def start(self) -> None:
+        """Start the writer thread if it is not running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="veramon-db-writer", daemon=True)
+            self._thread.start()
+            
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Finish all queued writes and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            if not thread:
+                return
+            self._queue.put(None)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+            
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Queue a write job.
+        
+        Args:
+            func: Callable taking (conn, *args, **kwargs)
+            
+        Returns:
+            Future resolved with the job's return value after commit
+        """
+        future: Future = Future()
+        self.start()
+        self._queue.put((func, args, kwargs, future))
+        return future
+        
+    def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a write job and wait for it to be committed.
+        
+        Jobs submitted from inside another job run inline on the writer
+        connection, as part of the outer job's transaction.
+        """
+        if self._connection is not None and threading.current_thread() is self._thread:
+            return func(_WriterConnection(self._connection), *args, **kwargs)
+        return self.submit(func, *args, **kwargs).result()
+        
+    def _run(self) -> None:
+        """Writer thread main loop."""
+        try:
+            self._connection = _create_connection()
+        except sqlite3.Error as e:
+            logger.error(f"Could not open the writer connection: {e}")
+            self._fail_queued(e)
+            return
+        # Transactions are managed explicitly below
+        self._connection.isolation_level = None
+        writer = _WriterConnection(self._connection)
+        
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                    
+                # Group every job that is already waiting into this transaction
+                batch = [job]
+                stop_after_batch = False
+                while len(batch) < self.max_batch_size:
+                    try:
+                        job = self._queue.get_nowait()
+                    except Empty:
+                        break
+                    if job is None:
+                        stop_after_batch = True
+                        break
+                    batch.append(job)
+                    
+                self._run_batch(writer, batch)
+                
+                if stop_after_batch:
+                    break
+        finally:
+            self._connection.close()
+            self._connection = None
+            
+    def _fail_queued(self, error: Exception) -> None:
+        """Resolve the future of every queued job with an error."""
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except Empty:
+                return
+            if job is not None:
+                job[3].set_exception(error)
+                
+    def _run_batch(self, writer: _WriterConnection, batch: list) -> None:
+        """Run a batch of jobs in one transaction and resolve their futures."""
+        conn = self._connection
+        results = []
+        
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for func, args, kwargs, future in batch:
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    result = func(writer, *args, **kwargs)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_job")
+                    conn.execute("RELEASE write_job")
+                    results.append((future, None, e))
+                    self.stats["failed_jobs"] += 1
+                else:
+                    conn.execute("RELEASE write_job")
+                    results.append((future, result, None))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # A transaction statement failed, so no job in the batch was committed
+            logger.error(f"Group commit of {len(batch)} writes failed: {e}")
+            if conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            results = [(future, None, e) for _, _, _, future in batch]
+            
+        self.stats["jobs"] += len(batch)
+        self.stats["batches"] += 1
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        
+        # Only report success once the batch is durable
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+                
+    def get_stats(self) -> Dict[str, Any]:
+        """Get write queue statistics."""
+        return {
+            **self.stats,
+            "pending": self._queue.qsize(),
+            "avg_batch": self.stats["jobs"] / self.stats["batches"] if self.stats["batches"] else 0
+        }
+
+def configure_pool(profile: str = "default") -> None:
+    """
+    Select the connection profile used by the pool.
+    
+    Existing pooled connections are closed so new ones pick up the profile's
+    PRAGMAs, and the writer thread is started or stopped as needed.
+    
+    Args:
+        profile: Name of a profile in CONNECTION_PROFILES
+        
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    global _connection_profile, _write_queue
+    
+    if profile not in CONNECTION_PROFILES:
+        raise ValueError(f"Unknown connection profile: {profile}")
+        
+    # Queued writes finish before the profile changes. The writer thread is
+    # joined without the pool lock, as its jobs may need pooled connections.
+    with _pool_lock:
+        write_queue, _write_queue = _write_queue, None
+    if write_queue is not None:
+        write_queue.stop()
+        
+    with _pool_lock:
+        _connection_profile = profile
+        close_all_connections()
+        
+        if CONNECTION_PROFILES[profile]["single_writer"]:
+            _write_queue = WriteQueue()
+            _write_queue.start()
+            
+    logger.info(f"Database connection profile set to '{profile}'")
+
+def get_connection_profile() -> str:
+    """Get the name of the active connection profile."""
+    return _connection_profile
+
+def get_write_queue() -> Optional[WriteQueue]:
+    """Get the writer queue, or None if the active profile writes through the pool."""
+    return _write_queue
+
+def run_write(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a write job and commit it.
+    
+    The job receives a connection as its first argument. With a single-writer
+    profile it runs on the writer thread and is group committed; otherwise it
+    runs on a pooled connection and is committed on its own.
+    
+    Args:
+        func: Callable taking (conn, *args, **kwargs)
+        
+    Returns:
+        The job's return value
+    """
+    if _write_queue is not None:
+        return _write_queue.run(func, *args, **kwargs)
+        
+    conn = get_connection()
+    try:
+        result = func(conn, *args, **kwargs)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def _execute_write(conn, query: str, params) -> int:
+    """Write job that executes a single statement."""
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    return cursor.rowcount
+
+def execute_write(query: str, params=()) -> int:
+    """
+    Execute and commit a single write statement.
+    
+    Args:
+        query: SQL statement
+        params: Statement parameters
+        
+    Returns:
+        Number of rows affected
+    """
+    return run_write(_execute_write, query, params)
+
 def create_tables():
     """
     Create all database tables if they don't exist.
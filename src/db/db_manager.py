@@ -18,15 +18,22 @@ import time
 import shutil
 import gzip
 import zlib
+import struct
+import hashlib
+import tempfile
 import logging
+import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple, Set, Union, Callable
 from pathlib import Path
 from functools import wraps
 
 from src.db.db import get_connection  # Import existing connection function
+from src.db.db import configure_pool, get_connection_profile, get_write_queue, run_write
+from src.db.db import get_pool_stats as get_connection_pool_stats
+from src.db.async_db import run_in_db_executor
 from src.utils.config_manager import get_config
-from src.db.cache_manager import get_cache_manager
+from src.db.cache_manager import get_cache_manager, SingleFlight
 
 # Set up logging
 logger = logging.getLogger("db_manager")
@@ -40,13 +47,86 @@ DEFAULT_CONFIG = {
     "backup_compression": True,       # Whether to compress backup files
     "auto_vacuum_days": 7,            # Days between automatic vacuum operations
     "max_backup_age_days": 30,        # Max age for auto backups before pruning
+    "backup_compression_level": 6,    # gzip level of compressed backups (1-9)
+    "backup_pages_per_step": 1024,    # Pages copied per online backup step (-1 copies all at once)
+    "backup_step_pause_ms": 1,        # Pause between backup steps so writers can get in
+    "backup_max_restarts": 3,         # Copies restarted by writes before the backup holds writers off
     "log_retention_days": 14,         # Days to keep log entries before cleanup
     "temp_data_retention_days": 7,     # Days to keep temporary data
     "enable_query_caching": True,     # Whether to enable query caching
     "cache_ttl_seconds": 300,         # Default TTL for cached queries (5 minutes)
-    "cache_frequent_user_data": True  # Whether to cache frequently accessed user data
+    "cache_frequent_user_data": True, # Whether to cache frequently accessed user data
+    "negative_cache_ttl_seconds": 30, # TTL for cached empty results (0 to not cache them)
+    "connection_profile": "default"   # SQLite connection profile ("default" or "wal")
 }
 
+# Marks a query result that is not in the cache, as None results are cached
+_NOT_CACHED = object()
+
+# Backups are streamed to and from disk in chunks of this size
+BACKUP_CHUNK_SIZE = 1024 * 1024
+
+# File names of full backups (plain SQLite files) and of differential backups
+FULL_BACKUP_EXTENSIONS = (".db", ".db.gz")
+DIFF_BACKUP_EXTENSIONS = (".dbdiff", ".dbdiff.gz")
+
+# First line of a differential backup, which is followed by a JSON header line
+# and then (4-byte big-endian page number, page) records
+DIFF_MAGIC = b"VERAMON-DIFF 1\n"
+
+class _BackupRestartLimit(Exception):
+    """Raised from the backup progress callback when writes keep restarting the copy."""
+
+class _LegacyBackupReader:
+    """
+    Read the database from a backup made before backups were streamed.
+    
+    Those backups hold a zlib stream inside the gzip file. The stream is
+    decompressed in chunks, so old backups restore without loading the
+    whole database into memory.
+    """
+    
+    def __init__(self, compressed):
+        self._compressed = compressed
+        self._decompressor = zlib.decompressobj()
+        self._buffer = b""
+    
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = self._compressed.read(BACKUP_CHUNK_SIZE)
+            if not chunk:
+                self._buffer += self._decompressor.flush()
+                break
+            self._buffer += self._decompressor.decompress(chunk)
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+    
+    def close(self) -> None:
+        self._compressed.close()
+    
+    def __enter__(self) -> "_LegacyBackupReader":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+def _sqlite_page_size(header: bytes) -> int:
+    """Get the page size from the first bytes of an SQLite database file."""
+    if len(header) < 18 or not header.startswith(b"SQLite format 3\x00"):
+        raise ValueError("Not an SQLite database")
+    page_size = struct.unpack(">H", header[16:18])[0]
+    # The largest page size does not fit in two bytes and is stored as 1
+    return 65536 if page_size == 1 else page_size
+
+def _row_to_dict(row: Any) -> Optional[Dict[str, Any]]:
+    """Convert a fetched row to a dictionary, or None if there is no row."""
+    # Rows are sqlite3.Row, which has column names but no description
+    if not row or not hasattr(row, "keys"):
+        return None
+    return dict(row)
+
 # Decorator to time database operations for performance monitoring
 def time_database_operation(operation_name: str = None):
     """Decorator to time database operations for performance monitoring."""
@@ -83,12 +163,24 @@ class DatabaseManager:
         # Ensure backup directory exists
         os.makedirs(self.backup_dir, exist_ok=True)
         
+        # Apply the configured connection profile (PRAGMAs and writer queue)
+        if self.config["connection_profile"] != get_connection_profile():
+            configure_pool(self.config["connection_profile"])
+        
         # Get cache manager
         self.cache_manager = get_cache_manager()
         
         # Track modified tables for cache invalidation
         self._modified_tables: Set[str] = set()
         
+        # Identical cacheable reads in progress, shared by the callers that miss together
+        self._query_flights = SingleFlight()
+        self._async_flights: Dict[Tuple, asyncio.Task] = {}
+        self._async_flight_stats = {"calls": 0, "shared": 0}
+        
+        # Statistics of the most recent backup
+        self.last_backup: Optional[Dict[str, Any]] = None
+        
         # Check if automatic maintenance is needed
         self._check_auto_maintenance()
     
@@ -153,6 +245,11 @@ class DatabaseManager:
             # Remove duplicates from backups_to_delete
             backups_to_delete = list({b["path"]: b for b in backups_to_delete}.values())
             
+            # Keep the full backups that remaining differential backups are applied to
+            deleted = {b["path"] for b in backups_to_delete}
+            needed_bases = {b.get("base") for b in backups if b["path"] not in deleted}
+            backups_to_delete = [b for b in backups_to_delete if b["filename"] not in needed_bases]
+            
             # Delete old backups
             for backup in backups_to_delete:
                 try:
@@ -400,8 +497,9 @@ class DatabaseManager:
             logger.warning("Reset cancelled: Confirmation text not provided.")
             return False
         
-        # Create a backup before resetting
-        self.create_backup("pre_reset")
+        # Create a backup before resetting, including unsaved user data
+        self._flush_user_data()
+        self.create_backup(self._timestamped_backup_name("pre_reset"))
         
         # Get all table names
         conn = get_connection()
@@ -419,15 +517,23 @@ class DatabaseManager:
         
         # Reinitialize the database
         self.initialize_database()
+        self._reload_user_data()
         
         return True
     
-    def create_backup(self, backup_name: Optional[str] = None) -> str:
+    def create_backup(self, backup_name: Optional[str] = None, differential: bool = False) -> str:
         """
         Create a backup of the current database.
         
+        The live database is copied with SQLite's online backup API, so the
+        backup is consistent even while commands write, and then streamed
+        through gzip if compression is on. A differential backup only keeps
+        the pages that differ from the newest full backup.
+        
         Args:
             backup_name: Optional name for the backup
+            differential: Whether to store only the pages changed since the
+                newest full backup (a full backup is made if there is none)
             
         Returns:
             str: Path to the created backup file
@@ -437,36 +543,340 @@ class DatabaseManager:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_name = f"backup_{timestamp}"
         
-        # Ensure .db extension
-        if not backup_name.endswith(".db"):
-            backup_name += ".db"
+        # The extension depends on the kind of backup
+        if backup_name.endswith(".db"):
+            backup_name = backup_name[:-3]
         
-        # Create backup path
-        backup_path = os.path.join(self.backup_dir, backup_name)
+        compress = self.config.get("backup_compression", DEFAULT_CONFIG["backup_compression"])
+        base = self._latest_full_backup() if differential else None
+        if differential and base is None:
+            logger.info("No full backup to compare against, creating a full backup")
+        
+        start_time = time.perf_counter()
+        fd, snapshot_path = tempfile.mkstemp(suffix=".db.tmp", dir=self.backup_dir)
+        os.close(fd)
+        try:
+            stats = self._snapshot_database(snapshot_path)
+            
+            if base is not None and self._backup_page_size(base["path"]) != stats["page_size"]:
+                logger.info(f"Page size differs from {base['filename']}, creating a full backup")
+                base = None
+            
+            if base is not None:
+                backup_path = os.path.join(self.backup_dir, backup_name + ".dbdiff")
+                if compress:
+                    backup_path += ".gz"
+                stats["changed_pages"] = self._write_differential(snapshot_path, base, backup_path, compress)
+                stats["base"] = base["filename"]
+            else:
+                backup_path = os.path.join(self.backup_dir, backup_name + ".db")
+                if compress:
+                    backup_path += ".gz"
+                if os.path.basename(backup_path) in self._differential_bases():
+                    raise FileExistsError(
+                        f"{os.path.basename(backup_path)} is the full backup of a differential backup"
+                    )
+                if compress:
+                    self._compress_file(snapshot_path, backup_path)
+                else:
+                    os.replace(snapshot_path, backup_path)
+        finally:
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+        
+        stats.update({
+            "path": backup_path,
+            "type": "differential" if base is not None else "full",
+            "size_bytes": os.path.getsize(backup_path),
+            "seconds": time.perf_counter() - start_time
+        })
+        self.last_backup = stats
+        
+        logger.info(
+            f"Database backup created at {backup_path} ({stats['type']}, {stats['page_count']} pages, "
+            f"{stats['steps']} steps, {stats['restarts']} restarts, {stats['seconds']:.2f}s)"
+        )
+        return backup_path
+    
+    async def create_backup_async(self, backup_name: Optional[str] = None, differential: bool = False) -> str:
+        """
+        Create a backup on the database executor without blocking the event loop.
+        
+        Args:
+            backup_name: Optional name for the backup
+            differential: Whether to store only the pages changed since the
+                newest full backup
+            
+        Returns:
+            str: Path to the created backup file
+        """
+        return await run_in_db_executor(self.create_backup, backup_name, differential)
+    
+    def _timestamped_backup_name(self, purpose: str) -> str:
+        """Get a unique name for an automatic backup, such as the one taken before a restore."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return f"backup_{purpose}_{timestamp}"
+    
+    def _snapshot_database(self, target_path: str) -> Dict[str, Any]:
+        """
+        Copy the live database into a new SQLite file with the online backup API.
+        
+        Pages are copied backup_pages_per_step at a time. With write-ahead
+        logging the source keeps one read transaction open, so the copy is
+        a consistent snapshot while writers carry on. Otherwise the backup
+        pauses between steps so writers can get in, and SQLite restarts the
+        copy after each write; after backup_max_restarts restarts the copy
+        keeps a read transaction open instead, which holds writers off until
+        it finishes.
+        
+        Args:
+            target_path: Path of the SQLite file to create
+            
+        Returns:
+            Dict[str, Any]: Steps, restarts, whether writers were held off,
+            and the page size and count of the copy
+        """
+        pages = self.config["backup_pages_per_step"]
+        pause = self.config["backup_step_pause_ms"] / 1000
+        max_restarts = self.config["backup_max_restarts"]
+        stats = {"steps": 0, "restarts": 0, "held_writers": False}
         
-        # Close connections to allow backup
-        # This assumes get_connection uses a single connection pattern
-        # If using connection pooling, you'd close the pool here
         conn = get_connection()
-        conn.close()
+        source = conn.connection
+        try:
+            journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0]
+            hold_snapshot = journal_mode.lower() == "wal"
+            
+            while True:
+                remaining_pages = [None]
+                
+                def progress(status, remaining, total):
+                    stats["steps"] += 1
+                    if remaining_pages[0] is not None and remaining > remaining_pages[0]:
+                        stats["restarts"] += 1
+                        if not hold_snapshot and stats["restarts"] > max_restarts:
+                            raise _BackupRestartLimit()
+                    remaining_pages[0] = remaining
+                    if not hold_snapshot and pause > 0:
+                        time.sleep(pause)
+                
+                target = sqlite3.connect(target_path)
+                try:
+                    if hold_snapshot:
+                        source.execute("BEGIN")
+                        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                    source.backup(target, pages=pages, progress=progress)
+                    stats["page_size"] = target.execute("PRAGMA page_size").fetchone()[0]
+                    stats["page_count"] = target.execute("PRAGMA page_count").fetchone()[0]
+                    return stats
+                except _BackupRestartLimit:
+                    logger.warning("Writes keep restarting the backup, holding writers off to finish it")
+                    hold_snapshot = True
+                    stats["held_writers"] = True
+                finally:
+                    if source.in_transaction:
+                        source.rollback()
+                    target.close()
+        finally:
+            conn.close()
+    
+    def _compress_file(self, source_path: str, backup_path: str) -> None:
+        """Stream a file through gzip into a backup file."""
+        level = self.config["backup_compression_level"]
+        part_path = backup_path + ".part"
+        with open(source_path, "rb") as f_in, gzip.open(part_path, "wb", compresslevel=level) as f_out:
+            shutil.copyfileobj(f_in, f_out, BACKUP_CHUNK_SIZE)
+        os.replace(part_path, backup_path)
+    
+    def _write_differential(self, snapshot_path: str, base: Dict[str, Any],
+                            backup_path: str, compress: bool) -> int:
+        """
+        Write the pages of a snapshot that differ from a full backup.
         
-        # Create the backup
-        shutil.copy2(self.db_path, backup_path)
+        Both files are read page by page, so memory use does not depend on
+        the size of the database. The header records the size and SHA-256
+        of the full backup's database, which are checked before the pages
+        are applied to it.
         
-        # Compress backup if configured
-        if self.config.get("backup_compression", DEFAULT_CONFIG["backup_compression"]):
-            with open(backup_path, "rb") as f_in, gzip.open(backup_path + ".gz", "wb") as f_out:
-                f_out.write(zlib.compress(f_in.read()))
-            os.remove(backup_path)
-            backup_path += ".gz"
+        Args:
+            snapshot_path: SQLite file made by _snapshot_database
+            base: Entry of list_backups for the full backup to compare against
+            backup_path: Path of the differential backup to create
+            compress: Whether to gzip the differential backup
+            
+        Returns:
+            int: Number of pages written
+        """
+        with open(snapshot_path, "rb") as snapshot:
+            page_size = _sqlite_page_size(snapshot.read(100))
+        page_count = os.path.getsize(snapshot_path) // page_size
+        
+        changed = 0
+        base_hash = hashlib.sha256()
+        base_size = 0
+        # Pages go to a scratch file first, as the header needs the base's checksum
+        fd, records_path = tempfile.mkstemp(suffix=".dbdiff.tmp", dir=self.backup_dir)
+        try:
+            with open(snapshot_path, "rb") as snapshot, self._open_backup(base["path"]) as base_file, \
+                    os.fdopen(fd, "wb") as records:
+                for page_number in range(1, page_count + 1):
+                    page = snapshot.read(page_size)
+                    base_page = base_file.read(page_size)
+                    base_hash.update(base_page)
+                    base_size += len(base_page)
+                    if base_page != page:
+                        records.write(struct.pack(">I", page_number))
+                        records.write(page)
+                        changed += 1
+                # The rest of a full backup that is longer than the snapshot
+                for chunk in iter(lambda: base_file.read(BACKUP_CHUNK_SIZE), b""):
+                    base_hash.update(chunk)
+                    base_size += len(chunk)
+            
+            header = {
+                "base": base["filename"],
+                "base_size": base_size,
+                "base_sha256": base_hash.hexdigest(),
+                "page_size": page_size,
+                "page_count": page_count
+            }
+            part_path = backup_path + ".part"
+            if compress:
+                output = gzip.open(part_path, "wb", compresslevel=self.config["backup_compression_level"])
+            else:
+                output = open(part_path, "wb")
+            with open(records_path, "rb") as records, output:
+                output.write(DIFF_MAGIC)
+                output.write(json.dumps(header).encode() + b"\n")
+                shutil.copyfileobj(records, output, BACKUP_CHUNK_SIZE)
+            os.replace(part_path, backup_path)
+        finally:
+            os.remove(records_path)
+        return changed
+    
+    def _open_backup(self, path: str):
+        """
+        Open a backup file for streamed reading, decompressing it if needed.
         
-        logger.info(f"Database backup created at {backup_path}")
-        return backup_path
+        Full backups made before backups were streamed hold zlib data inside
+        the gzip file, which is decompressed as well.
+        """
+        if not path.endswith(".gz"):
+            return open(path, "rb")
+        backup = gzip.open(path, "rb")
+        try:
+            start = backup.peek(2)[:2]
+        except Exception:
+            backup.close()
+            raise
+        # A zlib stream starts with 0x78 and a header that is a multiple of 31
+        if len(start) == 2 and start[0] == 0x78 and int.from_bytes(start, "big") % 31 == 0:
+            return _LegacyBackupReader(backup)
+        return backup
+    
+    def _backup_page_size(self, path: str) -> int:
+        """Get the page size of a full backup."""
+        with self._open_backup(path) as backup:
+            return _sqlite_page_size(backup.read(100))
+    
+    def _read_diff_header(self, backup) -> Dict[str, Any]:
+        """Read the header of an open differential backup."""
+        if backup.readline() != DIFF_MAGIC:
+            raise ValueError("Not a differential backup")
+        header = json.loads(backup.readline())
+        if not isinstance(header, dict) or "base" not in header:
+            raise ValueError("Damaged differential backup header")
+        return header
+    
+    def _differential_bases(self) -> Set[str]:
+        """Get the file names of the full backups that differential backups are applied to."""
+        return {backup["base"] for backup in self.list_backups() if backup.get("base")}
+    
+    def _latest_full_backup(self) -> Optional[Dict[str, Any]]:
+        """Get the newest full backup that can be read, or None if there is none."""
+        for backup in self.list_backups():
+            if backup["type"] != "full":
+                continue
+            try:
+                self._backup_page_size(backup["path"])
+            except (OSError, EOFError, ValueError, zlib.error) as e:
+                logger.warning(f"Unreadable full backup {backup['filename']}: {e}")
+                continue
+            return backup
+        return None
+    
+    def _copy_backup(self, backup_path: str, target_path: str) -> Tuple[int, str]:
+        """
+        Write the database held by a full backup to target_path.
+        
+        Args:
+            backup_path: Path of a full backup
+            target_path: Path of the SQLite file to write
+            
+        Returns:
+            Tuple[int, str]: Size and SHA-256 hex digest of the database
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with self._open_backup(backup_path) as source, open(target_path, "wb") as target:
+            for chunk in iter(lambda: source.read(BACKUP_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                size += len(chunk)
+                target.write(chunk)
+        return size, digest.hexdigest()
+    
+    def _materialize_backup(self, backup_path: str, target_path: str) -> None:
+        """
+        Write the database held by a backup file to target_path.
+        
+        Compressed backups are decompressed in chunks. A differential backup
+        is applied on top of its full backup, which must be in the same
+        directory and unchanged since the differential backup was made.
+        
+        Args:
+            backup_path: Path of a full or differential backup
+            target_path: Path of the SQLite file to write
+            
+        Raises:
+            FileNotFoundError: If the full backup of a differential backup is missing
+            ValueError: If the full backup has changed or the differential backup is damaged
+        """
+        if not backup_path.endswith(DIFF_BACKUP_EXTENSIONS):
+            self._copy_backup(backup_path, target_path)
+            return
+        
+        name = os.path.basename(backup_path)
+        with self._open_backup(backup_path) as diff:
+            header = self._read_diff_header(diff)
+            base_path = os.path.join(os.path.dirname(backup_path), header["base"])
+            if not os.path.exists(base_path):
+                raise FileNotFoundError(f"Full backup {header['base']} of {name} not found")
+            base_size, base_sha256 = self._copy_backup(base_path, target_path)
+            if (base_size, base_sha256) != (header.get("base_size"), header.get("base_sha256")):
+                raise ValueError(f"Full backup {header['base']} has changed since {name} was made")
+            
+            page_size = header["page_size"]
+            with open(target_path, "r+b") as target:
+                while True:
+                    record = diff.read(4)
+                    if not record:
+                        break
+                    page = diff.read(page_size)
+                    if len(record) < 4 or len(page) < page_size:
+                        raise ValueError(f"Differential backup {name} is truncated")
+                    page_number = struct.unpack(">I", record)[0]
+                    target.seek((page_number - 1) * page_size)
+                    target.write(page)
+                target.truncate(header["page_count"] * page_size)
     
     def restore_backup(self, backup_path: str, confirm_text: str = None) -> bool:
         """
         Restore a database from a backup file.
         
+        The backup is streamed into a temporary SQLite file, which is then
+        copied into the live database with the online backup API, so pooled
+        connections stay usable and see the restored data.
+        
         Args:
             backup_path: Path to the backup file
             confirm_text: Must be 'CONFIRM_RESTORE' to proceed
@@ -482,57 +892,81 @@ class DatabaseManager:
             logger.error(f"Restore failed: Backup file {backup_path} not found.")
             return False
         
-        # Create a backup of current state before restoring
-        self.create_backup("pre_restore")
+        # Create a backup of current state before restoring, including
+        # changes the write-behind stores have not written yet
+        self._flush_user_data()
+        self.create_backup(self._timestamped_backup_name("pre_restore"))
         
-        # Close connections before restoring
-        conn = get_connection()
-        conn.close()
-        
-        # Decompress if it's a compressed backup
-        if backup_path.endswith(".gz"):
+        fd, restore_path = tempfile.mkstemp(suffix=".db.tmp", dir=self.backup_dir)
+        os.close(fd)
+        try:
+            self._materialize_backup(backup_path, restore_path)
+            
+            source = sqlite3.connect(restore_path)
+            conn = get_connection()
             try:
-                decompressed_path = backup_path[:-3]  # Remove .gz extension
-                with gzip.open(backup_path, 'rb') as f_in, open(decompressed_path, 'wb') as f_out:
-                    f_out.write(f_in.read())
-                backup_path = decompressed_path
-            except Exception as e:
-                logger.error(f"Error decompressing backup: {e}")
-                return False
-        
-        # Restore from backup
-        shutil.copy2(backup_path, self.db_path)
+                source.backup(conn.connection, pages=self.config["backup_pages_per_step"], sleep=0.05)
+            finally:
+                conn.close()
+                source.close()
+        except Exception as e:
+            logger.error(f"Error restoring backup {backup_path}: {e}")
+            return False
+        finally:
+            os.remove(restore_path)
         
-        # Clean up temporary decompressed file if we created one
-        if backup_path.endswith(".db") and os.path.exists(backup_path) and backup_path != self.db_path:
-            try:
-                os.remove(backup_path)
-            except:
-                pass
+        # Cached results and user data belong to the replaced data
+        self.clear_all_caches()
+        self._reload_user_data()
         
         logger.info(f"Database restored from {backup_path}")
         return True
     
+    async def restore_backup_async(self, backup_path: str, confirm_text: str = None) -> bool:
+        """
+        Restore a backup on the database executor without blocking the event loop.
+        
+        Args:
+            backup_path: Path to the backup file
+            confirm_text: Must be 'CONFIRM_RESTORE' to proceed
+            
+        Returns:
+            bool: True if restore was successful
+        """
+        return await run_in_db_executor(self.restore_backup, backup_path, confirm_text)
+    
     def list_backups(self) -> List[Dict[str, Any]]:
         """
         List all available backups.
         
         Returns:
-            List[Dict[str, Any]]: List of backup information
+            List[Dict[str, Any]]: List of backup information, where "type" is
+            "full" or "differential" and differential backups name their
+            full backup under "base"
         """
         backups = []
         
         for filename in os.listdir(self.backup_dir):
-            if filename.endswith(".db") or filename.endswith(".db.gz"):
+            if filename.endswith(FULL_BACKUP_EXTENSIONS + DIFF_BACKUP_EXTENSIONS):
                 file_path = os.path.join(self.backup_dir, filename)
                 stat = os.stat(file_path)
                 
-                backups.append({
+                backup = {
                     "filename": filename,
                     "path": file_path,
                     "size_mb": round(stat.st_size / (1024 * 1024), 2),
-                    "created": datetime.fromtimestamp(stat.st_ctime).isoformat()
-                })
+                    "created": datetime.fromtimestamp(stat.st_ctime).isoformat(),
+                    "type": "full"
+                }
+                if filename.endswith(DIFF_BACKUP_EXTENSIONS):
+                    backup["type"] = "differential"
+                    try:
+                        with self._open_backup(file_path) as diff:
+                            backup["base"] = self._read_diff_header(diff)["base"]
+                    except (OSError, EOFError, ValueError, zlib.error) as e:
+                        logger.warning(f"Unreadable differential backup {filename}: {e}")
+                        backup["base"] = None
+                backups.append(backup)
         
         # Sort by creation time (newest first)
         backups.sort(key=lambda x: x["created"], reverse=True)
@@ -962,6 +1396,12 @@ class DatabaseManager:
         """
         Execute a database query with caching support.
         
+        Cacheable reads that miss the cache are coalesced: threads asking
+        for the same query while it runs wait for its result instead of
+        running it again. Empty results (no row, or no rows) are cached too,
+        for negative_cache_ttl_seconds, so lookups of missing users and
+        Veramon do not reach SQLite every time.
+        
         Args:
             query: SQL query to execute
             params: Query parameters
@@ -975,56 +1415,150 @@ class DatabaseManager:
         """
         # Only use cache for SELECT queries that are marked as cacheable
         is_select = query.strip().upper().startswith("SELECT")
-        use_cache = (
+        use_cache = self._is_cacheable(is_select, cacheable, fetch)
+        
+        # Try to get from cache
+        if use_cache:
+            cached_result = self.cache_manager.get_query_result(query, params, _NOT_CACHED)
+            if cached_result is not _NOT_CACHED:
+                return cached_result
+            
+            # Execute the query once for all threads that missed together
+            return self._query_flights.do(
+                (self.cache_manager.query_key(query, params), fetch),
+                self._read_and_cache, query, params, fetch, tables, ttl
+            )
+        
+        # Writes go through the single writer connection when the profile has one
+        if not is_select and get_write_queue() is not None:
+            result = run_write(self._execute_on_connection, query, params, fetch)
+            if tables:
+                self._modified_tables.update(tables)
+                self.invalidate_cache_for_tables(tables)
+            return result
+        
+        conn = get_connection()
+        try:
+            result = self._timed_execute(conn, query, params, fetch)
+            if not is_select:
+                conn.commit()
+        finally:
+            conn.close()
+            
+        # If this is a write operation, invalidate cached reads of the tables it changed
+        if not is_select and tables:
+            self._modified_tables.update(tables)
+            self.invalidate_cache_for_tables(tables)
+            
+        return result
+        
+    def _is_cacheable(self, is_select: bool, cacheable: bool, fetch: str) -> bool:
+        """Check whether a query's result may be cached and its reads coalesced."""
+        return (
             self.config.get("enable_query_caching", True) and 
             cacheable and 
             is_select and 
             fetch in ("all", "one")
         )
         
-        result = None
-        cache_hit = False
+    def _timed_execute(self, conn, query: str, params: Tuple, fetch: str) -> Any:
+        """Execute a query, fetch its result and log it if it is slow."""
+        cursor = conn.cursor()
         
-        # Try to get from cache
-        if use_cache:
-            cached_result = self.cache_manager.get_query_result(query, params)
-            if cached_result is not None:
-                result = cached_result
-                cache_hit = True
+        start_time = time.time()
+        cursor.execute(query, params or ())
         
-        # Execute the query if not cached
-        if not cache_hit:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            start_time = time.time()
-            cursor.execute(query, params or ())
-            
-            if fetch == "all":
-                result = cursor.fetchall()
-            elif fetch == "one":
-                result = cursor.fetchone()
-            else:
-                result = None
-                
-            # Track slow queries
-            elapsed_time = time.time() - start_time
-            if elapsed_time > 0.1:  # Log queries taking more than 100ms
-                logger.warning(f"Slow query: {query} took {elapsed_time:.4f}s")
+        if fetch == "all":
+            result = cursor.fetchall()
+        elif fetch == "one":
+            result = cursor.fetchone()
+        else:
+            result = None
             
-            # If this is a write operation, track modified tables for cache invalidation
-            if not is_select and tables:
-                self._modified_tables.update(tables)
-                
-            # Cache the result if appropriate
-            if use_cache and result is not None:
-                ttl = ttl or self.config.get("cache_ttl_seconds", 300)
-                self.cache_manager.cache_query_result(query, params, result, ttl, tables)
-                
+        # Track slow queries
+        elapsed_time = time.time() - start_time
+        if elapsed_time > 0.1:  # Log queries taking more than 100ms
+            logger.warning(f"Slow query: {query} took {elapsed_time:.4f}s")
+        return result
+        
+    def _read_and_cache(self, query: str, params: Tuple, fetch: str,
+                        tables: List[str], ttl: int) -> Any:
+        """Run a cacheable read and cache its result, empty or not."""
+        # Taken before the read so a change committed meanwhile is not cached as current
+        generations = self.cache_manager.query_generations(tables)
+        conn = get_connection()
+        try:
+            result = self._timed_execute(conn, query, params, fetch)
+        finally:
             conn.close()
-            
+        
+        if result is None or (fetch == "all" and not result):
+            ttl = self.config.get("negative_cache_ttl_seconds", 30)
+        else:
+            ttl = ttl or self.config.get("cache_ttl_seconds", 300)
+        if ttl:
+            self.cache_manager.cache_query_result(query, params, result, ttl, tables, generations)
         return result
         
+    def _execute_on_connection(self, conn, query: str, params: Tuple, fetch: str) -> Any:
+        """Write job that executes a query and fetches its result."""
+        cursor = conn.cursor()
+        cursor.execute(query, params or ())
+        
+        if fetch == "all":
+            return cursor.fetchall()
+        elif fetch == "one":
+            return cursor.fetchone()
+        return None
+        
+    async def execute_query_async(self, query: str, params: Tuple = None, fetch: str = "all",
+                                  cacheable: bool = False, tables: List[str] = None,
+                                  ttl: int = None) -> Any:
+        """
+        Execute a database query without blocking the event loop.
+        
+        Takes the same arguments as execute_query, which runs on the database
+        executor with the usual caching and connection pool behaviour.
+        Identical cacheable reads awaited at the same time share one executor
+        job, so a burst of them does not fill the executor with waiting
+        threads. A caller that is cancelled stops waiting without cancelling
+        the shared job.
+        
+        Returns:
+            Query results based on fetch mode
+        """
+        is_select = query.strip().upper().startswith("SELECT")
+        if not self._is_cacheable(is_select, cacheable, fetch):
+            return await run_in_db_executor(
+                self.execute_query, query, params, fetch, cacheable, tables, ttl
+            )
+        
+        cached_result = self.cache_manager.get_query_result(query, params, _NOT_CACHED)
+        if cached_result is not _NOT_CACHED:
+            return cached_result
+        
+        loop = asyncio.get_running_loop()
+        key = (self.cache_manager.query_key(query, params), fetch)
+        job = self._async_flights.get(key)
+        if job is None or job.get_loop() is not loop:
+            job = loop.create_task(run_in_db_executor(
+                self.execute_query, query, params, fetch, cacheable, tables, ttl
+            ))
+            self._async_flights[key] = job
+            job.add_done_callback(lambda done, key=key: self._finish_async_flight(key, done))
+            self._async_flight_stats["calls"] += 1
+        else:
+            self._async_flight_stats["shared"] += 1
+        return await asyncio.shield(job)
+        
+    def _finish_async_flight(self, key: Tuple, job: "asyncio.Task") -> None:
+        """Forget a finished shared read."""
+        if self._async_flights.get(key) is job:
+            del self._async_flights[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not job.cancelled():
+            job.exception()
+        
     def execute_script(self, script: str, params: Dict[str, Any] = None) -> None:
         """
         Execute a SQL script with parameter substitution.
@@ -1089,6 +1623,39 @@ class DatabaseManager:
         self.cache_manager.invalidate_tables(tables)
         logger.debug(f"Invalidated cache for tables: {', '.join(tables)}")
     
+    def _user_data_stores(self) -> List[Any]:
+        """Get the write-behind stores that keep user data in memory."""
+        # Imported here, as these modules sit above the database layer
+        from src.db.quest_store import get_quest_store
+        from src.utils.user_settings import get_settings_service
+        return [get_quest_store(), get_settings_service()]
+        
+    def _flush_user_data(self) -> None:
+        """Write the changes the write-behind stores still hold."""
+        for store in self._user_data_stores():
+            store.flush()
+        
+    def _reload_user_data(self) -> None:
+        """Drop in-memory user data, quest progress, battle baselines and rankings after the database was replaced."""
+        from src.utils.leaderboard_index import get_leaderboard_index
+        from src.models.quest_engine import get_quest_engine
+        from src.db.battle_events import get_battle_event_log
+        
+        for store in self._user_data_stores():
+            store.invalidate_all()
+        # Cached progress would otherwise be written over the restored quests
+        get_quest_engine().invalidate()
+        # Battles start again with a snapshot instead of deltas against replaced rows
+        get_battle_event_log().reset()
+        leaderboard_index = get_leaderboard_index()
+        try:
+            leaderboard_index.reconcile()
+        except Exception as e:
+            # Rankings load again on first use
+            logger.error(f"Error reloading leaderboard rankings: {e}")
+            leaderboard_index.invalidate()
+        logger.info("Reloaded user data stores, quest progress, battle baselines and leaderboard rankings")
+        
     def clear_all_caches(self) -> None:
         """Clear all database caches."""
         self.cache_manager.clear_all_caches()
@@ -1101,7 +1668,22 @@ class DatabaseManager:
         Returns:
             Dictionary with cache statistics
         """
-        return self.cache_manager.get_cache_stats()
+        stats = self.cache_manager.get_cache_stats()
+        stats["coalescing"] = {
+            "threads": self._query_flights.get_stats(),
+            "async": {**self._async_flight_stats, "in_flight": len(self._async_flights)}
+        }
+        return stats
+        
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics.
+        
+        Returns:
+            Dictionary with checkout wait times, in-use connections,
+            exhaustion events and connection ages
+        """
+        return get_connection_pool_stats()
         
     # User data methods with caching
     
@@ -1109,6 +1691,9 @@ class DatabaseManager:
         """
         Get user data with caching support.
         
+        Missing users are cached as empty results for a short time, and
+        concurrent lookups of the same user share one query.
+        
         Args:
             user_id: Discord user ID
             
@@ -1122,26 +1707,37 @@ class DatabaseManager:
                 return cached_user
                 
         # Query from database if not in cache
-        result = self.execute_query(
-            "SELECT * FROM users WHERE user_id = ?", 
-            (user_id,), 
-            fetch="one",
-            cacheable=True,
-            tables=["users"]
-        )
+        result = self.execute_query(*self._user_query(user_id))
+        return self._cache_user(user_id, result)
+    
+    async def get_user_async(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get user data without blocking the event loop.
         
-        if result:
-            # Convert to dictionary
-            columns = [col[0] for col in result.description] if hasattr(result, 'description') else []
-            user_data = dict(zip(columns, result))
+        Args:
+            user_id: Discord user ID
             
-            # Cache the result
-            if self.config.get("cache_frequent_user_data", True):
-                self.cache_manager.cache_user_data(user_id, user_data)
+        Returns:
+            User data dictionary or None if not found
+        """
+        if self.config.get("cache_frequent_user_data", True):
+            cached_user = self.cache_manager.get_user_data(user_id)
+            if cached_user is not None:
+                return cached_user
                 
-            return user_data
-        
-        return None
+        result = await self.execute_query_async(*self._user_query(user_id))
+        return self._cache_user(user_id, result)
+    
+    def _user_query(self, user_id: str) -> Tuple:
+        """Get the execute_query arguments that read one user."""
+        return "SELECT * FROM users WHERE user_id = ?", (user_id,), "one", True, ["users"]
+    
+    def _cache_user(self, user_id: str, result: Any) -> Optional[Dict[str, Any]]:
+        """Convert a users row to a dictionary and cache it."""
+        user_data = _row_to_dict(result)
+        if user_data is not None and self.config.get("cache_frequent_user_data", True):
+            self.cache_manager.cache_user_data(user_id, user_data)
+        return user_data
     
     def update_user(self, user_id: str, updates: Dict[str, Any]) -> bool:
         """
@@ -1183,6 +1779,9 @@ class DatabaseManager:
         """
         Get Veramon data with caching support.
         
+        Missing Veramon are cached as empty results for a short time, and
+        concurrent lookups of the same Veramon share one query.
+        
         Args:
             veramon_id: Veramon instance ID
             
@@ -1195,25 +1794,36 @@ class DatabaseManager:
             return cached_veramon
                 
         # Query from database if not in cache
-        result = self.execute_query(
-            "SELECT * FROM user_veramon WHERE id = ?", 
-            (veramon_id,), 
-            fetch="one",
-            cacheable=True,
-            tables=["user_veramon"]
-        )
+        result = self.execute_query(*self._veramon_query(veramon_id))
+        return self._cache_veramon(veramon_id, result)
+    
+    async def get_veramon_async(self, veramon_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get Veramon data without blocking the event loop.
         
-        if result:
-            # Convert to dictionary
-            columns = [col[0] for col in result.description] if hasattr(result, 'description') else []
-            veramon_data = dict(zip(columns, result))
+        Args:
+            veramon_id: Veramon instance ID
             
-            # Cache the result
-            self.cache_manager.cache_veramon_data(veramon_id, veramon_data)
+        Returns:
+            Veramon data dictionary or None if not found
+        """
+        cached_veramon = self.cache_manager.get_veramon_data(veramon_id)
+        if cached_veramon is not None:
+            return cached_veramon
                 
-            return veramon_data
-        
-        return None
+        result = await self.execute_query_async(*self._veramon_query(veramon_id))
+        return self._cache_veramon(veramon_id, result)
+    
+    def _veramon_query(self, veramon_id: str) -> Tuple:
+        """Get the execute_query arguments that read one Veramon."""
+        return "SELECT * FROM user_veramon WHERE id = ?", (veramon_id,), "one", True, ["user_veramon"]
+    
+    def _cache_veramon(self, veramon_id: str, result: Any) -> Optional[Dict[str, Any]]:
+        """Convert a user_veramon row to a dictionary and cache it."""
+        veramon_data = _row_to_dict(result)
+        if veramon_data is not None:
+            self.cache_manager.cache_veramon_data(veramon_id, veramon_data)
+        return veramon_data
     
     def update_veramon(self, veramon_id: str, updates: Dict[str, Any]) -> bool:
         """
@@ -0,0 +1,89 @@
+"""
+User Quest Store for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+QuestManager used to keep each user's quest progress in
+data/quests/<user_id>.json and rewrite the whole indented file on every
+progress update. Writes were not atomic and the directory grew by one file
+per player. This module keeps the same per-user quest data as one row per
+user in the user_quest_data table, behind the write-behind cache of
+UserDataStore.
+"""
+
+import logging
+
+from src.db.user_data_store import UserDataStore, read_json_dir, mark_migrated
+from src.utils.config_manager import get_config
+
+# Set up logging
+logger = logging.getLogger("quest_store")
+
+
+class UserQuestStore(UserDataStore):
+    """
+    Write-behind cache of per-user quest data backed by SQLite.
+
+    Callers that change a user's data in place must hold the lock while they
+    do, and call mark_dirty afterwards, so a flush never serializes data that
+    is half changed. Dirty users stay cached until they are written.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, max_users: int = 5000):
+        """
+        Initialize the store.
+
+        Args:
+            flush_interval: Maximum seconds a change waits before being written
+            max_users: Maximum number of clean users kept in memory
+        """
+        super().__init__("user_quest_data", flush_interval, max_users)
+
+    def migrate_json_files(self, quest_dir: str) -> int:
+        """
+        Import per-user JSON files left by the file-based storage.
+
+        Files are imported in one transaction and then renamed to
+        <user_id>.json.migrated, so the migration runs once. Users that
+        already have a row keep it.
+
+        Args:
+            quest_dir: Directory holding the <user_id>.json files
+
+        Returns:
+            int: Number of users imported
+        """
+        data, paths = read_json_dir(quest_dir)
+        if not data:
+            return 0
+
+        count = self.import_rows(data)
+        mark_migrated(paths)
+        logger.info(f"Migrated quest data of {count} users from {quest_dir}")
+        return count
+
+
+# Global instance
+_quest_store = None
+
+def get_quest_store() -> UserQuestStore:
+    """
+    Get the global user quest store instance.
+
+    Returns:
+        The global UserQuestStore instance
+    """
+    global _quest_store
+    if _quest_store is None:
+        _quest_store = UserQuestStore(
+            flush_interval=get_config("quest", "store_flush_interval", 5.0),
+            max_users=get_config("quest", "store_cache_size", 5000)
+        )
+    return _quest_store
+
+def shutdown_quest_store() -> None:
+    """Write unsaved quest progress and stop the flush thread."""
+    global _quest_store
+    if _quest_store is not None:
+        _quest_store.stop()
+        _quest_store = None
+        logger.info("User quest store shut down")
@@ -0,0 +1,769 @@
+"""
+Tiered Cache for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+src/utils/cache.py and src/db/cache_manager.py used to keep their own
+dictionaries, locks, TTL handling and statistics, and neither bounded the
+memory it used. This module is the one cache both are built on. Data lives
+in named namespaces, each with a byte budget enforced by a segmented LRU,
+optional TTLs and explicit invalidation. Namespaces marked persistent also
+write to a local SQLite file, so their entries survive restarts and entries
+evicted from memory can be read back instead of being recomputed.
+"""
+
+import os
+import sys
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.utils.config_manager import get_config
+
+# Set up logging
+logger = logging.getLogger("tiered_cache")
+
+_MISSING = object()
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Estimate the bytes held by a value.
+
+    Containers are followed two levels deep, which covers the rows, lists
+    of rows and dicts the bot caches without walking large object graphs.
+
+    Args:
+        value: Value to measure
+
+    Returns:
+        int: Estimated size in bytes
+    """
+    size = sys.getsizeof(value)
+    if _depth >= 2:
+        return size
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += estimate_size(key, _depth + 1) + estimate_size(item, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset, sqlite3.Row)):
+        for item in value:
+            size += estimate_size(item, _depth + 1)
+    return size
+
+
+class CacheItem:
+    """A value held in a namespace."""
+
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value: Any, size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at  # 0 for no expiry
+
+    def is_expired(self, now: float) -> bool:
+        return self.expires_at != 0 and now >= self.expires_at
+
+
+class DiskTier:
+    """
+    Second cache tier in a local SQLite file.
+
+    Values are pickled. Writes are batched; deletions are written at once so
+    an invalidated entry is never read back. The file is a cache, so it uses
+    no fsync and is trimmed to a maximum number of entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, batch_size: int = 256):
+        """
+        Open the disk tier.
+
+        Args:
+            path: Path of the SQLite file
+            max_entries: Maximum number of entries kept in the file
+            batch_size: Number of pending writes that triggers a flush
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_updated ON cache_entries(updated_at)")
+        self._pending: Dict[Tuple[str, str], Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "reads": 0,
+            "hits": 0,
+            "writes": 0,
+            "deletes": 0,
+            "errors": 0
+        }
+
+    def get(self, namespace: str, key: str) -> Tuple[bool, Any, float]:
+        """
+        Read an entry.
+
+        Returns:
+            (found, value, expires_at)
+        """
+        with self._lock:
+            self.stats["reads"] += 1
+            pending = self._pending.get((namespace, key))
+            if pending is not None:
+                blob, expires_at = pending
+            else:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (namespace, key)
+                ).fetchone()
+                if row is None:
+                    return False, None, 0
+                blob, expires_at = row
+
+        if expires_at and time.time() >= expires_at:
+            return False, None, 0
+        try:
+            value = pickle.loads(blob)
+        except Exception as e:
+            logger.warning(f"Unreadable disk cache entry {namespace}:{key}: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+            return False, None, 0
+
+        with self._lock:
+            self.stats["hits"] += 1
+        return True, value, expires_at
+
+    def put(self, namespace: str, key: str, value: Any, expires_at: float) -> bool:
+        """
+        Queue an entry to be written.
+
+        Returns:
+            bool: False if the value cannot be pickled
+        """
+        try:
+            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+            return False
+
+        with self._lock:
+            self._pending[(namespace, key)] = (blob, expires_at)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+        return True
+
+    def delete(self, namespace: str, key: str) -> None:
+        """Delete an entry."""
+        with self._lock:
+            self._pending.pop((namespace, key), None)
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+            self.stats["deletes"] += 1
+
+    def delete_matching(self, namespace: str, pattern: str) -> None:
+        """Delete the entries of a namespace whose key contains a pattern."""
+        with self._lock:
+            for pending_key in [k for k in self._pending if k[0] == namespace and pattern in k[1]]:
+                del self._pending[pending_key]
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND instr(key, ?) > 0",
+                (namespace, pattern)
+            )
+            self.stats["deletes"] += 1
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Delete every entry of a namespace, or of all namespaces if None."""
+        with self._lock:
+            if namespace is None:
+                self._pending.clear()
+                self._conn.execute("DELETE FROM cache_entries")
+            else:
+                for pending_key in [k for k in self._pending if k[0] == namespace]:
+                    del self._pending[pending_key]
+                self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+            self.stats["deletes"] += 1
+
+    def flush(self) -> int:
+        """
+        Write pending entries and trim the file.
+
+        Returns:
+            int: Number of entries written
+        """
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_locked(self) -> int:
+        """Write pending entries. Caller holds the lock."""
+        if not self._pending:
+            return 0
+        now = time.time()
+        rows = [(namespace, key, blob, expires_at, now)
+                for (namespace, key), (blob, expires_at) in self._pending.items()]
+        self._pending.clear()
+        try:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
+            self._conn.execute("DELETE FROM cache_entries WHERE expires_at != 0 AND expires_at <= ?", (now,))
+            excess = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute("""
+                    DELETE FROM cache_entries WHERE rowid IN (
+                        SELECT rowid FROM cache_entries ORDER BY updated_at LIMIT ?
+                    )
+                """, (excess,))
+            self._conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            self._conn.execute("ROLLBACK")
+            self.stats["errors"] += 1
+            logger.error(f"Error writing {len(rows)} disk cache entries: {e}")
+            return 0
+        self.stats["writes"] += len(rows)
+        return len(rows)
+
+    def close(self) -> None:
+        """Write pending entries and close the file."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get disk tier statistics."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+            return {
+                **self.stats,
+                "entries": entries,
+                "pending": len(self._pending),
+                "file_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            }
+
+
+class CacheNamespace:
+    """
+    A byte-bounded cache of one kind of data.
+
+    Eviction is a segmented LRU: new entries enter a probation segment and
+    move to a protected segment (up to protected_ratio of the budget) when
+    they are read again, so a burst of one-off entries only pushes out other
+    one-off entries. Listeners added with add_listener are called with
+    (key, value, reason) for every entry that leaves memory, after the
+    namespace lock is released.
+    """
+
+    def __init__(self, name: str, max_bytes: int, max_entries: Optional[int] = None,
+                 default_ttl: Optional[int] = None, disk: Optional[DiskTier] = None,
+                 protected_ratio: float = 0.8):
+        """
+        Initialize the namespace.
+
+        Args:
+            name: Name of the namespace
+            max_bytes: Memory budget in bytes
+            max_entries: Maximum number of entries (optional)
+            default_ttl: Default time to live in seconds (None for no expiry)
+            disk: Disk tier for entries with string keys (optional)
+            protected_ratio: Share of the budget for entries read more than once
+        """
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.disk = disk
+        self.protected_bytes = int(max_bytes * protected_ratio)
+        self._probation: "OrderedDict[Any, CacheItem]" = OrderedDict()
+        self._protected: "OrderedDict[Any, CacheItem]" = OrderedDict()
+        self._probation_size = 0
+        self._protected_size = 0
+        self._version = 0  # Bumped by every write, so stale disk reads are not cached
+        self._key_locks: Dict[Any, threading.Lock] = {}
+        self._listeners: List[Callable[[Any, Any, str], None]] = []
+        self._lock = threading.RLock()
+        self.stats = self._new_stats()
+
+    @staticmethod
+    def _new_stats() -> Dict[str, int]:
+        return {
+            "hits": 0,
+            "misses": 0,
+            "disk_hits": 0,
+            "stale": 0,
+            "inserts": 0,
+            "rejected": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._probation) + len(self._protected)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._probation or key in self._protected
+
+    def add_listener(self, listener: Callable[[Any, Any, str], None]) -> None:
+        """Call a listener with (key, value, reason) for each entry that leaves memory."""
+        self._listeners.append(listener)
+
+    def get(self, key: Any, default: Any = None,
+            validate: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Get a value from memory, or from the disk tier.
+
+        Args:
+            key: The cache key
+            default: Value to return if the key is not cached
+            validate: Check that a cached value is still usable; values that
+                fail it are removed and counted as stale misses
+
+        Returns:
+            The cached value or default
+        """
+        return self._get(key, default, validate, True)
+
+    def _get(self, key: Any, default: Any, validate: Optional[Callable[[Any], bool]],
+             count_miss: bool) -> Any:
+        """Look a key up in both tiers, counting the miss if count_miss is set."""
+        removed = []
+        with self._lock:
+            item = self._find(key, removed)
+            if item is not None and validate is not None and not validate(item.value):
+                removed.append((key, self._remove(key), "stale"))
+                self.stats["stale"] += 1
+                item = None
+            if item is not None:
+                self._touch(key, item, removed)
+                self.stats["hits"] += 1
+                value = item.value
+            version = self._version
+        self._notify(removed)
+        if item is not None:
+            return value
+
+        if self.disk is not None and isinstance(key, str):
+            found, value, expires_at = self.disk.get(self.name, key)
+            if found and (validate is None or validate(value)):
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                    if self._version == version and key not in self:
+                        self._insert(key, value, estimate_size(value), expires_at, removed)
+                self._notify(removed)
+                return value
+
+        if count_miss:
+            with self._lock:
+                self.stats["misses"] += 1
+        return default
+
+    def peek(self, key: Any, default: Any = None) -> Any:
+        """Get a value from memory without counting or reordering it."""
+        item = self._probation.get(key) or self._protected.get(key)
+        return default if item is None else item.value
+
+    def put(self, key: Any, value: Any, ttl: Optional[int] = None, size: Optional[int] = None) -> bool:
+        """
+        Add or replace a value.
+
+        Args:
+            key: The cache key
+            value: The value to cache
+            ttl: Time to live in seconds (default_ttl if None, 0 for no expiry)
+            size: Size in bytes (estimated if None)
+
+        Returns:
+            bool: False if the value is larger than the namespace budget
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+        expires_at = time.time() + ttl if ttl else 0
+        if size is None:
+            size = estimate_size(value)
+
+        removed = []
+        with self._lock:
+            self._version += 1
+            if key in self:
+                removed.append((key, self._remove(key), "replaced"))
+            if size > self.max_bytes:
+                self.stats["rejected"] += 1
+                stored = False
+            else:
+                self._insert(key, value, size, expires_at, removed)
+                self.stats["inserts"] += 1
+                stored = True
+            # Under the lock so a concurrent pop cannot be overwritten on disk
+            if stored and self.disk is not None and isinstance(key, str):
+                self.disk.put(self.name, key, value, expires_at)
+        self._notify(removed)
+        return stored
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        """
+        Remove a value from both tiers.
+
+        Returns:
+            The removed value, or default if it was not in memory
+        """
+        removed = []
+        with self._lock:
+            self._version += 1
+            value = default
+            if key in self:
+                value = self._remove(key)
+                removed.append((key, value, "invalidated"))
+                self.stats["invalidations"] += 1
+            if self.disk is not None and isinstance(key, str):
+                self.disk.delete(self.name, key)
+        self._notify(removed)
+        return value
+
+    def invalidate(self, key: Any) -> bool:
+        """
+        Remove a value from both tiers.
+
+        Returns:
+            True if the key was in memory
+        """
+        return self.pop(key, _MISSING) is not _MISSING
+
+    def invalidate_pattern(self, pattern: str) -> int:
+        """
+        Remove every value whose string key contains a pattern.
+
+        Scans all keys; prefer dedicated keys or namespaces for data that
+        is invalidated often.
+
+        Returns:
+            Number of entries removed from memory
+        """
+        if self.disk is not None:
+            self.disk.delete_matching(self.name, pattern)
+        removed = self.remove_if(lambda key, value: isinstance(key, str) and pattern in key, "invalidated")
+        with self._lock:
+            self.stats["invalidations"] += len(removed)
+        return len(removed)
+
+    def remove_if(self, predicate: Callable[[Any, Any], bool], reason: str = "removed") -> List[Tuple[Any, Any]]:
+        """
+        Remove the values in memory for which predicate(key, value) is true.
+
+        Returns:
+            List of removed (key, value) pairs
+        """
+        removed = []
+        with self._lock:
+            self._version += 1
+            for segment in (self._probation, self._protected):
+                for key in [key for key, item in segment.items() if predicate(key, item.value)]:
+                    removed.append((key, self._remove(key), reason))
+        self._notify(removed)
+        return [(key, value) for key, value, _ in removed]
+
+    def clear(self) -> int:
+        """
+        Remove every value from both tiers.
+
+        Returns:
+            Number of entries removed from memory
+        """
+        if self.disk is not None:
+            self.disk.clear(self.name)
+        return len(self.remove_if(lambda key, value: True, "cleared"))
+
+    def cleanup_expired(self) -> int:
+        """
+        Remove expired values from memory.
+
+        Returns:
+            Number of entries removed
+        """
+        removed = []
+        now = time.time()
+        with self._lock:
+            for segment in (self._probation, self._protected):
+                for key in [key for key, item in segment.items() if item.is_expired(now)]:
+                    removed.append((key, self._remove(key), "expired"))
+            self.stats["expirations"] += len(removed)
+        self._notify(removed)
+        return len(removed)
+
+    def get_or_set(self, key: Any, value_func: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+        """
+        Get a value or compute and cache it, once per key across threads.
+
+        Args:
+            key: The cache key
+            value_func: Function that computes the value
+            ttl: Time to live in seconds
+
+        Returns:
+            The cached or newly computed value
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                # Another thread may have computed it while we waited
+                value = self._get(key, _MISSING, None, False)
+                if value is _MISSING:
+                    value = value_func()
+                    self.put(key, value, ttl)
+                return value
+        finally:
+            with self._lock:
+                if self._key_locks.get(key) is key_lock and not key_lock.locked():
+                    del self._key_locks[key]
+
+    def reset_stats(self) -> None:
+        """Reset the counters."""
+        with self._lock:
+            self.stats = self._new_stats()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get namespace statistics.
+
+        Returns:
+            Dictionary with namespace statistics
+        """
+        with self._lock:
+            entries = len(self)
+            size = self._probation_size + self._protected_size
+            requests = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            return {
+                "total_items": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "utilization": size / self.max_bytes if self.max_bytes > 0 else 0,
+                "protected_items": len(self._protected),
+                "protected_bytes": self._protected_size,
+                "avg_entry_bytes": size / entries if entries else 0,
+                **self.stats,
+                "hit_rate": (self.stats["hits"] + self.stats["disk_hits"]) / requests if requests else 0,
+                "persistent": self.disk is not None
+            }
+
+    def _find(self, key: Any, removed: List) -> Optional[CacheItem]:
+        """Find an unexpired item. Caller holds the lock."""
+        item = self._probation.get(key)
+        if item is None:
+            item = self._protected.get(key)
+            if item is None:
+                return None
+        if item.is_expired(time.time()):
+            removed.append((key, self._remove(key), "expired"))
+            self.stats["expirations"] += 1
+            return None
+        return item
+
+    def _touch(self, key: Any, item: CacheItem, removed: List) -> None:
+        """Record a read: promote a probation item or refresh a protected one."""
+        if key in self._protected:
+            self._protected.move_to_end(key)
+            return
+        del self._probation[key]
+        self._probation_size -= item.size
+        self._protected[key] = item
+        self._protected_size += item.size
+        # Demote the least recently read protected items back to probation
+        while self._protected_size > self.protected_bytes and len(self._protected) > 1:
+            demoted_key, demoted = self._protected.popitem(last=False)
+            self._protected_size -= demoted.size
+            self._probation[demoted_key] = demoted
+            self._probation_size += demoted.size
+
+    def _insert(self, key: Any, value: Any, size: int, expires_at: float, removed: List) -> None:
+        """Add an item to probation and evict down to the budget. Caller holds the lock."""
+        self._probation[key] = CacheItem(value, size, expires_at)
+        self._probation_size += size
+        while (self._probation_size + self._protected_size > self.max_bytes
+               or (self.max_entries is not None and len(self) > self.max_entries)):
+            # The new item is the most recent in probation; it is only evicted last
+            segment = self._probation if len(self._probation) > 1 or not self._protected else self._protected
+            evicted_key = next(iter(segment))
+            removed.append((evicted_key, self._remove(evicted_key), "evicted"))
+            self.stats["evictions"] += 1
+
+    def _remove(self, key: Any) -> Any:
+        """Remove an item from memory and return its value. Caller holds the lock."""
+        item = self._probation.pop(key, None)
+        if item is not None:
+            self._probation_size -= item.size
+        else:
+            item = self._protected.pop(key)
+            self._protected_size -= item.size
+        return item.value
+
+    def _notify(self, removed: List[Tuple[Any, Any, str]]) -> None:
+        """Tell listeners about removed items."""
+        if not removed or not self._listeners:
+            return
+        for key, value, reason in removed:
+            for listener in self._listeners:
+                try:
+                    listener(key, value, reason)
+                except Exception as e:
+                    logger.error(f"Error in {self.name} cache listener: {e}")
+
+
+class TieredCache:
+    """
+    The namespaces of the application cache and their shared disk tier.
+
+    Namespaces are created on first use with a share of the memory budget
+    and report their statistics together.
+    """
+
+    def __init__(self, memory_bytes: int = 64 * 1024 * 1024, disk_path: Optional[str] = None,
+                 disk_max_entries: int = 100000):
+        """
+        Initialize the cache.
+
+        Args:
+            memory_bytes: Memory budget shared out to namespaces
+            disk_path: Path of the SQLite file for persistent namespaces (None to disable)
+            disk_max_entries: Maximum number of entries in the disk tier
+        """
+        self.memory_bytes = memory_bytes
+        self.disk = None
+        if disk_path:
+            try:
+                self.disk = DiskTier(disk_path, max_entries=disk_max_entries)
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Disk cache at {disk_path} unavailable, using memory only: {e}")
+        self.namespaces: Dict[str, CacheNamespace] = {}
+        self._lock = threading.Lock()
+
+    def namespace(self, name: str, share: float = 0.1, max_entries: Optional[int] = None,
+                  default_ttl: Optional[int] = None, persistent: bool = False) -> CacheNamespace:
+        """
+        Get a namespace, creating it on first use.
+
+        Args:
+            name: Name of the namespace
+            share: Share of the memory budget for the namespace
+            max_entries: Maximum number of entries (optional)
+            default_ttl: Default time to live in seconds (None for no expiry)
+            persistent: Whether entries with string keys also go to the disk tier
+
+        Returns:
+            The namespace
+        """
+        with self._lock:
+            namespace = self.namespaces.get(name)
+            if namespace is None:
+                namespace = CacheNamespace(
+                    name, int(self.memory_bytes * share), max_entries=max_entries,
+                    default_ttl=default_ttl, disk=self.disk if persistent else None
+                )
+                self.namespaces[name] = namespace
+            return namespace
+
+    def clear(self) -> int:
+        """
+        Clear every namespace.
+
+        Returns:
+            Number of entries removed from memory
+        """
+        return sum(namespace.clear() for namespace in list(self.namespaces.values()))
+
+    def cleanup_expired(self) -> int:
+        """
+        Remove expired entries from every namespace.
+
+        Returns:
+            Number of entries removed
+        """
+        return sum(namespace.cleanup_expired() for namespace in list(self.namespaces.values()))
+
+    def flush(self) -> int:
+        """Write pending disk tier entries."""
+        return self.disk.flush() if self.disk is not None else 0
+
+    def reset_stats(self) -> None:
+        """Reset the counters of every namespace."""
+        for namespace in list(self.namespaces.values()):
+            namespace.reset_stats()
+
+    def close(self) -> None:
+        """Write pending entries and close the disk tier."""
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+            for namespace in list(self.namespaces.values()):
+                namespace.disk = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics of every namespace and their totals.
+
+        Returns:
+            Dictionary with cache statistics
+        """
+        namespaces = {name: namespace.get_stats() for name, namespace in list(self.namespaces.items())}
+        totals = {key: sum(stats[key] for stats in namespaces.values())
+                  for key in ("total_items", "bytes", "hits", "disk_hits", "misses", "evictions",
+                              "expirations", "invalidations")}
+        requests = totals["hits"] + totals["disk_hits"] + totals["misses"]
+        return {
+            **totals,
+            "max_bytes": self.memory_bytes,
+            "hit_rate": (totals["hits"] + totals["disk_hits"]) / requests if requests else 0,
+            "namespaces": namespaces,
+            "disk": self.disk.get_stats() if self.disk is not None else None
+        }
+
+
+# Global instance
+_tiered_cache = None
+
+def get_tiered_cache() -> TieredCache:
+    """
+    Get the global tiered cache instance.
+
+    Returns:
+        The global TieredCache instance
+    """
+    global _tiered_cache
+    if _tiered_cache is None:
+        _tiered_cache = TieredCache(
+            memory_bytes=int(get_config("general", "cache_memory_mb", 64) * 1024 * 1024),
+            disk_path=get_config("general", "cache_disk_path", None),
+            disk_max_entries=get_config("general", "cache_disk_max_entries", 100000)
+        )
+    return _tiered_cache
+
+def shutdown_tiered_cache() -> None:
+    """Write pending disk entries and close the disk tier."""
+    global _tiered_cache
+    if _tiered_cache is not None:
+        _tiered_cache.close()
+        _tiered_cache = None
+        logger.info("Tiered cache shut down")
@@ -0,0 +1,408 @@
+"""
+User Data Store for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+Per-user documents such as quest progress and settings used to live in one
+JSON file per user, rewritten in full on every change. This module keeps
+such documents as one row per user in a SQLite table, behind an in-memory
+write-behind cache: changes only mark a user dirty, and a background thread
+writes every dirty user in one transaction each flush_interval. It also
+has helpers to import the old per-user files once.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.db.db import get_connection, run_write
+
+# Set up logging
+logger = logging.getLogger("user_data_store")
+
+
+def read_json_dir(directory: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Read the <user_id>.json files of a directory.
+
+    Files that cannot be parsed are logged and skipped.
+
+    Args:
+        directory: Directory to read
+
+    Returns:
+        (dict of user ID to parsed data, paths of the files read)
+    """
+    data = {}
+    paths = []
+    if not os.path.isdir(directory):
+        return data, paths
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        if not filename.endswith(".json") or not os.path.isfile(path):
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data[filename[:-len(".json")]] = json.load(f)
+        except Exception as e:
+            logger.error(f"Skipping user data file {path}: {e}")
+            continue
+        paths.append(path)
+    return data, paths
+
+
+def mark_migrated(paths: List[str]) -> None:
+    """Rename imported files to <name>.migrated so they are not imported again."""
+    for path in paths:
+        os.replace(path, path + ".migrated")
+
+
+class UserDataStore:
+    """
+    Write-behind cache of per-user JSON data backed by a SQLite table.
+
+    Callers that change a user's data in place must hold the lock while they
+    do, and call mark_dirty afterwards, so a flush never serializes data that
+    is half changed. Dirty users stay cached until they are written.
+    """
+
+    def __init__(self, table: str, flush_interval: float = 5.0, max_users: int = 5000):
+        """
+        Initialize the store.
+
+        Args:
+            table: Name of the table holding one row per user
+            flush_interval: Maximum seconds a change waits before being written
+            max_users: Maximum number of clean users kept in memory
+        """
+        self.table = table
+        self.flush_interval = flush_interval
+        self.max_users = max_users
+        self.lock = threading.RLock()
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._dirty: set = set()
+        self._flushing: set = set()  # users whose write is in flight
+        self._table_ready = False
+        # Bumped whenever rows are written, so loads can tell their row is stale
+        self._generation = 0
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {
+            "hits": 0,
+            "loads": 0,
+            "updates": 0,
+            "flushes": 0,
+            "rows_written": 0,
+            "failed_flushes": 0,
+            "evicted": 0
+        }
+
+    def _create_table(self, cursor) -> None:
+        """Create the data table if it doesn't exist."""
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                user_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def _ensure_table(self) -> None:
+        """Create the table once per store, through the write queue."""
+        if not self._table_ready:
+            run_write(lambda conn: self._create_table(conn.cursor()))
+            self._table_ready = True
+
+    def _prepare(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Adjust a user's data after it is loaded; subclasses fill in defaults here."""
+        return data
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        """
+        Get a user's data, loading it from the database if needed.
+
+        The returned dict is the cached copy; hold the lock while changing
+        it and call mark_dirty afterwards.
+
+        Args:
+            user_id: Discord ID of the user
+
+        Returns:
+            The user's data, empty if the user has none
+        """
+        user_id = str(user_id)
+        while True:
+            with self.lock:
+                data = self._data.get(user_id)
+                if data is not None:
+                    self._data.move_to_end(user_id)
+                    self.stats["hits"] += 1
+                    return data
+                generation = self._generation
+
+            # Read without the lock, so other users' lookups and changes
+            # don't wait on the database
+            self._ensure_table()
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT data FROM {self.table} WHERE user_id = ?", (user_id,))
+                row = cursor.fetchone()
+            finally:
+                conn.close()
+
+            data = {}
+            if row is not None:
+                try:
+                    data = json.loads(row[0])
+                except ValueError as e:
+                    logger.error(f"Error loading {self.table} of user {user_id}: {e}")
+            data = self._prepare(data)
+
+            with self.lock:
+                cached = self._data.get(user_id)
+                if cached is not None:
+                    # Loaded or replaced by another caller meanwhile
+                    self._data.move_to_end(user_id)
+                    return cached
+                if generation != self._generation:
+                    # Rows were written meanwhile, so the row read may be stale
+                    continue
+                self.stats["loads"] += 1
+                self._data[user_id] = data
+                self._evict()
+                return data
+
+    def preload(self, limit: Optional[int] = None) -> int:
+        """
+        Load the most recently updated users into memory, e.g. at startup.
+
+        Args:
+            limit: Maximum number of users to load (max_users if None)
+
+        Returns:
+            int: Number of users loaded
+        """
+        limit = self.max_users if limit is None else min(limit, self.max_users)
+        self._ensure_table()
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT user_id, data FROM {self.table}
+                ORDER BY updated_at DESC
+                LIMIT ?
+            """, (limit,))
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        loaded = 0
+        with self.lock:
+            # Oldest first, so the most recent users end up most recently used
+            for user_id, data_json in reversed(rows):
+                if user_id in self._data:
+                    continue
+                try:
+                    self._data[user_id] = self._prepare(json.loads(data_json))
+                except ValueError as e:
+                    logger.error(f"Error loading {self.table} of user {user_id}: {e}")
+                    continue
+                loaded += 1
+            self.stats["loads"] += loaded
+            self._evict()
+        return loaded
+
+    def put(self, user_id: str, data: Dict[str, Any]) -> None:
+        """Replace a user's data."""
+        user_id = str(user_id)
+        with self.lock:
+            self._data[user_id] = data
+            self._data.move_to_end(user_id)
+            self.mark_dirty(user_id)
+
+    def holds(self, user_id: str, data: Dict[str, Any]) -> bool:
+        """
+        Check whether data is the dict the store caches for a user.
+
+        Callers that got data from get without the lock check this with the
+        lock held before changing it, as the user may have been evicted or
+        replaced meanwhile.
+        """
+        with self.lock:
+            return self._data.get(str(user_id)) is data
+
+    def mark_dirty(self, user_id: str) -> None:
+        """
+        Queue a user's cached data to be written on the next flush.
+
+        Users that are not cached are ignored, as there is no data to write;
+        their changes were made to a dict the store no longer holds.
+        """
+        user_id = str(user_id)
+        with self.lock:
+            if user_id not in self._data:
+                logger.warning(f"Ignoring change to {self.table} of uncached user {user_id}")
+                return
+            self._dirty.add(user_id)
+            self.stats["updates"] += 1
+        self.start()
+
+    def _evict(self) -> None:
+        """Drop the least recently used clean users over the limit, never ones being written."""
+        excess = len(self._data) - self.max_users
+        if excess <= 0:
+            return
+        # The most recently used user is kept, as its caller is about to use it
+        for user_id in list(self._data)[:-1]:
+            if excess <= 0:
+                break
+            if user_id not in self._dirty and user_id not in self._flushing:
+                del self._data[user_id]
+                self.stats["evicted"] += 1
+                excess -= 1
+
+    def _write_rows(self, conn, rows: List[Tuple[str, str, float]]) -> None:
+        """Write job that upserts the data of several users."""
+        cursor = conn.cursor()
+        self._create_table(cursor)
+        cursor.executemany(f"""
+            INSERT INTO {self.table} (user_id, data, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+            data = excluded.data,
+            updated_at = excluded.updated_at
+        """, rows)
+
+    def _import_rows(self, conn, rows: List[Tuple[str, str, float]]) -> None:
+        """Write job that inserts migrated users without replacing existing rows."""
+        cursor = conn.cursor()
+        self._create_table(cursor)
+        cursor.executemany(f"""
+            INSERT INTO {self.table} (user_id, data, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id) DO NOTHING
+        """, rows)
+
+    def import_rows(self, data: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Import users in one transaction, keeping users that already have a row.
+
+        Args:
+            data: Dict of user ID to data
+
+        Returns:
+            int: Number of users given
+        """
+        if not data:
+            return 0
+        now = time.time()
+        rows = [(str(user_id), json.dumps(user_data, separators=(",", ":")), now)
+                for user_id, user_data in data.items()]
+        run_write(self._import_rows, rows)
+        with self.lock:
+            self._generation += 1
+            for user_id, _, _ in rows:
+                if user_id not in self._dirty and user_id not in self._flushing:
+                    self._data.pop(user_id, None)
+        return len(rows)
+
+    def flush(self) -> int:
+        """
+        Write every dirty user in one transaction.
+
+        Users being written stay pinned in memory until the write commits,
+        so they are neither evicted nor reloaded from their old row, and stay
+        dirty if the write fails, so the next flush retries them.
+
+        Returns:
+            int: Number of users written
+        """
+        with self._flush_lock:
+            with self.lock:
+                dirty = {user_id for user_id in self._dirty if user_id in self._data}
+                if len(dirty) < len(self._dirty):
+                    logger.warning(f"Skipping {len(self._dirty) - len(dirty)} uncached users of {self.table}")
+                if not dirty:
+                    self._dirty = set()
+                    return 0
+                now = time.time()
+                self._dirty = set()
+                self._flushing = dirty
+                # Loads that read before the write must not cache what they read
+                self._generation += 1
+                rows = [(user_id, json.dumps(self._data[user_id], separators=(",", ":")), now)
+                        for user_id in dirty]
+
+            try:
+                run_write(self._write_rows, rows)
+            except Exception as e:
+                logger.error(f"Failed to write {self.table} of {len(rows)} users: {e}")
+                with self.lock:
+                    self._flushing = set()
+                    self._dirty |= dirty
+                    self.stats["failed_flushes"] += 1
+                return 0
+
+            with self.lock:
+                self._flushing = set()
+                self.stats["flushes"] += 1
+                self.stats["rows_written"] += len(rows)
+                self._evict()
+            return len(rows)
+
+    def invalidate_all(self) -> None:
+        """
+        Drop every cached user, including unsaved changes, e.g. after a restore.
+
+        The next get reads the user's row again and recreates the table if
+        the restored database has none.
+        """
+        with self._flush_lock:
+            with self.lock:
+                self._data.clear()
+                self._dirty = set()
+                self._table_ready = False
+                self._generation += 1
+
+    def start(self) -> None:
+        """Start the background flush thread if it is not running."""
+        with self.lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"veramon-{self.table}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the flush thread and write everything still dirty."""
+        with self.lock:
+            thread = self._thread
+            self._thread = None
+        if thread:
+            self._stop.set()
+            thread.join(timeout)
+        self.flush()
+
+    def _run(self) -> None:
+        """Flush thread main loop."""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing {self.table}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics."""
+        with self.lock:
+            return {
+                **self.stats,
+                "cached_users": len(self._data),
+                "dirty_users": len(self._dirty)
+            }
+
+
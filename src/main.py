@@ -166,6 +166,7 @@ async def create_fallback_cog(cog_type):
 async def setup_database():
     """Initialize the database with required tables."""
     from src.db.db_manager import get_db_manager
+    from src.utils.user_settings import get_settings_service
     
     print("Setting up database...")
     
@@ -184,6 +185,11 @@ async def setup_database():
     db_manager = get_db_manager()
     db_manager.initialize_database()
     
+    # Move settings out of the old per-user files and warm the settings cache
+    settings_service = get_settings_service()
+    settings_service.migrate_legacy_files()
+    settings_service.preload()
+    
     print(f"Database setup complete. Version: {db_manager.get_db_version()}")
 
 @bot.event
@@ -290,12 +296,37 @@ async def on_guild_join(guild):
     except Exception as e:
         print(f"⚠️ Error in on_guild_join event: {e}")
 
+async def shutdown_services():
+    """Release background resources once the bot has stopped."""
+    from src.utils.metrics_exporter import shutdown_metrics_exporter
+    from src.db.async_db import shutdown_db_executor
+    from src.db.audit_writer import shutdown_audit_writer
+    from src.db.quest_store import shutdown_quest_store
+    from src.utils.user_settings import shutdown_settings_service
+    from src.db.tiered_cache import shutdown_tiered_cache
+    
+    shutdown_metrics_exporter()
+    
+    # Flush queued audit rows, quest progress and settings before the database executor goes away
+    shutdown_audit_writer()
+    shutdown_quest_store()
+    shutdown_settings_service()
+    shutdown_tiered_cache()
+    shutdown_db_executor()
+
 async def main():
+    from src.utils.metrics_exporter import start_metrics_exporter
+    
     async with bot:
-        await setup_database()
-        await load_extensions()
-        setup_shortcut_handler(bot)  # Initialize shortcut handler with bot parameter
-        await bot.start(TOKEN)
+        try:
+            # Serve local metrics (for the healthcheck) if METRICS_PORT is set
+            start_metrics_exporter()
+            await setup_database()
+            await load_extensions()
+            setup_shortcut_handler(bot)  # Initialize shortcut handler with bot parameter
+            await bot.start(TOKEN)
+        finally:
+            await shutdown_services()
 
 if __name__ == "__main__":
     asyncio.run(main())
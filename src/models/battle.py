@@ -13,16 +13,39 @@ import logging
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Dict, List, Optional, Tuple, Union, Any, Callable
-from functools import lru_cache
 
 from src.models.veramon import Veramon
 from src.db.cache_manager import get_cache_manager
 from src.utils.performance_monitor import get_performance_monitor
 from src.utils.battle_metrics import get_battle_metrics
+from src.utils.rng import get_rng_service, ReplayableRandom
+from src.utils.data_loader import load_abilities_data
+from src.utils.type_registry import DEFAULT_TYPE_CHART, get_type_registry
 
 # Set up logging
 logger = logging.getLogger("battle")
 
+# Ability data shared by all battles, loaded on first use
+_abilities_data = None
+
+def _get_abilities_data() -> Dict[str, Dict[str, Any]]:
+    """Get move data from abilities.json."""
+    global _abilities_data
+    if _abilities_data is None:
+        try:
+            abilities = load_abilities_data()
+        except Exception as e:
+            logger.error(f"Error loading ability data: {e}")
+            abilities = {}
+            
+        # Intern move types once, so damage lookups index by code
+        type_registry = get_type_registry()
+        for ability in abilities.values():
+            if isinstance(ability, dict):
+                ability["type_code"] = type_registry.intern(ability.get("type"))
+        _abilities_data = abilities
+    return _abilities_data
+
 class BattleType(Enum):
     PVP = "pvp"              # Player vs Player (1v1)
     PVE = "pve"              # Player vs NPC
@@ -87,27 +110,7 @@ class Battle:
     }
     
     # Move type effectiveness multipliers
-    TYPE_CHART = {
-        # Format: {attacking_type: {defending_type: multiplier}}
-        "normal": {"rock": 0.5, "steel": 0.5, "ghost": 0},
-        "fire": {"fire": 0.5, "water": 0.5, "grass": 2.0, "ice": 2.0, "bug": 2.0, "rock": 0.5, "dragon": 0.5, "steel": 2.0},
-        "water": {"fire": 2.0, "water": 0.5, "grass": 0.5, "ground": 2.0, "rock": 2.0, "dragon": 0.5},
-        "electric": {"water": 2.0, "electric": 0.5, "grass": 0.5, "ground": 0, "flying": 2.0, "dragon": 0.5},
-        "grass": {"fire": 0.5, "water": 2.0, "grass": 0.5, "poison": 0.5, "ground": 2.0, "flying": 0.5, "bug": 0.5, "rock": 2.0, "dragon": 0.5, "steel": 0.5},
-        "ice": {"fire": 0.5, "water": 0.5, "grass": 2.0, "ice": 0.5, "ground": 2.0, "flying": 2.0, "dragon": 2.0, "steel": 0.5},
-        "fighting": {"normal": 2.0, "ice": 2.0, "poison": 0.5, "flying": 0.5, "psychic": 0.5, "bug": 0.5, "rock": 2.0, "ghost": 0, "dark": 2.0, "steel": 2.0, "fairy": 0.5},
-        "poison": {"grass": 2.0, "poison": 0.5, "ground": 0.5, "rock": 0.5, "ghost": 0.5, "steel": 0, "fairy": 2.0},
-        "ground": {"fire": 2.0, "electric": 2.0, "grass": 0.5, "poison": 2.0, "flying": 0, "bug": 0.5, "rock": 2.0, "steel": 2.0},
-        "flying": {"electric": 0.5, "grass": 2.0, "fighting": 2.0, "bug": 2.0, "rock": 0.5, "steel": 0.5},
-        "psychic": {"fighting": 2.0, "poison": 2.0, "psychic": 0.5, "dark": 0, "steel": 0.5},
-        "bug": {"fire": 0.5, "grass": 2.0, "fighting": 0.5, "poison": 0.5, "flying": 0.5, "psychic": 2.0, "ghost": 0.5, "dark": 2.0, "steel": 0.5, "fairy": 0.5},
-        "rock": {"fire": 2.0, "ice": 2.0, "fighting": 0.5, "ground": 0.5, "flying": 2.0, "bug": 2.0, "steel": 0.5},
-        "ghost": {"normal": 0, "psychic": 2.0, "ghost": 2.0, "dark": 0.5},
-        "dragon": {"dragon": 2.0, "steel": 0.5, "fairy": 0},
-        "dark": {"fighting": 0.5, "psychic": 2.0, "ghost": 2.0, "dark": 0.5, "fairy": 0.5},
-        "steel": {"fire": 0.5, "water": 0.5, "electric": 0.5, "ice": 2.0, "rock": 2.0, "steel": 0.5, "fairy": 2.0},
-        "fairy": {"fire": 0.5, "fighting": 2.0, "poison": 0.5, "dragon": 2.0, "dark": 2.0, "steel": 0.5}
-    }
+    TYPE_CHART = DEFAULT_TYPE_CHART
     
     # Critical hit chance and multiplier
     CRITICAL_HIT_CHANCE = 0.1  # 10% chance
@@ -117,13 +120,17 @@ class Battle:
     DAMAGE_RANDOM_MIN = 0.85
     DAMAGE_RANDOM_MAX = 1.0
     
+    # Maximum number of base damage results cached per battle
+    DAMAGE_CACHE_SIZE = 512
+    
     def __init__(
         self,
         battle_id: int,
         battle_type: BattleType,
         host_id: str,
         teams: List[Dict[str, Any]] = None,
-        expiry_minutes: int = 5
+        expiry_minutes: int = 5,
+        seed: Optional[int] = None
     ):
         self.battle_id = battle_id
         self.battle_type = battle_type
@@ -145,12 +152,19 @@ class Battle:
         self.status_effects = {}  # Veramon ID -> list of status effects
         self.field_conditions = {}  # Field-wide conditions
         
+        # Every roll in this battle comes from its own generator, so a battle
+        # can be replayed from its seed and the same actions
+        self.rng_seed = seed if seed is not None else get_rng_service().seed_for("battle", battle_id)
+        self.rng = ReplayableRandom(self.rng_seed)
+        
         # Cache manager for battle-related data
         self.cache_manager = get_cache_manager()
         
         # Calculation cache (in-memory for this battle instance)
         self._move_result_cache = {}
         self._stat_cache = {}
+        self._damage_cache = {}
+        self.damage_cache_stats = {"hits": 0, "misses": 0}
         
         # Performance tracking
         self.performance_monitor = get_performance_monitor()
@@ -574,81 +588,9 @@ class Battle:
         if not move_type or not defender_type:
             return 1.0
             
-        # Get type chart for attacking move
-        type_matchups = self.TYPE_CHART.get(move_type.lower(), {})
-        
-        # Return multiplier or default to 1.0 (neutral)
-        return type_matchups.get(defender_type.lower(), 1.0)
+        type_registry = get_type_registry()
+        return type_registry.single(type_registry.code(move_type), type_registry.code(defender_type))
     
-    @lru_cache(maxsize=128)
-    def _calculate_move_result(self, attacker: Veramon, defender: Veramon, move_name: str) -> Dict[str, Any]:
-        """Calculate the result of a move, including damage and effects."""
-        # Find the move in attacker's move list
-        move = next((m for m in attacker.moves if m["name"] == move_name), None)
-        
-        if not move:
-            return {"success": False, "message": "Move not found"}
-            
-        # Extract move properties
-        power = move.get("power", 0)
-        accuracy = move.get("accuracy", 100)
-        move_type = move.get("type", "normal")
-        
-        # Check if move hits based on accuracy
-        hit_roll = random.randint(1, 100)
-        if hit_roll > accuracy:
-            return {"success": False, "message": "Move missed"}
-            
-        # Initialize result
-        result = {
-            "success": True,
-            "damage": 0
-        }
-            
-        # Calculate damage for damaging moves
-        if power > 0:
-            # Get attacker's attack stat (with modifiers)
-            attack_stat = getattr(attacker, "attack", 10)
-            # Get defender's defense stat (with modifiers)
-            defense_stat = getattr(defender, "defense", 10)
-            
-            # Apply type effectiveness
-            type_multiplier = 1.0
-            if hasattr(defender, "type"):
-                defender_type = getattr(defender, "type", "normal")
-                type_multiplier = self._calculate_type_effectiveness(move_type, defender_type)
-            
-            # Base damage formula
-            damage_formula = (2 * attacker.level / 5 + 2) * power * attack_stat / defense_stat / 50 + 2
-            
-            # Apply type effectiveness
-            damage = int(damage_formula * type_multiplier)
-            
-            # Critical hit check
-            is_critical = random.random() < self.CRITICAL_HIT_CHANCE
-            if is_critical:
-                damage = int(damage * self.CRITICAL_HIT_MULTIPLIER)
-                
-            # Apply random factor
-            random_factor = self.DAMAGE_RANDOM_MIN + random.random() * (self.DAMAGE_RANDOM_MAX - self.DAMAGE_RANDOM_MIN)
-            damage = int(damage * random_factor)
-            
-            # Ensure minimum damage
-            damage = max(1, damage)
-                
-            # Update result with damage info
-            result.update({
-                "damage": damage,
-                "is_critical": is_critical,
-                "effectiveness": type_multiplier
-            })
-            
-        # Add effects if present
-        if "effects" in move and move["effects"]:
-            result["effects"] = move["effects"]
-            
-        return result
-
     def _check_battle_end(self) -> Dict[str, Any]:
         """Check if the battle has ended and determine the winner."""
         # Check each team's Veramon health
@@ -976,27 +918,106 @@ class Battle:
             
         return {"success": True, "results": results, "next_turn": self.current_turn}
         
+    def _get_move_data(self, attacker: Veramon, move_name: str) -> Dict[str, Any]:
+        """Get a move's data from the attacker's move list or the ability data."""
+        for move in getattr(attacker, "moves", []):
+            if isinstance(move, dict) and move.get("name") == move_name:
+                return move
+        return _get_abilities_data().get(move_name, {})
+        
+    def _get_type_multiplier(self, move_type: Union[str, int], defender: Veramon) -> float:
+        """Get the combined effectiveness of a move type name or code against all the defender's types."""
+        type_registry = get_type_registry()
+        if isinstance(move_type, str):
+            move_type = type_registry.code(move_type)
+        combo = getattr(defender, "type_combo", None)
+        if combo is None:
+            defender_types = getattr(defender, "types", None) or getattr(defender, "type", None) or []
+            if isinstance(defender_types, str):
+                defender_types = [defender_types]
+            combo = type_registry.combo(defender_types)
+        return type_registry.effectiveness(move_type, combo)
+        
+    def _get_base_damage(self, attacker: Veramon, defender: Veramon, move_name: str,
+                         power: int, type_multiplier: float) -> float:
+        """
+        Get the damage of a move before critical hits and the random roll.
+        
+        Results are cached per battle by snapshots of the stats they depend
+        on, so a stat stage or form change gives a new key instead of a
+        stale result. Keys hold only plain values, never Veramon objects.
+        """
+        level = getattr(attacker, "level", 1)
+        attack_stat = getattr(attacker, "attack", 10)
+        defense_stat = getattr(defender, "defense", 10) or 1
+        
+        cache_key = (
+            (level, attack_stat, getattr(attacker, "active_form", None)),
+            (defense_stat, getattr(defender, "active_form", None)),
+            move_name,
+            type_multiplier
+        )
+        base_damage = self._damage_cache.get(cache_key)
+        if base_damage is not None:
+            self.damage_cache_stats["hits"] += 1
+            return base_damage
+            
+        self.damage_cache_stats["misses"] += 1
+        base_damage = ((2 * level / 5 + 2) * power * attack_stat / defense_stat / 50 + 2) * type_multiplier
+        
+        if len(self._damage_cache) >= self.DAMAGE_CACHE_SIZE:
+            self._damage_cache.clear()
+        self._damage_cache[cache_key] = base_damage
+        return base_damage
+        
     def _calculate_move_result(self, attacker: Veramon, defender: Veramon, move_name: str) -> Dict[str, Any]:
         """Calculate the result of a move, including damage and effects."""
-        # This would use your ability data from abilities.json
-        # For simplicity, we'll just do a basic calculation here
-        base_damage = random.randint(10, 20)
-        critical_hit = random.random() < 0.1
-        type_effectiveness = random.choice([0.5, 1.0, 2.0])  # Simplified
-        
-        damage_multiplier = 1.0
+        move = self._get_move_data(attacker, move_name)
+        power = move.get("power") or 0
+        move_type = move.get("type") or "normal"
+        effects = move.get("effects") or []
+        
+        # Accuracy is a fraction in the ability data and a percentage in older move lists
+        accuracy = move.get("accuracy", 1.0)
+        if accuracy > 1:
+            accuracy /= 100
+        if self.rng.random() > accuracy:
+            return {
+                "damage": 0,
+                "missed": True,
+                "critical_hit": False,
+                "type_effectiveness": 1.0,
+                "effects": [],
+                "message": f"{move_name} missed!"
+            }
+            
+        if power <= 0:
+            return {
+                "damage": 0,
+                "critical_hit": False,
+                "type_effectiveness": 1.0,
+                "effects": effects,
+                "message": f"Used {move_name}!"
+            }
+            
+        # The deterministic part comes from the cache, the rolls are applied after
+        type_multiplier = self._get_type_multiplier(move.get("type_code", move_type), defender)
+        base_damage = self._get_base_damage(attacker, defender, move_name, power, type_multiplier)
+        
+        critical_hit = self.rng.random() < self.CRITICAL_HIT_CHANCE
+        random_factor = self.DAMAGE_RANDOM_MIN + self.rng.random() * (self.DAMAGE_RANDOM_MAX - self.DAMAGE_RANDOM_MIN)
+        
+        damage = base_damage * random_factor
         if critical_hit:
-            damage_multiplier *= 1.5
-        damage_multiplier *= type_effectiveness
-        
-        final_damage = int(base_damage * damage_multiplier)
+            damage *= self.CRITICAL_HIT_MULTIPLIER
+        final_damage = max(1, int(damage)) if type_multiplier > 0 else 0
         
         return {
             "damage": final_damage,
             "critical_hit": critical_hit,
-            "type_effectiveness": type_effectiveness,
-            "effects": [],
-            "message": f"Dealt {final_damage} damage!"
+            "type_effectiveness": type_multiplier,
+            "effects": effects,
+            "message": f"Dealt {final_damage} damage!" if final_damage else "It had no effect!"
         }
         
     def _check_battle_end(self) -> bool:
@@ -1263,7 +1284,7 @@ class Battle:
                 flee_chance *= condition["flee_chance_modifier"]
                 
         # Attempt to flee
-        roll = random.random()
+        roll = self.rng.random()
         if roll < flee_chance:
             # Successfully fled
             self.status = BattleStatus.CANCELLED
@@ -1489,7 +1510,7 @@ class Battle:
             "current_turn": self.current_turn,
             "turn_number": self.turn_number,
             "winner_id": self.winner_id,
-            "start_time": self.start_time,
+            "start_time": getattr(self, "start_time", None),
             "end_time": getattr(self, "end_time", None),
             "participants": self.participants,
             "teams": self.teams,
@@ -1497,7 +1518,9 @@ class Battle:
             "active_veramon": self.active_veramon,
             "battle_log": self.battle_log,
             "turn_order": self.turn_order,
-            "field_conditions": getattr(self, "field_conditions", {})
+            "field_conditions": getattr(self, "field_conditions", {}),
+            "rng_seed": self.rng_seed,
+            "rng_draws": self.rng.draws
         }
         
         return state
@@ -1541,7 +1564,13 @@ class Battle:
         self.battle_log = state.get("battle_log", [])
         self.turn_order = state.get("turn_order", [])
         self.field_conditions = state.get("field_conditions", {})
-        
+
+        # Restore the random generator, continuing where it left off if the
+        # state was saved mid-battle
+        self.rng_seed = state.get("rng_seed", self.rng_seed)
+        self.rng.seed(self.rng_seed)
+        self.rng.advance(state.get("rng_draws", 0))
+
         # Rebuild caches if needed
         self._clear_all_caches()
         
@@ -1553,6 +1582,8 @@ class Battle:
             self._stat_cache.clear()
         if hasattr(self, '_effect_cache'):
             self._effect_cache.clear()
+        if hasattr(self, '_damage_cache'):
+            self._damage_cache.clear()
 
     STATUS_EFFECT_TYPES = [
         "poison", "burn", "paralysis", "sleep", "confusion", 
@@ -1591,7 +1622,7 @@ class Battle:
                 apply_chance = effect.get("chance", self.STATUS_EFFECT_CHANCES.get(effect_type, 1.0))
                 
                 # Check if effect should be applied based on chance
-                if random.random() <= apply_chance:
+                if self.rng.random() <= apply_chance:
                     # Check if target already has this effect
                     if effect_type not in target.get("status_effects", []):
                         # Add effect to target
@@ -1599,7 +1630,7 @@ class Battle:
                             target["status_effects"] = []
                         
                         # Get duration (turns)
-                        duration = effect.get("duration", random.randint(1, 5))
+                        duration = effect.get("duration", self.rng.randint(1, 5))
                         
                         # Create effect data
                         effect_data = {
@@ -1672,7 +1703,7 @@ class Battle:
                     
                 elif effect["type"] == "paralysis":
                     # 25% chance to skip turn
-                    if random.random() < 0.25:
+                    if self.rng.random() < 0.25:
                         messages.append(f"{veramon['name']} is paralyzed and couldn't move!")
                         processed.append("paralysis_skip")
                     else:
@@ -1685,7 +1716,7 @@ class Battle:
                     
                 elif effect["type"] == "confusion":
                     # 33% chance to hurt itself
-                    if random.random() < 0.33:
+                    if self.rng.random() < 0.33:
                         damage = max(1, int(veramon["max_hp"] * 0.1))
                         veramon["current_hp"] -= damage
                         total_damage += damage
@@ -1700,7 +1731,7 @@ class Battle:
                     processed.append("freeze_skip")
                     
                     # 20% chance to thaw each turn
-                    if random.random() < 0.2:
+                    if self.rng.random() < 0.2:
                         messages.append(f"{veramon['name']} thawed out!")
                         # Don't add to updated_effects so it gets removed
                         continue
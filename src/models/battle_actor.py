@@ -13,6 +13,7 @@ import json
 from typing import Dict, Any, List, Optional, Tuple, Set
 
 from src.utils.actor_system import Actor, ActorRef, time_actor_operation, get_actor_system, PersistableActor
+from src.db.battle_events import get_battle_event_log, encode_state
 from src.models.battle import Battle, BattleType
 from src.utils.performance_monitor import PerformanceMonitor
 from src.utils.battle_metrics import BattleMetrics
@@ -22,6 +23,10 @@ logger = logging.getLogger(__name__)
 class BattleActor(Actor, PersistableActor):
     """Actor implementation of a Battle."""
     
+    # Saves are small event log appends made off the event loop, so every
+    # change is saved right away
+    persist_interval = 0.0
+    
     def __init__(self, battle_id: int, battle_type: BattleType, host_id: str, 
                  teams: List[Dict[str, Any]] = None, performance_monitor=None,
                  battle_metrics=None):
@@ -50,6 +55,13 @@ class BattleActor(Actor, PersistableActor):
         # Last activity timestamp (used for cleanup)
         self.last_activity = time.time()
         
+        # Actions covered by the next save, recorded in the event log
+        self._pending_events: List[str] = ["create"]
+        
+        # Saves of this battle run one at a time, in order
+        self._persist_lock = asyncio.Lock()
+        self._persist_task: Optional[asyncio.Task] = None
+        
     def get_persistent_state(self) -> Dict[str, Any]:
         """
         Get the state to persist. Returns a JSON-serializable representation 
@@ -69,6 +81,57 @@ class BattleActor(Actor, PersistableActor):
         
         return state
         
+    def save_persistent_state(self, state: Dict[str, Any]) -> None:
+        """Append the changes since the last save to the battle event log."""
+        get_battle_event_log().append(self._persistence_key, state, self._take_event_type())
+        
+    def _take_event_type(self) -> str:
+        """Get the event type of the next save and start collecting actions for the one after."""
+        event_type = ",".join(self._pending_events) or "update"
+        self._pending_events = []
+        return event_type
+        
+    async def persist_state(self, force=False):
+        """
+        Save the battle through the event log without blocking the event loop.
+        
+        The state is encoded on the loop, where the battle changes, and the
+        diff and write run on the database executor.
+        """
+        if not force and not self._dirty:
+            return False
+            
+        async with self._persist_lock:
+            # The save this one waited for may have covered the changes
+            if not force and not self._dirty:
+                return False
+            self._dirty = False
+            event_type = self._take_event_type()
+            try:
+                encoded = encode_state(self.get_persistent_state())
+                await get_battle_event_log().append_async(self._persistence_key, encoded, event_type)
+            except Exception as e:
+                self._dirty = True
+                logger.exception(f"Error persisting battle actor {self.actor_id}: {e}")
+                return False
+            self._last_persisted = time.time()
+            return True
+            
+    async def _persist_pending(self) -> None:
+        """Save until no changes are left, so actions arriving during a save share the next one."""
+        while self._dirty:
+            if not await self.persist_state():
+                break
+        
+    @classmethod
+    def load_persistent_state(cls, actor_id: str) -> Optional[Dict[str, Any]]:
+        """Rebuild the saved state from the battle's snapshot and events."""
+        state = get_battle_event_log().load(actor_id)
+        if state is None:
+            # Battles saved before the event log as a single actor_state row
+            state = super().load_persistent_state(actor_id)
+        return state
+        
     def restore_from_state(self, state: Dict[str, Any]) -> None:
         """
         Restore actor state from persisted data.
@@ -111,6 +174,18 @@ class BattleActor(Actor, PersistableActor):
     async def receive(self, message: Dict[str, Any], sender: Optional[ActorRef] = None) -> Any:
         """Process a message sent to this battle actor."""
         self.last_activity = time.time()
+        result = await self._dispatch(message)
+        
+        # Save each change in the background instead of waiting for the
+        # periodic persist; the reply does not wait for the write
+        if self._dirty:
+            self._pending_events.append(message.get("action") or "update")
+            if self._persist_task is None or self._persist_task.done():
+                self._persist_task = asyncio.create_task(self._persist_pending())
+        return result
+        
+    async def _dispatch(self, message: Dict[str, Any]) -> Any:
+        """Route a message to the handler for its action."""
         action = message.get("action")
         
         if not action:
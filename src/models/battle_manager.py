@@ -18,6 +18,8 @@ from src.models.battle import BattleType
 from src.utils.performance_monitor import PerformanceMonitor
 from src.utils.battle_metrics import BattleMetrics
 from src.db.db import get_connection
+from src.db.battle_events import get_battle_event_log
+from src.db.async_db import run_in_db_executor
 
 logger = logging.getLogger(__name__)
 
@@ -245,10 +247,11 @@ class BattleManager:
                 "winner_id": winner_id
             })
             
-            # Persist the final state
+            # Persist the final state and compact the battle's event log
             actor = self.actor_system.get_actor(battle_ref.actor_id)
             if actor and hasattr(actor, 'persist_state'):
                 await actor.persist_state(force=True)
+            await run_in_db_executor(get_battle_event_log().close, battle_ref.actor_id)
                 
             # Update database
             conn = get_connection()
@@ -267,6 +270,9 @@ class BattleManager:
             if battle_id in self.active_battles:
                 del self.active_battles[battle_id]
                 
+            # Release the actor and its mailbox
+            self.actor_system.unregister_actor(battle_ref.actor_id)
+                
             logger.info(f"Ended battle {battle_id}")
             return result
         except Exception as e:
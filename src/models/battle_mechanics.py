@@ -14,6 +14,7 @@ from enum import Enum
 
 from src.models.status_effects import StatusEffectManager, StatusEffectType
 from src.models.field_conditions import FieldManager, FieldConditionType
+from src.utils.type_registry import get_type_registry
 
 # Set up logging
 logger = logging.getLogger("battle_mechanics")
@@ -35,8 +36,9 @@ class BattleMechanics:
     and other advanced mechanics to the main battle system.
     """
     
-    def __init__(self, battle_data: Dict[str, Any]):
+    def __init__(self, battle_data: Dict[str, Any], rng: Optional[random.Random] = None):
         self.battle_data = battle_data
+        self.rng = rng or random  # Battle's own generator, if it has one
         self.status_managers = {}  # {veramon_id: StatusEffectManager}
         self.field_manager = FieldManager()
         self.battle_items = {}     # {veramon_id: [items]}
@@ -405,7 +407,7 @@ class BattleMechanics:
                 effect_chance = effect.get("chance", 100)
                 
                 # Only include effects that have a chance to occur
-                if random.randint(1, 100) <= effect_chance:
+                if self.rng.randint(1, 100) <= effect_chance:
                     # Status effects
                     if effect_type == "status":
                         status_name = effect.get("status")
@@ -819,13 +821,38 @@ class BattleMechanics:
 
 # Standalone functions that can be imported directly
 
+# Damage rolls shared by calculate_damage and the battle simulator
+CRITICAL_HIT_MULTIPLIER = 1.5
+DAMAGE_ROLL_MIN = 0.85
+DAMAGE_ROLL_MAX = 1.0
+
+def raw_damage(level, power, attack, defense):
+    """
+    Calculate damage before modifiers and rolls.
+    
+    Works on plain numbers as well as NumPy arrays.
+    
+    Args:
+        level: Level of the attacker
+        power: Base power of the move
+        attack: Attacking stat
+        defense: Defending stat
+        
+    Returns:
+        Damage before modifiers
+    """
+    level_factor = (2 * level) / 5 + 2
+    return (level_factor * power * attack / defense) / 50 + 2
+
+
 def calculate_damage(
     attacker_stats: Dict[str, Any],
     defender_stats: Dict[str, Any],
     move_data: Dict[str, Any],
-    type_effectiveness: float = 1.0,
+    type_effectiveness: Optional[float] = 1.0,
     critical_hit: bool = False,
-    modifiers: Dict[str, float] = None
+    modifiers: Dict[str, float] = None,
+    rng: Optional[random.Random] = None
 ) -> int:
     """
     Calculate battle damage for a move.
@@ -834,9 +861,11 @@ def calculate_damage(
         attacker_stats: Stats of the attacking Veramon
         defender_stats: Stats of the defending Veramon  
         move_data: Data for the move being used
-        type_effectiveness: Type effectiveness multiplier
+        type_effectiveness: Type effectiveness multiplier, or None to look it
+            up from the move's type and the defender's "types"
         critical_hit: Whether this is a critical hit
         modifiers: Additional damage modifiers
+        rng: Random number generator to use (the random module by default)
         
     Returns:
         The calculated damage amount
@@ -865,21 +894,26 @@ def calculate_damage(
     if base_power == 0:
         return 0  # Status moves do no damage
     
-    # Apply level scaling
+    # Calculate raw damage with level scaling
     level = attacker_stats.get("level", 5)
-    level_factor = (2 * level) / 5 + 2
-    
-    # Calculate raw damage
-    raw_damage = (level_factor * base_power * atk_stat / def_stat) / 50 + 2
+    damage = raw_damage(level, base_power, atk_stat, def_stat)
     
     # Apply STAB (Same Type Attack Bonus)
     stab_modifier = modifiers.get("stab", 1.0)
     
     # Apply type effectiveness
     type_modifier = type_effectiveness
+    if type_modifier is None:
+        type_registry = get_type_registry()
+        move_code = move_data.get("type_code")
+        if move_code is None:
+            move_code = type_registry.code(move_data.get("type"))
+        type_modifier = type_registry.effectiveness(
+            move_code, type_registry.combo(defender_stats.get("types", []))
+        )
     
     # Apply critical hit (x1.5 damage)
-    crit_modifier = 1.5 if critical_hit else 1.0
+    crit_modifier = CRITICAL_HIT_MULTIPLIER if critical_hit else 1.0
     
     # Apply other modifiers
     weather_modifier = modifiers.get("weather", 1.0)
@@ -888,11 +922,11 @@ def calculate_damage(
     item_modifier = modifiers.get("item", 1.0)
     
     # Calculate final damage
-    final_damage = raw_damage * stab_modifier * type_modifier * crit_modifier
+    final_damage = damage * stab_modifier * type_modifier * crit_modifier
     final_damage = final_damage * weather_modifier * status_modifier * field_modifier * item_modifier
     
     # Apply random factor (85-100%)
-    random_factor = random.uniform(0.85, 1.0)
+    random_factor = (rng or random).uniform(DAMAGE_ROLL_MIN, DAMAGE_ROLL_MAX)
     final_damage = final_damage * random_factor
     
     # Convert to integer
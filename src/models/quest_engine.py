@@ -0,0 +1,359 @@
+"""
+Quest Engine for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+EconomyCog.update_quest_progress used to load every incomplete quest of a
+user on each catch, battle or trade, parse its requirements and progress
+from JSON, check it against the event and write each matching quest back
+with its own UPDATE. This module keeps each user's active quests in memory,
+indexed by the event type they count, with their requirements compiled
+into matchers once. An event only looks at the quests of its own type, and
+all progress, completions and rewards it causes are written in one job.
+"""
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Container, Dict, List, Optional, Tuple
+
+from src.db.async_db import run_write_async
+from src.utils.config_manager import get_config
+
+logger = logging.getLogger('veramon.quest_engine')
+
+RARITY_LEVELS = ["common", "uncommon", "rare", "legendary", "mythic"]
+
+
+def compile_checks(requirements: Dict[str, Any]) -> Tuple[Tuple[str, frozenset], ...]:
+    """
+    Compile a quest's criteria into (event key, allowed values) checks.
+
+    A check only applies to events that report its key, so a catch quest
+    for fire types still counts catches that carry no type. A minimum
+    rarity becomes the set of rarities at or above it.
+
+    Args:
+        requirements: Parsed requirements of the quest
+
+    Returns:
+        Tuple of checks
+
+    Raises:
+        ValueError: If the minimum rarity is unknown
+    """
+    checks = []
+    if "min_rarity" in requirements:
+        min_index = RARITY_LEVELS.index(requirements["min_rarity"])
+        checks.append(("rarity", frozenset(RARITY_LEVELS[min_index:])))
+    if "type_name" in requirements and requirements["type_name"] != "random":
+        checks.append(("type_name", frozenset([requirements["type_name"]])))
+    for key in ("biome", "battle_type"):
+        if key in requirements:
+            checks.append((key, frozenset([requirements[key]])))
+    return tuple(checks)
+
+
+class ActiveQuest:
+    """An incomplete quest of one user, with its compiled requirements."""
+
+    __slots__ = ("quest_id", "event_type", "target", "checks", "progress",
+                 "token_reward", "xp_reward", "item_rewards")
+
+    def __init__(self, quest_id: str, requirements: Dict[str, Any], progress: Dict[str, Any],
+                 token_reward: int = 0, xp_reward: int = 0, item_rewards: Optional[List[Dict]] = None):
+        self.quest_id = quest_id
+        self.event_type = requirements.get("type")
+        self.target = requirements.get("count", 1)
+        self.checks = compile_checks(requirements)
+        self.progress = progress
+        self.token_reward = token_reward or 0
+        self.xp_reward = xp_reward or 0
+        self.item_rewards = item_rewards or []
+
+    def matches(self, criteria: Dict[str, Any]) -> bool:
+        """Check whether an event's criteria satisfy the quest."""
+        for key, allowed in self.checks:
+            if key in criteria and criteria[key] not in allowed:
+                return False
+        return True
+
+    def advance(self, count: int, criteria: Dict[str, Any]) -> bool:
+        """
+        Add an event to the quest's progress.
+
+        Returns:
+            bool: Whether the progress changed
+        """
+        progress = self.progress
+        current = progress.setdefault("current", 0)
+        if self.event_type == "explore_unique_biomes" and "biome" in criteria:
+            biomes = progress.setdefault("biomes", [])
+            if criteria["biome"] in biomes:
+                return False
+            biomes.append(criteria["biome"])
+            progress["current"] = len(biomes)
+        else:
+            progress["current"] = current + count
+        return True
+
+    @property
+    def complete(self) -> bool:
+        return self.progress["current"] >= self.target
+
+
+class UserQuestIndex:
+    """A user's active quests, grouped by the event type they count."""
+
+    def __init__(self, quests: List[ActiveQuest] = ()):
+        self.by_event: Dict[str, List[ActiveQuest]] = {}
+        for quest in quests:
+            self.by_event.setdefault(quest.event_type, []).append(quest)
+
+    def __len__(self) -> int:
+        return sum(len(quests) for quests in self.by_event.values())
+
+    def apply(self, event_type: str, count: int, criteria: Dict[str, Any]
+              ) -> Tuple[List[ActiveQuest], List[ActiveQuest]]:
+        """
+        Apply an event to the matching quests.
+
+        Completed quests leave the index.
+
+        Returns:
+            (quests whose progress changed, quests completed)
+        """
+        quests = self.by_event.get(event_type)
+        if not quests:
+            return [], []
+
+        changed = []
+        completed = []
+        for quest in quests:
+            if quest.matches(criteria) and quest.advance(count, criteria):
+                (completed if quest.complete else changed).append(quest)
+        if completed:
+            remaining = [quest for quest in quests if not quest.complete]
+            if remaining:
+                self.by_event[event_type] = remaining
+            else:
+                del self.by_event[event_type]
+        return changed, completed
+
+
+class QuestEngine:
+    """
+    Least-recently-used cache of per-user quest indexes.
+
+    A user's index is loaded inside the first write job that needs it, so
+    it always matches the rows that job writes. Quest assignments must call
+    invalidate so the next event loads the new quests.
+    """
+
+    def __init__(self, max_users: int = 1000):
+        """
+        Initialize the engine.
+
+        Args:
+            max_users: Maximum number of user indexes kept in memory
+        """
+        self.max_users = max_users
+        self._indexes: "OrderedDict[str, UserQuestIndex]" = OrderedDict()
+        self._loading: Dict[str, bool] = {}  # user_id -> invalidated while loading
+        self._lock = threading.RLock()
+        self.stats = {
+            "events": 0,
+            "hits": 0,
+            "loads": 0,
+            "evicted": 0,
+            "updated": 0,
+            "completed": 0
+        }
+
+    def _load(self, conn, user_id: str) -> UserQuestIndex:
+        """Build a user's index from the user_quests table."""
+        with self._lock:
+            self._loading[user_id] = False
+
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT q.quest_id, q.requirements, uq.progress, q.token_reward, q.xp_reward, q.item_rewards
+            FROM quests q
+            JOIN user_quests uq ON q.quest_id = uq.quest_id
+            WHERE uq.user_id = ? AND uq.completed = 0
+        """, (user_id,))
+
+        quests = []
+        for quest_id, requirements_json, progress_json, token_reward, xp_reward, item_rewards_json in cursor.fetchall():
+            try:
+                requirements = json.loads(requirements_json)
+                progress = json.loads(progress_json)
+                item_rewards = json.loads(item_rewards_json) if item_rewards_json else []
+                quests.append(ActiveQuest(quest_id, requirements, progress,
+                                          token_reward, xp_reward, item_rewards))
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Skipping quest {quest_id} of user {user_id}: {e}")
+        index = UserQuestIndex(quests)
+
+        with self._lock:
+            self.stats["loads"] += 1
+            # Quests assigned while the rows were read may be missing, so
+            # only this event uses the index and the next one reloads it
+            if not self._loading.pop(user_id, True):
+                self._indexes[user_id] = index
+                if len(self._indexes) > self.max_users:
+                    self._indexes.popitem(last=False)
+                    self.stats["evicted"] += 1
+        return index
+
+    def _get(self, conn, user_id: str) -> UserQuestIndex:
+        """Get a user's index, loading it if it is not cached."""
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return index
+        return self._load(conn, user_id)
+
+    def record(self, conn, user_id: str, event_type: str, count: int = 1,
+               criteria: Optional[Dict[str, Any]] = None,
+               known_items: Optional[Container[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Write job that applies an event to a user's quests.
+
+        Progress, completions, tokens, XP and item rewards are written with
+        one statement each, however many quests the event touches.
+
+        Args:
+            conn: Database connection
+            user_id: Discord ID of the user
+            event_type: Type of action (catch, battle_win, etc.)
+            count: How much to increment progress by
+            criteria: Details of the event (rarity, type_name, biome, battle_type)
+            known_items: Item IDs that may be rewarded (any if None)
+
+        Returns:
+            Completed quests with their rewards
+        """
+        criteria = criteria or {}
+        index = self._get(conn, user_id)
+        with self._lock:
+            self.stats["events"] += 1
+            changed, completed = index.apply(event_type, count, criteria)
+        if not changed and not completed:
+            return []
+
+        try:
+            cursor = conn.cursor()
+            if changed:
+                cursor.executemany("""
+                    UPDATE user_quests
+                    SET progress = ?
+                    WHERE user_id = ? AND quest_id = ?
+                """, [(json.dumps(quest.progress), user_id, quest.quest_id) for quest in changed])
+
+            if completed:
+                completion_date = datetime.now().isoformat()
+                cursor.executemany("""
+                    UPDATE user_quests
+                    SET progress = ?, completed = 1, completion_date = ?
+                    WHERE user_id = ? AND quest_id = ?
+                """, [(json.dumps(quest.progress), completion_date, user_id, quest.quest_id)
+                      for quest in completed])
+
+                cursor.execute("""
+                    UPDATE users
+                    SET tokens = tokens + ?, xp = xp + ?
+                    WHERE user_id = ?
+                """, (sum(quest.token_reward for quest in completed),
+                      sum(quest.xp_reward for quest in completed), user_id))
+
+                items: Dict[str, int] = {}
+                for quest in completed:
+                    for item_reward in quest.item_rewards:
+                        item_id = item_reward.get("item_id")
+                        if known_items is None or item_id in known_items:
+                            items[item_id] = items.get(item_id, 0) + item_reward.get("quantity", 1)
+                if items:
+                    cursor.executemany("""
+                        INSERT INTO inventory (user_id, item_id, quantity)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT(user_id, item_id) DO UPDATE SET
+                        quantity = quantity + excluded.quantity
+                    """, [(user_id, item_id, quantity) for item_id, quantity in items.items()])
+        except Exception:
+            # The index is ahead of the rolled back rows
+            self.invalidate(user_id)
+            raise
+
+        with self._lock:
+            self.stats["updated"] += len(changed)
+            self.stats["completed"] += len(completed)
+        return [{
+            "quest_id": quest.quest_id,
+            "token_reward": quest.token_reward,
+            "xp_reward": quest.xp_reward,
+            "item_rewards": quest.item_rewards
+        } for quest in completed]
+
+    async def process(self, user_id: str, event_type: str, count: int = 1,
+                      known_items: Optional[Container[str]] = None, **criteria: Any) -> List[Dict[str, Any]]:
+        """
+        Apply an event to a user's quests without blocking the event loop.
+
+        Args:
+            user_id: Discord ID of the user
+            event_type: Type of action (catch, battle_win, etc.)
+            count: How much to increment progress by
+            known_items: Item IDs that may be rewarded (any if None)
+            **criteria: Details of the event (rarity, type_name, biome, battle_type)
+
+        Returns:
+            Completed quests with their rewards
+        """
+        try:
+            return await run_write_async(self.record, user_id, event_type, count, criteria, known_items)
+        except Exception:
+            # The commit may have failed after the job updated the index
+            self.invalidate(user_id)
+            raise
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop the index of a user, or of every user if None."""
+        with self._lock:
+            if user_id is None:
+                self._indexes.clear()
+                for loading_user in self._loading:
+                    self._loading[loading_user] = True
+            else:
+                self._indexes.pop(user_id, None)
+                if user_id in self._loading:
+                    self._loading[user_id] = True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get quest engine statistics."""
+        with self._lock:
+            return {
+                **self.stats,
+                "cached_users": len(self._indexes)
+            }
+
+
+# Global instance
+_quest_engine = None
+
+def get_quest_engine() -> QuestEngine:
+    """
+    Get the global quest engine instance.
+
+    Returns:
+        The global QuestEngine instance
+    """
+    global _quest_engine
+    if _quest_engine is None:
+        _quest_engine = QuestEngine(
+            max_users=get_config("general", "quest_index_cache_size", 1000)
+        )
+    return _quest_engine
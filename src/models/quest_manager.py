@@ -3,10 +3,12 @@ import os
 import json
 import logging
 import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Union, Iterator
 
 from src.models.quest import Quest, QuestType, QuestStatus, QuestRequirementType, QuestRewardType, UserQuestManager
+from src.db.quest_store import get_quest_store
 
 logger = logging.getLogger('veramon.quest_manager')
 
@@ -24,10 +26,22 @@ class QuestManager:
         self.quests = {}  # quest_id -> Quest object
         self.event_quests = {}  # event_id -> list of quest_ids
         self.story_lines = {}  # story_line_id -> list of quest_ids in order
+        self.store = get_quest_store()  # per-user progress, saved in the database
+        
+        # user_id -> (quest data the index was built from, requirement type ->
+        # [(quest_id, quest data, requirements of that type)]), most recent last
+        self._progress_index = OrderedDict()
+        self.max_indexed_users = self.store.max_users
         
         self.ensure_quest_directory()
         self.load_all_quests()
         
+        # Import progress files left by the file-based storage
+        try:
+            self.store.migrate_json_files(self.quest_dir)
+        except Exception as e:
+            logger.error(f"Error migrating user quest files from {self.quest_dir}: {e}")
+        
     def ensure_quest_directory(self):
         """Ensure the quest directory structure exists."""
         for subdir in ['daily', 'weekly', 'story', 'achievements', 'events']:
@@ -286,79 +300,122 @@ class QuestManager:
     def update_progress(self, user_id: str, requirement_type: str, amount: int = 1, 
                        metadata: Dict[str, Any] = None):
         """Update progress for all quests with a specific requirement type."""
-        user_quests = self._get_user_quests(user_id)
-        
-        if not user_quests:
-            return
+        while True:
+            # Loaded without the store's lock, so other users don't wait on the database
+            user_quests = self._get_user_quests(user_id)
+            if not user_quests:
+                return
             
+            # The store writes the changes later, so hold its lock while changing them
+            with self.store.lock:
+                if self.store.holds(user_id, user_quests):
+                    return self._apply_progress(user_id, user_quests, requirement_type, amount, metadata)
+            # Evicted or replaced since it was loaded, so load it again
+        
+    def _apply_progress(self, user_id: str, user_quests: Dict[str, Any], requirement_type: str,
+                        amount: int, metadata: Optional[Dict[str, Any]]) -> List[str]:
+        """Advance a user's cached quests of one requirement type; the store's lock must be held."""
         quests_updated = []
+        completed = False
         
-        # Process active daily and weekly quests
-        for quest_id in user_quests.get('active_quests', []):
-            quest_data = user_quests.get('quest_data', {}).get(quest_id)
-            
-            if not quest_data:
-                continue
-                
-            if self._update_quest_progress(quest_data, requirement_type, amount, metadata):
+        # Only look at active quests, current story quests and
+        # achievements that count this requirement type
+        entries = self._get_progress_index(str(user_id), user_quests).get(requirement_type, [])
+        for quest_id, quest_data, requirements in entries:
+            if self._advance_requirements(quest_data, requirements, amount, metadata):
                 quests_updated.append(quest_id)
+                completed = completed or quest_data.get('completed', False)
         
-        # Process active story quests
-        for storyline_id, story_data in user_quests.get('storylines', {}).items():
-            current_quest_id = story_data.get('current_quest')
-            
-            if not current_quest_id:
-                continue
-                
-            quest_data = user_quests.get('quest_data', {}).get(current_quest_id)
-            
-            if not quest_data:
-                continue
-                
-            if self._update_quest_progress(quest_data, requirement_type, amount, metadata):
-                quests_updated.append(current_quest_id)
+        if completed:
+            remaining = [entry for entry in entries if not entry[1].get('completed')]
+            if remaining:
+                entries[:] = remaining
+            else:
+                del self._progress_index[str(user_id)][1][requirement_type]
         
-        # Process achievements
-        for achievement_id, achievement_data in user_quests.get('achievements', {}).items():
-            if achievement_data.get('completed'):
-                continue
-                
-            if self._update_quest_progress(achievement_data, requirement_type, amount, metadata):
-                quests_updated.append(achievement_id)
-        
-        # Save updated quests
+        # Queue the changed quests to be written
         if quests_updated:
-            self._save_user_quests(user_id, user_quests)
+            self.store.mark_dirty(user_id)
             
         return quests_updated
         
+    def _get_progress_index(self, user_id: str, user_quests: Dict[str, Any]) -> Dict[str, List]:
+        """
+        Get a user's incomplete quests grouped by requirement type.
+        
+        The index is rebuilt whenever the store holds a different data
+        object for the user, e.g. after it was reloaded or replaced with put.
+        Code that adds quests to the cached data in place must call
+        invalidate_progress_index afterwards.
+        """
+        cached = self._progress_index.get(user_id)
+        if cached is not None and cached[0] is user_quests:
+            self._progress_index.move_to_end(user_id)
+            return cached[1]
+        
+        quest_data = user_quests.get('quest_data', {})
+        tracked = [(quest_id, quest_data.get(quest_id)) for quest_id in user_quests.get('active_quests', [])]
+        tracked += [(story_data.get('current_quest'), quest_data.get(story_data.get('current_quest')))
+                    for story_data in user_quests.get('storylines', {}).values()
+                    if story_data.get('current_quest')]
+        tracked += list(user_quests.get('achievements', {}).items())
+        
+        index = {}
+        for quest_id, data in tracked:
+            if not data or data.get('completed'):
+                continue
+            by_type = {}
+            for req in data.get('requirements', []):
+                by_type.setdefault(req.get('type'), []).append(req)
+            for requirement_type, requirements in by_type.items():
+                index.setdefault(requirement_type, []).append((quest_id, data, requirements))
+        
+        self._progress_index[user_id] = (user_quests, index)
+        self._progress_index.move_to_end(user_id)
+        while len(self._progress_index) > self.max_indexed_users:
+            self._progress_index.popitem(last=False)
+        return index
+        
+    def invalidate_progress_index(self, user_id: Optional[str] = None) -> None:
+        """Drop the progress index of a user, or of every user if None."""
+        with self.store.lock:
+            if user_id is None:
+                self._progress_index.clear()
+            else:
+                self._progress_index.pop(str(user_id), None)
+        
     def _update_quest_progress(self, quest_data: Dict[str, Any], 
                               requirement_type: str, amount: int = 1,
                               metadata: Dict[str, Any] = None) -> bool:
         """Update progress for a specific quest data object."""
+        requirements = [req for req in quest_data.get('requirements', [])
+                        if req.get('type') == requirement_type]
+        return self._advance_requirements(quest_data, requirements, amount, metadata)
+        
+    def _advance_requirements(self, quest_data: Dict[str, Any], requirements: List[Dict[str, Any]],
+                              amount: int = 1, metadata: Dict[str, Any] = None) -> bool:
+        """Add progress to some of a quest's requirements and complete it if all are met."""
         if quest_data.get('completed'):
             return False
             
-        requirements = quest_data.get('requirements', [])
         updated = False
         
         for req in requirements:
-            if req.get('type') == requirement_type:
-                # Check if metadata constraints match
-                if metadata and not self._check_metadata_constraints(req, metadata):
-                    continue
-                    
-                # Update progress
-                current = req.get('progress', 0)
-                new_progress = min(current + amount, req.get('amount', 1))
-                req['progress'] = new_progress
-                updated = True
+            # Check if metadata constraints match
+            if metadata and not self._check_metadata_constraints(req, metadata):
+                continue
+                
+            # Update progress
+            current = req.get('progress', 0)
+            new_progress = min(current + amount, req.get('amount', 1))
+            req['progress'] = new_progress
+            updated = True
         
         # Check if all requirements are met
         if updated:
             all_completed = True
             
-            for req in requirements:
+            for req in quest_data.get('requirements', []):
                 progress = req.get('progress', 0)
                 amount_needed = req.get('amount', 1)
                 
@@ -384,30 +441,17 @@ class QuestManager:
         return True
         
     def _get_user_quests(self, user_id: str) -> Dict[str, Any]:
-        """Get user quest data from file."""
-        filepath = os.path.join(self.quest_dir, f"{user_id}.json")
-        
-        if not os.path.exists(filepath):
-            return {}
-        
+        """Get user quest data from the quest store."""
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self.store.get(user_id)
         except Exception as e:
-            logger.error(f"Error loading user quests from {filepath}: {e}")
+            logger.error(f"Error loading user quests of {user_id}: {e}")
             return {}
         
     def _save_user_quests(self, user_id: str, user_quests: Dict[str, Any]) -> bool:
-        """Save user quest data to file."""
-        filepath = os.path.join(self.quest_dir, f"{user_id}.json")
-        
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(user_quests, f, indent=2, ensure_ascii=False)
-            return True
-        except Exception as e:
-            logger.error(f"Error saving user quests to {filepath}: {e}")
-            return False
+        """Queue user quest data to be written by the quest store."""
+        self.store.put(user_id, user_quests)
+        return True
 
 
 # Global quest manager instance
@@ -15,6 +15,7 @@ from typing import Dict, List, Optional, Union, Any, Set
 
 from src.models.veramon import Veramon
 from src.db.db import get_connection
+from src.utils.name_index import get_capture_index
 
 # Set up logging
 logger = logging.getLogger("trade")
@@ -585,6 +586,15 @@ class Trade:
             # Commit transaction
             cursor.execute("COMMIT")
             
+            # Move traded Veramon between the owners' autocomplete indexes
+            capture_index = get_capture_index()
+            for item in trade.creator_items:
+                if item.item_type == ItemType.VERAMON:
+                    capture_index.transfer_capture(item.item_id, trade.creator_id, trade.target_id)
+            for item in trade.target_items:
+                if item.item_type == ItemType.VERAMON:
+                    capture_index.transfer_capture(item.item_id, trade.target_id, trade.creator_id)
+            
             return True
         except Exception as e:
             # Rollback on error
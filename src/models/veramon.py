@@ -1,6 +1,7 @@
 import random
 from typing import Dict, List, Optional, Tuple, Union
 from src.utils.data_loader import load_all_veramon_data
+from src.utils.type_registry import get_type_registry
 
 class Veramon:
     """
@@ -46,6 +47,11 @@ class Veramon:
         """Get Veramon's types."""
         return self.data.get("type", [])
     
+    @property
+    def type_combo(self) -> int:
+        """Get the interned code of Veramon's type combination."""
+        return get_type_registry().combo(self.types)
+    
     @property
     def max_hp(self) -> int:
         """Calculate max HP based on base stats and level."""
@@ -41,10 +41,10 @@ class SecurityTestRunner:
         self.test_target_id = "TEST_TARGET_456"
         
         # Initialize secure random test IDs
-        random.seed(int(time.time()))
-        self.test_spawn_id = f"test_spawn_{random.randint(10000, 99999)}"
-        self.test_battle_id = random.randint(10000, 99999)
-        self.test_trade_id = random.randint(10000, 99999)
+        rng = random.Random()
+        self.test_spawn_id = f"test_spawn_{rng.randint(10000, 99999)}"
+        self.test_battle_id = rng.randint(10000, 99999)
+        self.test_trade_id = rng.randint(10000, 99999)
         
     def report_test(self, test_name, passed, message=None):
         """Report a test result."""
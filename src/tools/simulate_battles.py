@@ -0,0 +1,96 @@
+"""
+Veramon Balance Simulation Tool
+-------------------------------
+This script runs large numbers of headless battles between random teams and
+reports per-species win rates and move usage, to find Veramon that need
+rebalancing in veramon_database.json:
+1. Simulates 1v1 or team battles at a fixed level
+2. Prints the strongest and weakest species by win rate
+3. Optionally writes the full results as JSON
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("simulate_battles")
+
+# Add parent directory to path for imports
+script_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(script_dir, '..', '..'))
+sys.path.insert(0, parent_dir)
+
+from src.utils.battle_simulator import BattleSimulator
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Simulate battles for balance testing")
+    parser.add_argument("--battles", type=int, default=100000, help="Number of battles")
+    parser.add_argument("--team-size", type=int, default=1, help="Veramon per team, e.g. 1 or 6")
+    parser.add_argument("--level", type=int, default=50, help="Level of every Veramon")
+    parser.add_argument("--max-turns", type=int, default=100, help="Turns before a battle is a draw")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="Battles per worker chunk")
+    parser.add_argument("--seed", type=int, default=None, help="Seed to reproduce a run")
+    parser.add_argument("--top", type=int, default=10, help="Species to list at each end")
+    parser.add_argument("--min-appearances", type=int, default=20,
+                        help="Appearances needed to be listed")
+    parser.add_argument("--output", help="Write full results as JSON to this file")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    simulator = BattleSimulator(level=args.level, max_turns=args.max_turns)
+    start_time = time.perf_counter()
+    results = simulator.run(
+        battles=args.battles,
+        team_size=args.team_size,
+        seed=args.seed,
+        workers=args.workers,
+        chunk_size=args.chunk_size
+    )
+    elapsed = time.perf_counter() - start_time
+
+    print("Veramon Balance Simulation")
+    print("-" * 45)
+    print(f"{results['battles']} battles ({args.team_size}v{args.team_size}, level {args.level}) "
+          f"in {elapsed:.1f}s using {results['backend']}, seed {results['seed']}")
+    print(f"Draws: {results['draws']}, average turns: {results['average_turns']:.1f}")
+
+    ranked = sorted(
+        ((name, stats) for name, stats in results["species"].items()
+         if stats["appearances"] >= args.min_appearances),
+        key=lambda item: item[1]["win_rate"],
+        reverse=True
+    )
+    print("\nStrongest species:")
+    for name, stats in ranked[:args.top]:
+        print(f"  {name:<20} {stats['win_rate']:6.1%} of {stats['appearances']}")
+    print("\nWeakest species:")
+    for name, stats in ranked[-args.top:]:
+        print(f"  {name:<20} {stats['win_rate']:6.1%} of {stats['appearances']}")
+
+    total_uses = sum(results["moves"].values()) or 1
+    print("\nMost used moves:")
+    for name, uses in sorted(results["moves"].items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {name:<20} {uses / total_uses:6.1%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Wrote results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
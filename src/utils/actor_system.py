@@ -17,6 +17,8 @@ from functools import wraps
 import pickle
 import base64
 import sqlite3
+import zlib
+from collections import deque
 from datetime import datetime
 from src.db.db import get_connection
 
@@ -65,6 +67,9 @@ class ActorRef:
 class PersistableActor:
     """Mixin for actors that can have their state persisted to a database."""
     
+    # Minimum seconds between unforced saves
+    persist_interval = 5.0
+    
     def __init__(self):
         self._persistence_key = self.actor_id
         self._last_persisted = 0
@@ -82,32 +87,8 @@ class PersistableActor:
         try:
             current_time = time.time()
             # Only persist if dirty and not persisted recently (to avoid db spam)
-            if force or (self._dirty and (current_time - self._last_persisted > 5.0)):
-                state = self.get_persistent_state()
-                
-                # Convert state to a serializable format
-                serialized_state = json.dumps(state)
-                
-                conn = get_connection()
-                cursor = conn.cursor()
-                
-                # Upsert the actor state
-                cursor.execute("""
-                    INSERT INTO actor_state 
-                    (actor_id, actor_type, serialized_state, updated_at)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT(actor_id) DO UPDATE SET
-                    serialized_state = excluded.serialized_state,
-                    updated_at = excluded.updated_at
-                """, (
-                    self._persistence_key,
-                    self.__class__.__name__,
-                    serialized_state,
-                    datetime.utcnow().isoformat()
-                ))
-                
-                conn.commit()
-                conn.close()
+            if force or (self._dirty and (current_time - self._last_persisted > self.persist_interval)):
+                self.save_persistent_state(self.get_persistent_state())
                 
                 self._last_persisted = current_time
                 self._dirty = False
@@ -117,6 +98,54 @@ class PersistableActor:
             
         return False
     
+    def save_persistent_state(self, state: Dict[str, Any]) -> None:
+        """
+        Write the state to the database. Override this to change how it is stored.
+        """
+        # Convert state to a serializable format
+        serialized_state = json.dumps(state)
+        
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        # Upsert the actor state
+        cursor.execute("""
+            INSERT INTO actor_state 
+            (actor_id, actor_type, serialized_state, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(actor_id) DO UPDATE SET
+            serialized_state = excluded.serialized_state,
+            updated_at = excluded.updated_at
+        """, (
+            self._persistence_key,
+            self.__class__.__name__,
+            serialized_state,
+            datetime.utcnow().isoformat()
+        ))
+        
+        conn.commit()
+        conn.close()
+    
+    @classmethod
+    def load_persistent_state(cls, actor_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read an actor's saved state, or None if it was never saved.
+        Override this together with save_persistent_state.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT serialized_state
+            FROM actor_state
+            WHERE actor_id = ?
+        """, (actor_id,))
+        
+        row = cursor.fetchone()
+        conn.close()
+        
+        return json.loads(row[0]) if row else None
+    
     def get_persistent_state(self) -> Dict[str, Any]:
         """
         Get the state to persist. Override this in subclasses.
@@ -168,6 +197,10 @@ class Actor:
                     "max_time": max_time,
                     "count": len(times)
                 }
+        
+        # Include the state of the mailbox this actor is served from
+        if self._actor_system:
+            metrics["mailbox"] = self._actor_system.get_mailbox_metrics(self.actor_id)
                 
         return metrics
             
@@ -184,15 +217,73 @@ class Actor:
             self._ref = ActorRef(self.actor_id, self._actor_system)
         return self._ref
 
+class Mailbox:
+    """
+    Message queue served by a single worker task.
+    
+    A mailbox belongs either to one actor or to a shard of actors. Messages in
+    a mailbox are processed strictly in order, while separate mailboxes are
+    drained concurrently so a slow actor only delays its own messages.
+    """
+    
+    # Number of latency samples kept per mailbox
+    SAMPLE_SIZE = 100
+    
+    def __init__(self, key: str):
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.worker: Optional[asyncio.Task] = None
+        self.processed_count = 0
+        self.max_depth = 0
+        self.wait_times = deque(maxlen=self.SAMPLE_SIZE)
+        self.processing_times = deque(maxlen=self.SAMPLE_SIZE)
+        
+    @property
+    def depth(self) -> int:
+        """Number of messages waiting to be processed."""
+        return self.queue.qsize()
+        
+    def is_idle(self) -> bool:
+        """Check whether the mailbox has no worker and no queued messages."""
+        return (self.worker is None or self.worker.done()) and self.queue.empty()
+        
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get depth and latency metrics for this mailbox."""
+        wait_times = list(self.wait_times)
+        processing_times = list(self.processing_times)
+        
+        return {
+            "mailbox": self.key,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "processed_count": self.processed_count,
+            "avg_wait_time": sum(wait_times) / len(wait_times) if wait_times else 0,
+            "max_wait_time": max(wait_times) if wait_times else 0,
+            "avg_processing_time": sum(processing_times) / len(processing_times) if processing_times else 0,
+            "max_processing_time": max(processing_times) if processing_times else 0
+        }
+
 class ActorSystem:
-    """System that manages actors and routes messages between them."""
-    def __init__(self, name: str):
+    """
+    System that manages actors and routes messages between them.
+    
+    Each actor gets its own mailbox by default. Passing ``mailbox_shards``
+    instead spreads actors over a fixed number of shared mailboxes keyed by
+    actor ID, which bounds the number of worker tasks while still keeping
+    per-actor message ordering.
+    """
+    def __init__(self, name: str, mailbox_shards: Optional[int] = None):
+        if mailbox_shards is not None and mailbox_shards < 1:
+            raise ValueError(f"mailbox_shards must be at least 1, got {mailbox_shards}")
+            
         self.name = name
         self._actors: Dict[str, Actor] = {}
         self._response_futures: Dict[str, asyncio.Future] = {}
-        self._message_queue: asyncio.Queue = asyncio.Queue()
+        self._mailbox_shards = mailbox_shards
+        self._mailboxes: Dict[str, Mailbox] = {}
+        self._queued: Dict[str, int] = {}  # actor_id -> messages waiting in its mailbox
+        self._retiring: Dict[str, list] = {}  # actor_id -> [unregistered actor, messages still owed to it]
         self._running = False
-        self._processor_task = None
         self._actor_types: Dict[str, type] = {}
         self._persistence_task = None
         self._shutdown_hook_task = None
@@ -233,6 +324,27 @@ class ActorSystem:
         actor._actor_system = self
         return actor.get_ref()
         
+    def unregister_actor(self, actor_id: str) -> Optional[Actor]:
+        """
+        Remove an actor from the system.
+        
+        Messages already queued for the actor are still delivered, while
+        messages sent afterwards fail as for any unknown actor. In per-actor
+        mode the actor's mailbox is dropped once it is idle.
+        """
+        actor = self._actors.pop(actor_id, None)
+        
+        queued = self._queued.get(actor_id, 0)
+        if actor and queued:
+            self._retiring[actor_id] = [actor, queued]
+        
+        if not self._mailbox_shards:
+            mailbox = self._mailboxes.get(actor_id)
+            if mailbox and mailbox.is_idle():
+                del self._mailboxes[actor_id]
+                
+        return actor
+        
     async def create_actor(self, actor_type_name: str, *args, **kwargs) -> ActorRef:
         """Create and register an actor of the given type."""
         if actor_type_name not in self._actor_types:
@@ -253,37 +365,22 @@ class ActorSystem:
         
         # Try to load from persistence
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT serialized_state, actor_type
-                FROM actor_state
-                WHERE actor_id = ?
-            """, (actor_id,))
+            actor_class = self._actor_types.get(actor_type_name)
             
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                serialized_state, actor_type = row
+            if actor_class is None:
+                logger.warning(f"Actor type {actor_type_name} not registered, ignoring persisted state")
+            elif issubclass(actor_class, PersistableActor):
+                state = actor_class.load_persistent_state(actor_id)
                 
-                # Get the actor class
-                if actor_type_name not in self._actor_types:
-                    logger.warning(f"Actor type {actor_type_name} not registered, ignoring persisted state")
-                else:
-                    actor_class = self._actor_types[actor_type_name]
+                if state is not None:
                     actor = actor_class(*args, **kwargs)
                     actor.actor_id = actor_id
                     
-                    # Restore state if it's a PersistableActor
-                    if isinstance(actor, PersistableActor):
-                        try:
-                            state = json.loads(serialized_state)
-                            actor.restore_from_state(state)
-                            logger.info(f"Restored actor {actor_id} from persistence")
-                        except Exception as e:
-                            logger.exception(f"Error restoring actor {actor_id} from persisted state: {e}")
+                    try:
+                        actor.restore_from_state(state)
+                        logger.info(f"Restored actor {actor_id} from persistence")
+                    except Exception as e:
+                        logger.exception(f"Error restoring actor {actor_id} from persisted state: {e}")
                     
                     return self.register_actor(actor)
         except Exception as e:
@@ -304,14 +401,14 @@ class ActorSystem:
         if not self._running:
             await self.start()
             
-        await self._message_queue.put((actor_id, message, sender, None))
+        self._enqueue(actor_id, message, sender, None)
         
     async def ask(self, actor_id: str, message: Dict[str, Any], timeout: float = 5.0) -> Any:
         """Send a message to an actor and wait for a response."""
         if not self._running:
             await self.start()
             
-        future = asyncio.Future()
+        future = asyncio.get_running_loop().create_future()
         message_id = str(uuid.uuid4())
         self._response_futures[message_id] = future
         
@@ -319,15 +416,63 @@ class ActorSystem:
         message_with_id = message.copy()
         message_with_id["_message_id"] = message_id
         
-        await self._message_queue.put((actor_id, message_with_id, None, message_id))
+        self._enqueue(actor_id, message_with_id, None, message_id)
         
         try:
             result = await asyncio.wait_for(future, timeout)
             return result
         except asyncio.TimeoutError:
-            del self._response_futures[message_id]
+            self._response_futures.pop(message_id, None)
             raise TimeoutError(f"No response from actor {actor_id} after {timeout} seconds")
             
+    def _get_mailbox_key(self, actor_id: str) -> str:
+        """Get the key of the mailbox that serves an actor."""
+        if self._mailbox_shards:
+            # crc32 is stable across processes, unlike the builtin hash()
+            shard = zlib.crc32(actor_id.encode("utf-8")) % self._mailbox_shards
+            return f"shard_{shard}"
+        return actor_id
+        
+    def _enqueue(self, actor_id: str, message: Dict[str, Any], sender: Optional[ActorRef],
+                 message_id: Optional[str]) -> None:
+        """Put a message in the target actor's mailbox and make sure it is being drained."""
+        key = self._get_mailbox_key(actor_id)
+        mailbox = self._mailboxes.get(key)
+        if mailbox is None:
+            mailbox = Mailbox(key)
+            self._mailboxes[key] = mailbox
+            
+        mailbox.queue.put_nowait((actor_id, message, sender, message_id, time.time()))
+        self._queued[actor_id] = self._queued.get(actor_id, 0) + 1
+        mailbox.max_depth = max(mailbox.max_depth, mailbox.depth)
+        
+        # Workers exit when their mailbox runs dry, so start one on demand
+        if mailbox.worker is None or mailbox.worker.done():
+            mailbox.worker = asyncio.create_task(self._drain_mailbox(mailbox))
+            
+    def get_mailbox_metrics(self, actor_id: str) -> Dict[str, Any]:
+        """Get metrics for the mailbox that serves an actor."""
+        mailbox = self._mailboxes.get(self._get_mailbox_key(actor_id))
+        if not mailbox:
+            return Mailbox(self._get_mailbox_key(actor_id)).get_metrics()
+        return mailbox.get_metrics()
+        
+    def get_system_metrics(self) -> Dict[str, Any]:
+        """Get aggregate metrics for the actor system and all of its mailboxes."""
+        mailboxes = {key: mailbox.get_metrics() for key, mailbox in self._mailboxes.items()}
+        
+        return {
+            "name": self.name,
+            "running": self._running,
+            "actor_count": len(self._actors),
+            "mailbox_mode": "sharded" if self._mailbox_shards else "per_actor",
+            "mailbox_count": len(mailboxes),
+            "active_workers": sum(1 for m in self._mailboxes.values() if m.worker and not m.worker.done()),
+            "total_depth": sum(m["depth"] for m in mailboxes.values()),
+            "max_depth": max((m["max_depth"] for m in mailboxes.values()), default=0),
+            "mailboxes": mailboxes
+        }
+            
     async def _persist_actors(self):
         """Periodically persist all persistable actors."""
         while self._running:
@@ -356,7 +501,6 @@ class ActorSystem:
             return
             
         self._running = True
-        self._processor_task = asyncio.create_task(self._process_messages())
         self._persistence_task = asyncio.create_task(self._persist_actors())
         
         # Register shutdown hook
@@ -412,77 +556,109 @@ class ActorSystem:
             except asyncio.CancelledError:
                 pass
             
+        # Let in-flight mailboxes drain so queued messages are not lost
+        workers = [m.worker for m in self._mailboxes.values() if m.worker and not m.worker.done()]
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+            
         # Final persist of all actors
         for actor_id, actor in list(self._actors.items()):
             if isinstance(actor, PersistableActor):
                 await actor.persist_state(force=True)
-                
-        # Stop processor task
-        if self._processor_task:
-            await self._message_queue.put((None, None, None, None))  # Sentinel to stop processor
-            await self._processor_task
-            self._processor_task = None
             
         logger.info(f"Stopped ActorSystem '{self.name}'")
         
-    async def _process_messages(self) -> None:
-        """Process messages from the queue."""
-        while self._running:
-            actor_id, message, sender, message_id = await self._message_queue.get()
-            
-            # Check for stop sentinel
-            if actor_id is None and message is None:
-                break
-                
-            # Get the target actor
-            actor = self._actors.get(actor_id)
-            if not actor:
-                logger.warning(f"Message sent to non-existent actor: {actor_id}")
-                if message_id and message_id in self._response_futures:
-                    self._response_futures[message_id].set_exception(
-                        ValueError(f"Actor not found: {actor_id}")
-                    )
-                    del self._response_futures[message_id]
-                continue
-                
-            # Process the message
+    async def _drain_mailbox(self, mailbox: Mailbox) -> None:
+        """Process messages from a mailbox until it is empty."""
+        while True:
             try:
-                start_time = time.time()
-                actor._metrics["message_count"] += 1
-                actor._metrics["last_message_time"] = start_time
-                
-                result = await actor.receive(message, sender)
+                actor_id, message, sender, message_id, enqueued_at = mailbox.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
                 
-                processing_time = time.time() - start_time
-                actor._metrics["total_processing_time"] += processing_time
-                actor._metrics["max_processing_time"] = max(
-                    actor._metrics["max_processing_time"], processing_time
-                )
+            queued = self._queued.pop(actor_id, 1) - 1
+            if queued:
+                self._queued[actor_id] = queued
                 
-                # If this is a persistable actor, mark it as dirty after processing a message
-                if isinstance(actor, PersistableActor):
-                    actor.mark_dirty()
+            start_time = time.time()
+            mailbox.wait_times.append(start_time - enqueued_at)
+            
+            await self._deliver(actor_id, message, sender, message_id)
+            
+            mailbox.processing_times.append(time.time() - start_time)
+            mailbox.processed_count += 1
+            
+            # Yield between messages so other mailboxes get a turn even when
+            # an actor's receive() never actually suspends
+            await asyncio.sleep(0)
+            
+        # Drop mailboxes of actors that have been unregistered in the meantime
+        if not self._mailbox_shards and mailbox.key not in self._actors and mailbox.queue.empty():
+            if self._mailboxes.get(mailbox.key) is mailbox:
+                del self._mailboxes[mailbox.key]
                 
-                # If this was an ask, set the result in the future
-                if message_id and message_id in self._response_futures:
-                    self._response_futures[message_id].set_result(result)
-                    del self._response_futures[message_id]
-                    
-            except Exception as e:
-                actor._metrics["error_count"] += 1
-                logger.exception(f"Error in actor {actor_id} processing message {message}")
+    async def _deliver(self, actor_id: str, message: Dict[str, Any], sender: Optional[ActorRef],
+                       message_id: Optional[str]) -> None:
+        """Deliver a single message to its actor and resolve any pending ask."""
+        # Get the target actor; messages queued before it was unregistered
+        # come first in its mailbox, so they go to the retiring actor
+        retiring = self._retiring.get(actor_id)
+        if retiring:
+            actor = retiring[0]
+            retiring[1] -= 1
+            if not retiring[1]:
+                del self._retiring[actor_id]
+        else:
+            actor = self._actors.get(actor_id)
+        if not actor:
+            logger.warning(f"Message sent to non-existent actor: {actor_id}")
+            future = self._response_futures.pop(message_id, None) if message_id else None
+            if future and not future.done():
+                future.set_exception(ValueError(f"Actor not found: {actor_id}"))
+            return
+            
+        # Process the message
+        try:
+            start_time = time.time()
+            actor._metrics["message_count"] += 1
+            actor._metrics["last_message_time"] = start_time
+            
+            result = await actor.receive(message, sender)
+            
+            processing_time = time.time() - start_time
+            actor._metrics["total_processing_time"] += processing_time
+            actor._metrics["max_processing_time"] = max(
+                actor._metrics["max_processing_time"], processing_time
+            )
+            
+            # If this is a persistable actor, mark it as dirty after processing a message
+            if isinstance(actor, PersistableActor):
+                actor.mark_dirty()
+            
+            # If this was an ask, set the result in the future
+            future = self._response_futures.pop(message_id, None) if message_id else None
+            if future and not future.done():
+                future.set_result(result)
                 
-                # If this was an ask, set the exception in the future
-                if message_id and message_id in self._response_futures:
-                    self._response_futures[message_id].set_exception(e)
-                    del self._response_futures[message_id]
+        except Exception as e:
+            actor._metrics["error_count"] += 1
+            logger.exception(f"Error in actor {actor_id} processing message {message}")
+            
+            # If this was an ask, set the exception in the future
+            future = self._response_futures.pop(message_id, None) if message_id else None
+            if future and not future.done():
+                future.set_exception(e)
 
 # Singleton actor system
 _default_system = None
 
-def get_actor_system(name: str = "default") -> ActorSystem:
-    """Get or create the default actor system."""
+def get_actor_system(name: str = "default", mailbox_shards: Optional[int] = None) -> ActorSystem:
+    """
+    Get or create the default actor system.
+    
+    ``mailbox_shards`` only takes effect when the system is first created.
+    """
     global _default_system
     if not _default_system:
-        _default_system = ActorSystem(name)
+        _default_system = ActorSystem(name, mailbox_shards=mailbox_shards)
     return _default_system
@@ -6,6 +6,8 @@ import functools
 import os
 import json
 from src.db.db import get_connection
+from src.db.async_db import run_in_db_executor
+from src.utils.name_index import get_capture_index, get_species_index, get_item_index
 
 class AutocompleteHandlers:
     """
@@ -22,24 +24,8 @@ class AutocompleteHandlers:
         Autocomplete for Veramon names.
         Provides suggestions for Veramon names based on the user's input.
         """
-        # Load Veramon data from the database file
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-        database_path = os.path.join(data_dir, "veramon_database.json")
-        
-        try:
-            with open(database_path, 'r') as f:
-                veramon_data = json.load(f)
-        except Exception as e:
-            print(f"Error loading Veramon database in autocomplete: {e}")
-            veramon_data = {}
-                
         # Filter Veramon names based on current input
-        matches = []
-        for name in veramon_data.keys():
-            if current.lower() in name.lower():
-                matches.append(name)
-                if len(matches) >= 25:  # Discord allows max 25 choices
-                    break
+        matches = get_species_index().search(current, limit=25)  # Discord allows max 25 choices
                     
         return [
             app_commands.Choice(name=name, value=name)
@@ -58,22 +44,13 @@ class AutocompleteHandlers:
         user_id = str(interaction.user.id)
         
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            # Query for user's Veramon with names matching the current input
-            cursor.execute("""
-                SELECT c.id, c.veramon_name, c.nickname, c.level, c.shiny 
-                FROM captures c
-                WHERE c.user_id = ? AND (
-                    c.nickname LIKE ? OR c.veramon_name LIKE ?
-                )
-                ORDER BY c.level DESC
-                LIMIT 25
-            """, (user_id, f"%{current}%", f"%{current}%"))
-            
-            results = cursor.fetchall()
-            conn.close()
+            # Search the user's in-memory capture index, loading it off the
+            # event loop the first time
+            capture_index = get_capture_index()
+            if capture_index.is_warm(user_id):
+                results = capture_index.search(user_id, current)
+            else:
+                results = await run_in_db_executor(capture_index.search, user_id, current)
             
             # Format results as choices
             choices = []
@@ -130,19 +107,12 @@ class AutocompleteHandlers:
         Autocomplete for item names.
         Provides suggestions for items based on the user's input.
         """
-        # Load item data
-        data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "items.json")
-        with open(data_path, 'r') as f:
-            item_data = json.load(f)
-            
         # Filter item names based on current input
-        matches = []
-        for item_id, item_info in item_data.items():
-            item_name = item_info.get("name", item_id)
-            if current.lower() in item_name.lower():
-                matches.append((item_id, item_name))
-                if len(matches) >= 25:
-                    break
+        item_index = get_item_index()
+        matches = [
+            (item_id, item_index.name(item_id))
+            for item_id in item_index.search(current, limit=25)
+        ]
                     
         return [
             app_commands.Choice(name=item_name, value=item_id)
@@ -4,6 +4,10 @@ Battle Metrics for Veramon Reunited
 
 This module tracks and analyzes battle performance metrics, providing insights
 into battle system efficiency and identifying bottlenecks.
+
+Timings and finished battles are kept in fixed-memory latency sketches
+(see latency_sketch.py), so memory does not grow with the number of
+battles and summaries include p50/p95/p99.
 """
 
 import time
@@ -12,9 +16,10 @@ import json
 import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple, Set
-from collections import defaultdict
+from collections import deque
 
 from src.utils.performance_monitor import get_performance_monitor
+from src.utils.latency_sketch import LatencySketch, LatencyHistograms
 
 # Set up logging
 logger = logging.getLogger('battle_metrics')
@@ -27,13 +32,26 @@ class BattleMetrics:
     analysis to help identify performance bottlenecks.
     """
     
-    def __init__(self):
-        """Initialize the battle metrics tracker."""
-        self.operation_times: Dict[str, List[float]] = defaultdict(list)
-        self.battle_durations: Dict[int, Dict[str, Any]] = {}
-        self.move_calculation_times: List[float] = []
-        self.status_effect_times: List[float] = []
-        self.field_condition_times: List[float] = []
+    def __init__(self, max_active_battles: int = 1000, recent_battle_limit: int = 100):
+        """
+        Initialize the battle metrics tracker.
+        
+        Args:
+            max_active_battles: Maximum number of unfinished battles tracked;
+                the oldest are dropped beyond it, e.g. battles that never ended
+            recent_battle_limit: Number of finished battles kept for get_recent_battles
+        """
+        # Timings in seconds
+        self.operation_latency = LatencyHistograms(max_series=100)
+        self.move_calculation_latency = LatencySketch()
+        self.status_effect_latency = LatencySketch()
+        self.field_condition_latency = LatencySketch()
+        self.battle_duration_latency = LatencySketch()
+        self.battle_turns = LatencySketch()
+        
+        self.max_active_battles = max_active_battles
+        self.active_battles: Dict[int, Dict[str, Any]] = {}
+        self.recent_battles = deque(maxlen=recent_battle_limit)
         self.battle_counts: Dict[str, int] = {
             'total': 0,
             'pvp': 0,
@@ -56,7 +74,7 @@ class BattleMetrics:
             battle_type: Type of battle (pvp, pve, multi)
         """
         with self.metrics_lock:
-            self.battle_durations[battle_id] = {
+            self.active_battles[battle_id] = {
                 'start_time': time.time(),
                 'battle_type': battle_type,
                 'turns': 0,
@@ -71,6 +89,10 @@ class BattleMetrics:
             self.battle_counts['total'] += 1
             if battle_type in self.battle_counts:
                 self.battle_counts[battle_type] += 1
+            
+            # Forget the oldest battles that were never ended
+            while len(self.active_battles) > self.max_active_battles:
+                self.active_battles.pop(next(iter(self.active_battles)))
     
     def record_battle_end(self, battle_id: int, outcome: str) -> None:
         """
@@ -81,17 +103,21 @@ class BattleMetrics:
             outcome: Battle outcome (completed or cancelled)
         """
         with self.metrics_lock:
-            if battle_id not in self.battle_durations:
+            battle = self.active_battles.pop(battle_id, None)
+            if battle is None:
                 return
                 
             # Calculate duration
-            start_time = self.battle_durations[battle_id]['start_time']
-            duration = time.time() - start_time
+            end_time = time.time()
+            duration = end_time - battle['start_time']
             
             # Update metrics
-            self.battle_durations[battle_id]['duration'] = duration
-            self.battle_durations[battle_id]['end_time'] = time.time()
-            self.battle_durations[battle_id]['outcome'] = outcome
+            battle['duration'] = duration
+            battle['end_time'] = end_time
+            battle['outcome'] = outcome
+            self.recent_battles.append({**battle, 'battle_id': battle_id})
+            self.battle_duration_latency.add(duration)
+            self.battle_turns.add(battle['turns'])
             
             # Increment outcome counter
             if outcome in self.battle_counts:
@@ -99,7 +125,7 @@ class BattleMetrics:
             
             # Record to performance monitor
             if self.performance_monitor:
-                battle_type = self.battle_durations[battle_id]['battle_type']
+                battle_type = battle['battle_type']
                 self.performance_monitor.record_custom_metric(
                     f"battle_duration_{battle_type}", 
                     duration
@@ -113,8 +139,8 @@ class BattleMetrics:
             battle_id: Unique ID for the battle
         """
         with self.metrics_lock:
-            if battle_id in self.battle_durations:
-                self.battle_durations[battle_id]['turns'] += 1
+            if battle_id in self.active_battles:
+                self.active_battles[battle_id]['turns'] += 1
     
     def record_move_use(self, battle_id: int) -> None:
         """
@@ -124,8 +150,8 @@ class BattleMetrics:
             battle_id: Unique ID for the battle
         """
         with self.metrics_lock:
-            if battle_id in self.battle_durations:
-                self.battle_durations[battle_id]['moves_used'] += 1
+            if battle_id in self.active_battles:
+                self.active_battles[battle_id]['moves_used'] += 1
     
     def record_switch(self, battle_id: int) -> None:
         """
@@ -135,8 +161,8 @@ class BattleMetrics:
             battle_id: Unique ID for the battle
         """
         with self.metrics_lock:
-            if battle_id in self.battle_durations:
-                self.battle_durations[battle_id]['switches'] += 1
+            if battle_id in self.active_battles:
+                self.active_battles[battle_id]['switches'] += 1
     
     def record_item_use(self, battle_id: int) -> None:
         """
@@ -146,8 +172,8 @@ class BattleMetrics:
             battle_id: Unique ID for the battle
         """
         with self.metrics_lock:
-            if battle_id in self.battle_durations:
-                self.battle_durations[battle_id]['items_used'] += 1
+            if battle_id in self.active_battles:
+                self.active_battles[battle_id]['items_used'] += 1
     
     def record_status_effect(self, battle_id: int) -> None:
         """
@@ -157,8 +183,8 @@ class BattleMetrics:
             battle_id: Unique ID for the battle
         """
         with self.metrics_lock:
-            if battle_id in self.battle_durations:
-                self.battle_durations[battle_id]['status_effects_applied'] += 1
+            if battle_id in self.active_battles:
+                self.active_battles[battle_id]['status_effects_applied'] += 1
     
     def record_field_condition(self, battle_id: int) -> None:
         """
@@ -168,8 +194,8 @@ class BattleMetrics:
             battle_id: Unique ID for the battle
         """
         with self.metrics_lock:
-            if battle_id in self.battle_durations:
-                self.battle_durations[battle_id]['field_conditions_applied'] += 1
+            if battle_id in self.active_battles:
+                self.active_battles[battle_id]['field_conditions_applied'] += 1
     
     def record_operation_time(self, operation: str, duration: float) -> None:
         """
@@ -179,12 +205,7 @@ class BattleMetrics:
             operation: Name of the operation
             duration: Time taken in seconds
         """
-        with self.metrics_lock:
-            self.operation_times[operation].append(duration)
-            
-            # If we have too many samples, remove oldest ones
-            if len(self.operation_times[operation]) > 1000:
-                self.operation_times[operation] = self.operation_times[operation][-1000:]
+        self.operation_latency.record(operation, duration)
     
     def record_move_calculation(self, duration: float) -> None:
         """
@@ -193,16 +214,11 @@ class BattleMetrics:
         Args:
             duration: Time taken in seconds
         """
-        with self.metrics_lock:
-            self.move_calculation_times.append(duration)
-            
-            # If we have too many samples, remove oldest ones
-            if len(self.move_calculation_times) > 1000:
-                self.move_calculation_times = self.move_calculation_times[-1000:]
-            
-            # Record to performance monitor
-            if self.performance_monitor:
-                self.performance_monitor.record_custom_metric("move_calculation", duration)
+        self.move_calculation_latency.add(duration)
+        
+        # Record to performance monitor
+        if self.performance_monitor:
+            self.performance_monitor.record_custom_metric("move_calculation", duration)
     
     def record_status_effect_processing(self, duration: float) -> None:
         """
@@ -211,16 +227,11 @@ class BattleMetrics:
         Args:
             duration: Time taken in seconds
         """
-        with self.metrics_lock:
-            self.status_effect_times.append(duration)
-            
-            # If we have too many samples, remove oldest ones
-            if len(self.status_effect_times) > 1000:
-                self.status_effect_times = self.status_effect_times[-1000:]
-            
-            # Record to performance monitor
-            if self.performance_monitor:
-                self.performance_monitor.record_custom_metric("status_effect_processing", duration)
+        self.status_effect_latency.add(duration)
+        
+        # Record to performance monitor
+        if self.performance_monitor:
+            self.performance_monitor.record_custom_metric("status_effect_processing", duration)
     
     def record_field_condition_processing(self, duration: float) -> None:
         """
@@ -229,108 +240,56 @@ class BattleMetrics:
         Args:
             duration: Time taken in seconds
         """
-        with self.metrics_lock:
-            self.field_condition_times.append(duration)
-            
-            # If we have too many samples, remove oldest ones
-            if len(self.field_condition_times) > 1000:
-                self.field_condition_times = self.field_condition_times[-1000:]
-            
-            # Record to performance monitor
-            if self.performance_monitor:
-                self.performance_monitor.record_custom_metric("field_condition_processing", duration)
+        self.field_condition_latency.add(duration)
+        
+        # Record to performance monitor
+        if self.performance_monitor:
+            self.performance_monitor.record_custom_metric("field_condition_processing", duration)
     
     def get_metrics_summary(self) -> Dict[str, Any]:
         """
         Get a summary of battle performance metrics.
         
+        Timing summaries have count, total, average, min, max, p50, p95 and
+        p99 in seconds, or only count if nothing was recorded.
+        
         Returns:
             Dictionary with battle metrics summary
         """
         with self.metrics_lock:
-            # Calculate operation time statistics
-            operation_stats = {}
-            for operation, times in self.operation_times.items():
-                if times:
-                    operation_stats[operation] = {
-                        'count': len(times),
-                        'average': sum(times) / len(times),
-                        'min': min(times),
-                        'max': max(times),
-                        'total': sum(times)
-                    }
-            
-            # Calculate move calculation statistics
-            if self.move_calculation_times:
-                move_calc_stats = {
-                    'count': len(self.move_calculation_times),
-                    'average': sum(self.move_calculation_times) / len(self.move_calculation_times),
-                    'min': min(self.move_calculation_times),
-                    'max': max(self.move_calculation_times),
-                    'total': sum(self.move_calculation_times)
-                }
-            else:
-                move_calc_stats = {'count': 0}
-            
-            # Calculate status effect statistics
-            if self.status_effect_times:
-                status_effect_stats = {
-                    'count': len(self.status_effect_times),
-                    'average': sum(self.status_effect_times) / len(self.status_effect_times),
-                    'min': min(self.status_effect_times),
-                    'max': max(self.status_effect_times),
-                    'total': sum(self.status_effect_times)
-                }
-            else:
-                status_effect_stats = {'count': 0}
-            
-            # Calculate field condition statistics
-            if self.field_condition_times:
-                field_condition_stats = {
-                    'count': len(self.field_condition_times),
-                    'average': sum(self.field_condition_times) / len(self.field_condition_times),
-                    'min': min(self.field_condition_times),
-                    'max': max(self.field_condition_times),
-                    'total': sum(self.field_condition_times)
-                }
-            else:
-                field_condition_stats = {'count': 0}
-            
-            # Calculate battle duration statistics
-            completed_battles = [
-                data for data in self.battle_durations.values() 
-                if 'duration' in data
-            ]
-            
-            if completed_battles:
-                durations = [data['duration'] for data in completed_battles]
-                turns = [data['turns'] for data in completed_battles]
-                
-                avg_duration = sum(durations) / len(durations)
-                avg_turns = sum(turns) / len(turns)
-                
-                battle_stats = {
-                    'count': len(completed_battles),
-                    'average_duration': avg_duration,
-                    'min_duration': min(durations),
-                    'max_duration': max(durations),
-                    'average_turns': avg_turns,
-                    'min_turns': min(turns),
-                    'max_turns': max(turns),
-                }
-            else:
-                battle_stats = {'count': 0}
-            
-            # Compile full summary
-            return {
-                'timestamp': datetime.now().isoformat(),
-                'battle_counts': self.battle_counts.copy(),
-                'battle_stats': battle_stats,
-                'operation_stats': operation_stats,
-                'move_calculation_stats': move_calc_stats,
-                'status_effect_stats': status_effect_stats,
-                'field_condition_stats': field_condition_stats
+            battle_counts = self.battle_counts.copy()
+            active_battles = len(self.active_battles)
+        
+        # Calculate battle duration statistics
+        durations = self.battle_duration_latency.to_dict()
+        turns = self.battle_turns.to_dict()
+        if durations['count']:
+            battle_stats = {
+                'count': durations['count'],
+                'average_duration': durations['average'],
+                'min_duration': durations['min'],
+                'max_duration': durations['max'],
+                'p50_duration': durations['p50'],
+                'p95_duration': durations['p95'],
+                'p99_duration': durations['p99'],
+                'average_turns': turns['average'],
+                'min_turns': turns['min'],
+                'max_turns': turns['max'],
             }
+        else:
+            battle_stats = {'count': 0}
+        
+        # Compile full summary
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'battle_counts': battle_counts,
+            'active_battles': active_battles,
+            'battle_stats': battle_stats,
+            'operation_stats': self.operation_latency.snapshot(),
+            'move_calculation_stats': self.move_calculation_latency.to_dict(),
+            'status_effect_stats': self.status_effect_latency.to_dict(),
+            'field_condition_stats': self.field_condition_latency.to_dict()
+        }
     
     def get_recent_battles(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -340,30 +299,21 @@ class BattleMetrics:
             limit: Maximum number of battles to return
             
         Returns:
-            List of recent battle data
+            List of recent battle data, most recent first
         """
         with self.metrics_lock:
-            # Get completed battles sorted by end time (most recent first)
-            completed_battles = [
-                {**data, 'battle_id': battle_id} 
-                for battle_id, data in self.battle_durations.items() 
-                if 'end_time' in data
-            ]
-            
-            # Sort by end time (descending)
-            completed_battles.sort(key=lambda x: x['end_time'], reverse=True)
-            
-            # Return limited number
-            return completed_battles[:limit]
+            return list(reversed(self.recent_battles))[:limit]
     
     def clear_metrics(self) -> None:
         """Clear all metrics data."""
         with self.metrics_lock:
-            self.operation_times.clear()
-            self.battle_durations.clear()
-            self.move_calculation_times.clear()
-            self.status_effect_times.clear()
-            self.field_condition_times.clear()
+            self.operation_latency.clear()
+            for sketch in (self.move_calculation_latency, self.status_effect_latency,
+                           self.field_condition_latency, self.battle_duration_latency,
+                           self.battle_turns):
+                sketch.clear()
+            self.active_battles.clear()
+            self.recent_battles.clear()
             self.battle_counts = {
                 'total': 0,
                 'pvp': 0,
@@ -383,8 +333,8 @@ class BattleMetrics:
         bottlenecks = []
         with self.metrics_lock:
             # Check for slow move calculations
-            if self.move_calculation_times and len(self.move_calculation_times) >= 10:
-                avg_move_calc = sum(self.move_calculation_times) / len(self.move_calculation_times)
+            if self.move_calculation_latency.count >= 10:
+                avg_move_calc = self.move_calculation_latency.average
                 if avg_move_calc > 0.05:  # More than 50ms
                     severity = "high" if avg_move_calc > 0.1 else "medium"
                     bottlenecks.append({
@@ -395,8 +345,8 @@ class BattleMetrics:
                     })
             
             # Check for slow status effect processing
-            if self.status_effect_times and len(self.status_effect_times) >= 5:
-                avg_status = sum(self.status_effect_times) / len(self.status_effect_times)
+            if self.status_effect_latency.count >= 5:
+                avg_status = self.status_effect_latency.average
                 if avg_status > 0.03:  # More than 30ms
                     severity = "high" if avg_status > 0.07 else "medium"
                     bottlenecks.append({
@@ -407,9 +357,9 @@ class BattleMetrics:
                     })
             
             # Check for slow battle operations
-            for operation, times in self.operation_times.items():
-                if times and len(times) >= 5:
-                    avg_time = sum(times) / len(times)
+            for operation, stats in self.operation_latency.snapshot().items():
+                if stats['count'] >= 5:
+                    avg_time = stats['average']
                     if avg_time > 0.1:  # More than 100ms
                         severity = "high" if avg_time > 0.2 else "medium"
                         bottlenecks.append({
@@ -420,13 +370,8 @@ class BattleMetrics:
                         })
             
             # Check if battles take too many turns
-            completed_battles = [
-                data for data in self.battle_durations.values() 
-                if 'duration' in data and 'turns' in data
-            ]
-            
-            if completed_battles and len(completed_battles) >= 5:
-                avg_turns = sum(data['turns'] for data in completed_battles) / len(completed_battles)
+            if self.battle_turns.count >= 5:
+                avg_turns = self.battle_turns.average
                 if avg_turns > 15:  # More than 15 turns on average
                     severity = "medium" if avg_turns > 20 else "low"
                     bottlenecks.append({
@@ -0,0 +1,385 @@
+"""
+Headless Battle Simulator for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+Battle and BattleMechanics are built for live Discord battles and depend on
+the cache manager, performance monitor and metrics singletons, so they are
+too heavy to run thousands of battles for balance testing. This module
+simulates batches of 1v1 or team battles with the same stat formulas,
+damage formula and type chart. With NumPy installed a batch is stepped as
+arrays, one turn for every running battle at once; without it, the same
+rules run battle by battle. Batches are split across a process pool.
+"""
+
+import random
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.models.veramon import Veramon
+from src.models.battle_mechanics import (
+    raw_damage, CRITICAL_HIT_MULTIPLIER, DAMAGE_ROLL_MIN, DAMAGE_ROLL_MAX
+)
+from src.utils.data_loader import load_abilities_data
+from src.utils.rng import RNGService, derive_seed, NUMPY_AVAILABLE
+from src.utils.type_registry import get_type_registry
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+# Set up logging
+logger = logging.getLogger("battle_simulator")
+
+CRITICAL_HIT_CHANCE = 0.1
+DEFAULT_MOVE = {"power": 35, "accuracy": 1.0, "type": "normal"}
+
+
+class SimulationTables:
+    """
+    Per-species stats and per-matchup move choices for a simulation.
+
+    Every Veramon uses the move with the highest expected damage against
+    its current opponent, so the move, its damage before rolls and its hit
+    chance only depend on the pair of species and are computed once.
+    Matchup tables are flat lists indexed [attacker * species_count + defender].
+    """
+
+    def __init__(self, species: Dict[str, Dict[str, Any]], level: int = 50,
+                 abilities: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Build the tables.
+
+        Args:
+            species: Species data by name, as in veramon_database.json
+            level: Level of every simulated Veramon
+            abilities: Move data for species that list moves by name
+        """
+        if abilities is None:
+            abilities = load_abilities_data()
+        type_registry = get_type_registry()
+
+        self.level = level
+        self.names: List[str] = sorted(species)
+        self.move_names: List[str] = []
+        move_codes: Dict[str, int] = {}
+
+        self.max_hp: List[int] = []
+        self.speed: List[int] = []
+        attack: List[int] = []
+        defense: List[int] = []
+        combos: List[int] = []
+        moves: List[List[Tuple[int, float, float, int]]] = []
+
+        for name in self.names:
+            veramon = Veramon(name, data=species[name], level=level)
+            self.max_hp.append(veramon.max_hp)
+            self.speed.append(veramon.speed)
+            attack.append(veramon.attack)
+            defense.append(veramon.defense)
+            combos.append(type_registry.combo(veramon.types))
+
+            species_moves = []
+            for move_name, move in self._species_moves(species[name], abilities):
+                if move_name not in move_codes:
+                    move_codes[move_name] = len(self.move_names)
+                    self.move_names.append(move_name)
+                accuracy = move.get("accuracy", 1.0)
+                if accuracy > 1:
+                    accuracy /= 100
+                species_moves.append((
+                    move_codes[move_name],
+                    float(move.get("power", 0)),
+                    accuracy,
+                    type_registry.intern(move.get("type"))
+                ))
+            moves.append(species_moves)
+
+        count = len(self.names)
+        self.species_count = count
+        self.best_move: List[int] = [0] * (count * count)
+        self.base_damage: List[float] = [0.0] * (count * count)
+        self.hit_chance: List[float] = [0.0] * (count * count)
+
+        for attacker in range(count):
+            for defender in range(count):
+                best = None
+                for move_code, power, accuracy, type_code in moves[attacker]:
+                    damage = 0.0
+                    if power > 0:
+                        effectiveness = type_registry.effectiveness(type_code, combos[defender])
+                        damage = raw_damage(level, power, attack[attacker], defense[defender]) * effectiveness
+                    if best is None or damage * accuracy > best[1] * best[2]:
+                        best = (move_code, damage, accuracy)
+                index = attacker * count + defender
+                self.best_move[index], self.base_damage[index], self.hit_chance[index] = best
+
+    def _species_moves(self, data: Dict[str, Any],
+                       abilities: Dict[str, Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Get a species' moves as (name, data) pairs, falling back to Tackle."""
+        listed = data.get("abilities") or {}
+        if isinstance(listed, dict):
+            moves = [(name, move) for name, move in listed.items() if isinstance(move, dict)]
+        else:
+            moves = [(name, abilities[name]) for name in listed if name in abilities]
+        return moves or [("Tackle", abilities.get("Tackle", DEFAULT_MOVE))]
+
+
+def _roll_damage(base: float, rng: random.Random) -> int:
+    """Apply critical hit and damage rolls the way calculate_damage does."""
+    if base <= 0:
+        return 0
+    damage = base * rng.uniform(DAMAGE_ROLL_MIN, DAMAGE_ROLL_MAX)
+    if rng.random() < CRITICAL_HIT_CHANCE:
+        damage *= CRITICAL_HIT_MULTIPLIER
+    return max(1, int(damage))
+
+
+def _simulate_python(tables: SimulationTables, battles: int, team_size: int,
+                     seed: int, max_turns: int) -> Dict[str, Any]:
+    """Simulate a batch one battle at a time."""
+    rng = RNGService.from_seed(seed)
+    count = tables.species_count
+    appearances = [0] * count
+    wins = [0] * count
+    move_uses = [0] * len(tables.move_names)
+    draws = 0
+    total_turns = 0
+
+    for _ in range(battles):
+        teams = [[rng.randrange(count) for _ in range(team_size)] for _ in range(2)]
+        hp = [[tables.max_hp[species] for species in team] for team in teams]
+        active = [0, 0]
+        winner = None
+        turns = 0
+
+        while winner is None and turns < max_turns:
+            turns += 1
+            current = [teams[0][active[0]], teams[1][active[1]]]
+            speed_0, speed_1 = tables.speed[current[0]], tables.speed[current[1]]
+            first = 0 if speed_0 > speed_1 else 1 if speed_1 > speed_0 else rng.randrange(2)
+
+            for side in (first, 1 - first):
+                other = 1 - side
+                index = current[side] * count + current[other]
+                move_uses[tables.best_move[index]] += 1
+                if rng.random() < tables.hit_chance[index]:
+                    hp[other][active[other]] -= _roll_damage(tables.base_damage[index], rng)
+
+                if hp[other][active[other]] <= 0:
+                    # A replacement does not attack on the turn it comes in
+                    active[other] += 1
+                    if active[other] == team_size:
+                        winner = side
+                    break
+
+        total_turns += turns
+        for team in teams:
+            for species in team:
+                appearances[species] += 1
+        if winner is None:
+            draws += 1
+        else:
+            for species in teams[winner]:
+                wins[species] += 1
+
+    return {
+        "battles": battles,
+        "draws": draws,
+        "turns": total_turns,
+        "appearances": appearances,
+        "wins": wins,
+        "move_uses": move_uses
+    }
+
+
+def _simulate_numpy(tables: SimulationTables, battles: int, team_size: int,
+                    seed: int, max_turns: int) -> Dict[str, Any]:
+    """Simulate a batch with every running battle stepped at once."""
+    rng = RNGService.numpy_generator(seed)
+    count = tables.species_count
+    max_hp = np.array(tables.max_hp, dtype=np.float64)
+    speed = np.array(tables.speed, dtype=np.int64)
+    best_move = np.array(tables.best_move, dtype=np.int64)
+    base_damage = np.array(tables.base_damage, dtype=np.float64)
+    hit_chance = np.array(tables.hit_chance, dtype=np.float64)
+    move_uses = np.zeros(len(tables.move_names), dtype=np.int64)
+
+    teams = rng.integers(0, count, size=(battles, 2, team_size))
+    hp = max_hp[teams]
+    active = np.zeros((battles, 2), dtype=np.int64)
+    winner = np.full(battles, -1, dtype=np.int64)
+    turns = np.zeros(battles, dtype=np.int64)
+    running = np.arange(battles)
+
+    def attack(battle, side):
+        """Resolve one attack per battle and return which defenders fainted."""
+        other = 1 - side
+        attacker = teams[battle, side, active[battle, side]]
+        defender = teams[battle, other, active[battle, other]]
+        index = attacker * count + defender
+        move_uses[:] += np.bincount(best_move[index], minlength=move_uses.size)
+
+        size = battle.size
+        hit = rng.random(size) < hit_chance[index]
+        damage = base_damage[index] * rng.uniform(DAMAGE_ROLL_MIN, DAMAGE_ROLL_MAX, size)
+        damage *= np.where(rng.random(size) < CRITICAL_HIT_CHANCE, CRITICAL_HIT_MULTIPLIER, 1.0)
+        damage = np.where(base_damage[index] > 0, np.maximum(1, np.floor(damage)), 0) * hit
+
+        slot = active[battle, other]
+        hp[battle, other, slot] -= damage
+        fainted = hp[battle, other, slot] <= 0
+
+        # A replacement does not attack on the turn it comes in
+        fainted_battle, fainted_side = battle[fainted], other[fainted]
+        active[fainted_battle, fainted_side] += 1
+        defeated = active[fainted_battle, fainted_side] == team_size
+        winner[fainted_battle[defeated]] = side[fainted][defeated]
+        return fainted
+
+    for _ in range(max_turns):
+        if running.size == 0:
+            break
+        turns[running] += 1
+        speed_0 = speed[teams[running, 0, active[running, 0]]]
+        speed_1 = speed[teams[running, 1, active[running, 1]]]
+        first = np.where(speed_0 > speed_1, 0,
+                         np.where(speed_1 > speed_0, 1, rng.integers(0, 2, running.size)))
+
+        fainted = attack(running, first)
+        second = ~fainted
+        attack(running[second], 1 - first[second])
+
+        running = running[winner[running] < 0]
+
+    decided = np.nonzero(winner >= 0)[0]
+    winning_teams = teams[decided, winner[decided]]
+    return {
+        "battles": battles,
+        "draws": int(battles - decided.size),
+        "turns": int(turns.sum()),
+        "appearances": np.bincount(teams.ravel(), minlength=count).tolist(),
+        "wins": np.bincount(winning_teams.ravel(), minlength=count).tolist(),
+        "move_uses": move_uses.tolist()
+    }
+
+
+# Tables of the worker process, set once by the pool initializer
+_worker_tables = None
+
+def _init_worker(tables: SimulationTables) -> None:
+    """Keep the tables in the worker so chunks don't have to carry them."""
+    global _worker_tables
+    _worker_tables = tables
+
+def _run_chunk(battles: int, team_size: int, seed: int, max_turns: int,
+               use_numpy: bool) -> Dict[str, Any]:
+    """Simulate one chunk in a worker process."""
+    simulate = _simulate_numpy if use_numpy else _simulate_python
+    return simulate(_worker_tables, battles, team_size, seed, max_turns)
+
+
+class BattleSimulator:
+    """
+    Runs batches of headless battles between random teams.
+
+    Results only depend on the seed, the chunk size and whether NumPy is
+    used, not on the number of worker processes.
+    """
+
+    def __init__(self, species: Optional[Dict[str, Dict[str, Any]]] = None, level: int = 50,
+                 max_turns: int = 100, use_numpy: Optional[bool] = None):
+        """
+        Initialize the simulator.
+
+        Args:
+            species: Species data by name (all species in the database if None)
+            level: Level of every simulated Veramon
+            max_turns: Turns after which a battle counts as a draw
+            use_numpy: Whether to step battles as arrays (if NumPy is installed by default)
+        """
+        if species is None:
+            from src.utils.species_registry import get_species_registry
+            species = get_species_registry().all()
+        if use_numpy is None:
+            use_numpy = NUMPY_AVAILABLE
+        elif use_numpy and not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for vectorized simulations")
+
+        self.tables = SimulationTables(species, level=level)
+        self.max_turns = max_turns
+        self.use_numpy = use_numpy
+
+    def run(self, battles: int = 1000, team_size: int = 1, seed: Optional[int] = None,
+            workers: int = 1, chunk_size: int = 5000) -> Dict[str, Any]:
+        """
+        Simulate battles between random teams.
+
+        Args:
+            battles: Number of battles
+            team_size: Veramon per team, e.g. 1 or 6
+            seed: Seed for the teams and all rolls (random if None)
+            workers: Number of worker processes
+            chunk_size: Battles per chunk handed to a worker
+
+        Returns:
+            Dict with battle, draw and turn counts, per-species appearances,
+            wins and win rate, and how often each move was used
+        """
+        if seed is None:
+            seed = random.getrandbits(64)
+        chunks = []
+        remaining = battles
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            chunks.append((size, team_size, derive_seed(seed, "simulation", len(chunks)),
+                           self.max_turns, self.use_numpy))
+            remaining -= size
+
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.tables,)) as executor:
+                results = list(executor.map(_run_chunk, *zip(*chunks)))
+        else:
+            _init_worker(self.tables)
+            results = [_run_chunk(*chunk) for chunk in chunks]
+
+        return self._merge(results, team_size, seed)
+
+    def _merge(self, results: List[Dict[str, Any]], team_size: int, seed: int) -> Dict[str, Any]:
+        """Add up chunk results and name species and moves."""
+        tables = self.tables
+        appearances = [0] * tables.species_count
+        wins = [0] * tables.species_count
+        move_uses = [0] * len(tables.move_names)
+        battles = draws = turns = 0
+
+        for result in results:
+            battles += result["battles"]
+            draws += result["draws"]
+            turns += result["turns"]
+            for i, value in enumerate(result["appearances"]):
+                appearances[i] += value
+            for i, value in enumerate(result["wins"]):
+                wins[i] += value
+            for i, value in enumerate(result["move_uses"]):
+                move_uses[i] += value
+
+        species = {}
+        for i, name in enumerate(tables.names):
+            if appearances[i]:
+                species[name] = {
+                    "appearances": appearances[i],
+                    "wins": wins[i],
+                    "win_rate": wins[i] / appearances[i]
+                }
+
+        return {
+            "battles": battles,
+            "team_size": team_size,
+            "seed": seed,
+            "backend": "numpy" if self.use_numpy else "python",
+            "draws": draws,
+            "average_turns": turns / battles if battles else 0.0,
+            "species": species,
+            "moves": {name: move_uses[i] for i, name in enumerate(tables.move_names) if move_uses[i]}
+        }
@@ -1,22 +1,30 @@
-import time
-import threading
-import json
 from typing import Dict, Any, Optional, Callable, List, Tuple, Union
 from functools import wraps
 import logging
 
+from src.db.tiered_cache import CacheNamespace, get_tiered_cache
+
 logger = logging.getLogger('veramon.cache')
 
 class Cache:
     """
     A thread-safe cache system with TTL (time-to-live) for frequently accessed data.
     Supports automatic invalidation and lazy loading.
+    
+    Entries live in the "general" namespace of the tiered cache, so they
+    share its memory budget, eviction, disk tier and statistics with the
+    database caches.
     """
     
-    def __init__(self):
-        self._cache = {}
-        self._locks = {}
-        self._global_lock = threading.RLock()
+    def __init__(self, namespace: Optional[CacheNamespace] = None):
+        self._namespace = namespace
+        
+    @property
+    def namespace(self) -> CacheNamespace:
+        """The tiered cache namespace holding the entries."""
+        if self._namespace is None:
+            self._namespace = get_tiered_cache().namespace("general", share=0.15, persistent=True)
+        return self._namespace
         
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -29,19 +37,7 @@ class Cache:
         Returns:
             The cached value or default if not found
         """
-        with self._global_lock:
-            # Check if key exists and is not expired
-            if key in self._cache:
-                entry = self._cache[key]
-                if entry['expires'] > time.time() or entry['expires'] == 0:
-                    logger.debug(f"Cache hit: {key}")
-                    return entry['value']
-                else:
-                    # Key is expired
-                    del self._cache[key]
-                    
-            logger.debug(f"Cache miss: {key}")
-            return default
+        return self.namespace.get(key, default)
             
     def set(self, key: str, value: Any, ttl: int = 600) -> None:
         """
@@ -52,13 +48,7 @@ class Cache:
             value: Value to cache
             ttl: Time to live in seconds (0 for no expiration)
         """
-        with self._global_lock:
-            expires = time.time() + ttl if ttl > 0 else 0
-            self._cache[key] = {
-                'value': value,
-                'expires': expires
-            }
-            logger.debug(f"Cache set: {key}, TTL: {ttl}s")
+        self.namespace.put(key, value, ttl)
             
     def delete(self, key: str) -> bool:
         """
@@ -70,18 +60,12 @@ class Cache:
         Returns:
             True if key was deleted, False if it didn't exist
         """
-        with self._global_lock:
-            if key in self._cache:
-                del self._cache[key]
-                logger.debug(f"Cache delete: {key}")
-                return True
-            return False
+        return self.namespace.invalidate(key)
             
     def clear(self) -> None:
         """Clear all cached data."""
-        with self._global_lock:
-            self._cache.clear()
-            logger.debug("Cache cleared")
+        self.namespace.clear()
+        logger.debug("Cache cleared")
             
     def invalidate_pattern(self, pattern: str) -> int:
         """
@@ -93,13 +77,7 @@ class Cache:
         Returns:
             Number of keys invalidated
         """
-        count = 0
-        with self._global_lock:
-            keys_to_delete = [k for k in self._cache if pattern in k]
-            for key in keys_to_delete:
-                del self._cache[key]
-                count += 1
-                
+        count = self.namespace.invalidate_pattern(pattern)
         logger.debug(f"Cache invalidated {count} keys matching pattern: {pattern}")
         return count
         
@@ -115,27 +93,7 @@ class Cache:
         Returns:
             The cached or newly computed value
         """
-        # Try to get from cache first
-        value = self.get(key)
-        if value is not None:
-            return value
-            
-        # Get a lock for this key to prevent multiple computations
-        with self._global_lock:
-            if key not in self._locks:
-                self._locks[key] = threading.Lock()
-                
-        # Use the key-specific lock
-        with self._locks[key]:
-            # Check again in case another thread set the value while we were waiting
-            value = self.get(key)
-            if value is not None:
-                return value
-                
-            # Compute the value
-            value = value_func()
-            self.set(key, value, ttl)
-            return value
+        return self.namespace.get_or_set(key, value_func, ttl)
             
     def stats(self) -> Dict[str, Any]:
         """
@@ -144,43 +102,36 @@ class Cache:
         Returns:
             Dictionary with cache statistics
         """
-        with self._global_lock:
-            total_entries = len(self._cache)
-            expired_entries = sum(1 for entry in self._cache.values() 
-                               if entry['expires'] > 0 and entry['expires'] <= time.time())
-            active_entries = total_entries - expired_entries
-            
-            # Categorize by expiration time
-            expiration_groups = {
-                'no_expiry': 0,      # Never expires
-                'short_term': 0,     # < 5 minutes
-                'medium_term': 0,    # 5-30 minutes
-                'long_term': 0       # > 30 minutes
-            }
-            
-            now = time.time()
-            for entry in self._cache.values():
-                if entry['expires'] == 0:
-                    expiration_groups['no_expiry'] += 1
-                elif entry['expires'] <= now:
-                    pass  # Already expired, not counted
-                elif entry['expires'] - now < 300:  # 5 minutes
-                    expiration_groups['short_term'] += 1
-                elif entry['expires'] - now < 1800:  # 30 minutes
-                    expiration_groups['medium_term'] += 1
-                else:
-                    expiration_groups['long_term'] += 1
-                    
-            return {
-                'total_entries': total_entries,
-                'active_entries': active_entries,
-                'expired_entries': expired_entries,
-                'expiration_groups': expiration_groups
-            }
+        return self.namespace.get_stats()
 
 # Create a global cache instance
 cache = Cache()
 
+def clear_cache() -> int:
+    """
+    Clear every namespace of the tiered cache.
+    
+    Returns:
+        Number of entries removed from memory
+    """
+    return get_tiered_cache().clear()
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit, miss, eviction and memory statistics of every cache namespace.
+    
+    Returns:
+        Tiered cache statistics, with hit_rate as a percentage and the
+        cached_items and memory_usage totals used by the diagnostics report
+    """
+    stats = get_tiered_cache().get_stats()
+    return {
+        **stats,
+        "hit_rate": stats["hit_rate"] * 100,
+        "cached_items": stats["total_items"],
+        "memory_usage": stats["bytes"]
+    }
+
 def cached(key_prefix: str, ttl: int = 600, key_func: Optional[Callable] = None):
     """
     Decorator for caching function results.
@@ -234,7 +185,7 @@ def invalidate_cache(pattern: str):
 
 def get_veramon_data(veramon_name: str = None) -> Dict[str, Any]:
     """
-    Get Veramon data from the cache or load it from the data file.
+    Get Veramon data from the shared species registry.
     
     Args:
         veramon_name: Optional specific Veramon to get data for
@@ -242,21 +193,9 @@ def get_veramon_data(veramon_name: str = None) -> Dict[str, Any]:
     Returns:
         Dict with Veramon data
     """
-    def load_veramon_data():
-        import os
-        import json
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-        database_path = os.path.join(data_dir, "veramon_database.json")
-        
-        try:
-            with open(database_path, 'r') as f:
-                return json.load(f)
-        except Exception:
-            # If there's an error, return an empty dictionary
-            # The fallback to veramon_data.json has been removed as it's no longer needed
-            return {}
-            
-    all_data = cache.get_or_set("veramon:all", load_veramon_data, ttl=3600)  # Cache for 1 hour
+    # The species registry already keeps the parsed file and reloads it on change
+    from src.utils.species_registry import get_species_registry
+    all_data = get_species_registry().all()
     
     if veramon_name:
         return all_data.get(veramon_name, {})
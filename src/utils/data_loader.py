@@ -2,24 +2,19 @@ import os
 import json
 import glob
 
+from src.utils.species_registry import get_species_registry
+
 def load_all_veramon_data():
     """
-    Load Veramon data from the database file.
+    Get Veramon data from the shared species registry.
+    
+    The file is parsed once per process and reloaded when it changes. The
+    returned dict is shared, so copy a species before modifying it.
     
     Returns:
         dict: Dictionary of all Veramon data
     """
-    base_dir = os.path.dirname(__file__)
-    data_dir = os.path.abspath(os.path.join(base_dir, '..', 'data'))
-    database_path = os.path.join(data_dir, 'veramon_database.json')
-    
-    # Load the database file
-    try:
-        with open(database_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Error loading Veramon database: {e}")
-        return {}
+    return get_species_registry().all()
 
 def load_biomes_data():
     """Load biomes data from the biomes.json file"""
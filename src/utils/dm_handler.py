@@ -6,6 +6,7 @@ import asyncio
 
 from src.models.permissions import check_permission_level, PermissionLevel, is_vip, is_admin
 from src.utils.user_settings import get_user_settings
+from src.utils.user_resolver import get_user_resolver
 
 logger = logging.getLogger('veramon.dm')
 
@@ -154,7 +155,7 @@ class DMHandler:
         """
         try:
             # Get the user
-            user = await self.bot.fetch_user(int(user_id))
+            user = (await get_user_resolver(self.bot).fetch_many([user_id])).get(str(user_id))
             if not user:
                 logger.error(f"Could not find user with ID {user_id}")
                 return None
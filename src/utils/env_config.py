@@ -58,6 +58,10 @@ def load_env_config() -> Dict[str, Any]:
     _env_config['CONNECTION_POOL_SIZE'] = int(os.getenv('CONNECTION_POOL_SIZE', '10'))
     _env_config['CACHE_TTL'] = int(os.getenv('CACHE_TTL', '300'))
     
+    # Metrics endpoint (0 disables it)
+    _env_config['METRICS_HOST'] = os.getenv('METRICS_HOST', '127.0.0.1')
+    _env_config['METRICS_PORT'] = int(os.getenv('METRICS_PORT', '0'))
+    
     # Advanced Settings
     _env_config['DEBUG_MODE'] = os.getenv('DEBUG_MODE', 'False').lower() in ('true', '1', 't', 'yes')
     _env_config['MAINTENANCE_MODE'] = os.getenv('MAINTENANCE_MODE', 'False').lower() in ('true', '1', 't', 'yes')
@@ -0,0 +1,323 @@
+"""
+Latency Sketches for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+PerformanceMonitor and BattleMetrics used to keep raw timing samples in
+lists and scan them for averages, so memory grew with traffic and there
+were no percentiles. This module provides fixed-memory streaming quantile
+sketches in the style of DDSketch: each value is counted in a logarithmic
+bucket, so any quantile is returned within a fixed relative error (1% by
+default) of the true value, whatever the number of samples.
+"""
+
+import math
+import threading
+import logging
+from typing import Dict, Any, Optional, List
+
+# Set up logging
+logger = logging.getLogger("latency_sketch")
+
+# Quantiles reported by LatencySketch.to_dict
+REPORTED_QUANTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+# Name that series beyond the limit of a LatencyHistograms are recorded under
+OVERFLOW_SERIES = "_other"
+
+
+class LatencySketch:
+    """
+    Streaming quantile sketch with a bounded relative error.
+
+    A value v is counted in bucket ceil(log(v) / log(gamma)), where
+    gamma = (1 + a) / (1 - a) for a relative accuracy a. Values are clamped
+    to [min_value, max_value], which bounds the number of buckets. Count,
+    sum, min and max are exact. Recording holds the sketch's own lock for a
+    few integer updates.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01,
+                 min_value: float = 1e-9, max_value: float = 1e9):
+        """
+        Initialize the sketch.
+
+        Args:
+            relative_accuracy: Maximum relative error of quantiles
+            min_value: Smallest value told apart from zero
+            max_value: Largest value told apart from larger ones
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.max_value = max_value
+
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.lock = threading.Lock()
+
+    def _index(self, value: float) -> int:
+        """Get the bucket of a positive value."""
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float) -> None:
+        """
+        Record a value.
+
+        Args:
+            value: Value to record; values at or below zero count as zero
+        """
+        if value > self.min_value:
+            index = self._index(min(value, self.max_value))
+        else:
+            index = None
+        with self.lock:
+            if index is None:
+                self.zero_count += 1
+            else:
+                self.buckets[index] = self.buckets.get(index, 0) + 1
+            self.count += 1
+            self.total += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Get an estimate of a quantile.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            The estimate, or None if nothing was recorded
+        """
+        with self.lock:
+            return self._quantile(q)
+
+    def _quantile(self, q: float) -> Optional[float]:
+        """Get an estimate of a quantile with the lock held."""
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            value = 0.0
+        else:
+            value = self.max
+            for index in sorted(self.buckets):
+                seen += self.buckets[index]
+                if seen > rank:
+                    # Midpoint of (gamma^(i-1), gamma^i] in relative terms
+                    value = 2 * self.gamma ** index / (self.gamma + 1)
+                    break
+        return min(max(value, self.min), self.max)
+
+    def count_at_most(self, bound: float) -> int:
+        """
+        Get the number of recorded values at or below a bound.
+
+        Values are counted by bucket, so values within the relative
+        accuracy of the bound may be counted on either side of it.
+
+        Args:
+            bound: Upper bound, e.g. a histogram bucket boundary
+
+        Returns:
+            The number of values
+        """
+        with self.lock:
+            if bound >= self.max:
+                return self.count
+            counted = self.zero_count
+            if bound > self.min_value:
+                highest = self._index(min(bound, self.max_value))
+                counted += sum(count for index, count in self.buckets.items() if index <= highest)
+            return counted
+
+    def merge(self, other: "LatencySketch") -> None:
+        """
+        Add the values recorded by another sketch with the same accuracy.
+
+        Args:
+            other: Sketch to merge into this one
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracies")
+        with other.lock:
+            buckets = dict(other.buckets)
+            zero_count, count, total = other.zero_count, other.count, other.total
+            low, high = other.min, other.max
+        with self.lock:
+            for index, bucket_count in buckets.items():
+                self.buckets[index] = self.buckets.get(index, 0) + bucket_count
+            self.zero_count += zero_count
+            self.count += count
+            self.total += total
+            self.min = min(self.min, low)
+            self.max = max(self.max, high)
+
+    def clear(self) -> None:
+        """Forget all recorded values."""
+        with self.lock:
+            self.buckets.clear()
+            self.zero_count = 0
+            self.count = 0
+            self.total = 0.0
+            self.min = math.inf
+            self.max = -math.inf
+
+    @property
+    def average(self) -> float:
+        """Mean of the recorded values, or 0 if there are none."""
+        return self.total / self.count if self.count else 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get a summary of the recorded values.
+
+        Returns:
+            Dictionary with count, total, average, min, max, p50, p95 and p99,
+            or only count if nothing was recorded
+        """
+        with self.lock:
+            if self.count == 0:
+                return {"count": 0}
+            summary = {
+                "count": self.count,
+                "total": self.total,
+                "average": self.total / self.count,
+                "min": self.min,
+                "max": self.max
+            }
+            for name, q in REPORTED_QUANTILES:
+                summary[name] = self._quantile(q)
+            return summary
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class LatencyHistograms:
+    """
+    Named latency sketches, such as one per command or query.
+
+    The number of series is bounded: once max_series names exist, values
+    for new names are recorded under one more series, OVERFLOW_SERIES.
+    Recording a value for an existing name takes no lock besides the
+    sketch's own.
+    """
+
+    def __init__(self, max_series: int = 500, relative_accuracy: float = 0.01):
+        """
+        Initialize the histograms.
+
+        Args:
+            max_series: Maximum number of named sketches
+            relative_accuracy: Relative accuracy of each sketch
+        """
+        self.max_series = max_series
+        self.relative_accuracy = relative_accuracy
+        self.sketches: Dict[str, LatencySketch] = {}
+        self.lock = threading.Lock()
+
+    def record(self, name: str, value: float) -> None:
+        """
+        Record a value for a series.
+
+        Args:
+            name: Series name
+            value: Value to record
+        """
+        sketch = self.sketches.get(name)
+        if sketch is None:
+            sketch = self._create(name)
+        sketch.add(value)
+
+    def _create(self, name: str) -> LatencySketch:
+        """Get the sketch of a new series, or of OVERFLOW_SERIES if there are too many."""
+        with self.lock:
+            sketch = self.sketches.get(name)
+            if sketch is not None:
+                return sketch
+            if len(self.sketches) >= self.max_series:
+                name = OVERFLOW_SERIES
+                sketch = self.sketches.get(name)
+                if sketch is not None:
+                    return sketch
+            sketch = LatencySketch(self.relative_accuracy)
+            # Replace the dictionary so lock-free readers never see it resized
+            self.sketches = {**self.sketches, name: sketch}
+            return sketch
+
+    def get(self, name: str) -> Optional[LatencySketch]:
+        """
+        Get the sketch of a series.
+
+        Args:
+            name: Series name
+
+        Returns:
+            The sketch, or None if nothing was recorded for the name
+        """
+        return self.sketches.get(name)
+
+    def combined(self) -> LatencySketch:
+        """
+        Get one sketch of the values of every series.
+
+        Returns:
+            A new sketch merging all series
+        """
+        merged = LatencySketch(self.relative_accuracy)
+        for sketch in list(self.sketches.values()):
+            merged.merge(sketch)
+        return merged
+
+    def top(self, limit: int = 5, key: str = "count") -> List[tuple]:
+        """
+        Get the series with the highest value of a summary field.
+
+        Args:
+            limit: Number of series to return
+            key: Field of LatencySketch.to_dict to sort by
+
+        Returns:
+            List of (name, summary) tuples, highest first
+        """
+        summaries = [(name, sketch.to_dict()) for name, sketch in list(self.sketches.items())]
+        summaries = [item for item in summaries if item[1]["count"]]
+        summaries.sort(key=lambda item: item[1].get(key, 0), reverse=True)
+        return summaries[:limit]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the summary of every series.
+
+        Returns:
+            Dictionary of series name to LatencySketch.to_dict
+        """
+        return {name: sketch.to_dict() for name, sketch in sorted(self.sketches.items())}
+
+    def clear(self) -> None:
+        """Remove all series."""
+        with self.lock:
+            self.sketches = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sketches
+
+    def __len__(self) -> int:
+        return len(self.sketches)
@@ -0,0 +1,389 @@
+"""
+Leaderboard Index for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+/mystats used to count the users ahead of the caller with one query per
+stat, and /leaderboard sorted the whole stat on every call. This module
+keeps every leaderboard stat in memory as an ordered multiset of scores
+with a per-user score map, updated by LeaderboardCog.update_stat as scores
+are written. Rank lookups are a bisect plus a prefix sum, the top of each
+leaderboard is cached, and stats are periodically reloaded from the
+database to correct any drift.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.db.db import get_connection
+from src.utils.config_manager import get_config
+
+# Set up logging
+logger = logging.getLogger("leaderboard_index")
+
+
+class RankedScores:
+    """
+    Sorted multiset of scores with fast counts of higher scores.
+
+    Scores are kept in sorted buckets of about LOAD values. A Fenwick tree
+    over the bucket sizes gives the number of scores in the buckets before
+    any bucket in O(log n), so counting higher scores is two bisects and a
+    prefix sum. Adding or removing a score only shifts values within one
+    bucket.
+    """
+
+    LOAD = 512
+
+    def __init__(self, values: Iterable[int] = ()):
+        """
+        Initialize the multiset.
+
+        Args:
+            values: Initial scores, in any order
+        """
+        values = sorted(values)
+        self._buckets: List[List[int]] = [values[i:i + self.LOAD] for i in range(0, len(values), self.LOAD)]
+        self._size = len(values)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Rebuild the bucket maximums and the Fenwick tree after buckets split or vanish."""
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        count = len(self._buckets)
+        tree = [0] * (count + 1)
+        for i, bucket in enumerate(self._buckets, 1):
+            tree[i] += len(bucket)
+            parent = i + (i & -i)
+            if parent <= count:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, bucket: int, delta: int) -> None:
+        """Change the size of a bucket in the Fenwick tree."""
+        i = bucket + 1
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, bucket: int) -> int:
+        """Count the scores in the buckets before a bucket."""
+        total = 0
+        i = bucket
+        tree = self._tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int) -> None:
+        """Add a score."""
+        self._size += 1
+        if not self._buckets:
+            self._buckets.append([value])
+            self._rebuild()
+            return
+
+        i = bisect_left(self._maxes, value)
+        if i == len(self._buckets):
+            i -= 1
+        bucket = self._buckets[i]
+        insort(bucket, value)
+        self._maxes[i] = bucket[-1]
+        self._tree_add(i, 1)
+
+        if len(bucket) > 2 * self.LOAD:
+            self._buckets[i:i + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+            self._rebuild()
+
+    def remove(self, value: int) -> None:
+        """
+        Remove one occurrence of a score.
+
+        Raises:
+            ValueError: If the score is not in the multiset
+        """
+        i = bisect_left(self._maxes, value)
+        if i == len(self._buckets):
+            raise ValueError(f"{value} is not in the scores")
+        bucket = self._buckets[i]
+        pos = bisect_left(bucket, value)
+        if pos == len(bucket) or bucket[pos] != value:
+            raise ValueError(f"{value} is not in the scores")
+
+        del bucket[pos]
+        self._size -= 1
+        if bucket:
+            self._maxes[i] = bucket[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._buckets[i]
+            self._rebuild()
+
+    def count_greater(self, value: int) -> int:
+        """Count the scores strictly higher than a value."""
+        i = bisect_right(self._maxes, value)
+        if i == len(self._buckets):
+            return 0
+        return self._size - self._prefix(i) - bisect_right(self._buckets[i], value)
+
+
+def _top_key(entry: Tuple[str, int]) -> Tuple[int, str]:
+    """Order leaderboard entries by highest score, then by user ID."""
+    return (-entry[1], entry[0])
+
+
+class StatRanking:
+    """
+    Scores of every user for one stat, with ranks and a cached top list.
+
+    The top list holds the best top_size entries. Updates keep it exact
+    in place; only a cached user dropping out of it with others waiting
+    below makes it rebuild on the next read.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, int]] = (), top_size: int = 100):
+        """
+        Initialize the ranking.
+
+        Args:
+            rows: (user_id, score) pairs
+            top_size: Number of top entries kept cached
+        """
+        self.scores: Dict[str, int] = dict(rows)
+        self.ranked = RankedScores(self.scores.values())
+        self.top_size = top_size
+        self._top: Optional[List[Tuple[str, int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def set(self, user_id: str, value: int) -> None:
+        """Set a user's score."""
+        old = self.scores.get(user_id)
+        if old == value:
+            return
+        if old is not None:
+            self.ranked.remove(old)
+        self.ranked.add(value)
+        self.scores[user_id] = value
+
+        top = self._top
+        if top is None:
+            return
+        if old is not None and top and _top_key((user_id, old)) <= _top_key(top[-1]):
+            top.remove((user_id, old))
+
+        entry = (user_id, value)
+        outside = len(self.scores) - 1 - len(top)
+        if outside == 0 or (top and _top_key(entry) < _top_key(top[-1])):
+            keys = [_top_key(listed) for listed in top]
+            top.insert(bisect_left(keys, _top_key(entry)), entry)
+            if len(top) > self.top_size:
+                top.pop()
+        elif len(top) < self.top_size:
+            # A listed user dropped below users that are not cached
+            self._top = None
+
+    def rank(self, value: int) -> int:
+        """Get the rank a score has, 1 for the highest; equal scores share a rank."""
+        return self.ranked.count_greater(value) + 1
+
+    def top(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Get the highest (user_id, score) pairs."""
+        if limit > self.top_size:
+            return heapq.nsmallest(limit, self.scores.items(), key=_top_key)
+        if self._top is None:
+            self._top = heapq.nsmallest(self.top_size, self.scores.items(), key=_top_key)
+        return self._top[:limit]
+
+
+class LeaderboardIndex:
+    """
+    In-memory rankings of the leaderboard_stats table, one per stat.
+
+    A stat is loaded from the database on first use. Score changes that
+    happen while a stat loads are replayed on the loaded ranking, so a
+    reload can run while the bot keeps writing scores.
+    """
+
+    def __init__(self, top_size: int = 100):
+        """
+        Initialize the index.
+
+        Args:
+            top_size: Number of top entries cached per stat
+        """
+        self.top_size = top_size
+        self._rankings: Dict[str, StatRanking] = {}
+        self._pending: Dict[str, List[Tuple[str, int]]] = {}
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self.stats = {
+            "loads": 0,
+            "rank_queries": 0,
+            "top_queries": 0,
+            "updates": 0,
+            "drift": 0
+        }
+
+    def load(self, stat_name: str, force: bool = False) -> StatRanking:
+        """
+        Load a stat's ranking from the database.
+
+        Args:
+            stat_name: Name of the stat
+            force: Reload even if the stat is already loaded
+
+        Returns:
+            The stat's ranking
+        """
+        with self._load_lock:
+            with self._lock:
+                ranking = self._rankings.get(stat_name)
+                if ranking is not None and not force:
+                    return ranking
+                self._pending[stat_name] = []
+
+            try:
+                conn = get_connection()
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute("""
+                        SELECT user_id, stat_value FROM leaderboard_stats
+                        WHERE stat_name = ?
+                    """, (stat_name,))
+                    loaded = StatRanking(cursor.fetchall(), self.top_size)
+                finally:
+                    conn.close()
+            except Exception:
+                with self._lock:
+                    self._pending.pop(stat_name, None)
+                raise
+
+            with self._lock:
+                for user_id, value in self._pending.pop(stat_name):
+                    loaded.set(user_id, value)
+                if ranking is not None and ranking.scores != loaded.scores:
+                    drift = sum(1 for user_id, value in loaded.scores.items()
+                                if ranking.scores.get(user_id) != value)
+                    drift += len(ranking.scores.keys() - loaded.scores.keys())
+                    self.stats["drift"] += drift
+                    logger.warning(f"Leaderboard {stat_name} had {drift} scores out of sync")
+                self._rankings[stat_name] = loaded
+                self.stats["loads"] += 1
+            return loaded
+
+    def _get(self, stat_name: str) -> StatRanking:
+        """Get a loaded ranking, loading it if needed."""
+        ranking = self._rankings.get(stat_name)
+        if ranking is None:
+            ranking = self.load(stat_name)
+        return ranking
+
+    def update(self, user_id: str, stat_name: str, value: int) -> None:
+        """
+        Record a user's new score after it was written to the database.
+
+        Args:
+            user_id: Discord ID of the user
+            stat_name: Name of the stat
+            value: New score
+        """
+        with self._lock:
+            self.stats["updates"] += 1
+            pending = self._pending.get(stat_name)
+            if pending is not None:
+                pending.append((user_id, value))
+            ranking = self._rankings.get(stat_name)
+            if ranking is not None:
+                ranking.set(user_id, value)
+
+    def rank(self, stat_name: str, value: int) -> int:
+        """
+        Get the rank of a score, counting the users with a higher score.
+
+        Args:
+            stat_name: Name of the stat
+            value: Score to rank
+
+        Returns:
+            int: Rank, 1 for the highest score
+        """
+        ranking = self._get(stat_name)
+        with self._lock:
+            self.stats["rank_queries"] += 1
+            return ranking.rank(value)
+
+    def top(self, stat_name: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        Get the highest scores of a stat.
+
+        Args:
+            stat_name: Name of the stat
+            limit: Number of entries
+
+        Returns:
+            (user_id, score) pairs, highest first
+        """
+        ranking = self._get(stat_name)
+        with self._lock:
+            self.stats["top_queries"] += 1
+            return ranking.top(limit)
+
+    def reconcile(self, stat_names: Optional[Iterable[str]] = None) -> None:
+        """
+        Reload stats from the database, replacing the in-memory rankings.
+
+        Args:
+            stat_names: Stats to reload (every loaded stat if None)
+        """
+        if stat_names is None:
+            with self._lock:
+                stat_names = list(self._rankings)
+        for stat_name in stat_names:
+            start_time = time.time()
+            ranking = self.load(stat_name, force=True)
+            logger.info(f"Reconciled leaderboard {stat_name} ({len(ranking)} users) "
+                        f"in {time.time() - start_time:.2f}s")
+
+    def invalidate(self, stat_name: Optional[str] = None) -> None:
+        """Drop the ranking of a stat, or of every stat if None."""
+        with self._lock:
+            if stat_name is None:
+                self._rankings.clear()
+            else:
+                self._rankings.pop(stat_name, None)
+
+    def get_stats(self) -> Dict[str, object]:
+        """Get leaderboard index statistics."""
+        with self._lock:
+            return {
+                **self.stats,
+                "rankings": {name: len(ranking) for name, ranking in self._rankings.items()}
+            }
+
+
+# Global instance
+_leaderboard_index = None
+
+def get_leaderboard_index() -> LeaderboardIndex:
+    """
+    Get the global leaderboard index instance.
+
+    Returns:
+        The global LeaderboardIndex instance
+    """
+    global _leaderboard_index
+    if _leaderboard_index is None:
+        _leaderboard_index = LeaderboardIndex(
+            top_size=get_config("general", "leaderboard_top_cache_size", 100)
+        )
+    return _leaderboard_index
@@ -0,0 +1,426 @@
+"""
+Metrics Exporter for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+Serves the bot's performance metrics as OpenMetrics text on a local HTTP
+port, so they can be scraped by Prometheus and read by
+docker/healthcheck.py without a Discord admin command. The listener runs
+on its own thread and does not need Discord, so it keeps answering while
+the event loop is stalled; the loop heartbeat age then shows the stall.
+
+Exported metrics:
+- Command and battle operation latency histograms
+- Database connection pool stats
+- Cache hit ratios and sizes per namespace
+- Actor mailbox depth
+- Event loop lag
+- Active battles, and any gauges registered with register_gauge (such as
+  active trades)
+"""
+
+import math
+import time
+import asyncio
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, List, Callable, Tuple
+
+from src.utils.latency_sketch import LatencySketch
+from src.utils.env_config import get_env_config
+
+# Set up logging
+logger = logging.getLogger("metrics_exporter")
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Histogram bucket boundaries in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Gauges registered by other modules: name -> (help text, function)
+_gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+_gauges_lock = threading.Lock()
+
+
+def register_gauge(name: str, help_text: str, func: Callable[[], float]) -> None:
+    """
+    Export a gauge read from a function at each scrape.
+
+    Args:
+        name: Metric name, e.g. veramon_active_trades
+        help_text: Description of the metric
+        func: Function returning the current value
+    """
+    with _gauges_lock:
+        _gauges[name] = (help_text, func)
+
+def unregister_gauge(name: str) -> None:
+    """
+    Stop exporting a registered gauge.
+
+    Args:
+        name: Metric name
+    """
+    with _gauges_lock:
+        _gauges.pop(name, None)
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a sleep.
+
+    The lag of each interval goes into a latency sketch, and the time of the
+    last wake-up is kept as a heartbeat: while the loop is blocked, the
+    heartbeat age grows even though no lag can be measured.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        """
+        Initialize the monitor.
+
+        Args:
+            interval: Seconds between measurements
+        """
+        self.interval = interval
+        self.lag = LatencySketch()
+        self.last_lag = 0.0
+        self.last_beat = time.time()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start measuring on the running event loop."""
+        if self._task is None or self._task.done():
+            self.last_beat = time.time()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        """Stop measuring."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the monitor is measuring."""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def heartbeat_age(self) -> float:
+        """Seconds since the loop last woke up on time or late."""
+        return time.time() - self.last_beat
+
+    async def _run(self) -> None:
+        """Sleep for the interval and record how late each wake-up is."""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - start - self.interval)
+            self.lag.add(self.last_lag)
+            self.last_beat = time.time()
+
+
+class OpenMetricsWriter:
+    """Builds OpenMetrics text one metric family at a time."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, metric_type: str, help_text: str) -> None:
+        """Start a metric family."""
+        self.lines.append(f"# TYPE {name} {metric_type}")
+        self.lines.append(f"# HELP {name} {help_text}")
+
+    def sample(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Add a sample to the current family."""
+        if labels:
+            label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+            name = f"{name}{{{label_text}}}"
+        self.lines.append(f"{name} {_format_value(value)}")
+
+    def gauge(self, name: str, help_text: str, value: float,
+              labels: Optional[Dict[str, Any]] = None) -> None:
+        """Add a gauge family with one sample."""
+        self.family(name, "gauge", help_text)
+        self.sample(name, value, labels)
+
+    def counter(self, name: str, help_text: str, value: float,
+                labels: Optional[Dict[str, Any]] = None) -> None:
+        """Add a counter family with one sample."""
+        self.family(name, "counter", help_text)
+        self.sample(f"{name}_total", value, labels)
+
+    def histogram(self, name: str, sketch: LatencySketch, buckets: Tuple[float, ...],
+                  labels: Optional[Dict[str, Any]] = None, scale: float = 1.0) -> None:
+        """
+        Add the samples of one histogram from a latency sketch.
+
+        Args:
+            name: Family name
+            sketch: Sketch holding the values
+            buckets: Bucket boundaries in exported units
+            labels: Labels of the histogram
+            scale: Sketch units per exported unit, e.g. 1000 for a sketch in ms
+        """
+        labels = labels or {}
+        for bound in buckets:
+            self.sample(f"{name}_bucket", sketch.count_at_most(bound * scale), {**labels, "le": bound})
+        self.sample(f"{name}_bucket", sketch.count, {**labels, "le": "+Inf"})
+        self.sample(f"{name}_count", sketch.count, labels)
+        self.sample(f"{name}_sum", sketch.total / scale, labels)
+
+    def render(self) -> str:
+        """Get the exposition text."""
+        return "\n".join(self.lines + ["# EOF"]) + "\n"
+
+
+def _escape(value: Any) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class MetricsExporter:
+    """
+    Collects metrics from the bot's subsystems and serves them over HTTP.
+
+    Each collector reads one subsystem. A collector that fails is skipped and
+    counted in veramon_metrics_collector_errors_total, so one broken
+    subsystem does not hide the others.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9108,
+                 loop_monitor: Optional[LoopLagMonitor] = None):
+        """
+        Initialize the exporter.
+
+        Args:
+            host: Address to listen on
+            port: Port to listen on, 0 for any free port
+            loop_monitor: Event loop monitor, created if not given
+        """
+        self.host = host
+        self.port = port
+        self.loop_monitor = loop_monitor or LoopLagMonitor()
+        self.collector_errors = 0
+        self.scrapes = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.collectors: List[Callable[[OpenMetricsWriter], None]] = [
+            self._collect_commands,
+            self._collect_battles,
+            self._collect_db_pool,
+            self._collect_cache,
+            self._collect_actors,
+            self._collect_event_loop,
+            self._collect_registered
+        ]
+
+    def render(self) -> str:
+        """
+        Collect all metrics.
+
+        Returns:
+            OpenMetrics exposition text
+        """
+        writer = OpenMetricsWriter()
+        for collector in self.collectors:
+            # Collect into a separate writer so a failure leaves no partial family
+            part = OpenMetricsWriter()
+            try:
+                collector(part)
+                writer.lines.extend(part.lines)
+            except Exception as e:
+                self.collector_errors += 1
+                logger.debug(f"Metrics collector {collector.__name__} failed: {e}")
+        self.scrapes += 1
+        writer.counter("veramon_metrics_collector_errors", "Metric collectors that failed",
+                       self.collector_errors)
+        return writer.render()
+
+    def _collect_commands(self, writer: OpenMetricsWriter) -> None:
+        """Command latency and counts from the performance monitor."""
+        from src.utils.performance_monitor import get_performance_monitor
+        monitor = get_performance_monitor()
+
+        writer.family("veramon_command_duration_seconds", "histogram", "Command execution time")
+        for command, sketch in sorted(monitor.command_latency.sketches.items()):
+            writer.histogram("veramon_command_duration_seconds", sketch, LATENCY_BUCKETS,
+                             {"command": command}, scale=1000)
+
+    def _collect_battles(self, writer: OpenMetricsWriter) -> None:
+        """Active battles and battle operation latency from battle metrics."""
+        from src.utils.battle_metrics import get_battle_metrics
+        metrics = get_battle_metrics()
+
+        writer.gauge("veramon_active_battles", "Battles in progress", len(metrics.active_battles))
+        writer.family("veramon_battle_operation_duration_seconds", "histogram", "Battle operation time")
+        for operation, sketch in sorted(metrics.operation_latency.sketches.items()):
+            writer.histogram("veramon_battle_operation_duration_seconds", sketch, LATENCY_BUCKETS,
+                             {"operation": operation})
+
+    def _collect_db_pool(self, writer: OpenMetricsWriter) -> None:
+        """Connection pool stats."""
+        from src.db.db import get_pool_stats
+        stats = get_pool_stats()
+
+        writer.family("veramon_db_pool_connections", "gauge", "Pooled database connections by state")
+        for state in ("open", "idle", "in_use"):
+            writer.sample("veramon_db_pool_connections", stats[f"{state}_connections"], {"state": state})
+        writer.gauge("veramon_db_pool_max_connections", "Connection pool size", stats["max_connections"])
+        writer.counter("veramon_db_pool_checkouts", "Connections checked out of the pool", stats["checkouts"])
+        writer.counter("veramon_db_pool_exhaustion_events", "Checkouts that found the pool empty",
+                       stats["exhaustion_events"])
+        writer.gauge("veramon_db_pool_wait_seconds_max", "Longest wait for a connection",
+                     stats["max_wait_time"])
+        if "write_queue" in stats:
+            writer.gauge("veramon_db_write_queue_depth", "Writes waiting for the writer connection",
+                         stats["write_queue"]["pending"])
+
+    def _collect_cache(self, writer: OpenMetricsWriter) -> None:
+        """Hit ratios and sizes of the tiered cache namespaces."""
+        from src.db.tiered_cache import get_tiered_cache
+        namespaces = get_tiered_cache().get_stats()["namespaces"]
+
+        for name, metric_type, help_text, key in (
+            ("veramon_cache_hit_ratio", "gauge", "Share of cache reads that were hits", "hit_rate"),
+            ("veramon_cache_bytes", "gauge", "Estimated bytes held in memory", "bytes"),
+            ("veramon_cache_items", "gauge", "Entries held in memory", "total_items"),
+            ("veramon_cache_hits", "counter", "Cache reads served from memory", "hits"),
+            ("veramon_cache_misses", "counter", "Cache reads that missed", "misses"),
+            ("veramon_cache_evictions", "counter", "Entries evicted for space", "evictions")
+        ):
+            writer.family(name, metric_type, help_text)
+            sample_name = f"{name}_total" if metric_type == "counter" else name
+            for namespace, stats in sorted(namespaces.items()):
+                writer.sample(sample_name, stats[key], {"namespace": namespace})
+
+    def _collect_actors(self, writer: OpenMetricsWriter) -> None:
+        """Mailbox depth of the actor system, if it has been created."""
+        from src.utils import actor_system
+        system = actor_system._default_system
+        if system is None:
+            return
+        metrics = system.get_system_metrics()
+        labels = {"system": metrics["name"]}
+
+        writer.gauge("veramon_actor_mailbox_depth", "Messages waiting in all mailboxes",
+                     metrics["total_depth"], labels)
+        writer.gauge("veramon_actor_mailbox_max_depth", "Deepest any mailbox has been",
+                     metrics["max_depth"], labels)
+        writer.gauge("veramon_actors", "Registered actors", metrics["actor_count"], labels)
+
+    def _collect_event_loop(self, writer: OpenMetricsWriter) -> None:
+        """Event loop lag and heartbeat."""
+        monitor = self.loop_monitor
+        writer.family("veramon_event_loop_lag_seconds", "histogram", "How late the event loop woke up")
+        writer.histogram("veramon_event_loop_lag_seconds", monitor.lag, LOOP_LAG_BUCKETS)
+        writer.gauge("veramon_event_loop_heartbeat_age_seconds",
+                     "Seconds since the event loop lag monitor last ran", monitor.heartbeat_age)
+        writer.gauge("veramon_event_loop_monitored", "Whether the event loop lag monitor is running",
+                     monitor.running)
+
+    def _collect_registered(self, writer: OpenMetricsWriter) -> None:
+        """Gauges registered with register_gauge."""
+        with _gauges_lock:
+            gauges = sorted(_gauges.items())
+        for name, (help_text, func) in gauges:
+            try:
+                value = func()
+            except Exception as e:
+                self.collector_errors += 1
+                logger.debug(f"Gauge {name} failed: {e}")
+                continue
+            writer.gauge(name, help_text, value)
+
+    def start(self) -> None:
+        """Start the HTTP listener, and the loop monitor when called from the event loop."""
+        if self._server is None:
+            self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+            self._server.daemon_threads = True
+            self._server.exporter = self
+            self.port = self._server.server_address[1]
+            self._thread = threading.Thread(target=self._server.serve_forever,
+                                            name="metrics-exporter", daemon=True)
+            self._thread.start()
+            logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+        try:
+            self.loop_monitor.start()
+        except RuntimeError:
+            # No running event loop; lag is not measured
+            pass
+
+    def stop(self) -> None:
+        """Stop the HTTP listener and the loop monitor."""
+        self.loop_monitor.stop()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join(timeout=5)
+            self._server = None
+            self._thread = None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves /metrics from the server's exporter."""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.exporter.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+# Global instance
+_metrics_exporter = None
+
+def start_metrics_exporter() -> Optional[MetricsExporter]:
+    """
+    Start the global metrics exporter if METRICS_PORT is set.
+
+    Call from the event loop so the loop lag monitor runs on it.
+
+    Returns:
+        The running MetricsExporter, or None if metrics are disabled
+    """
+    global _metrics_exporter
+    port = get_env_config("METRICS_PORT", 0)
+    if not port:
+        return None
+    if _metrics_exporter is None:
+        _metrics_exporter = MetricsExporter(get_env_config("METRICS_HOST", "127.0.0.1"), port)
+    try:
+        _metrics_exporter.start()
+    except OSError as e:
+        logger.error(f"Could not serve metrics on port {port}: {e}")
+        _metrics_exporter = None
+    return _metrics_exporter
+
+def shutdown_metrics_exporter() -> None:
+    """Stop the global metrics exporter."""
+    global _metrics_exporter
+    if _metrics_exporter is not None:
+        _metrics_exporter.stop()
+        _metrics_exporter = None
+        logger.info("Metrics exporter shut down")
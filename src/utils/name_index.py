@@ -0,0 +1,502 @@
+"""
+Name Indexes for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+Autocomplete used to scan every species and item name, and to run a
+LIKE '%text%' query over a player's captures, on every keystroke. This
+module keeps trigram indexes over those names instead. Capture indexes are
+built per user on first use, kept in a least-recently-used cache and
+updated in place when captures are caught, renamed, evolved or traded.
+"""
+
+import os
+import json
+import heapq
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from src.db.db import get_connection
+from src.utils.species_registry import get_species_registry
+
+# Set up logging
+logger = logging.getLogger("name_index")
+
+ITEMS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'items.json'))
+
+
+def _capture_key(capture_id: Any) -> Any:
+    """Normalize a capture ID, which trades and commands may pass as a string."""
+    try:
+        return int(capture_id)
+    except (TypeError, ValueError):
+        return capture_id
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Get the set of three-character substrings of a string."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Case-insensitive substring search over named keys.
+
+    Queries of three or more characters only look at keys that share every
+    trigram of the query; shorter queries scan the names.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[Hashable, str]] = ()):
+        """
+        Initialize the index.
+
+        Args:
+            entries: Initial (key, name) pairs
+        """
+        self._texts: Dict[Hashable, str] = {}
+        self._names: Dict[Hashable, str] = {}
+        self._grams: Dict[str, Set[Hashable]] = {}
+        for key, text in entries:
+            self.add(key, text)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._texts
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Add a key, replacing its name if it is already indexed."""
+        if key in self._texts:
+            self.remove(key)
+
+        self._names[key] = text
+        text = text.lower()
+        self._texts[key] = text
+        for gram in _trigrams(text):
+            self._grams.setdefault(gram, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove a key if it is indexed."""
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        del self._names[key]
+
+        for gram in _trigrams(text):
+            postings = self._grams.get(gram)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._grams[gram]
+
+    def name(self, key: Hashable) -> str:
+        """Get the name a key was indexed with."""
+        return self._names[key]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Hashable]:
+        """
+        Find keys whose name contains the query.
+
+        Args:
+            query: Text to look for
+            limit: Maximum number of keys to return (all if None)
+
+        Returns:
+            Matching keys, names starting with the query first, each group
+            in alphabetical order of name
+        """
+        query = query.lower()
+
+        if len(query) < 3:
+            candidates: Iterable[Hashable] = self._texts
+        else:
+            postings = sorted((self._grams.get(gram, set()) for gram in _trigrams(query)), key=len)
+            if not postings[0]:
+                return []
+            candidates = postings[0].intersection(*postings[1:])
+
+        prefix_matches = []
+        other_matches = []
+        for key in candidates:
+            text = self._texts[key]
+            if text.startswith(query):
+                prefix_matches.append((text, key))
+            elif query in text:
+                other_matches.append((text, key))
+
+        prefix_matches.sort(key=lambda match: match[0])
+        other_matches.sort(key=lambda match: match[0])
+        keys = [key for _, key in prefix_matches + other_matches]
+        return keys[:limit] if limit is not None else keys
+
+
+class UserCaptureIndex:
+    """
+    Searchable index of one user's captures.
+
+    Captures are grouped by the lowercase species names and nicknames they
+    can be found by. Each group keeps its captures sorted by level, so the
+    best matches are merged from the front of the groups.
+    """
+
+    def __init__(self, rows: Iterable[Tuple] = ()):
+        """
+        Initialize the index.
+
+        Args:
+            rows: (id, veramon_name, nickname, level, shiny) rows
+        """
+        self.captures: Dict[int, Dict[str, Any]] = {}
+        self._names = TrigramIndex()
+        self._groups: Dict[str, List[Tuple[int, int]]] = {}
+
+        # Bulk load: append to the groups, then sort each group once
+        for capture_id, veramon_name, nickname, level, shiny in rows:
+            capture = self._new_capture(capture_id, veramon_name, nickname, level, shiny)
+            self.captures[capture_id] = capture
+            self._link(capture_id, capture, keep_sorted=False)
+        for group in self._groups.values():
+            group.sort()
+
+    def __len__(self) -> int:
+        return len(self.captures)
+
+    @staticmethod
+    def _names_of(capture: Dict[str, Any]) -> Set[str]:
+        """Get the lowercase names a capture can be found by."""
+        names = {capture["veramon_name"].lower()}
+        if capture["nickname"]:
+            names.add(capture["nickname"].lower())
+        return names
+
+    @staticmethod
+    def _new_capture(capture_id: int, veramon_name: str, nickname: Optional[str],
+                     level: int, shiny: bool) -> Dict[str, Any]:
+        """Build the record kept for a capture."""
+        return {
+            "id": capture_id,
+            "veramon_name": veramon_name,
+            "nickname": nickname,
+            "level": level,
+            "shiny": bool(shiny)
+        }
+
+    def _link(self, capture_id: int, capture: Dict[str, Any], keep_sorted: bool = True) -> None:
+        """Add a capture to the groups of its names."""
+        entry = (-(capture["level"] or 0), capture_id)
+        for name in self._names_of(capture):
+            group = self._groups.get(name)
+            if group is None:
+                group = self._groups[name] = []
+                self._names.add(name, name)
+            if keep_sorted:
+                insort(group, entry)
+            else:
+                group.append(entry)
+
+    def _unlink(self, capture_id: int, capture: Dict[str, Any]) -> None:
+        """Remove a capture from the groups of its names."""
+        entry = (-(capture["level"] or 0), capture_id)
+        for name in self._names_of(capture):
+            group = self._groups.get(name)
+            if not group:
+                continue
+            i = bisect_left(group, entry)
+            if i < len(group) and group[i] == entry:
+                del group[i]
+            if not group:
+                del self._groups[name]
+                self._names.remove(name)
+
+    def add(self, capture_id: int, veramon_name: str, nickname: Optional[str] = None,
+            level: int = 1, shiny: bool = False) -> None:
+        """Add a capture, replacing it if it is already indexed."""
+        self.remove(capture_id)
+        capture = self._new_capture(capture_id, veramon_name, nickname, level, shiny)
+        self.captures[capture_id] = capture
+        self._link(capture_id, capture)
+
+    def update(self, capture_id: int, **changes: Any) -> bool:
+        """
+        Change fields of an indexed capture.
+
+        Args:
+            capture_id: ID of the capture
+            changes: New values for veramon_name, nickname, level or shiny
+
+        Returns:
+            bool: Whether the capture was indexed
+        """
+        capture = self.captures.get(capture_id)
+        if capture is None:
+            return False
+
+        self._unlink(capture_id, capture)
+        capture.update(changes)
+        self._link(capture_id, capture)
+        return True
+
+    def remove(self, capture_id: int) -> Optional[Dict[str, Any]]:
+        """Remove a capture, returning it if it was indexed."""
+        capture = self.captures.pop(capture_id, None)
+        if capture is not None:
+            self._unlink(capture_id, capture)
+        return capture
+
+    def search(self, query: str, limit: int = 25) -> List[Dict[str, Any]]:
+        """
+        Find captures whose species name or nickname contains the query.
+
+        Args:
+            query: Text to look for
+            limit: Maximum number of captures to return
+
+        Returns:
+            Matching captures, highest level first
+        """
+        groups = [self._groups[name] for name in self._names.search(query)]
+        if len(groups) == 1:
+            merged = iter(groups[0])
+        else:
+            merged = heapq.merge(*groups)
+
+        results = []
+        seen = set()
+        for _, capture_id in merged:
+            # A capture is in two groups when both its names match
+            if capture_id in seen:
+                continue
+            seen.add(capture_id)
+            results.append(self.captures[capture_id])
+            if len(results) >= limit:
+                break
+        return results
+
+
+class CaptureNameIndex:
+    """
+    Least-recently-used cache of per-user capture indexes.
+
+    A user's index is loaded from the database on first search. After that,
+    catches, nicknames, evolutions and trades update it in place through
+    the add, update and transfer methods. Changes to users that are not
+    cached need no work, because their index is loaded fresh when needed.
+    """
+
+    def __init__(self, max_users: int = 1000):
+        """
+        Initialize the cache.
+
+        Args:
+            max_users: Maximum number of user indexes kept in memory
+        """
+        self.max_users = max_users
+        self._indexes: "OrderedDict[str, UserCaptureIndex]" = OrderedDict()
+        self._loading: Dict[str, bool] = {}  # user_id -> changed while loading
+        self._lock = threading.RLock()
+        self.stats = {
+            "hits": 0,
+            "loads": 0,
+            "evicted": 0,
+            "updates": 0
+        }
+
+    def is_warm(self, user_id: str) -> bool:
+        """Check whether a user's index is in memory."""
+        with self._lock:
+            return user_id in self._indexes
+
+    def _get(self, user_id: str) -> Optional[UserCaptureIndex]:
+        """Get a cached index, marking it recently used."""
+        index = self._indexes.get(user_id)
+        if index is not None:
+            self._indexes.move_to_end(user_id)
+        return index
+
+    def _load(self, user_id: str) -> UserCaptureIndex:
+        """Build a user's index from the captures table."""
+        with self._lock:
+            self._loading[user_id] = False
+
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, veramon_name, nickname, level, shiny
+                FROM captures
+                WHERE user_id = ?
+            """, (user_id,))
+            index = UserCaptureIndex(tuple(row) for row in cursor.fetchall())
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.stats["loads"] += 1
+            # A capture that changed while the rows were read may be stale, so
+            # only this search uses the index and the next one reloads it
+            if not self._loading.pop(user_id, True):
+                self._indexes[user_id] = index
+                if len(self._indexes) > self.max_users:
+                    self._indexes.popitem(last=False)
+                    self.stats["evicted"] += 1
+        return index
+
+    def search(self, user_id: str, query: str, limit: int = 25) -> List[Dict[str, Any]]:
+        """
+        Find a user's captures whose species name or nickname contains the query.
+
+        Loads the user's index from the database if it is not cached.
+
+        Args:
+            user_id: Discord ID of the user
+            query: Text to look for
+            limit: Maximum number of captures to return
+
+        Returns:
+            Matching captures, highest level first
+        """
+        with self._lock:
+            index = self._get(user_id)
+            if index is not None:
+                self.stats["hits"] += 1
+                return index.search(query, limit)
+
+        return self._load(user_id).search(query, limit)
+
+    def _changed(self, user_id: str) -> Optional[UserCaptureIndex]:
+        """Get a cached index to update, or note the change for loads in progress."""
+        self.stats["updates"] += 1
+        if user_id in self._loading:
+            self._loading[user_id] = True
+        return self._get(user_id)
+
+    def add_capture(self, user_id: str, capture_id: int, veramon_name: str,
+                    nickname: Optional[str] = None, level: int = 1, shiny: bool = False) -> None:
+        """Index a new capture."""
+        with self._lock:
+            index = self._changed(user_id)
+            if index is not None:
+                index.add(_capture_key(capture_id), veramon_name, nickname, level, shiny)
+
+    def update_capture(self, user_id: str, capture_id: int, **changes: Any) -> None:
+        """
+        Update an indexed capture, e.g. after a nickname change or evolution.
+
+        Args:
+            user_id: Discord ID of the owner
+            capture_id: ID of the capture
+            changes: New values for veramon_name, nickname, level or shiny
+        """
+        with self._lock:
+            index = self._changed(user_id)
+            if index is not None and not index.update(_capture_key(capture_id), **changes):
+                # The capture is missing from the index, so rebuild it
+                self._indexes.pop(user_id, None)
+
+    def transfer_capture(self, capture_id: int, from_user_id: str, to_user_id: str) -> None:
+        """Move a capture between two users' indexes after a trade."""
+        capture_id = _capture_key(capture_id)
+        with self._lock:
+            source = self._changed(from_user_id)
+            target = self._changed(to_user_id)
+            capture = source.remove(capture_id) if source is not None else None
+
+            if target is None:
+                return
+            if capture is None:
+                # Nothing to copy from, so rebuild the receiving index
+                self._indexes.pop(to_user_id, None)
+                return
+            target.add(capture_id, capture["veramon_name"], capture["nickname"],
+                       capture["level"], capture["shiny"])
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop the index of a user, or of every user if None."""
+        with self._lock:
+            if user_id is None:
+                self._indexes.clear()
+                for loading_user in self._loading:
+                    self._loading[loading_user] = True
+                return
+            self._changed(user_id)
+            self._indexes.pop(user_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get capture index statistics."""
+        with self._lock:
+            return {
+                **self.stats,
+                "users": len(self._indexes),
+                "captures": sum(len(index) for index in self._indexes.values())
+            }
+
+
+# Global instances
+_capture_index = None
+_species_index: Optional[TrigramIndex] = None
+_species_version = None
+_item_index: Optional[TrigramIndex] = None
+_item_mtime = None
+_index_lock = threading.Lock()
+
+def get_capture_index() -> CaptureNameIndex:
+    """
+    Get the global capture name index.
+
+    Returns:
+        The global CaptureNameIndex instance
+    """
+    global _capture_index
+    if _capture_index is None:
+        with _index_lock:
+            if _capture_index is None:
+                _capture_index = CaptureNameIndex()
+    return _capture_index
+
+def get_species_index() -> TrigramIndex:
+    """
+    Get the species name index, rebuilt whenever the species data reloads.
+
+    Returns:
+        TrigramIndex keyed by species name
+    """
+    global _species_index, _species_version
+    registry = get_species_registry()
+    version = registry.refresh()
+    if _species_index is None or version != _species_version:
+        with _index_lock:
+            if _species_index is None or version != _species_version:
+                _species_index = TrigramIndex((name, name) for name in registry.names())
+                _species_version = version
+    return _species_index
+
+def get_item_index() -> TrigramIndex:
+    """
+    Get the item name index, rebuilt whenever items.json changes.
+
+    Returns:
+        TrigramIndex keyed by item ID
+    """
+    global _item_index, _item_mtime
+    try:
+        mtime = os.stat(ITEMS_PATH).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    if _item_index is None or mtime != _item_mtime:
+        with _index_lock:
+            if _item_index is None or mtime != _item_mtime:
+                try:
+                    with open(ITEMS_PATH, 'r', encoding='utf-8') as f:
+                        items = json.load(f)
+                except Exception as e:
+                    logger.error(f"Error loading items for autocomplete: {e}")
+                    items = {}
+                _item_index = TrigramIndex(
+                    (item_id, item.get("name", item_id)) for item_id, item in items.items()
+                )
+                _item_mtime = mtime
+    return _item_index
@@ -4,20 +4,49 @@ Performance Monitoring System for Veramon Reunited
 
 This module provides utilities for tracking, analyzing, and optimizing
 performance across the bot's systems.
+
+Command, query and custom timings are kept in fixed-memory latency
+sketches (see latency_sketch.py), one per command, query fingerprint and
+metric name, which report p50/p95/p99 and max as well as averages.
 """
 
+import re
 import time
 import asyncio
 import psutil
 import threading
 import logging
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Union
-from collections import defaultdict, deque
+from collections import deque
+
+from src.utils.latency_sketch import LatencyHistograms
 
 # Set up logging
 logger = logging.getLogger("performance")
 
+# Literals and IN lists that vary between otherwise identical queries
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def fingerprint_query(query: str) -> str:
+    """
+    Get the fingerprint of a query, shared by queries that differ only in literals.
+    
+    Args:
+        query: SQL query string
+        
+    Returns:
+        The query with literals replaced by ? and whitespace collapsed
+    """
+    fingerprint = _STRING_LITERAL.sub("?", query)
+    fingerprint = _NUMBER_LITERAL.sub("?", fingerprint)
+    fingerprint = _IN_LIST.sub("IN (?)", " ".join(fingerprint.split()))
+    return fingerprint[:200]
+
 class PerformanceMonitor:
     """
     Tracks and analyzes performance metrics across the bot's systems.
@@ -30,9 +59,11 @@ class PerformanceMonitor:
     - Optimize high-traffic operations
     """
     
-    def __init__(self):
-        self.command_timings = defaultdict(lambda: {"total_time": 0, "count": 0, "avg_time": 0})
-        self.query_timings = []
+    def __init__(self, max_series: int = 500):
+        # Latency sketches: commands and queries in ms, custom metrics in seconds
+        self.command_latency = LatencyHistograms(max_series)
+        self.query_latency = LatencyHistograms(max_series)
+        self.custom_latency = LatencyHistograms(max_series)
         self.cache_hits = 0
         self.cache_misses = 0
         self.active_connections = 0
@@ -70,12 +101,7 @@ class PerformanceMonitor:
             command_name: Name of the command
             execution_time: Execution time in milliseconds
         """
-        self.command_timings[command_name]["total_time"] += execution_time
-        self.command_timings[command_name]["count"] += 1
-        self.command_timings[command_name]["avg_time"] = (
-            self.command_timings[command_name]["total_time"] / 
-            self.command_timings[command_name]["count"]
-        )
+        self.command_latency.record(command_name, execution_time)
         
         # Add to recent commands
         self.recent_commands.append({
@@ -117,12 +143,12 @@ class PerformanceMonitor:
             execution_time: Execution time in milliseconds
         """
         # Store query timing
+        self.query_latency.record(fingerprint_query(query), execution_time)
         query_entry = {
             "query": query,
             "duration": execution_time,
             "timestamp": datetime.now()
         }
-        self.query_timings.append(query_entry)
         self.recent_queries.append(query_entry)
         
         # Add to detailed monitoring if active
@@ -136,6 +162,26 @@ class PerformanceMonitor:
             log_query = query if len(query) <= 100 else query[:97] + "..."
             logger.warning(f"Slow query: {log_query} - {execution_time:.2f}ms")
     
+    def record_custom_metric(self, metric_name: str, duration: float):
+        """
+        Record a timing for a named metric that is not a command or query.
+
+        Args:
+            metric_name: Name of the metric
+            duration: Duration in seconds
+        """
+        self.custom_latency.record(metric_name, duration)
+
+    def record_battle_operation(self, operation_name: str, duration: float):
+        """
+        Record the duration of a battle operation.
+
+        Args:
+            operation_name: Name of the battle operation
+            duration: Duration in seconds
+        """
+        self.record_custom_metric(f"battle_{operation_name}", duration)
+
     def record_cache_hit(self):
         """Record a cache hit."""
         self.cache_hits += 1
@@ -155,9 +201,6 @@ class PerformanceMonitor:
     
     def get_average_query_time(self):
         """Get the average query execution time in milliseconds."""
-        if not self.query_timings:
-            return 0
-        
         # Average of recent queries
         recent_durations = [q["duration"] for q in self.recent_queries]
         if not recent_durations:
@@ -176,21 +219,11 @@ class PerformanceMonitor:
             Average execution time
         """
         if command_name:
-            if command_name in self.command_timings:
-                return self.command_timings[command_name]["avg_time"]
-            return 0
+            sketch = self.command_latency.get(command_name)
+            return sketch.average if sketch is not None else 0
             
         # Average across all commands
-        if not self.command_timings:
-            return 0
-            
-        total_time = sum(stats["total_time"] for stats in self.command_timings.values())
-        total_count = sum(stats["count"] for stats in self.command_timings.values())
-        
-        if total_count == 0:
-            return 0
-            
-        return total_time / total_count
+        return self.command_latency.combined().average
     
     def get_top_commands(self, limit: int = 5):
         """
@@ -202,15 +235,9 @@ class PerformanceMonitor:
         Returns:
             List of (command_name, avg_time, count) tuples
         """
-        sorted_commands = sorted(
-            self.command_timings.items(),
-            key=lambda x: x[1]["count"],
-            reverse=True
-        )
-        
         return [
-            (cmd, stats["avg_time"], stats["count"]) 
-            for cmd, stats in sorted_commands[:limit]
+            (cmd, stats["average"], stats["count"]) 
+            for cmd, stats in self.command_latency.top(limit, "count")
         ]
     
     def get_slowest_commands(self, limit: int = 5):
@@ -223,15 +250,9 @@ class PerformanceMonitor:
         Returns:
             List of (command_name, avg_time, count) tuples
         """
-        sorted_commands = sorted(
-            self.command_timings.items(),
-            key=lambda x: x[1]["avg_time"],
-            reverse=True
-        )
-        
         return [
-            (cmd, stats["avg_time"], stats["count"]) 
-            for cmd, stats in sorted_commands[:limit]
+            (cmd, stats["average"], stats["count"]) 
+            for cmd, stats in self.command_latency.top(limit, "average")
         ]
     
     def get_cache_statistics(self):
@@ -262,12 +283,13 @@ class PerformanceMonitor:
         bottlenecks = []
         
         # Check command performance
-        slow_commands = [(cmd, stats["avg_time"]) for cmd, stats in self.command_timings.items() 
-                         if stats["avg_time"] > self.slow_command_threshold and stats["count"] > 5]
+        slow_commands = [(cmd, stats) for cmd, stats in self.command_latency.snapshot().items() 
+                         if stats["count"] > 5 and stats["average"] > self.slow_command_threshold]
         
         if slow_commands:
-            for cmd, avg_time in slow_commands:
-                bottlenecks.append(f"Slow command: {cmd} ({avg_time:.1f}ms average)")
+            for cmd, stats in slow_commands:
+                bottlenecks.append(f"Slow command: {cmd} ({stats['average']:.1f}ms average, "
+                                   f"{stats['p99']:.1f}ms p99)")
         
         # Check query performance
         slow_queries = [q for q in self.recent_queries if q["duration"] > self.slow_query_threshold]
@@ -389,14 +411,33 @@ class PerformanceMonitor:
         
     def reset_statistics(self):
         """Reset all performance statistics."""
-        self.command_timings = defaultdict(lambda: {"total_time": 0, "count": 0, "avg_time": 0})
-        self.query_timings = []
+        self.command_latency.clear()
+        self.query_latency.clear()
+        self.custom_latency.clear()
         self.cache_hits = 0
         self.cache_misses = 0
         self.recent_queries.clear()
         self.recent_commands.clear()
         
         logger.info("Performance statistics reset")
+    
+    def get_latency_snapshot(self) -> Dict[str, Any]:
+        """
+        Get the latency summaries of every command, query fingerprint and custom metric.
+        
+        Returns:
+            Dictionary of commands, queries and custom metrics, each a
+            dictionary of name to count, total, average, min, max, p50, p95
+            and p99. Commands and queries are in milliseconds, custom
+            metrics in seconds.
+        """
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "units": {"commands": "ms", "queries": "ms", "custom": "s"},
+            "commands": self.command_latency.snapshot(),
+            "queries": self.query_latency.snapshot(),
+            "custom": self.custom_latency.snapshot()
+        }
         
 # Global instance for use throughout the codebase
 _performance_monitor = None
@@ -408,6 +449,24 @@ def get_performance_monitor():
         _performance_monitor = PerformanceMonitor()
     return _performance_monitor
 
+def get_performance_stats() -> Dict[str, Any]:
+    """
+    Get a machine-readable snapshot of the global performance monitor.
+    
+    Returns:
+        The latency snapshot, with response_times summarizing all commands
+        (in milliseconds) and the cache and connection counters
+    """
+    monitor = get_performance_monitor()
+    stats = monitor.get_latency_snapshot()
+    stats["response_times"] = monitor.command_latency.combined().to_dict()
+    stats["cache"] = {"hits": monitor.cache_hits, "misses": monitor.cache_misses}
+    stats["connections"] = {
+        "active": monitor.active_connections,
+        "max": monitor.max_connections
+    }
+    return stats
+
 # Command timing decorator
 def track_command_performance(func):
     """Decorator to track command execution time."""
@@ -0,0 +1,205 @@
+"""
+Deterministic RNG Service for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+Game randomness used to come from the process-wide random module, and the
+catch check reseeded that module on every attempt. This module hands out
+independent random.Random (or numpy Generator) instances whose seeds are
+derived from a master seed and a key such as a battle, spawn or user ID, so
+that results can be reproduced for audits and battles can be replayed in
+bulk without touching global state.
+"""
+
+import os
+import random
+import hashlib
+from typing import Any, Optional
+
+from src.utils.config_manager import get_config
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+def derive_seed(*parts: Any) -> int:
+    """
+    Hash a sequence of values into a 64-bit seed.
+
+    Args:
+        parts: Values that identify the random stream
+
+    Returns:
+        int: Seed that is stable across processes and Python versions
+    """
+    data = ":".join(str(part) for part in parts).encode()
+    return int.from_bytes(hashlib.sha256(data).digest()[:8], "big")
+
+
+class ReplayableRandom(random.Random):
+    """
+    random.Random that counts the 32-bit words it has drawn.
+
+    A seed and a draw count are enough to bring a new generator to the same
+    point, so saved state stays a couple of integers instead of the full
+    625-word Mersenne Twister state. The sequence of numbers is the same as
+    random.Random with the same seed.
+    """
+
+    def seed(self, a=None, version=2):
+        """Seed the generator and reset the draw count."""
+        super().seed(a, version)
+        self.draws = 0
+
+    def random(self):
+        """Return the next float in [0.0, 1.0), which uses two words."""
+        self.draws += 2
+        return super().random()
+
+    def getrandbits(self, k):
+        """Return k random bits, which uses one word per 32 bits."""
+        if k > 0:
+            self.draws += (k - 1) // 32 + 1
+        return super().getrandbits(k)
+
+    def advance(self, draws: int) -> None:
+        """
+        Skip ahead to a draw count, e.g. after reseeding a restored battle.
+
+        Args:
+            draws: Draw count to reach; must not be below the current one
+        """
+        remaining = draws - self.draws
+        if remaining < 0:
+            raise ValueError("Cannot move a generator back to an earlier draw")
+        while remaining:
+            chunk = min(remaining, 4096)
+            super().getrandbits(32 * chunk)
+            remaining -= chunk
+        self.draws = draws
+
+
+class RNGService:
+    """
+    Hands out seeded random number generators per user, battle and spawn.
+
+    Every generator is a new object, so using one never affects another or
+    the random module. The same master seed and key always give the same
+    sequence of numbers.
+    """
+
+    def __init__(self, master_seed: Optional[int] = None):
+        """
+        Initialize the RNG service.
+
+        Args:
+            master_seed: Seed all other seeds are derived from (random if None)
+        """
+        if master_seed is None:
+            master_seed = int.from_bytes(os.urandom(8), "big")
+        self.master_seed = master_seed
+
+    def seed_for(self, namespace: str, key: Any) -> int:
+        """
+        Get the seed of a random stream.
+
+        Args:
+            namespace: Kind of stream, e.g. "battle" or "spawn"
+            key: Identifier within the namespace
+
+        Returns:
+            int: Derived seed
+        """
+        return derive_seed(self.master_seed, namespace, key)
+
+    def for_user(self, user_id: str, nonce: Any) -> random.Random:
+        """
+        Get a generator for a single action of a user.
+
+        Args:
+            user_id: Discord ID of the user
+            nonce: Value that makes the action unique, e.g. a timestamp
+
+        Returns:
+            random.Random: Seeded generator
+        """
+        return random.Random(self.seed_for("user", f"{user_id}:{nonce}"))
+
+    def for_battle(self, battle_id: Any) -> ReplayableRandom:
+        """
+        Get the generator for a battle.
+
+        Args:
+            battle_id: ID of the battle
+
+        Returns:
+            ReplayableRandom: Seeded generator that counts its draws
+        """
+        return ReplayableRandom(self.seed_for("battle", battle_id))
+
+    def for_spawn(self, spawn_id: Any) -> random.Random:
+        """
+        Get the generator for a spawn.
+
+        Args:
+            spawn_id: ID of the spawn
+
+        Returns:
+            random.Random: Seeded generator
+        """
+        return random.Random(self.seed_for("spawn", spawn_id))
+
+    @staticmethod
+    def from_seed(seed: Any) -> random.Random:
+        """
+        Get a generator for a stored seed, e.g. to audit or replay a result.
+
+        Args:
+            seed: Seed as stored with the result
+
+        Returns:
+            random.Random: Seeded generator
+        """
+        return random.Random(seed)
+
+    @staticmethod
+    def numpy_generator(seed: Any):
+        """
+        Get a numpy Generator for a seed, for vectorized simulations.
+
+        Args:
+            seed: Integer seed, or any other value to hash into one
+
+        Returns:
+            numpy.random.Generator: Seeded generator
+
+        Raises:
+            RuntimeError: If numpy is not installed
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("numpy is required for numpy generators")
+        if not isinstance(seed, int):
+            seed = derive_seed(seed)
+        return np.random.default_rng(seed)
+
+
+# Global instance
+_rng_service = None
+
+def get_rng_service() -> RNGService:
+    """
+    Get the global RNG service instance.
+
+    The master seed is read from the "general.rng_master_seed" config value;
+    without one a random master seed is used for this process.
+
+    Returns:
+        The global RNGService instance
+    """
+    global _rng_service
+    if _rng_service is None:
+        _rng_service = RNGService(get_config("general", "rng_master_seed", None))
+    return _rng_service
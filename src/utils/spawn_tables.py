@@ -0,0 +1,274 @@
+"""
+Compiled Spawn Tables for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+Exploring used to rebuild a weighted list of every Veramon in a spawn table,
+applying weather and time-of-day type modifiers on every encounter, and then
+pick from it with a linear scan. Spawn weights only change when the biome
+data, the Veramon data or the weather changes, so this module compiles each
+(biome, special area, weather, time of day) combination once into an alias
+table that can be sampled in O(1).
+"""
+
+import random
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+class AliasTable:
+    """
+    Weighted sampler using Vose's alias method.
+
+    Building the table is O(n); each sample is O(1) and needs a single
+    random number.
+    """
+
+    __slots__ = ("items", "weights", "_prob", "_alias")
+
+    def __init__(self, choices: Sequence[Tuple[Any, float]]):
+        """
+        Build an alias table.
+
+        Args:
+            choices: Sequence of (item, weight) tuples
+
+        Raises:
+            ValueError: If choices is empty
+        """
+        if not choices:
+            raise ValueError("Cannot build an alias table without choices")
+
+        self.items = [item for item, _ in choices]
+        self.weights = [max(0.0, float(weight)) for _, weight in choices]
+
+        n = len(self.items)
+        total = sum(self.weights)
+        self._prob = [1.0] * n
+        self._alias = list(range(n))
+
+        if total <= 0:
+            # Like weighted_choice, fall back to the first item
+            self._alias = [0] * n
+            self._prob = [0.0] * n
+            return
+
+        scaled = [weight * n / total for weight in self.weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+
+        # Leftovers are 1.0 up to floating point error
+        for i in large + small:
+            self._prob[i] = 1.0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample(self, rng: random.Random = None) -> Any:
+        """
+        Pick an item with probability proportional to its weight.
+
+        Args:
+            rng: Random number generator to use (the random module by default)
+
+        Returns:
+            The chosen item
+        """
+        r = (rng or random).random() * len(self.items)
+        i = int(r)
+        if r - i < self._prob[i]:
+            return self.items[i]
+        return self.items[self._alias[i]]
+
+    def probability(self, item: Any) -> float:
+        """Get the chance of sampling an item."""
+        total = sum(self.weights)
+        if total <= 0:
+            return 1.0 if item == self.items[0] else 0.0
+        return sum(w for i, w in zip(self.items, self.weights) if i == item) / total
+
+
+class SpawnTableCompiler:
+    """
+    Compiles and caches spawn tables for every encounter context.
+
+    Tables are cached per (biome, special area, weather, time of day) and are
+    thrown away when the biome or Veramon data is replaced, or when
+    invalidate() is called after the data is edited in place.
+    """
+
+    def __init__(self, biomes: Dict[str, Any], veramon_data: Dict[str, Any],
+                 rarity_weights: Dict[str, float]):
+        """
+        Initialize the compiler.
+
+        Args:
+            biomes: Biome data keyed by biome key
+            veramon_data: Veramon data keyed by name
+            rarity_weights: Spawn weight of each rarity tier
+        """
+        self.rarity_weights = rarity_weights
+        self._signature = None
+        self._encounter_tables: Dict[Hashable, Optional[AliasTable]] = {}
+        self._rarity_tables: Dict[Hashable, Any] = {}
+        self.compile_count = 0
+        self.update_sources(biomes, veramon_data)
+
+    def update_sources(self, biomes: Dict[str, Any], veramon_data: Dict[str, Any],
+                       version: Optional[int] = None) -> None:
+        """
+        Point the compiler at the current data, dropping tables if it changed.
+
+        Args:
+            biomes: Biome data keyed by biome key
+            veramon_data: Veramon data keyed by name
+            version: Version of data that is reloaded in place, if known
+        """
+        signature = (id(biomes), len(biomes), id(veramon_data), len(veramon_data), version)
+        if signature != self._signature:
+            self._biomes = biomes
+            self._veramon_data = veramon_data
+            self._signature = signature
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """Drop every compiled table."""
+        self._encounter_tables.clear()
+        self._rarity_tables.clear()
+
+    def _type_modifiers(self, biome_data: Dict[str, Any], weather: Optional[str],
+                        time_of_day: Optional[str]) -> Dict[str, float]:
+        """Combine weather and time-of-day spawn modifiers, keyed by lowercase type."""
+        modifiers: Dict[str, float] = {}
+
+        sources = []
+        if weather and weather in biome_data.get('weather_effects', {}):
+            sources.append(biome_data['weather_effects'][weather].get('spawn_modifiers', {}))
+        if time_of_day and time_of_day in biome_data.get('time_effects', {}):
+            sources.append(biome_data['time_effects'][time_of_day].get('spawn_modifiers', {}))
+
+        for source in sources:
+            for type_name, modifier in source.items():
+                key = type_name.lower()
+                modifiers[key] = modifiers.get(key, 1.0) * modifier
+
+        return modifiers
+
+    def _species_weight(self, name: str, modifiers: Dict[str, float]) -> Optional[float]:
+        """Get the type-modified weight of a species, or None if it is unknown."""
+        data = self._veramon_data.get(name)
+        if data is None:
+            return None
+
+        weight = 1.0
+        for type_name in data.get('type', []):
+            if type_name and type_name.lower() in modifiers:
+                weight *= modifiers[type_name.lower()]
+        return weight
+
+    def _spawn_table(self, biome_data: Dict[str, Any], special_area: Optional[str]) -> Optional[Dict[str, List[str]]]:
+        """Get the raw spawn table of a biome or one of its special areas."""
+        if not special_area:
+            return biome_data.get('spawn_table', {})
+
+        for area in biome_data.get('special_areas', []):
+            if area.get('id') == special_area:
+                return area.get('spawn_table', {})
+        return None
+
+    def encounter_table(self, biome_key: str, special_area: Optional[str] = None,
+                        weather: Optional[str] = None,
+                        time_of_day: Optional[str] = None) -> Optional[AliasTable]:
+        """
+        Get the table used by explore, with every species of every rarity.
+
+        Each species is weighted by its rarity weight times the weather and
+        time-of-day modifiers of its types.
+
+        Args:
+            biome_key: Biome key
+            special_area: Special area ID, or None for the biome itself
+            weather: Current weather in the biome
+            time_of_day: Current time of day value
+
+        Returns:
+            Compiled table, or None if nothing can spawn
+        """
+        key = (biome_key, special_area, weather, time_of_day)
+        if key in self._encounter_tables:
+            return self._encounter_tables[key]
+
+        table = None
+        biome_data = self._biomes.get(biome_key)
+        spawn_table = self._spawn_table(biome_data, special_area) if biome_data else None
+
+        if spawn_table:
+            modifiers = self._type_modifiers(biome_data, weather, time_of_day)
+            choices = []
+            for rarity, names in spawn_table.items():
+                rarity_weight = self.rarity_weights.get(rarity.lower(), 1)
+                for name in names:
+                    weight = self._species_weight(name, modifiers)
+                    if weight is not None:
+                        choices.append((name, rarity_weight * weight))
+            if choices:
+                table = AliasTable(choices)
+
+        self.compile_count += 1
+        self._encounter_tables[key] = table
+        return table
+
+    def rarity_tables(self, biome_key: str, weather: Optional[str] = None
+                      ) -> Optional[Tuple[Optional[AliasTable], Dict[str, AliasTable], Dict[str, List[str]]]]:
+        """
+        Get the two-stage tables used for random spawns: a rarity tier first,
+        then a species within it weighted by weather modifiers.
+
+        Args:
+            biome_key: Biome key
+            weather: Current weather in the biome
+
+        Returns:
+            Tuple of (rarity table or None, species table per rarity, raw spawn
+            table), or None if the biome has no spawn table
+        """
+        key = (biome_key, weather)
+        if key in self._rarity_tables:
+            return self._rarity_tables[key]
+
+        compiled = None
+        biome_data = self._biomes.get(biome_key)
+        spawn_table = biome_data.get('spawn_table', {}) if biome_data else None
+
+        if spawn_table:
+            rarity_choices = [
+                (rarity, weight) for rarity, weight in self.rarity_weights.items()
+                if rarity in spawn_table
+            ]
+            rarity_table = AliasTable(rarity_choices) if rarity_choices else None
+
+            modifiers = self._type_modifiers(biome_data, weather, None)
+            species_tables = {}
+            for rarity, names in spawn_table.items():
+                choices = []
+                for name in names:
+                    weight = self._species_weight(name, modifiers)
+                    if weight is not None:
+                        choices.append((name, weight))
+                if choices:
+                    species_tables[rarity] = AliasTable(choices)
+
+            compiled = (rarity_table, species_tables, spawn_table)
+
+        self.compile_count += 1
+        self._rarity_tables[key] = compiled
+        return compiled
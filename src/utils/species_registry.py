@@ -0,0 +1,297 @@
+"""
+Species Registry for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+The Veramon database used to be parsed separately by every cog, by battle
+setup and by every Veramon created without data, and autocomplete re-read
+it on every keystroke. This module loads it once per process, keeps
+secondary indexes by name, type, rarity and biome plus per-species derived
+data, and reloads it when the file changes on disk.
+"""
+
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.type_registry import get_type_registry
+
+# Set up logging
+logger = logging.getLogger("species_registry")
+
+DATABASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'veramon_database.json'))
+
+
+class SpeciesRegistry:
+    """
+    Process-wide, lazily loaded view of the Veramon database.
+
+    all() always returns the same dict object. A reload updates that dict in
+    place, so modules holding a reference to it see the new data too. The
+    data is shared: callers must copy a species before modifying it.
+    """
+
+    def __init__(self, path: str = DATABASE_PATH, check_interval: float = 5.0):
+        """
+        Initialize the registry. Nothing is read until the data is used.
+
+        Args:
+            path: Path of the Veramon database JSON file
+            check_interval: Minimum seconds between file modification checks
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._mtime = None
+        self._last_check = 0.0
+        self._reset_indexes()
+
+    def _reset_indexes(self) -> None:
+        """Create empty indexes."""
+        self._by_lower: Dict[str, str] = {}
+        self._sorted_lower: List[Tuple[str, str]] = []
+        self._sorted_keys: List[str] = []
+        self._by_type: Dict[str, List[str]] = {}
+        self._by_rarity: Dict[str, List[str]] = {}
+        self._by_biome: Dict[str, List[str]] = {}
+        self._derived: Dict[str, Dict[str, Any]] = {}
+
+    def _ensure_current(self) -> None:
+        """Load the data on first use and reload it if the file changed."""
+        now = time.monotonic()
+        if self._loaded and now - self._last_check < self.check_interval:
+            return
+
+        with self._lock:
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+
+            if not self._loaded or mtime != self._mtime:
+                self._load(mtime)
+
+    def _load(self, mtime: Optional[int]) -> None:
+        """Read the database file and rebuild every index."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading Veramon database: {e}")
+            if self._loaded:
+                # Keep serving the last good data, e.g. during a partial write
+                return
+            data = {}
+
+        self._data.clear()
+        self._data.update(data)
+        self._build_indexes()
+        self._mtime = mtime
+        self._loaded = True
+        self.version += 1
+        logger.info(f"Loaded {len(self._data)} Veramon species (version {self.version})")
+
+    def _build_indexes(self) -> None:
+        """Build secondary indexes and derived data for the loaded species."""
+        self._reset_indexes()
+        type_registry = get_type_registry()
+
+        for name, species in self._data.items():
+            lower = name.lower()
+            self._by_lower[lower] = name
+
+            types = tuple(t.lower() for t in species.get("type", []) if t)
+            for type_name in types:
+                self._by_type.setdefault(type_name, []).append(name)
+
+            rarity = str(species.get("rarity", "common")).lower()
+            self._by_rarity.setdefault(rarity, []).append(name)
+
+            for biome in species.get("biomes", []):
+                self._by_biome.setdefault(biome, []).append(name)
+
+            base_stats = species.get("base_stats", {})
+            type_codes = tuple(type_registry.intern(type_name) for type_name in types)
+            self._derived[name] = {
+                "types": types,
+                "type_codes": type_codes,
+                "type_combo": type_registry.combo(type_codes),
+                "rarity": rarity,
+                "base_stat_total": sum(v for v in base_stats.values() if isinstance(v, (int, float))),
+                "catch_rate": species.get("catch_rate", 0),
+                "shiny_rate": species.get("shiny_rate", 0),
+                "evolves_to": species.get("evolution", {}).get("evolves_to")
+            }
+
+        self._sorted_lower = sorted(self._by_lower.items())
+        self._sorted_keys = [lower for lower, _ in self._sorted_lower]
+
+    def reload(self) -> None:
+        """Reload the database file now."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            self._last_check = time.monotonic()
+            self._load(mtime)
+
+    def refresh(self) -> int:
+        """
+        Reload the data if the file changed since the last check.
+
+        Returns:
+            int: Current data version, which increases on every reload
+        """
+        self._ensure_current()
+        return self.version
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get all species keyed by name.
+
+        Returns:
+            The shared species dict
+        """
+        self._ensure_current()
+        return self._data
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a species by name, falling back to a case-insensitive match.
+
+        Args:
+            name: Species name
+
+        Returns:
+            Species data, or None if it does not exist
+        """
+        self._ensure_current()
+        species = self._data.get(name)
+        if species is None:
+            canonical = self._by_lower.get(name.lower())
+            if canonical is not None:
+                species = self._data.get(canonical)
+        return species
+
+    def canonical_name(self, name: str) -> Optional[str]:
+        """Get the correctly capitalised name of a species, or None."""
+        self._ensure_current()
+        return self._by_lower.get(name.lower())
+
+    def names(self) -> List[str]:
+        """Get every species name in alphabetical order."""
+        self._ensure_current()
+        return [name for _, name in self._sorted_lower]
+
+    def by_type(self, type_name: str) -> List[str]:
+        """Get the names of species with a type."""
+        self._ensure_current()
+        return list(self._by_type.get(type_name.lower(), []))
+
+    def by_rarity(self, rarity: str) -> List[str]:
+        """Get the names of species of a rarity."""
+        self._ensure_current()
+        return list(self._by_rarity.get(rarity.lower(), []))
+
+    def by_biome(self, biome: str) -> List[str]:
+        """Get the names of species found in a biome."""
+        self._ensure_current()
+        return list(self._by_biome.get(biome, []))
+
+    def derived(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get precomputed data for a species.
+
+        Args:
+            name: Species name
+
+        Returns:
+            Dict with lowercase types and their interned codes, rarity, base
+            stat total, catch rate, shiny rate and evolution target, or None if it does not exist
+        """
+        self._ensure_current()
+        canonical = name if name in self._derived else self._by_lower.get(name.lower())
+        return self._derived.get(canonical) if canonical else None
+
+    def search_prefix(self, prefix: str, limit: int = 25) -> List[str]:
+        """
+        Find species whose name starts with a prefix, case-insensitively.
+
+        Args:
+            prefix: Start of the name
+            limit: Maximum number of names to return
+
+        Returns:
+            Matching names in alphabetical order
+        """
+        self._ensure_current()
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._sorted_keys, prefix)
+
+        matches = []
+        for lower, name in self._sorted_lower[start:]:
+            if not lower.startswith(prefix) or len(matches) >= limit:
+                break
+            matches.append(name)
+        return matches
+
+    def search(self, text: str, limit: int = 25) -> List[str]:
+        """
+        Find species whose name contains some text, prefix matches first.
+
+        Args:
+            text: Text to look for, case-insensitively
+            limit: Maximum number of names to return
+
+        Returns:
+            Matching names
+        """
+        matches = self.search_prefix(text, limit)
+        if len(matches) >= limit:
+            return matches
+
+        text = text.lower()
+        for lower, name in self._sorted_lower:
+            if text in lower and not lower.startswith(text):
+                matches.append(name)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics."""
+        self._ensure_current()
+        return {
+            "species": len(self._data),
+            "types": len(self._by_type),
+            "rarities": len(self._by_rarity),
+            "biomes": len(self._by_biome),
+            "version": self.version
+        }
+
+
+# Global instance
+_species_registry = None
+_registry_lock = threading.Lock()
+
+def get_species_registry() -> SpeciesRegistry:
+    """
+    Get the global species registry instance.
+
+    Returns:
+        The global SpeciesRegistry instance
+    """
+    global _species_registry
+    if _species_registry is None:
+        with _registry_lock:
+            if _species_registry is None:
+                _species_registry = SpeciesRegistry()
+    return _species_registry
@@ -0,0 +1,297 @@
+"""
+Type Registry for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+Type effectiveness used to be looked up in a dict of dicts keyed by
+lowercase type names, one type at a time, on every hit. This module interns
+type names as small integers and keeps the chart as a dense matrix. It also
+precomputes the combined multiplier of every attacking type against every
+defending type combination, so a dual-type lookup is a single index.
+"""
+
+import logging
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Set up logging
+logger = logging.getLogger("type_registry")
+
+# Format: {attacking_type: {defending_type: multiplier}}
+DEFAULT_TYPE_CHART = {
+    "normal": {"rock": 0.5, "steel": 0.5, "ghost": 0},
+    "fire": {"fire": 0.5, "water": 0.5, "grass": 2.0, "ice": 2.0, "bug": 2.0, "rock": 0.5, "dragon": 0.5, "steel": 2.0},
+    "water": {"fire": 2.0, "water": 0.5, "grass": 0.5, "ground": 2.0, "rock": 2.0, "dragon": 0.5},
+    "electric": {"water": 2.0, "electric": 0.5, "grass": 0.5, "ground": 0, "flying": 2.0, "dragon": 0.5},
+    "grass": {"fire": 0.5, "water": 2.0, "grass": 0.5, "poison": 0.5, "ground": 2.0, "flying": 0.5, "bug": 0.5, "rock": 2.0, "dragon": 0.5, "steel": 0.5},
+    "ice": {"fire": 0.5, "water": 0.5, "grass": 2.0, "ice": 0.5, "ground": 2.0, "flying": 2.0, "dragon": 2.0, "steel": 0.5},
+    "fighting": {"normal": 2.0, "ice": 2.0, "poison": 0.5, "flying": 0.5, "psychic": 0.5, "bug": 0.5, "rock": 2.0, "ghost": 0, "dark": 2.0, "steel": 2.0, "fairy": 0.5},
+    "poison": {"grass": 2.0, "poison": 0.5, "ground": 0.5, "rock": 0.5, "ghost": 0.5, "steel": 0, "fairy": 2.0},
+    "ground": {"fire": 2.0, "electric": 2.0, "grass": 0.5, "poison": 2.0, "flying": 0, "bug": 0.5, "rock": 2.0, "steel": 2.0},
+    "flying": {"electric": 0.5, "grass": 2.0, "fighting": 2.0, "bug": 2.0, "rock": 0.5, "steel": 0.5},
+    "psychic": {"fighting": 2.0, "poison": 2.0, "psychic": 0.5, "dark": 0, "steel": 0.5},
+    "bug": {"fire": 0.5, "grass": 2.0, "fighting": 0.5, "poison": 0.5, "flying": 0.5, "psychic": 2.0, "ghost": 0.5, "dark": 2.0, "steel": 0.5, "fairy": 0.5},
+    "rock": {"fire": 2.0, "ice": 2.0, "fighting": 0.5, "ground": 0.5, "flying": 2.0, "bug": 2.0, "steel": 0.5},
+    "ghost": {"normal": 0, "psychic": 2.0, "ghost": 2.0, "dark": 0.5},
+    "dragon": {"dragon": 2.0, "steel": 0.5, "fairy": 0},
+    "dark": {"fighting": 0.5, "psychic": 2.0, "ghost": 2.0, "dark": 0.5, "fairy": 0.5},
+    "steel": {"fire": 0.5, "water": 0.5, "electric": 0.5, "ice": 2.0, "rock": 2.0, "steel": 0.5, "fairy": 2.0},
+    "fairy": {"fire": 0.5, "fighting": 2.0, "poison": 0.5, "dragon": 2.0, "dark": 2.0, "steel": 0.5}
+}
+
+# Code of types the chart does not know, neutral against everything
+UNKNOWN_TYPE = 0
+
+TypeRef = Union[str, int]
+
+
+class TypeRegistry:
+    """
+    Interned type codes and precomputed effectiveness tables.
+
+    Code 0 is reserved for unknown types. The single-type matrix is indexed
+    [attacking * type_count + defending]; the combination table is indexed
+    [combo * type_count + attacking], so registering a new combination only
+    appends a row. Type and combination codes never change once handed
+    out: interning a new type rebuilds both tables with the wider stride,
+    keeping every existing row in place, and swaps them in with one
+    assignment.
+    """
+
+    def __init__(self, chart: Optional[Dict[str, Dict[str, float]]] = None,
+                 extra_types: Iterable[str] = ()):
+        """
+        Initialize the registry.
+
+        Args:
+            chart: Effectiveness chart keyed by lowercase type names
+            extra_types: Types with no chart entries, e.g. from species data
+        """
+        self.chart = chart if chart is not None else DEFAULT_TYPE_CHART
+        self._lock = threading.RLock()
+
+        names = set(self.chart)
+        for matchups in self.chart.values():
+            names.update(matchups)
+        names.update(t.lower() for t in extra_types if t)
+
+        self._names: List[str] = [""] + sorted(names)
+        self._codes: Dict[str, int] = {name: code for code, name in enumerate(self._names)}
+        self._build()
+
+    @property
+    def type_count(self) -> int:
+        """Number of type codes, including UNKNOWN_TYPE."""
+        return self._tables[0]
+
+    @property
+    def matrix(self) -> array:
+        """Single-type effectiveness matrix."""
+        return self._tables[1]
+
+    @property
+    def combo_matrix(self) -> array:
+        """Effectiveness of every attacking type against every combination."""
+        return self._tables[2]
+
+    def _build(self) -> None:
+        """Build the single-type matrix and the combinations of every type pair."""
+        count = len(self._names)
+        self._combos: Dict[Tuple[int, ...], int] = {}
+        self._combo_types: List[Tuple[int, ...]] = []
+        self._combo_names: Dict[Tuple[str, ...], int] = {}
+        # (type_count, matrix, combo_matrix), replaced together so readers never mix strides
+        self._tables = (count, self._single_matrix(count), array('d'))
+        self._add_combo(())
+        for first in range(1, count):
+            self._add_combo((first,))
+            for second in range(first + 1, count):
+                self._add_combo((first, second))
+
+    def _single_matrix(self, count: int) -> array:
+        """Build the single-type matrix for count type codes."""
+        matrix = array('d', [1.0]) * (count * count)
+        for attacking, matchups in self.chart.items():
+            row = self._codes[attacking] * count
+            for defending, multiplier in matchups.items():
+                matrix[row + self._codes[defending]] = float(multiplier)
+        return matrix
+
+    def _combo_row(self, codes: Tuple[int, ...], count: int, matrix: array) -> array:
+        """Compute the multipliers of every attacking type against a combination."""
+        row = array('d', [1.0]) * count
+        for attacking in range(count):
+            for defending in codes:
+                row[attacking] *= matrix[attacking * count + defending]
+        return row
+
+    def _add_combo(self, codes: Tuple[int, ...]) -> int:
+        """Register a sorted type combination and compute its row."""
+        count, matrix, combo_matrix = self._tables
+        combo = len(self._combo_types)
+        # The row exists before the code is published
+        combo_matrix.extend(self._combo_row(codes, count, matrix))
+        self._combo_types.append(codes)
+        self._combos[codes] = combo
+        return combo
+
+    def intern(self, name: Optional[str]) -> int:
+        """
+        Get the code of a type, registering it if it is new.
+
+        New types are neutral against everything. Registering one rebuilds
+        the tables, so this is meant for load time, but existing type and
+        combination codes keep their meaning.
+        """
+        if not name:
+            return UNKNOWN_TYPE
+        key = name.lower()
+        code = self._codes.get(key)
+        if code is not None:
+            return code
+
+        with self._lock:
+            if key not in self._codes:
+                self._register_type(key)
+                logger.info(f"Registered type {key}")
+            return self._codes[key]
+
+    def _register_type(self, key: str) -> None:
+        """Add a type code and the combinations it is part of, keeping existing codes."""
+        self._names.append(key)
+        code = len(self._names) - 1
+        count = code + 1
+        matrix = self._single_matrix(count)
+
+        # Existing combinations keep their codes and get a column for the new type
+        combo_matrix = array('d')
+        for codes in self._combo_types:
+            combo_matrix.extend(self._combo_row(codes, count, matrix))
+        combo_types = list(self._combo_types)
+        combos = dict(self._combos)
+        for codes in [(code,)] + [(first, code) for first in range(1, code)]:
+            combos[codes] = len(combo_types)
+            combo_types.append(codes)
+            combo_matrix.extend(self._combo_row(codes, count, matrix))
+
+        self._tables = (count, matrix, combo_matrix)
+        self._combo_types = combo_types
+        self._combos = combos
+        # Names that included this type were cached as combinations without it
+        self._combo_names = {}
+        self._codes[key] = code
+
+    def code(self, name: Optional[str]) -> int:
+        """Get the code of a type, or UNKNOWN_TYPE without registering it."""
+        if not name:
+            return UNKNOWN_TYPE
+        return self._codes.get(name.lower(), UNKNOWN_TYPE)
+
+    def name(self, code: int) -> str:
+        """Get the lowercase name of a type code."""
+        return self._names[code]
+
+    def combo(self, types: Iterable[TypeRef]) -> int:
+        """
+        Get the code of a defending type combination.
+
+        Args:
+            types: Type names or codes, in any order
+
+        Returns:
+            int: Combination code for effectiveness()
+        """
+        types = tuple(types)
+        # Entries go to the cache this call read, not one replaced by intern() meanwhile
+        combo_names = self._combo_names
+        if types and isinstance(types[0], str):
+            combo = combo_names.get(types)
+            if combo is not None:
+                return combo
+            names = types
+            types = tuple(self.code(name) for name in names)
+        else:
+            names = None
+
+        codes = tuple(sorted(set(code for code in types if code != UNKNOWN_TYPE)))
+        combo = self._combos.get(codes)
+        if combo is None:
+            with self._lock:
+                combo = self._combos.get(codes)
+                if combo is None:
+                    combo = self._add_combo(codes)
+
+        if names is not None:
+            combo_names[names] = combo
+        return combo
+
+    def effectiveness(self, attacking: int, combo: int) -> float:
+        """Get the multiplier of an attacking type code against a combination code."""
+        count, _, combo_matrix = self._tables
+        return combo_matrix[combo * count + attacking]
+
+    def single(self, attacking: int, defending: int) -> float:
+        """Get the multiplier of one type code against another."""
+        count, matrix, _ = self._tables
+        return matrix[attacking * count + defending]
+
+    def multiplier(self, move_type: Optional[str], defender_types: Iterable[str]) -> float:
+        """
+        Get the multiplier of a move type against a defender's types by name.
+
+        Args:
+            move_type: Type of the move
+            defender_types: Types of the defender
+
+        Returns:
+            float: Combined effectiveness multiplier
+        """
+        return self.effectiveness(self.code(move_type), self.combo(defender_types))
+
+    def combo_types(self, combo: int) -> Tuple[int, ...]:
+        """Get the type codes of a combination code."""
+        return self._combo_types[combo]
+
+    def as_numpy(self):
+        """
+        Get the combination table as a NumPy array of shape (combos, types).
+
+        Raises:
+            RuntimeError: If NumPy is not installed
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for as_numpy()")
+        count, _, combo_matrix = self._tables
+        return np.frombuffer(combo_matrix, dtype=np.float64).reshape(-1, count).copy()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get registry statistics."""
+        return {
+            "types": self.type_count - 1,
+            "combinations": len(self._combo_types)
+        }
+
+
+# Global instance
+_type_registry = None
+_registry_lock = threading.Lock()
+
+def get_type_registry() -> TypeRegistry:
+    """
+    Get the global type registry instance.
+
+    Returns:
+        The global TypeRegistry instance
+    """
+    global _type_registry
+    if _type_registry is None:
+        with _registry_lock:
+            if _type_registry is None:
+                _type_registry = TypeRegistry()
+    return _type_registry
@@ -176,10 +176,15 @@ class AccessibilitySettings:
 class AccessibilityManager:
     """Manages accessibility settings for all users."""
     
-    def __init__(self):
-        """Initialize the accessibility manager."""
+    def __init__(self, settings_file: str = "data/accessibility.json"):
+        """
+        Initialize the accessibility manager.
+        
+        Args:
+            settings_file: JSON file that users' accessibility settings are saved to
+        """
         self.settings: Dict[str, AccessibilitySettings] = {}
-        self.settings_file = "data/accessibility.json"
+        self.settings_file = settings_file
         
         # Create default settings
         self._create_defaults()
@@ -207,9 +212,8 @@ class AccessibilityManager:
         """Load settings from file."""
         try:
             if not os.path.exists(self.settings_file):
-                # Create data directory if it doesn't exist
-                os.makedirs(os.path.dirname(self.settings_file), exist_ok=True)
-                self.save_settings()
+                # Nobody has changed a setting yet; the file is written on
+                # the first change
                 return
             
             with open(self.settings_file, 'r') as f:
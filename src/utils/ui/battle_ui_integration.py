@@ -13,6 +13,7 @@ from typing import Dict, List, Any, Optional, Union
 from src.utils.ui.battle_ui_enhanced import BattleUI
 from src.utils.ui.ui_registry import get_ui_registry
 from src.utils.ui_theme import theme_manager, ThemeColorType
+from src.utils.user_resolver import get_user_resolver
 from src.utils.ui.accessibility import (
     get_accessibility_manager, 
     apply_text_size, 
@@ -357,7 +358,7 @@ class BattleUIIntegration:
         )
         
         # Get host user info
-        host_user = await interaction.client.fetch_user(int(host_id))
+        host_user = (await get_user_resolver(interaction.client).fetch_many([host_id])).get(str(host_id))
         host_name = host_user.name if host_user else "Unknown"
         
         embed.set_author(name=f"Challenge from {host_name}", icon_url=host_user.avatar.url if host_user and host_user.avatar else None)
@@ -4,6 +4,7 @@ import json
 import os
 import random
 from datetime import datetime
+from functools import lru_cache
 
 from src.utils.ui_theme import theme_manager, ThemeColorType, create_themed_embed
 from src.utils.user_settings import get_user_settings
@@ -15,6 +16,11 @@ ICON_PATH = os.path.join(ASSET_BASE_PATH, "icons")
 BADGE_PATH = os.path.join(ASSET_BASE_PATH, "badges")
 IMAGE_PLACEHOLDER = "https://via.placeholder.com/256?text=Veramon"
 
+@lru_cache(maxsize=4096)
+def _asset_exists(path: str) -> bool:
+    """Check for an asset file once, so rendering embeds does not touch the disk."""
+    return os.path.exists(path)
+
 class UIRenderer:
     """
     Handles rendering UI elements for the bot.
@@ -43,7 +49,7 @@ class UIRenderer:
             
         # Check if file exists
         image_path = os.path.join(VERAMON_IMAGES_PATH, f"{image_name}.png")
-        if os.path.exists(image_path):
+        if _asset_exists(image_path):
             # Return Discord CDN URL when deployed
             return f"attachment://{image_name}.png"
             
@@ -57,7 +63,7 @@ class UIRenderer:
         type_name = type_name.lower().replace(" ", "_")
         icon_path = os.path.join(ICON_PATH, "types", f"{type_name}.png")
         
-        if os.path.exists(icon_path):
+        if _asset_exists(icon_path):
             return f"attachment://{type_name}_type.png"
             
         return f"https://via.placeholder.com/32?text={type_name}"
@@ -68,7 +74,7 @@ class UIRenderer:
         badge_name = badge_name.lower().replace(" ", "_")
         badge_path = os.path.join(BADGE_PATH, f"{badge_name}.png")
         
-        if os.path.exists(badge_path):
+        if _asset_exists(badge_path):
             return f"attachment://{badge_name}_badge.png"
             
         return f"https://via.placeholder.com/64?text={badge_name}"
@@ -65,7 +65,7 @@ class UserSettingsView(NavigableView):
         
         # Add theme options
         available_themes = theme_manager.themes.values()
-        user_theme_id = theme_manager.user_themes.get(self.user_id, "default")
+        user_theme_id = theme_manager.get_user_theme_id(self.user_id)
         
         for theme in available_themes:
             theme_select.add_option(
@@ -340,7 +340,7 @@ class ThemeSelectionView(EnhancedSelectionView):
         
         # Add theme options
         available_themes = theme_manager.themes.values()
-        user_theme_id = theme_manager.user_themes.get(user_id, "default")
+        user_theme_id = theme_manager.get_user_theme_id(user_id)
         
         for theme in available_themes:
             self.add_option(
@@ -6,6 +6,8 @@ import os
 import colorsys
 from datetime import datetime
 
+from src.utils.user_settings import get_settings_service
+
 # Constants
 DEFAULT_THEME = "default"
 USER_THEMES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "user_themes")
@@ -242,7 +244,7 @@ class ThemeManager:
     def __init__(self):
         self.built_in_themes = {}
         self.user_themes = {}
-        self.user_preferences = {}
+        self.preferences = get_settings_service()  # per-user preferences, cached in memory
         
         # Load built-in themes
         self._load_built_in_themes()
@@ -336,10 +338,8 @@ class ThemeManager:
         Returns:
             The user's preferred theme or the default theme
         """
-        if user_id in self.user_preferences:
-            theme_name = self.user_preferences[user_id].get("theme", DEFAULT_THEME)
-            return self.get_theme(theme_name)
-        return self.get_theme()
+        theme_name = self.preferences.value(str(user_id), "theme", DEFAULT_THEME)
+        return self.get_theme(theme_name)
         
     def set_user_theme(self, user_id: str, theme_name: str) -> bool:
         """
@@ -357,11 +357,7 @@ class ThemeManager:
         if theme.name != theme_name and theme.name == DEFAULT_THEME:
             return False  # Theme not found
             
-        if user_id not in self.user_preferences:
-            self.user_preferences[user_id] = {}
-            
-        self.user_preferences[user_id]["theme"] = theme_name
-        self._save_user_preferences(user_id)
+        self.preferences.update(str(user_id), {"theme": theme_name})
         return True
         
     def create_user_theme(self, user_id: str, theme_name: str, base_theme: str = DEFAULT_THEME) -> Optional[Theme]:
@@ -409,7 +405,7 @@ class ThemeManager:
         
     def _save_user_preferences(self, user_id: str) -> bool:
         """
-        Save a user's preferences to a file.
+        Queue a user's preferences to be saved by the settings service.
         
         Args:
             user_id: The Discord user ID
@@ -417,22 +413,12 @@ class ThemeManager:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            prefs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                    "data", "user_preferences")
-            os.makedirs(prefs_dir, exist_ok=True)
-            
-            prefs_file = os.path.join(prefs_dir, f"{user_id}.json")
-            with open(prefs_file, 'w') as f:
-                json.dump(self.user_preferences[user_id], f, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error saving user preferences: {e}")
-            return False
+        self.preferences.mark_dirty(str(user_id))
+        return True
             
     def load_user_preferences(self, user_id: str) -> bool:
         """
-        Load a user's preferences from a file.
+        Load a user's preferences into the settings service cache.
         
         Args:
             user_id: The Discord user ID
@@ -441,19 +427,10 @@ class ThemeManager:
             True if successful, False otherwise
         """
         try:
-            prefs_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                     "data", "user_preferences", f"{user_id}.json")
-                                     
-            if not os.path.exists(prefs_file):
-                self.user_preferences[user_id] = {}
-                return True
-                
-            with open(prefs_file, 'r') as f:
-                self.user_preferences[user_id] = json.load(f)
+            self.preferences.get(str(user_id))
             return True
         except Exception as e:
             print(f"Error loading user preferences: {e}")
-            self.user_preferences[user_id] = {}
             return False
 
     def get_user_preference(self, user_id: str, key: str, default: Any = None) -> Any:
@@ -468,10 +445,7 @@ class ThemeManager:
         Returns:
             The preference value or default
         """
-        if user_id not in self.user_preferences:
-            self.load_user_preferences(user_id)
-            
-        return self.user_preferences.get(user_id, {}).get(key, default)
+        return self.preferences.value(str(user_id), key, default)
         
     def set_user_preference(self, user_id: str, key: str, value: Any) -> bool:
         """
@@ -485,14 +459,8 @@ class ThemeManager:
         Returns:
             True if successful
         """
-        if user_id not in self.user_preferences:
-            self.load_user_preferences(user_id)
-            
-        if user_id not in self.user_preferences:
-            self.user_preferences[user_id] = {}
-            
-        self.user_preferences[user_id][key] = value
-        return self._save_user_preferences(user_id)
+        self.preferences.update(str(user_id), {key: value})
+        return True
         
     def generate_theme_preview(self, theme_name: str) -> discord.Embed:
         """
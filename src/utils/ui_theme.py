@@ -14,6 +14,8 @@ import os
 import logging
 from dataclasses import dataclass, field
 
+from src.utils.user_settings import get_settings_service
+
 # Set up logging
 logger = logging.getLogger('veramon.ui_theme')
 
@@ -158,20 +160,28 @@ class Theme:
 class ThemeManager:
     """Manages themes for UI components."""
     
-    def __init__(self):
-        """Initialize the theme manager."""
+    def __init__(self, themes_file: str = "data/themes.json"):
+        """
+        Initialize the theme manager.
+        
+        Args:
+            themes_file: JSON file that custom and edited themes are saved to
+        """
         self.themes: Dict[str, Theme] = {}
-        self.user_themes: Dict[str, str] = {}  # Maps user IDs to theme IDs
         self.default_theme_id = "default"
-        self.themes_file = "data/themes.json"
-        self.user_themes_file = "data/user_themes.json"
+        self.themes_file = themes_file
+        
+        # Users' theme choices live in the settings service; resolved themes
+        # are cached here and dropped when a user changes theme
+        self._user_theme_cache: Dict[str, Theme] = {}
+        self.max_cached_users = 10000
+        get_settings_service().subscribe(self._on_settings_changed)
         
         # Create default themes
         self._create_default_themes()
         
         # Load themes from file
         self.load_themes()
-        self.load_user_themes()
     
     def _create_default_themes(self):
         """Create default themes."""
@@ -335,11 +345,8 @@ class ThemeManager:
         """Load themes from file."""
         try:
             if not os.path.exists(self.themes_file):
-                # Create themes directory if it doesn't exist
-                os.makedirs(os.path.dirname(self.themes_file), exist_ok=True)
-                
-                # Save default themes
-                self.save_themes()
+                # The default themes are built in; the file is written once a
+                # theme is created, changed or deleted
                 return
             
             with open(self.themes_file, 'r') as f:
@@ -368,50 +375,38 @@ class ThemeManager:
         except Exception as e:
             logger.error(f"Error saving themes: {e}")
     
-    def load_user_themes(self):
-        """Load user theme preferences."""
-        try:
-            if not os.path.exists(self.user_themes_file):
-                # Create directory if it doesn't exist
-                os.makedirs(os.path.dirname(self.user_themes_file), exist_ok=True)
-                return
-            
-            with open(self.user_themes_file, 'r') as f:
-                self.user_themes = json.load(f)
-                
-            logger.info(f"Loaded {len(self.user_themes)} user theme preferences")
-        except Exception as e:
-            logger.error(f"Error loading user themes: {e}")
-    
-    def save_user_themes(self):
-        """Save user theme preferences."""
-        try:
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(self.user_themes_file), exist_ok=True)
-            
-            with open(self.user_themes_file, 'w') as f:
-                json.dump(self.user_themes, f, indent=2)
-                
-            logger.info(f"Saved {len(self.user_themes)} user theme preferences")
-        except Exception as e:
-            logger.error(f"Error saving user themes: {e}")
+    def _on_settings_changed(self, user_id: Optional[str], changes: Dict[str, Any]) -> None:
+        """Drop a user's cached theme when they choose another one, or every theme after a reload."""
+        if user_id is None:
+            self._user_theme_cache.clear()
+        elif "theme" in changes:
+            self._user_theme_cache.pop(user_id, None)
     
     def get_theme(self, theme_id: str) -> Theme:
         """Get a theme by ID."""
         return self.themes.get(theme_id, self.themes[self.default_theme_id])
     
+    def get_user_theme_id(self, user_id: str) -> str:
+        """Get the ID of a user's preferred theme."""
+        return get_settings_service().value(str(user_id), "theme", self.default_theme_id)
+    
     def get_user_theme(self, user_id: str) -> Theme:
         """Get a user's preferred theme."""
-        theme_id = self.user_themes.get(str(user_id), self.default_theme_id)
-        return self.get_theme(theme_id)
+        user_id = str(user_id)
+        theme = self._user_theme_cache.get(user_id)
+        if theme is None:
+            theme = self.get_theme(self.get_user_theme_id(user_id))
+            if len(self._user_theme_cache) >= self.max_cached_users:
+                self._user_theme_cache.clear()
+            self._user_theme_cache[user_id] = theme
+        return theme
     
     def set_user_theme(self, user_id: str, theme_id: str) -> bool:
         """Set a user's preferred theme."""
         if theme_id not in self.themes:
             return False
         
-        self.user_themes[str(user_id)] = theme_id
-        self.save_user_themes()
+        get_settings_service().update(str(user_id), {"theme": theme_id})
         return True
     
     def create_theme(self, theme: Theme) -> bool:
@@ -429,6 +424,7 @@ class ThemeManager:
             return False
         
         self.themes[theme.id] = theme
+        self._user_theme_cache.clear()
         self.save_themes()
         return True
     
@@ -442,13 +438,10 @@ class ThemeManager:
         
         del self.themes[theme_id]
         
-        # Update users who were using this theme
-        for user_id, user_theme_id in self.user_themes.items():
-            if user_theme_id == theme_id:
-                self.user_themes[user_id] = self.default_theme_id
+        # Users who were using this theme fall back to the default theme
+        self._user_theme_cache.clear()
         
         self.save_themes()
-        self.save_user_themes()
         return True
     
     def get_themed_embed(self, user_id: str, title: str = None, description: str = None, 
@@ -460,6 +453,27 @@ class ThemeManager:
 # Create global instance
 theme_manager = ThemeManager()
 
+def create_themed_embed(user_id: str, title: str = None, description: str = None,
+                        color_type: ThemeColorType = ThemeColorType.PRIMARY,
+                        **kwargs) -> discord.Embed:
+    """
+    Create an embed using the user's preferred theme.
+    
+    Args:
+        user_id: The Discord user ID
+        title: The title of the embed
+        description: The description of the embed
+        color_type: The color type to use for the embed
+        **kwargs: Embed attributes to override, e.g. color
+        
+    Returns:
+        A Discord Embed object with the user's theme applied
+    """
+    embed = theme_manager.get_user_theme(user_id).create_embed(title, description, color_type)
+    for key, value in kwargs.items():
+        setattr(embed, key, value)
+    return embed
+
 def get_theme_manager() -> ThemeManager:
     """Get the global theme manager instance."""
     return theme_manager
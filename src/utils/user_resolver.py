@@ -0,0 +1,305 @@
+"""
+User Resolver for Veramon Reunited
+© 2025 killerdash117 | https://github.com/killerdash117
+
+Leaderboards, moderation commands, event reminders, DMs and battle invites
+used to call bot.fetch_user once per user, an HTTP request each that hits Discord rate
+limits at peak times. This module resolves users in bulk: from the gateway
+cache first, then from an in-memory cache of display names with a time to
+live, then from names saved in the database, and only then from the API.
+API fetches run concurrently up to a limit, and a user that is already
+being fetched for one caller is not fetched again for another.
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+from src.db.async_db import run_with_connection, run_write_async
+from src.utils.config_manager import get_config
+
+# Set up logging
+logger = logging.getLogger("user_resolver")
+
+
+class UserResolver:
+    """
+    Bulk, cached lookup of Discord users and their display names.
+
+    Display names are kept in a least-recently-used cache and saved to the
+    user_display_names table, so they survive restarts. Names older than
+    the time to live are fetched again, but are still used if the fetch
+    fails.
+    """
+
+    def __init__(self, bot: Optional[discord.Client] = None, ttl: float = 86400,
+                 max_entries: int = 10000, max_concurrency: int = 5):
+        """
+        Initialize the resolver.
+
+        Args:
+            bot: Client used for gateway lookups and API fetches
+            ttl: Seconds a display name is used before it is fetched again
+            max_entries: Maximum number of display names kept in memory
+            max_concurrency: Maximum number of API fetches at once
+        """
+        self.bot = bot
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._names: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._table_ready = False
+        self.stats = {
+            "gateway": 0,
+            "memory": 0,
+            "database": 0,
+            "fetched": 0,
+            "coalesced": 0,
+            "failed": 0
+        }
+
+    @staticmethod
+    def _unique(user_ids: Iterable[Any]) -> List[str]:
+        """Normalize IDs to strings, dropping duplicates but keeping order."""
+        return list(dict.fromkeys(str(user_id) for user_id in user_ids))
+
+    def _remember(self, user_id: str, display_name: str, fetched_at: Optional[float] = None) -> None:
+        """Cache a display name in memory until its time to live runs out."""
+        if fetched_at is None:
+            fetched_at = time.time()
+        self._names[user_id] = (display_name, fetched_at + self.ttl)
+        self._names.move_to_end(user_id)
+        if len(self._names) > self.max_entries:
+            self._names.popitem(last=False)
+
+    def _cached_name(self, user_id: str) -> Optional[str]:
+        """Get a display name from memory if it has not expired."""
+        entry = self._names.get(user_id)
+        if entry is None:
+            return None
+        if entry[1] < time.time():
+            del self._names[user_id]
+            return None
+        self._names.move_to_end(user_id)
+        return entry[0]
+
+    def _gateway_user(self, user_id: str) -> Optional[discord.User]:
+        """Get a user from the gateway cache."""
+        if self.bot is None:
+            return None
+        try:
+            return self.bot.get_user(int(user_id))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _create_table(cursor) -> None:
+        """Create the display name table if it doesn't exist."""
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS user_display_names (
+                user_id TEXT PRIMARY KEY,
+                display_name TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    async def _ensure_table(self) -> None:
+        """Create the display name table once, through the write queue."""
+        if not self._table_ready:
+            await run_write_async(lambda conn: self._create_table(conn.cursor()))
+            self._table_ready = True
+
+    def _load_names(self, conn, user_ids: List[str]) -> Dict[str, Tuple[str, float]]:
+        """Load saved display names. Runs on the database executor."""
+        cursor = conn.cursor()
+        names = {}
+        # Stay below SQLite's limit on query parameters
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            cursor.execute(f"""
+                SELECT user_id, display_name, updated_at FROM user_display_names
+                WHERE user_id IN ({",".join("?" * len(chunk))})
+            """, chunk)
+            for user_id, display_name, updated_at in cursor.fetchall():
+                names[user_id] = (display_name, updated_at)
+        return names
+
+    def _save_names(self, conn, rows: List[Tuple[str, str, float]]) -> None:
+        """Write job that saves fetched display names."""
+        conn.cursor().executemany("""
+            INSERT INTO user_display_names (user_id, display_name, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+            display_name = excluded.display_name,
+            updated_at = excluded.updated_at
+        """, rows)
+
+    async def _fetch_one(self, user_id: str) -> Optional[discord.User]:
+        """Fetch a user from the API, limited by the concurrency semaphore."""
+        async with self._semaphore:
+            try:
+                user = await self.bot.fetch_user(int(user_id))
+            except (discord.HTTPException, ValueError) as e:
+                self.stats["failed"] += 1
+                logger.debug(f"Could not fetch user {user_id}: {e}")
+                return None
+        self.stats["fetched"] += 1
+        return user
+
+    async def _fetch(self, user_ids: List[str]) -> Dict[str, discord.User]:
+        """Fetch users from the API, joining fetches already in progress."""
+        if not user_ids or self.bot is None:
+            return {}
+
+        futures = []
+        started = set()
+        for user_id in user_ids:
+            future = self._inflight.get(user_id)
+            if future is None:
+                started.add(user_id)
+                future = asyncio.ensure_future(self._fetch_one(user_id))
+                self._inflight[user_id] = future
+                future.add_done_callback(lambda _, user_id=user_id: self._inflight.pop(user_id, None))
+            else:
+                self.stats["coalesced"] += 1
+            futures.append(future)
+
+        # Shielded so a cancelled caller does not cancel fetches others wait for
+        results = await asyncio.gather(*(asyncio.shield(future) for future in futures))
+        users = {user_id: user for user_id, user in zip(user_ids, results) if user is not None}
+
+        # Fetches joined from other callers are saved by those callers
+        rows = [(user_id, user.display_name, time.time())
+                for user_id, user in users.items() if user_id in started]
+        if rows:
+            for user_id, display_name, fetched_at in rows:
+                self._remember(user_id, display_name, fetched_at)
+            try:
+                await self._ensure_table()
+                await run_write_async(self._save_names, rows)
+            except Exception as e:
+                # Recreated on the next save, e.g. after a restore dropped it
+                self._table_ready = False
+                logger.error(f"Error saving display names: {e}")
+        return users
+
+    async def resolve_many(self, user_ids: Iterable[Any]) -> Dict[str, str]:
+        """
+        Get the display names of several users.
+
+        Args:
+            user_ids: Discord user IDs, as strings or ints
+
+        Returns:
+            Dict of user ID string to display name, without users that
+            could not be resolved
+        """
+        names: Dict[str, str] = {}
+        missing = []
+        for user_id in self._unique(user_ids):
+            user = self._gateway_user(user_id)
+            if user is not None:
+                self.stats["gateway"] += 1
+                names[user_id] = user.display_name
+                continue
+            cached = self._cached_name(user_id)
+            if cached is not None:
+                self.stats["memory"] += 1
+                names[user_id] = cached
+            else:
+                missing.append(user_id)
+
+        if not missing:
+            return names
+
+        stale = {}
+        try:
+            await self._ensure_table()
+            saved = await run_with_connection(self._load_names, missing)
+        except Exception as e:
+            self._table_ready = False
+            logger.error(f"Error loading display names: {e}")
+            saved = {}
+        now = time.time()
+        to_fetch = []
+        for user_id in missing:
+            entry = saved.get(user_id)
+            if entry is not None and entry[1] + self.ttl > now:
+                self.stats["database"] += 1
+                names[user_id] = entry[0]
+                self._remember(user_id, entry[0], entry[1])
+            else:
+                if entry is not None:
+                    stale[user_id] = entry[0]
+                to_fetch.append(user_id)
+
+        fetched = await self._fetch(to_fetch)
+        for user_id in to_fetch:
+            user = fetched.get(user_id)
+            if user is not None:
+                names[user_id] = user.display_name
+            elif user_id in stale:
+                names[user_id] = stale[user_id]
+        return names
+
+    async def fetch_many(self, user_ids: Iterable[Any]) -> Dict[str, discord.User]:
+        """
+        Get several users, e.g. to send them DMs.
+
+        Args:
+            user_ids: Discord user IDs, as strings or ints
+
+        Returns:
+            Dict of user ID string to user, without users that could not be
+            fetched
+        """
+        users: Dict[str, discord.User] = {}
+        missing = []
+        for user_id in self._unique(user_ids):
+            user = self._gateway_user(user_id)
+            if user is not None:
+                self.stats["gateway"] += 1
+                users[user_id] = user
+            else:
+                missing.append(user_id)
+
+        users.update(await self._fetch(missing))
+        return users
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get resolver statistics."""
+        return {
+            **self.stats,
+            "cached_names": len(self._names),
+            "inflight": len(self._inflight)
+        }
+
+
+# Global instance
+_user_resolver = None
+
+def get_user_resolver(bot: Optional[discord.Client] = None) -> UserResolver:
+    """
+    Get the global user resolver instance.
+
+    Args:
+        bot: Client to bind the resolver to, if it is not bound yet
+
+    Returns:
+        The global UserResolver instance
+    """
+    global _user_resolver
+    if _user_resolver is None:
+        _user_resolver = UserResolver(
+            ttl=get_config("general", "user_name_ttl", 86400),
+            max_entries=get_config("general", "user_name_cache_size", 10000),
+            max_concurrency=get_config("general", "user_fetch_concurrency", 5)
+        )
+    if bot is not None and _user_resolver.bot is None:
+        _user_resolver.bot = bot
+    return _user_resolver
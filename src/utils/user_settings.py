@@ -1,14 +1,20 @@
 import discord
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Union, Callable
 import json
 import os
+import logging
 from enum import Enum
 
-# Constants
-SETTINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "user_settings")
+from src.db.user_data_store import UserDataStore, read_json_dir, mark_migrated
+from src.utils.config_manager import get_config
+
+# Set up logging
+logger = logging.getLogger('veramon.user_settings')
 
-# Ensure settings directory exists
-os.makedirs(SETTINGS_DIR, exist_ok=True)
+# Directories and files of the old file-based storage, read once by the migration
+SETTINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "user_settings")
+PREFERENCES_DIR = os.path.join(os.path.dirname(__file__), "data", "user_preferences")
+USER_THEMES_FILE = os.path.join("data", "user_themes.json")
 
 class NotificationLevel(Enum):
     """User notification preference levels"""
@@ -30,124 +36,241 @@ class BattleAnimationSpeed(Enum):
     FAST = "fast"         # Fast animations
     INSTANT = "instant"   # No animations
 
+DEFAULT_SETTINGS = {
+    # UI Settings
+    "theme": "default",
+    "compact_mode": False,
+    "show_animations": True,
+    "show_tips": True,
+    "show_veramon_images": True,
+    "embed_style": "default",
+    
+    # Notification Settings
+    "notification_level": NotificationLevel.ALL.value,
+    "trade_notifications": True,
+    "battle_notifications": True,
+    "event_notifications": True,
+    "friend_notifications": True,
+    
+    # Privacy Settings
+    "profile_privacy": PrivacyLevel.PUBLIC.value,
+    "collection_privacy": PrivacyLevel.PUBLIC.value,
+    "activity_privacy": PrivacyLevel.PUBLIC.value,
+    "hide_online_status": False,
+    
+    # Gameplay Settings
+    "battle_animation_speed": BattleAnimationSpeed.NORMAL.value,
+    "auto_claim_rewards": False,
+    "confirm_trades": True,
+    "default_battle_team": 1,
+    "auto_heal": False,
+    
+    # Accessibility Settings
+    "high_contrast_mode": False,
+    "text_size": "medium",
+    "use_screen_reader_hints": False,
+    "reduce_animations": False,
+    
+    # Advanced Settings
+    "show_detailed_stats": False,
+    "developer_mode": False,
+    "experimental_features": False
+}
+
+class SettingsService(UserDataStore):
+    """
+    Cached settings and theme preferences of every user.
+
+    Settings live in memory in a bounded least-recently-used cache and are
+    written to the user_settings_data table in batches. Listeners registered
+    with subscribe are told about every change, so derived state such as a
+    user's resolved theme can be kept in memory too. A user ID of None
+    tells them that every user's settings were replaced, e.g. by a restore.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, max_users: int = 5000):
+        """
+        Initialize the service.
+
+        Args:
+            flush_interval: Maximum seconds a change waits before being written
+            max_users: Maximum number of clean users kept in memory
+        """
+        super().__init__("user_settings_data", flush_interval, max_users)
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+    def _prepare(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill in defaults for settings a loaded user has not set."""
+        for key, value in DEFAULT_SETTINGS.items():
+            data.setdefault(key, value)
+        return data
+
+    def settings(self, user_id: str) -> Dict[str, Any]:
+        """
+        Get a user's settings, with defaults for anything not set.
+
+        The returned dict is the cached copy; change it through update.
+        """
+        return self.get(user_id)
+
+    def value(self, user_id: str, key: str, default: Any = None) -> Any:
+        """Get one setting or preference of a user."""
+        return self.settings(user_id).get(key, default)
+
+    def update(self, user_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Change settings or preferences of a user and notify listeners.
+
+        Args:
+            user_id: Discord ID of the user
+            changes: New values by key
+
+        Returns:
+            The values that actually changed
+        """
+        user_id = str(user_id)
+        while True:
+            # Loaded without the lock, so other users don't wait on the database
+            data = self.settings(user_id)
+            with self.lock:
+                if not self.holds(user_id, data):
+                    # Evicted or replaced since it was loaded
+                    continue
+                changed = {key: value for key, value in changes.items()
+                           if key not in data or data[key] != value}
+                if not changed:
+                    return changed
+                data.update(changed)
+                self.mark_dirty(user_id)
+            break
+
+        self._notify(user_id, changed)
+        return changed
+
+    def invalidate_all(self) -> None:
+        """Drop every cached user and tell listeners that all settings were replaced."""
+        super().invalidate_all()
+        self._notify(None, {})
+
+    def _notify(self, user_id: Optional[str], changed: Dict[str, Any]) -> None:
+        """Call every listener, logging listeners that fail."""
+        for listener in list(self._listeners):
+            try:
+                listener(user_id, changed)
+            except Exception as e:
+                logger.error(f"Error in settings listener {listener}: {e}")
+
+    def subscribe(self, listener: Callable[[Optional[str], Dict[str, Any]], None]) -> None:
+        """Call a listener with (user_id, changed values) after each change, or (None, {}) after a reload."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        """Stop calling a listener."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def migrate_legacy_files(self, settings_dir: str = SETTINGS_DIR,
+                             preferences_dir: str = PREFERENCES_DIR,
+                             user_themes_file: str = USER_THEMES_FILE) -> int:
+        """
+        Import settings and theme preferences from the old JSON files.
+
+        Reads <user_id>.json files from the UserSettings and ThemeManager
+        directories and the user to theme map of the UI theme manager, merges
+        them per user and imports them in one transaction. Imported files are
+        renamed to .migrated, so the migration runs once. Users that already
+        have a row keep it.
+
+        Returns:
+            int: Number of users imported
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        settings, settings_paths = read_json_dir(settings_dir)
+        for user_id, data in settings.items():
+            merged[user_id] = {key: value for key, value in data.items() if key in DEFAULT_SETTINGS}
+        preferences, preference_paths = read_json_dir(preferences_dir)
+        for user_id, data in preferences.items():
+            merged.setdefault(user_id, {}).update(data)
+
+        theme_paths = []
+        if os.path.isfile(user_themes_file):
+            try:
+                with open(user_themes_file, "r", encoding="utf-8") as f:
+                    for user_id, theme_id in json.load(f).items():
+                        merged.setdefault(str(user_id), {})["theme"] = theme_id
+                theme_paths.append(user_themes_file)
+            except Exception as e:
+                logger.error(f"Skipping user theme file {user_themes_file}: {e}")
+
+        count = self.import_rows(merged)
+        mark_migrated(settings_paths + preference_paths + theme_paths)
+        if count:
+            logger.info(f"Migrated settings of {count} users")
+        return count
+
+
 class UserSettings:
     """
     A class to manage user settings and preferences.
+    
+    A view of one user's settings in the settings service; creating one
+    does not read any files.
     """
     
-    def __init__(self, user_id: str):
-        self.user_id = user_id
-        self.settings = {
-            # UI Settings
-            "theme": "default",
-            "compact_mode": False,
-            "show_animations": True,
-            "show_tips": True,
-            "show_veramon_images": True,
-            "embed_style": "default",
-            
-            # Notification Settings
-            "notification_level": NotificationLevel.ALL.value,
-            "trade_notifications": True,
-            "battle_notifications": True,
-            "event_notifications": True,
-            "friend_notifications": True,
-            
-            # Privacy Settings
-            "profile_privacy": PrivacyLevel.PUBLIC.value,
-            "collection_privacy": PrivacyLevel.PUBLIC.value,
-            "activity_privacy": PrivacyLevel.PUBLIC.value,
-            "hide_online_status": False,
-            
-            # Gameplay Settings
-            "battle_animation_speed": BattleAnimationSpeed.NORMAL.value,
-            "auto_claim_rewards": False,
-            "confirm_trades": True,
-            "default_battle_team": 1,
-            "auto_heal": False,
-            
-            # Accessibility Settings
-            "high_contrast_mode": False,
-            "text_size": "medium",
-            "use_screen_reader_hints": False,
-            "reduce_animations": False,
-            
-            # Advanced Settings
-            "show_detailed_stats": False,
-            "developer_mode": False,
-            "experimental_features": False
-        }
+    def __init__(self, user_id: str, service: Optional[SettingsService] = None):
+        self.user_id = str(user_id)
+        self.service = service or get_settings_service()
         
-        # Load existing settings if available
-        self.load()
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """The user's settings, read from the service so an evicted user is reloaded."""
+        return self.service.settings(self.user_id)
         
     def get(self, key: str, default: Any = None) -> Any:
         """Get a setting value."""
-        return self.settings.get(key, default)
+        return self.service.value(self.user_id, key, default)
         
     def set(self, key: str, value: Any) -> bool:
         """Set a setting value and save."""
-        if key in self.settings:
-            self.settings[key] = value
-            return self.save()
+        if key in DEFAULT_SETTINGS:
+            self.service.update(self.user_id, {key: value})
+            return True
         return False
         
     def reset(self, key: str = None) -> bool:
         """Reset settings to default values."""
         if key:
             # Reset specific setting
-            default_settings = UserSettings("temp").settings
-            if key in default_settings:
-                self.settings[key] = default_settings[key]
+            if key in DEFAULT_SETTINGS:
+                self.service.update(self.user_id, {key: DEFAULT_SETTINGS[key]})
         else:
             # Reset all settings
-            default_settings = UserSettings("temp").settings
-            self.settings = default_settings.copy()
+            self.service.update(self.user_id, DEFAULT_SETTINGS)
             
-        return self.save()
+        return True
         
     def save(self) -> bool:
-        """Save settings to file."""
-        try:
-            settings_file = os.path.join(SETTINGS_DIR, f"{self.user_id}.json")
-            with open(settings_file, "w") as f:
-                json.dump(self.settings, f, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error saving settings: {e}")
-            return False
+        """Queue the settings to be saved."""
+        self.service.settings(self.user_id)
+        self.service.mark_dirty(self.user_id)
+        return True
             
     def load(self) -> bool:
-        """Load settings from file."""
-        try:
-            settings_file = os.path.join(SETTINGS_DIR, f"{self.user_id}.json")
-            if os.path.exists(settings_file):
-                with open(settings_file, "r") as f:
-                    loaded_settings = json.load(f)
-                    
-                    # Update settings with loaded values
-                    # Only update keys that already exist in the default settings
-                    for key, value in loaded_settings.items():
-                        if key in self.settings:
-                            self.settings[key] = value
-                            
-                return True
-            return False
-        except Exception as e:
-            print(f"Error loading settings: {e}")
-            return False
+        """Load settings from the settings service."""
+        self.service.settings(self.user_id)
+        return True
             
     def to_dict(self) -> Dict[str, Any]:
         """Convert settings to dictionary."""
-        return self.settings.copy()
+        return {key: self.settings.get(key, value) for key, value in DEFAULT_SETTINGS.items()}
         
     def from_dict(self, settings_dict: Dict[str, Any]) -> bool:
         """Update settings from dictionary."""
-        for key, value in settings_dict.items():
-            if key in self.settings:
-                self.settings[key] = value
-                
-        return self.save()
+        self.service.update(self.user_id, {
+            key: value for key, value in settings_dict.items() if key in DEFAULT_SETTINGS
+        })
+        return True
         
     def get_notification_settings(self) -> Dict[str, Any]:
         """Get notification-related settings."""
@@ -198,6 +321,32 @@ class UserSettings:
             "reduce_animations": self.get("reduce_animations")
         }
 
+# Global instance
+_settings_service = None
+
+def get_settings_service() -> SettingsService:
+    """
+    Get the global settings service instance.
+
+    Returns:
+        The global SettingsService instance
+    """
+    global _settings_service
+    if _settings_service is None:
+        _settings_service = SettingsService(
+            flush_interval=get_config("general", "settings_flush_interval", 5.0),
+            max_users=get_config("general", "settings_cache_size", 5000)
+        )
+    return _settings_service
+
+def shutdown_settings_service() -> None:
+    """Write unsaved settings and stop the flush thread."""
+    global _settings_service
+    if _settings_service is not None:
+        _settings_service.stop()
+        _settings_service = None
+        logger.info("Settings service shut down")
+
 # Helper function to get a user's settings
 def get_user_settings(user_id: str) -> UserSettings:
     """Get a user's settings."""
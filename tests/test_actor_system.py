@@ -0,0 +1,172 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+from unittest.mock import patch, MagicMock
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.actor_system import Actor, ActorSystem
+
+
+class EchoActor(Actor):
+    """Actor that records the messages it receives, optionally sleeping first."""
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.received = []
+
+    async def receive(self, message, sender=None):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(message["seq"])
+        return message["seq"]
+
+
+class TestActorMailboxes(unittest.IsolatedAsyncioTestCase):
+    """
+    Test cases for actor mailboxes.
+
+    Validates that every actor (or shard of actors) is drained independently,
+    so a slow battle never holds up the messages of unrelated battles.
+    """
+
+    def setUp(self):
+        """Keep the actor system away from the real database."""
+        patcher = patch('src.utils.actor_system.get_connection', return_value=MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncSetUp(self):
+        """Time the loop as it runs in production rather than in debug mode."""
+        asyncio.get_running_loop().set_debug(False)
+
+    async def _run_load(self, system: ActorSystem, battle_count: int = 500):
+        """Send one message to each of many fast actors behind one slow actor."""
+        slow = EchoActor(delay=0.5)
+        slow.actor_id = "battle_slow"
+        system.register_actor(slow)
+
+        fast_actors = []
+        for i in range(battle_count):
+            actor = EchoActor()
+            actor.actor_id = f"battle_{i}"
+            system.register_actor(actor)
+            fast_actors.append(actor)
+
+        # Queue several slow turns first to provoke head-of-line blocking
+        slow_calls = [asyncio.create_task(system.ask(slow.actor_id, {"seq": n})) for n in range(3)]
+        await asyncio.sleep(0)
+
+        start_time = time.time()
+        results = await asyncio.gather(*(system.ask(a.actor_id, {"seq": 1}) for a in fast_actors))
+        fast_duration = time.time() - start_time
+
+        await asyncio.gather(*slow_calls)
+        await system.stop()
+
+        return slow, fast_actors, results, fast_duration
+
+    async def test_slow_actor_does_not_block_others(self):
+        """Test that 500 concurrent battles are not delayed by one slow battle."""
+        system = ActorSystem("test")
+        slow, fast_actors, results, fast_duration = await self._run_load(system)
+
+        print(f"500 battles behind a slow actor (per-actor mailboxes): {fast_duration:.4f} seconds")
+
+        self.assertEqual(results, [1] * len(fast_actors))
+        self.assertEqual(slow.received, [0, 1, 2])
+        # With a single shared queue this would take at least 1.5s
+        self.assertLess(fast_duration, 0.5)
+
+    async def test_sharded_mailboxes(self):
+        """Test that sharded mailboxes keep unrelated shards flowing."""
+        system = ActorSystem("test", mailbox_shards=16)
+        slow, fast_actors, results, fast_duration = await self._run_load(system)
+
+        print(f"500 battles behind a slow actor (16 shards): {fast_duration:.4f} seconds")
+
+        self.assertEqual(results, [1] * len(fast_actors))
+        self.assertLessEqual(len(system.get_system_metrics()["mailboxes"]), 16)
+
+        # Only actors sharing the slow actor's shard may have waited on it
+        slow_shard = system._get_mailbox_key(slow.actor_id)
+        unaffected = [a for a in fast_actors if system._get_mailbox_key(a.actor_id) != slow_shard]
+        self.assertTrue(unaffected)
+        for actor in unaffected:
+            self.assertLess(actor.get_metrics()["mailbox"]["max_wait_time"], 0.5)
+
+    async def test_per_actor_ordering(self):
+        """Test that messages to one actor are processed in the order they were sent."""
+        system = ActorSystem("test", mailbox_shards=4)
+        actor = EchoActor(delay=0.001)
+        system.register_actor(actor)
+
+        for seq in range(50):
+            await system.tell(actor.actor_id, {"seq": seq})
+        await system.stop()
+
+        self.assertEqual(actor.received, list(range(50)))
+
+    async def test_mailbox_metrics(self):
+        """Test that actor metrics report mailbox depth and latency."""
+        system = ActorSystem("test")
+        actor = EchoActor(delay=0.01)
+        system.register_actor(actor)
+
+        for seq in range(5):
+            await system.tell(actor.actor_id, {"seq": seq})
+
+        self.assertEqual(actor.get_metrics()["mailbox"]["depth"], 5)
+        await system.stop()
+
+        mailbox = actor.get_metrics()["mailbox"]
+        self.assertEqual(mailbox["depth"], 0)
+        self.assertEqual(mailbox["max_depth"], 5)
+        self.assertEqual(mailbox["processed_count"], 5)
+        self.assertGreater(mailbox["max_wait_time"], 0)
+        self.assertGreater(mailbox["avg_processing_time"], 0)
+
+    async def test_unregister_releases_mailbox(self):
+        """Test that unregistering an actor drops its idle mailbox."""
+        system = ActorSystem("test")
+        actor = EchoActor()
+        system.register_actor(actor)
+
+        self.assertEqual(await system.ask(actor.actor_id, {"seq": 7}), 7)
+        system.unregister_actor(actor.actor_id)
+
+        self.assertIsNone(system.get_actor(actor.actor_id))
+        self.assertEqual(system.get_system_metrics()["mailbox_count"], 0)
+
+        with self.assertRaises(ValueError):
+            await system.ask(actor.actor_id, {"seq": 8})
+        await system.stop()
+
+    async def test_unregister_delivers_queued_messages(self):
+        """Test that messages queued before unregistering still reach the actor."""
+        for shards in (None, 4):
+            system = ActorSystem("test", mailbox_shards=shards)
+            actor = EchoActor(delay=0.01)
+            system.register_actor(actor)
+
+            await system.start()
+            for seq in range(3):
+                await system.tell(actor.actor_id, {"seq": seq})
+            pending = asyncio.ensure_future(system.ask(actor.actor_id, {"seq": 3}))
+            await asyncio.sleep(0)
+            system.unregister_actor(actor.actor_id)
+
+            # Sent after unregistering, so it fails like any unknown actor
+            with self.assertRaises(ValueError):
+                await system.ask(actor.actor_id, {"seq": 4})
+            self.assertEqual(await pending, 3)
+            self.assertEqual(actor.received, [0, 1, 2, 3])
+            await system.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
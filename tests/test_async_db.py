@@ -0,0 +1,144 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+import sqlite3
+import tempfile
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db.db import get_connection
+from src.db.async_db import (
+    fetch_one, fetch_all, execute, execute_many, run_with_connection, shutdown_db_executor
+)
+
+
+def percentile(values, pct):
+    """Return the given percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class TestAsyncDatabase(unittest.TestCase):
+    """
+    Test cases for the async database facade.
+
+    Validates that queries awaited through async_db return the same results as
+    the synchronous pool and keep the event loop responsive under load.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, "test.db")
+
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE users (user_id TEXT PRIMARY KEY, tokens INTEGER, xp INTEGER)")
+        conn.executemany(
+            "INSERT INTO users VALUES (?, ?, ?)",
+            [(str(i), i % 1000, i % 777) for i in range(50000)]
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Release pooled connections and the executor."""
+        shutdown_db_executor()
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def test_round_trip(self):
+        """Test reads and writes through the async helpers."""
+        async def scenario():
+            await execute("UPDATE users SET tokens = ? WHERE user_id = ?", (4242, "7"))
+            row = await fetch_one("SELECT tokens FROM users WHERE user_id = ?", ("7",))
+            self.assertEqual(row[0], 4242)
+
+            await execute_many(
+                "INSERT INTO users VALUES (?, ?, ?)",
+                [("new_1", 1, 1), ("new_2", 2, 2)]
+            )
+            rows = await fetch_all("SELECT user_id FROM users WHERE user_id LIKE 'new_%' ORDER BY user_id")
+            self.assertEqual([r[0] for r in rows], ["new_1", "new_2"])
+
+        asyncio.run(scenario())
+
+    def test_run_with_connection_rolls_back_on_error(self):
+        """Test that failed work is rolled back and the connection is returned."""
+        def failing_update(conn):
+            conn.cursor().execute("UPDATE users SET tokens = -1 WHERE user_id = '1'")
+            raise RuntimeError("boom")
+
+        async def scenario():
+            with self.assertRaises(RuntimeError):
+                await run_with_connection(failing_update)
+            row = await fetch_one("SELECT tokens FROM users WHERE user_id = '1'")
+            self.assertEqual(row[0], 1)
+
+        asyncio.run(scenario())
+
+    def test_interaction_latency_under_load(self):
+        """Benchmark p99 command latency and loop lag with 200 concurrent commands."""
+        query = "SELECT COUNT(*), SUM(tokens) FROM users WHERE xp > ?"
+        command_count = 200
+
+        def blocking_command(i):
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute(query, (i % 700,))
+            result = cursor.fetchone()
+            conn.close()
+            return result
+
+        async def run_load(use_executor):
+            lags = []
+            stop = asyncio.Event()
+
+            async def heartbeat():
+                # Measures how late the loop wakes up, like gateway heartbeats would
+                while not stop.is_set():
+                    expected = time.perf_counter() + 0.002
+                    await asyncio.sleep(0.002)
+                    lags.append(time.perf_counter() - expected)
+
+            async def command(i):
+                start = time.perf_counter()
+                if use_executor:
+                    await fetch_one(query, (i % 700,))
+                else:
+                    blocking_command(i)
+                await asyncio.sleep(0)
+                return time.perf_counter() - start
+
+            monitor = asyncio.create_task(heartbeat())
+            await asyncio.sleep(0.01)
+            latencies = await asyncio.gather(*(command(i) for i in range(command_count)))
+            stop.set()
+            await monitor
+            return latencies, lags
+
+        sync_latencies, sync_lags = asyncio.run(run_load(False))
+        async_latencies, async_lags = asyncio.run(run_load(True))
+
+        print(f"Sync:  p99 command latency {percentile(sync_latencies, 99)*1000:.2f} ms, "
+              f"max loop lag {max(sync_lags)*1000:.2f} ms")
+        print(f"Async: p99 command latency {percentile(async_latencies, 99)*1000:.2f} ms, "
+              f"max loop lag {max(async_lags)*1000:.2f} ms")
+
+        # Blocking queries stall the loop for the whole batch; awaited ones must not
+        self.assertLess(max(async_lags), max(sync_lags))
+        self.assertLess(percentile(async_lags, 99), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
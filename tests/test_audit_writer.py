@@ -0,0 +1,170 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db.db import execute_write
+from src.db.audit_writer import AuditLogWriter
+from src.core.security_manager import SecurityManager, ActionType
+
+INSERT_LOG = """
+INSERT INTO transaction_log (user_id, action_type, details, timestamp, ip_address, client_version)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def percentile(values, pct):
+    """Return the given percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class TestAuditLogWriter(unittest.TestCase):
+    """
+    Test cases for the batched audit log writer.
+
+    Validates that queued audit rows are written in batches, survive
+    shutdown, apply backpressure when the queue is full, and take audit
+    logging off the command path.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database with security tables."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        SecurityManager()
+
+    def tearDown(self):
+        """Release pooled connections."""
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def _count_rows(self, table: str = "transaction_log") -> int:
+        """Count the rows written to an audit table."""
+        conn = db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            return cursor.fetchone()[0]
+        finally:
+            conn.close()
+
+    def _row(self, i: int) -> tuple:
+        """Build transaction_log parameters for a fake command."""
+        return (str(i), "EXPLORE", "{}", str(time.time()), None, None)
+
+    def test_rows_are_batched(self):
+        """Test that queued rows are written together once the batch fills."""
+        writer = AuditLogWriter(flush_interval=5, batch_size=50)
+
+        for i in range(200):
+            writer.log(INSERT_LOG, self._row(i))
+        writer.flush()
+
+        self.assertEqual(self._count_rows(), 200)
+        stats = writer.get_stats()
+        self.assertEqual(stats["rows_written"], 200)
+        self.assertLessEqual(stats["batches"], 5)
+        writer.stop()
+
+    def test_flush_interval(self):
+        """Test that a lone row is written once the flush interval passes."""
+        writer = AuditLogWriter(flush_interval=0.05, batch_size=1000)
+
+        writer.log(INSERT_LOG, self._row(1))
+        time.sleep(0.3)
+
+        self.assertEqual(self._count_rows(), 1)
+        writer.stop()
+
+    def test_flush_wakes_writer(self):
+        """Test that flush writes waiting rows without waiting for the flush interval."""
+        writer = AuditLogWriter(flush_interval=10, batch_size=10000)
+
+        writer.flush()
+        for i in range(20):
+            writer.log(INSERT_LOG, self._row(i))
+        start_time = time.perf_counter()
+        writer.flush()
+        elapsed = time.perf_counter() - start_time
+
+        self.assertEqual(self._count_rows(), 20)
+        self.assertLess(elapsed, 1)
+        writer.stop()
+        self.assertEqual(writer.get_stats()["queued"], 0)
+
+    def test_stop_flushes_queue(self):
+        """Test that stopping the writer writes every queued row."""
+        writer = AuditLogWriter(flush_interval=10, batch_size=10000)
+
+        for i in range(100):
+            writer.log(INSERT_LOG, self._row(i))
+        writer.stop()
+
+        self.assertEqual(self._count_rows(), 100)
+
+    def test_backpressure(self):
+        """Test that a full queue makes callers write their own rows."""
+        writer = AuditLogWriter(flush_interval=10, batch_size=10000, max_queue_size=10)
+
+        # Keep the writer thread from starting so the queue fills up
+        with patch.object(writer, "start"):
+            for i in range(25):
+                writer.log(INSERT_LOG, self._row(i))
+
+        self.assertEqual(writer.get_stats()["sync_writes"], 15)
+        self.assertEqual(self._count_rows(), 15)
+
+        writer.start()
+        writer.stop()
+        self.assertEqual(self._count_rows(), 25)
+
+    def test_command_latency(self):
+        """Benchmark per-command audit latency and rows/sec, inline versus batched."""
+        commands = 2000
+
+        inline_latencies = []
+        start_time = time.perf_counter()
+        for i in range(commands):
+            command_start = time.perf_counter()
+            execute_write(INSERT_LOG, self._row(i))
+            inline_latencies.append(time.perf_counter() - command_start)
+        inline_rate = commands / (time.perf_counter() - start_time)
+
+        security = SecurityManager()
+        writer = AuditLogWriter()
+        batched_latencies = []
+        with patch("src.core.security_manager.get_audit_writer", return_value=writer):
+            start_time = time.perf_counter()
+            for i in range(commands):
+                command_start = time.perf_counter()
+                security.log_transaction(str(i), ActionType.EXPLORE, {"command": i})
+                batched_latencies.append(time.perf_counter() - command_start)
+            writer.stop()
+            batched_rate = commands / (time.perf_counter() - start_time)
+
+        self.assertEqual(self._count_rows(), commands * 2)
+
+        print(f"Inline:  {inline_rate:.0f} rows/sec, "
+              f"p50 {percentile(inline_latencies, 50)*1e6:.0f} us, p99 {percentile(inline_latencies, 99)*1e6:.0f} us per command")
+        print(f"Batched: {batched_rate:.0f} rows/sec, "
+              f"p50 {percentile(batched_latencies, 50)*1e6:.0f} us, p99 {percentile(batched_latencies, 99)*1e6:.0f} us per command "
+              f"(avg batch {writer.get_stats()['avg_batch']:.0f})")
+
+        self.assertLess(percentile(batched_latencies, 50), percentile(inline_latencies, 50))
+        self.assertGreater(batched_rate, inline_rate)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import sys
+import os
+import gc
+import time
+import asyncio
+import weakref
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.veramon import Veramon
+from src.models.battle import Battle, BattleType, BattleStatus, ParticipantStatus
+
+FLAMELING = {"name": "Flameling", "type": ["Fire"], "rarity": "common",
+             "base_stats": {"hp": 400, "atk": 60, "def": 50, "speed": 60}}
+LEAFKIT = {"name": "Leafkit", "type": ["Grass", "Bug"], "rarity": "common",
+           "base_stats": {"hp": 400, "atk": 55, "def": 55, "speed": 50}}
+
+
+def create_veramon(data: dict, moves: list) -> Veramon:
+    """Create a level 50 Veramon with the given moves."""
+    veramon = Veramon(data["name"], data=data, level=50)
+    veramon.moves = moves
+    return veramon
+
+
+def create_battle(battle_id: int) -> Battle:
+    """Create a started 1v1 battle between a Flameling and a Leafkit."""
+    battle = Battle(battle_id, BattleType.PVP, "1", seed=battle_id)
+    battle.add_participant("2", team_id=1, status=ParticipantStatus.JOINED)
+    battle.participants["1"]["status"] = ParticipantStatus.JOINED
+    battle.add_veramon("1", create_veramon(FLAMELING, ["Ember", "Tackle"]), 0)
+    battle.add_veramon("2", create_veramon(LEAFKIT, ["Tackle"]), 0)
+    asyncio.run(battle.start_battle())
+    return battle
+
+
+def play(battle: Battle, max_turns: int = 200) -> int:
+    """Play until the battle ends, returning the number of moves used."""
+    async def run():
+        moves = 0
+        while battle.status == BattleStatus.ACTIVE and moves < max_turns:
+            user_id = battle.current_turn
+            target = "2" if user_id == "1" else "1"
+            move_name = "Ember" if user_id == "1" else "Tackle"
+            await battle.execute_move(user_id, move_name, [target])
+            moves += 1
+        return moves
+    return asyncio.run(run())
+
+
+class TestBattleDamage(unittest.TestCase):
+    """
+    Test cases for the per-battle damage cache.
+
+    Validates that only the deterministic part of damage is cached, that
+    stat changes are not served stale results, and that finished battles
+    are not kept alive by the cache.
+    """
+
+    def test_rolls_applied_after_cache(self):
+        """Test that cached base damage still gets fresh random rolls."""
+        battle = create_battle(1)
+        attacker = battle.veramon["1"][0]
+        defender = battle.veramon["2"][0]
+
+        damages = set()
+        for _ in range(50):
+            result = battle._calculate_move_result(attacker, defender, "Ember")
+            if not result.get("missed"):
+                damages.add(result["damage"])
+                # Fire against Grass/Bug
+                self.assertEqual(result["type_effectiveness"], 4.0)
+
+        self.assertGreater(len(damages), 1)
+        self.assertEqual(battle.damage_cache_stats["misses"], 1)
+        self.assertEqual(len(battle._damage_cache), 1)
+
+    def test_stat_changes_not_stale(self):
+        """Test that stat stage and form changes give a new base damage."""
+        battle = create_battle(1)
+        attacker = battle.veramon["1"][0]
+        defender = battle.veramon["2"][0]
+
+        base = battle._get_base_damage(attacker, defender, "Tackle", 35, 1.0)
+        attacker.stat_stages["atk"] = 2
+        boosted = battle._get_base_damage(attacker, defender, "Tackle", 35, 1.0)
+        self.assertGreater(boosted, base)
+
+        attacker.stat_stages["atk"] = 0
+        self.assertEqual(battle._get_base_damage(attacker, defender, "Tackle", 35, 1.0), base)
+        attacker.active_form = "blazing"
+        battle._get_base_damage(attacker, defender, "Tackle", 35, 1.0)
+
+        self.assertEqual(battle.damage_cache_stats, {"hits": 1, "misses": 3})
+
+    def test_cache_is_bounded(self):
+        """Test that the cache never grows past its limit."""
+        battle = create_battle(1)
+        attacker = battle.veramon["1"][0]
+        defender = battle.veramon["2"][0]
+
+        with patch.object(Battle, "DAMAGE_CACHE_SIZE", 8):
+            for level in range(1, 40):
+                attacker.level = level
+                battle._get_base_damage(attacker, defender, "Tackle", 35, 1.0)
+                self.assertLessEqual(len(battle._damage_cache), 8)
+
+    def test_finished_battles_are_released(self):
+        """Test that battles and their Veramon are freed once dropped."""
+        refs = []
+        for battle_id in range(50):
+            battle = create_battle(battle_id)
+            play(battle)
+            refs.append(weakref.ref(battle))
+            refs.append(weakref.ref(battle.veramon["1"][0]))
+            refs.append(weakref.ref(battle.veramon["2"][0]))
+        del battle
+        gc.collect()
+
+        self.assertEqual([ref for ref in refs if ref() is not None], [])
+
+    def test_move_throughput(self):
+        """Benchmark moves per second with and without the damage cache."""
+        def run(battles: int) -> float:
+            moves = 0
+            start_time = time.perf_counter()
+            for battle_id in range(battles):
+                battle = create_battle(battle_id)
+                moves += play(battle)
+            return moves / (time.perf_counter() - start_time)
+
+        cached = run(100)
+        with patch.object(Battle, "DAMAGE_CACHE_SIZE", 0):
+            uncached = run(100)
+
+        print(f"\nBattle moves: {cached:.0f} moves/sec with the damage cache, "
+              f"{uncached:.0f} moves/sec without")
+
+        battle = create_battle(0)
+        play(battle)
+        self.assertGreater(battle.damage_cache_stats["hits"], battle.damage_cache_stats["misses"])
+
+
+if __name__ == '__main__':
+    unittest.main()
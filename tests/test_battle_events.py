@@ -0,0 +1,348 @@
+import unittest
+import sys
+import os
+import json
+import time
+import asyncio
+import tempfile
+import statistics
+import threading
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db import battle_events
+from src.db.db import get_connection
+from src.db.battle_events import BattleEventLog, diff_state, apply_delta, _json_default
+from src.models.battle import Battle, BattleType, BattleStatus, ParticipantStatus
+from src.models.battle_actor import BattleActor
+
+
+class BattleVeramon:
+    """Minimal battle-ready Veramon with fixed stats."""
+
+    def __init__(self, veramon_id: str, hp: int = 5000):
+        self.id = veramon_id
+        self.hp = hp
+        self.current_hp = hp
+        self.speed = 50
+        self.moves = ["Tackle"]
+
+    def to_dict(self):
+        return {"id": self.id, "hp": self.hp, "current_hp": self.current_hp}
+
+
+def create_battle(battle_id: int) -> Battle:
+    """Create a started 1v1 battle with a full team on each side."""
+    battle = Battle(battle_id, BattleType.PVP, "1", seed=battle_id)
+    battle.add_participant("2", team_id=1, status=ParticipantStatus.JOINED)
+    battle.participants["1"]["status"] = ParticipantStatus.JOINED
+    for slot in range(6):
+        battle.add_veramon("1", BattleVeramon(f"{battle_id}-a{slot}"), slot)
+        battle.add_veramon("2", BattleVeramon(f"{battle_id}-b{slot}"), slot)
+    asyncio.run(battle.start_battle())
+    return battle
+
+
+def play_turn(battle: Battle) -> None:
+    """Play one Tackle for the player whose turn it is."""
+    target = "2" if battle.current_turn == "1" else "1"
+    asyncio.run(battle.execute_move(battle.current_turn, "Tackle", [target]))
+
+
+def normalized(state):
+    """Get a state as it reads back from JSON."""
+    return json.loads(json.dumps(state, default=_json_default))
+
+
+class TestBattleEvents(unittest.TestCase):
+    """
+    Test cases for the battle event log.
+
+    Validates state deltas, rebuilding state from a snapshot and its events,
+    compaction, and persistence of battle actors through the log.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Release pooled connections."""
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def _create_actor_state_table(self) -> None:
+        """Create the table the actor system keeps full actor states in."""
+        conn = get_connection()
+        conn.cursor().execute("""
+            CREATE TABLE actor_state (
+                actor_id TEXT PRIMARY KEY,
+                actor_type TEXT NOT NULL,
+                serialized_state TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _count(self, table: str) -> int:
+        conn = get_connection()
+        count = conn.cursor().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        conn.close()
+        return count
+
+    def test_diff_and_apply(self):
+        """Test that deltas rebuild the new state and stay small."""
+        old = {
+            "log": [{"turn": 1}],
+            "rng": list(range(100)),
+            "hp": {"a": 10, "b": 10},
+            "gone": True,
+            "order": [1, 2, 3]
+        }
+        new = {
+            "log": [{"turn": 1}, {"turn": 2}],
+            "rng": list(range(99)) + [7],
+            "hp": {"a": 10, "b": 4},
+            "order": [3, 2, 1],
+            "winner": "a"
+        }
+
+        ops = diff_state(old, new)
+        self.assertIn(["a", ["log"], [{"turn": 2}]], ops)
+        self.assertIn(["s", ["rng", 99], 7], ops)
+        self.assertIn(["s", ["hp", "b"], 4], ops)
+        self.assertIn(["d", ["gone"]], ops)
+        self.assertIn(["s", ["order"], [3, 2, 1]], ops)
+        self.assertEqual(apply_delta(normalized(old), normalized(ops)), new)
+
+        self.assertEqual(diff_state(new, normalized(new)), [])
+        self.assertEqual(apply_delta([1], diff_state([1], {"x": 1})), {"x": 1})
+
+    def test_rebuild_and_compaction(self):
+        """Test that state is rebuilt from a snapshot and the events after it."""
+        log = BattleEventLog(snapshot_interval=10)
+        battle = create_battle(1)
+
+        log.append("battle_1", battle.to_dict(), "start_battle")
+        for _ in range(25):
+            play_turn(battle)
+            log.append("battle_1", battle.to_dict(), "execute_move")
+
+        # Unchanged state writes nothing
+        self.assertFalse(log.append("battle_1", battle.to_dict()))
+        self.assertEqual(log.stats["snapshots"], 3)
+        self.assertEqual(self._count("battle_events"), 5)
+
+        restored = BattleEventLog().load("battle_1")
+        self.assertEqual(restored, normalized(battle.to_dict()))
+        self.assertIsNone(BattleEventLog().load("battle_2"))
+
+        log.close("battle_1")
+        self.assertEqual(self._count("battle_events"), 0)
+        self.assertEqual(BattleEventLog().load("battle_1"), normalized(battle.to_dict()))
+
+    def test_resume_after_load(self):
+        """Test that a loaded stream continues with deltas."""
+        first = BattleEventLog(snapshot_interval=50)
+        battle = create_battle(1)
+        first.append("battle_1", battle.to_dict())
+        play_turn(battle)
+        first.append("battle_1", battle.to_dict())
+
+        # A new process loads the battle and saves the next turn
+        second = BattleEventLog(snapshot_interval=50)
+        self.assertEqual(second.load("battle_1"), normalized(battle.to_dict()))
+        play_turn(battle)
+        second.append("battle_1", battle.to_dict())
+
+        self.assertEqual(second.stats["snapshots"], 0)
+        self.assertEqual(BattleEventLog().load("battle_1"), normalized(battle.to_dict()))
+
+    def test_battle_actor_persistence(self):
+        """Test that battle actors save through the log and fall back to old rows."""
+        with patch.object(battle_events, "_battle_event_log", BattleEventLog()):
+            actor = BattleActor(5, BattleType.PVP, "1", performance_monitor=MagicMock(),
+                                battle_metrics=MagicMock())
+            asyncio.run(actor.persist_state(force=True))
+
+            state = BattleActor.load_persistent_state("battle_5")
+            self.assertEqual(state["battle_id"], 5)
+            self.assertEqual(state["battle_state"]["host_id"], "1")
+
+            # Battles saved before the event log existed
+            self._create_actor_state_table()
+            conn = get_connection()
+            conn.cursor().execute("""
+                INSERT INTO actor_state (actor_id, actor_type, serialized_state, updated_at)
+                VALUES ('battle_6', 'BattleActor', ?, ?)
+            """, (json.dumps({"battle_id": 6}), datetime.utcnow().isoformat()))
+            conn.commit()
+            conn.close()
+            self.assertEqual(BattleActor.load_persistent_state("battle_6"), {"battle_id": 6})
+
+    def test_battle_actor_saves_off_loop(self):
+        """Test that actions are saved in the background, off the event loop, and coalesced."""
+        log = BattleEventLog(snapshot_interval=100)
+        writer_threads = []
+        append_encoded = log.append_encoded
+        def recording_append(*args):
+            writer_threads.append(threading.current_thread())
+            time.sleep(0.02)
+            return append_encoded(*args)
+        log.append_encoded = recording_append
+
+        async def play():
+            actor = BattleActor(8, BattleType.PVP, "1", performance_monitor=MagicMock(),
+                                battle_metrics=MagicMock())
+
+            async def dispatch(message):
+                actor.battle.turn_number += 1
+                actor.mark_dirty()
+                return {"success": True}
+            actor._dispatch = dispatch
+
+            start_time = time.perf_counter()
+            for _ in range(10):
+                await actor.receive({"action": "execute_move"})
+            elapsed = time.perf_counter() - start_time
+            await actor._persist_task
+            return actor, elapsed
+
+        with patch.object(battle_events, "_battle_event_log", log):
+            actor, elapsed = asyncio.run(play())
+            # Replies did not wait for the writes, which ran on the database executor
+            self.assertLess(elapsed, 0.02)
+            self.assertTrue(writer_threads)
+            self.assertNotIn(threading.main_thread(), writer_threads)
+            self.assertLess(len(writer_threads), 10)
+            self.assertFalse(actor._dirty)
+            self.assertEqual(BattleEventLog().load("battle_8")["battle_state"]["turn_number"], 10)
+
+    def test_streams_save_concurrently(self):
+        """Test that a slow save of one battle does not hold up others, and failed saves keep the baseline."""
+        log = BattleEventLog(snapshot_interval=100)
+        log.append("battle_1", {"turn": 0})
+        log.append("battle_2", {"turn": 0})
+
+        run_write = battle_events.run_write
+        entered = threading.Event()
+        release = threading.Event()
+        def slow_write(job, stream_id, *args):
+            if stream_id == "battle_1":
+                entered.set()
+                release.wait(5)
+            return run_write(job, stream_id, *args)
+
+        with patch.object(battle_events, "run_write", slow_write):
+            slow = threading.Thread(target=log.append, args=("battle_1", {"turn": 1}))
+            slow.start()
+            self.assertTrue(entered.wait(5))
+            # Written while the first battle's save is still waiting on its write
+            self.assertTrue(log.append("battle_2", {"turn": 1}))
+            self.assertEqual(log._streams["battle_1"]["seq"], 0)
+            release.set()
+            slow.join(5)
+        self.assertEqual(log._streams["battle_1"]["state"], {"turn": 1})
+
+        def failing_write(*args):
+            raise RuntimeError("disk full")
+        with patch.object(battle_events, "run_write", failing_write):
+            with self.assertRaises(RuntimeError):
+                log.append("battle_2", {"turn": 2})
+        self.assertEqual(log._streams["battle_2"], {"state": {"turn": 1}, "seq": 1, "events": 1})
+        self.assertTrue(log.append("battle_2", {"turn": 2}))
+        self.assertEqual(BattleEventLog().load("battle_2"), {"turn": 2})
+
+    def test_close_keeps_stream_order(self):
+        """Test that a save racing a close waits for the closing snapshot, and locks are dropped."""
+        log = BattleEventLog(snapshot_interval=100)
+        log.append("battle_1", {"turn": 0})
+        log.append("battle_1", {"turn": 1})
+
+        run_write = battle_events.run_write
+        entered = threading.Event()
+        release = threading.Event()
+        def slow_write(job, *args):
+            if not entered.is_set():
+                entered.set()
+                release.wait(5)
+            return run_write(job, *args)
+
+        with patch.object(battle_events, "run_write", slow_write):
+            closing = threading.Thread(target=log.close, args=("battle_1",))
+            closing.start()
+            self.assertTrue(entered.wait(5))
+            saving = threading.Thread(target=log.append, args=("battle_1", {"turn": 2}))
+            saving.start()
+            saving.join(0.1)
+            self.assertTrue(saving.is_alive())
+            release.set()
+            closing.join(5)
+            saving.join(5)
+
+        self.assertEqual(BattleEventLog().load("battle_1"), {"turn": 2})
+        self.assertEqual(log._stream_locks, {})
+
+    def test_persist_benchmark(self):
+        """Benchmark bytes written and persist latency for a 100-turn battle."""
+        turns = 100
+        battle = create_battle(1)
+        states = [battle.to_dict()]
+        for _ in range(turns):
+            play_turn(battle)
+            states.append(normalized(battle.to_dict()))
+        self.assertEqual(battle.status, BattleStatus.ACTIVE)
+
+        self._create_actor_state_table()
+
+        def full_rewrite(state):
+            serialized_state = json.dumps(state, default=_json_default)
+            conn = get_connection()
+            conn.cursor().execute("""
+                INSERT INTO actor_state (actor_id, actor_type, serialized_state, updated_at)
+                VALUES ('battle_1', 'BattleActor', ?, ?)
+                ON CONFLICT(actor_id) DO UPDATE SET
+                serialized_state = excluded.serialized_state,
+                updated_at = excluded.updated_at
+            """, (serialized_state, datetime.utcnow().isoformat()))
+            conn.commit()
+            conn.close()
+            return len(serialized_state)
+
+        full_bytes = 0
+        full_times = []
+        for state in states[1:]:
+            start_time = time.perf_counter()
+            full_bytes += full_rewrite(state)
+            full_times.append(time.perf_counter() - start_time)
+
+        log = BattleEventLog(snapshot_interval=20)
+        log.append("battle_1", states[0])
+        log.stats["bytes_written"] = 0
+        event_times = []
+        for state in states[1:]:
+            start_time = time.perf_counter()
+            log.append("battle_1", state, "execute_move")
+            event_times.append(time.perf_counter() - start_time)
+
+        full_per_turn = full_bytes / turns
+        event_per_turn = log.stats["bytes_written"] / turns
+        print(f"\n{turns}-turn battle: full rewrite {full_per_turn:.0f} bytes/turn, "
+              f"p50 {statistics.median(full_times) * 1000:.2f} ms; event log {event_per_turn:.0f} bytes/turn "
+              f"(snapshots included), p50 {statistics.median(event_times) * 1000:.2f} ms")
+
+        self.assertEqual(BattleEventLog().load("battle_1"), states[-1])
+        self.assertLess(event_per_turn, full_per_turn / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import sys
+import os
+import time
+import random
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.veramon import Veramon
+from src.models.battle_mechanics import calculate_damage
+from src.utils.rng import NUMPY_AVAILABLE
+from src.utils.type_registry import get_type_registry
+from src.utils.battle_simulator import BattleSimulator, SimulationTables
+
+
+def species(name: str, types: list, moves: dict, hp: int = 60, atk: int = 60,
+            defense: int = 60, speed: int = 60) -> dict:
+    """Create species data in the format of veramon_database.json."""
+    return {
+        "name": name,
+        "type": types,
+        "rarity": "common",
+        "abilities": moves,
+        "base_stats": {"hp": hp, "atk": atk, "def": defense, "speed": speed}
+    }
+
+
+SPECIES = {
+    "Flameling": species("Flameling", ["Fire"], {
+        "Fire Strike": {"power": 40, "accuracy": 100, "type": "fire"},
+        "Tackle": {"power": 35, "accuracy": 100, "type": "normal"}
+    }),
+    "Leafkit": species("Leafkit", ["Grass", "Bug"], {
+        "Leaf Strike": {"power": 40, "accuracy": 100, "type": "grass"}
+    }),
+    "Aquafin": species("Aquafin", ["Water"], {
+        "Water Strike": {"power": 40, "accuracy": 100, "type": "water"}
+    }),
+    "Pebblit": species("Pebblit", ["Rock"], {
+        "Rock Strike": {"power": 40, "accuracy": 90, "type": "rock"}
+    }, hp=100, defense=100, speed=20)
+}
+
+
+class TestBattleSimulator(unittest.TestCase):
+    """
+    Test cases for the headless battle simulator.
+
+    Validates move choice and damage against the live formulas,
+    reproducible results across worker counts, sensible win rates, and
+    simulation throughput.
+    """
+
+    def test_tables_match_battle_formulas(self):
+        """Test that matchup tables use the stat, damage and type formulas."""
+        tables = SimulationTables(SPECIES, level=50, abilities={})
+        count = tables.species_count
+        flameling = tables.names.index("Flameling")
+        leafkit = tables.names.index("Leafkit")
+        aquafin = tables.names.index("Aquafin")
+
+        veramon = Veramon("Flameling", data=SPECIES["Flameling"], level=50)
+        self.assertEqual(tables.max_hp[flameling], veramon.max_hp)
+        self.assertEqual(tables.speed[flameling], veramon.speed)
+
+        # Fire Strike against Grass/Bug, Tackle against Water
+        index = flameling * count + leafkit
+        self.assertEqual(tables.move_names[tables.best_move[index]], "Fire Strike")
+        self.assertEqual(tables.move_names[tables.best_move[flameling * count + aquafin]], "Tackle")
+
+        defender = Veramon("Leafkit", data=SPECIES["Leafkit"], level=50)
+        expected = calculate_damage(
+            {"attack": veramon.attack, "level": 50},
+            {"defense": defender.defense},
+            {"power": 40},
+            type_effectiveness=get_type_registry().multiplier("fire", defender.types),
+            rng=random.Random(1)
+        )
+        roll = random.Random(1).uniform(0.85, 1.0)
+        self.assertEqual(int(tables.base_damage[index] * roll), expected)
+        self.assertEqual(tables.hit_chance[tables.names.index("Pebblit") * count + flameling], 0.9)
+
+    def test_reproducible_across_workers(self):
+        """Test that results depend on the seed and not on the worker count."""
+        simulator = BattleSimulator(SPECIES, use_numpy=False)
+
+        serial = simulator.run(battles=400, team_size=3, seed=7, chunk_size=100)
+        pooled = simulator.run(battles=400, team_size=3, seed=7, chunk_size=100, workers=2)
+        self.assertEqual(serial, pooled)
+        self.assertNotEqual(serial, simulator.run(battles=400, team_size=3, seed=8, chunk_size=100))
+
+        self.assertEqual(serial["battles"], 400)
+        self.assertEqual(sum(s["appearances"] for s in serial["species"].values()), 400 * 2 * 3)
+        self.assertEqual(sum(s["wins"] for s in serial["species"].values()) % 3, 0)
+
+    def test_win_rates_follow_matchups(self):
+        """Test that a type advantage shows up in the win rates."""
+        simulator = BattleSimulator({
+            "Flameling": SPECIES["Flameling"],
+            "Leafkit": SPECIES["Leafkit"]
+        }, use_numpy=False)
+        results = simulator.run(battles=1000, seed=1)
+
+        # Mirror matches are even, so the advantage is diluted
+        self.assertGreater(results["species"]["Flameling"]["win_rate"], 0.7)
+        self.assertLess(results["species"]["Leafkit"]["win_rate"], 0.3)
+        self.assertIn("Fire Strike", results["moves"])
+        # Fire Strike is resisted in mirror matches
+        self.assertIn("Tackle", results["moves"])
+
+    @unittest.skipIf(not NUMPY_AVAILABLE, "NumPy is not installed")
+    def test_numpy_matches_python(self):
+        """Test that the vectorized engine gives the same statistics."""
+        vectorized = BattleSimulator(SPECIES, use_numpy=True).run(battles=20000, team_size=6, seed=3)
+        looped = BattleSimulator(SPECIES, use_numpy=False).run(battles=20000, team_size=6, seed=3)
+
+        for name, stats in looped["species"].items():
+            self.assertAlmostEqual(vectorized["species"][name]["win_rate"], stats["win_rate"], delta=0.03)
+        self.assertAlmostEqual(vectorized["average_turns"], looped["average_turns"],
+                               delta=looped["average_turns"] * 0.05)
+
+    def test_simulation_throughput(self):
+        """Benchmark battles per second for 1v1 and 6v6 battles."""
+        simulator = BattleSimulator()
+        for team_size, battles in ((1, 20000), (6, 5000)):
+            start_time = time.perf_counter()
+            results = simulator.run(battles=battles, team_size=team_size, seed=1)
+            elapsed = time.perf_counter() - start_time
+            print(f"\n{team_size}v{team_size} simulation ({results['backend']}): "
+                  f"{battles / elapsed:.0f} battles/sec, {results['average_turns']:.1f} turns on average")
+            self.assertLess(results["draws"], battles * 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
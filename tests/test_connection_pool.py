@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db.db import get_connection, get_pool_stats, validate_idle_connections
+
+
+class TestConnectionPool(unittest.TestCase):
+    """
+    Test cases for the connection pool.
+
+    Validates that connections are only health checked after errors or while
+    idle, and that the pool reports its usage statistics.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Release pooled connections."""
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def test_return_does_not_probe(self):
+        """Test that returning a healthy connection runs no extra statement."""
+        validations = get_pool_stats()["validations"]
+
+        for _ in range(100):
+            conn = get_connection()
+            conn.cursor().execute("SELECT 1")
+            conn.close()
+
+        self.assertEqual(get_pool_stats()["validations"], validations)
+
+    def test_broken_connection_discarded_after_error(self):
+        """Test that a connection is validated and replaced after an error."""
+        discarded = get_pool_stats()["connections_discarded"]
+        conn = get_connection()
+        raw = conn.connection
+        raw.close()  # Simulate a connection that died while checked out
+
+        with self.assertRaises(sqlite3.Error):
+            with conn:
+                conn.cursor()
+
+        stats = get_pool_stats()
+        self.assertEqual(stats["connections_discarded"], discarded + 1)
+        self.assertEqual(stats["open_connections"], db.MAX_CONNECTIONS // 2)
+
+        for _ in range(db.MAX_CONNECTIONS):
+            check = get_connection()
+            self.assertIsNot(check.connection, raw)
+            check.close()
+
+    def test_idle_validation(self):
+        """Test that the background check discards broken idle connections."""
+        conn = get_connection()
+        raw = conn.connection
+        conn.close()
+        raw.close()
+
+        self.assertEqual(validate_idle_connections(min_idle_seconds=60), 0)
+        self.assertEqual(validate_idle_connections(min_idle_seconds=0), 1)
+        self.assertEqual(get_pool_stats()["open_connections"], db.MAX_CONNECTIONS // 2 - 1)
+
+    def test_pool_stats(self):
+        """Test checkout, in-use and exhaustion statistics."""
+        before = get_pool_stats()
+        held = [get_connection() for _ in range(db.MAX_CONNECTIONS)]
+
+        stats = get_pool_stats()
+        self.assertEqual(stats["in_use_connections"], db.MAX_CONNECTIONS)
+        self.assertEqual(stats["checkouts"] - before["checkouts"], db.MAX_CONNECTIONS)
+
+        with self.assertRaises(sqlite3.Error):
+            get_connection(timeout=0.05)
+        self.assertEqual(get_pool_stats()["exhaustion_events"], before["exhaustion_events"] + 1)
+
+        for conn in held:
+            conn.close()
+
+        stats = get_pool_stats()
+        self.assertEqual(stats["in_use_connections"], 0)
+        self.assertGreaterEqual(stats["max_connection_age"], stats["avg_connection_age"])
+
+    def test_checkout_throughput(self):
+        """Benchmark checkout/return cycles with lazy versus per-return validation."""
+        cycles = 20000
+
+        def run_cycles():
+            start_time = time.perf_counter()
+            for _ in range(cycles):
+                get_connection().close()
+            return cycles / (time.perf_counter() - start_time)
+
+        lazy_rate = run_cycles()
+
+        original_return = db.return_connection_to_pool
+        with patch.object(db, "return_connection_to_pool",
+                          lambda connection, validate=False: original_return(connection, True)):
+            probing_rate = run_cycles()
+
+        print(f"Lazy validation: {lazy_rate:.0f} checkouts/sec")
+        print(f"Probe on every return: {probing_rate:.0f} checkouts/sec")
+
+        self.assertGreater(lazy_rate, probing_rate)
+
+
+if __name__ == '__main__':
+    unittest.main()
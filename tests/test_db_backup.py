@@ -0,0 +1,465 @@
+import unittest
+import sys
+import os
+import gzip
+import time
+import zlib
+import shutil
+import sqlite3
+import asyncio
+import resource
+import tempfile
+import threading
+import tracemalloc
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db import tiered_cache
+from src.db import cache_manager as cache_manager_module
+from src.db import quest_store
+from src.utils import user_settings
+from src.utils import leaderboard_index
+from src.models import quest_engine
+from src.db import battle_events
+from src.db.db import configure_pool, execute_write
+from src.db.async_db import run_in_db_executor
+from src.db.tiered_cache import TieredCache
+from src.db.cache_manager import CacheManager
+from src.db.db_manager import DatabaseManager
+from src.db.quest_store import UserQuestStore
+from src.utils.user_settings import SettingsService
+from src.utils.leaderboard_index import LeaderboardIndex
+from src.models.quest_engine import QuestEngine
+from src.db.battle_events import BattleEventLog
+
+
+def legacy_create_backup(db_path, backup_path):
+    """The file copy backup this module replaced, kept as the benchmark baseline."""
+    shutil.copy2(db_path, backup_path)
+    with open(backup_path, "rb") as f_in, gzip.open(backup_path + ".gz", "wb") as f_out:
+        f_out.write(zlib.compress(f_in.read()))
+    os.remove(backup_path)
+    return backup_path + ".gz"
+
+
+class TestDatabaseBackup(unittest.TestCase):
+    """
+    Test cases for online, streamed database backups.
+
+    Validates that backups taken with the SQLite backup API are consistent
+    while commands write, that differential backups store only changed
+    pages and restore on top of their full backup, that restores reach
+    pooled connections, caches, write-behind user data, quest progress,
+    saved battles and leaderboard rankings, and compares memory use and
+    write stalls against the old file copy.
+    """
+
+    def setUp(self):
+        """Use a temporary database, backup directory and cache for each test."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "test.db")
+        configure_pool("default")
+        patcher = patch.object(db, "DB_PATH", self.db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.quest_store = UserQuestStore(flush_interval=60)
+        self.settings_service = SettingsService(flush_interval=60)
+        self.leaderboard_index = LeaderboardIndex()
+        self.quest_engine = QuestEngine()
+        self.battle_event_log = BattleEventLog()
+        for target, name, value in (
+            (tiered_cache, "_tiered_cache", TieredCache(memory_bytes=10 ** 7)),
+            (quest_store, "_quest_store", self.quest_store),
+            (user_settings, "_settings_service", self.settings_service),
+            (leaderboard_index, "_leaderboard_index", self.leaderboard_index),
+            (quest_engine, "_quest_engine", self.quest_engine),
+            (battle_events, "_battle_event_log", self.battle_event_log),
+            (cache_manager_module, "_cache_manager", None),
+            (CacheManager, "_maintenance_loop", lambda self: None),
+            (DatabaseManager, "_check_auto_maintenance", lambda self: None),
+        ):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        with patch("src.db.db_manager.os.makedirs"):
+            self.manager = DatabaseManager()
+        self.manager.backup_dir = os.path.join(self.temp_dir.name, "backups")
+        os.makedirs(self.manager.backup_dir)
+
+        execute_write("CREATE TABLE users (user_id TEXT PRIMARY KEY, tokens INTEGER DEFAULT 0, bio TEXT)")
+
+    def tearDown(self):
+        self.quest_store.stop()
+        self.settings_service.stop()
+        configure_pool("default")
+        self.temp_dir.cleanup()
+
+    def _fill(self, rows, start=0):
+        """Insert users with a few hundred bytes of text each."""
+        def insert(conn):
+            conn.cursor().executemany(
+                "INSERT INTO users (user_id, tokens, bio) VALUES (?, ?, ?)",
+                ((str(i), i, f"Trainer {i} " + os.urandom(96).hex()) for i in range(start, start + rows))
+            )
+        db.run_write(insert)
+
+    def _count(self, path=None):
+        """Count users in the live database or in an SQLite file."""
+        if path is None:
+            return self.manager.execute_query("SELECT COUNT(*) FROM users", fetch="one", cacheable=False)[0]
+        conn = sqlite3.connect(path)
+        try:
+            self.assertEqual(conn.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _materialize(self, backup_path):
+        """Write the database a backup holds to a file and return its path."""
+        path = os.path.join(self.temp_dir.name, "materialized.db")
+        self.manager._materialize_backup(backup_path, path)
+        return path
+
+    def test_backup_and_restore(self):
+        """Test that a compressed backup restores into the live database."""
+        self._fill(500)
+        self.assertEqual(self.manager.get_user("7")["tokens"], 7)
+
+        backup_path = self.manager.create_backup("nightly.db")
+        self.assertTrue(backup_path.endswith("nightly.db.gz"))
+        self.assertEqual(self._count(self._materialize(backup_path)), 500)
+        self.assertEqual(self.manager.last_backup["type"], "full")
+        self.assertEqual(os.listdir(self.manager.backup_dir), ["nightly.db.gz"])
+
+        execute_write("DELETE FROM users")
+        execute_write("UPDATE users SET tokens = 0")
+        self.assertFalse(self.manager.restore_backup(backup_path))
+        self.assertTrue(self.manager.restore_backup(backup_path, confirm_text="CONFIRM_RESTORE"))
+
+        # Pooled connections and the cache see the restored rows
+        self.assertEqual(self._count(), 500)
+        self.assertEqual(self.manager.get_user("7")["tokens"], 7)
+        backups = sorted(b["filename"] for b in self.manager.list_backups())
+        self.assertEqual(len(backups), 2)
+        self.assertEqual(backups[1], "nightly.db.gz")
+        self.assertTrue(backups[0].startswith("backup_pre_restore_"))
+
+        # Uncompressed backups are plain SQLite files
+        self.manager.config["backup_compression"] = False
+        plain_path = self.manager.create_backup("plain")
+        self.assertEqual(self._count(plain_path), 500)
+
+    def test_restore_reaches_user_data(self):
+        """Test that a restore replaces write-behind user data and leaderboard rankings."""
+        self._fill(10)
+        execute_write("CREATE TABLE leaderboard_stats (user_id TEXT, stat_name TEXT, stat_value INTEGER)")
+        execute_write("INSERT INTO leaderboard_stats VALUES ('1', 'catches', 5)")
+        self.quest_store.put("1", {"v": 1})
+        self.quest_store.flush()
+        self.assertEqual(self.leaderboard_index.top("catches"), [("1", 5)])
+        backup_path = self.manager.create_backup("nightly")
+
+        # Changes made after the backup, one of them still unsaved
+        execute_write("UPDATE leaderboard_stats SET stat_value = 9")
+        self.leaderboard_index.update("1", "catches", 9)
+        self.quest_store.put("1", {"v": 2})
+        self.assertTrue(self.manager.restore_backup(backup_path, confirm_text="CONFIRM_RESTORE"))
+
+        # Nothing from before the restore is written over the restored rows
+        self.assertEqual(self.quest_store.flush(), 0)
+        row = self.manager.execute_query(
+            "SELECT data FROM user_quest_data WHERE user_id = '1'", fetch="one", cacheable=False
+        )
+        self.assertEqual(row[0], '{"v":1}')
+        self.assertEqual(self.quest_store.get("1"), {"v": 1})
+        self.assertEqual(self.leaderboard_index.top("catches"), [("1", 5)])
+
+        # The backup taken before restoring holds the unsaved change
+        pre_restore = [b["path"] for b in self.manager.list_backups()
+                       if b["filename"].startswith("backup_pre_restore_")]
+        conn = sqlite3.connect(self._materialize(pre_restore[0]))
+        try:
+            self.assertEqual(conn.execute("SELECT data FROM user_quest_data").fetchone()[0], '{"v":2}')
+        finally:
+            conn.close()
+
+    def test_restore_reaches_quest_progress(self):
+        """Test that quest events after a restore continue from the restored progress."""
+        execute_write("""
+            CREATE TABLE quests (quest_id TEXT PRIMARY KEY, requirements TEXT, token_reward INTEGER,
+                                 xp_reward INTEGER, item_rewards TEXT)
+        """)
+        execute_write("""
+            CREATE TABLE user_quests (user_id TEXT, quest_id TEXT, progress TEXT, completed INTEGER,
+                                      completion_date TEXT)
+        """)
+        execute_write("INSERT INTO quests VALUES ('q1', '{\"type\": \"catch\", \"count\": 10}', 0, 0, '[]')")
+        execute_write("INSERT INTO user_quests VALUES ('1', 'q1', '{\"current\": 0}', 0, NULL)")
+        settings_changes = []
+        self.settings_service.subscribe(lambda user_id, changed: settings_changes.append((user_id, changed)))
+
+        def catch():
+            db.run_write(self.quest_engine.record, "1", "catch")
+            return self.manager.execute_query(
+                "SELECT progress FROM user_quests WHERE user_id = '1'", fetch="one", cacheable=False
+            )[0]
+
+        self.assertEqual(catch(), '{"current": 1}')
+        backup_path = self.manager.create_backup("nightly")
+        catch()
+        self.assertEqual(catch(), '{"current": 3}')
+
+        self.assertTrue(self.manager.restore_backup(backup_path, confirm_text="CONFIRM_RESTORE"))
+        self.assertEqual(catch(), '{"current": 2}')
+        # Derived per-user state such as resolved themes is dropped too
+        self.assertIn((None, {}), settings_changes)
+
+    def test_restore_reaches_battles(self):
+        """Test that battles saved after a restore start again with a snapshot."""
+        # Taken before any battle was saved, so restoring it drops the battle tables
+        backup_path = self.manager.create_backup("nightly")
+        self.battle_event_log.append("battle_1", {"turn": 1})
+        self.battle_event_log.append("battle_1", {"turn": 2})
+
+        self.assertTrue(self.manager.restore_backup(backup_path, confirm_text="CONFIRM_RESTORE"))
+        self.assertTrue(self.battle_event_log.append("battle_1", {"turn": 3}))
+        self.assertEqual(self.battle_event_log.stats["snapshots"], 2)
+        self.assertEqual(BattleEventLog().load("battle_1"), {"turn": 3})
+
+    def test_consistent_while_writing(self):
+        """Test that backups taken during writes are consistent in both profiles."""
+        self._fill(3000)
+        self.manager.config["backup_pages_per_step"] = 8
+
+        for profile in ("wal", "default"):
+            configure_pool(profile)
+            stop = threading.Event()
+            written = []
+
+            def writer():
+                i = 100000
+                while not stop.is_set():
+                    execute_write("INSERT INTO users (user_id, tokens) VALUES (?, -5)", (str(i),))
+                    written.append(i)
+                    i += 1
+                    time.sleep(0.001)
+
+            thread = threading.Thread(target=writer)
+            thread.start()
+            time.sleep(0.02)
+            try:
+                backup_path = self.manager.create_backup(f"during_{profile}")
+            finally:
+                stop.set()
+                thread.join()
+
+            stats = self.manager.last_backup
+            count = self._count(self._materialize(backup_path))
+            self.assertGreaterEqual(count, 3000, profile)
+            self.assertGreater(len(written), 0, profile)
+            if profile == "wal":
+                # The read transaction keeps one snapshot, so writes never restart the copy
+                self.assertEqual(stats["restarts"], 0)
+                self.assertFalse(stats["held_writers"])
+            else:
+                self.assertLessEqual(stats["restarts"], self.manager.config["backup_max_restarts"] + 1)
+            execute_write("DELETE FROM users WHERE tokens = -5")
+
+    def test_differential_backup(self):
+        """Test that differential backups keep changed pages and restore on their base."""
+        self._fill(5000)
+        full_path = self.manager.create_backup("backup_20250101_000000")
+        full_stats = self.manager.last_backup
+
+        execute_write("UPDATE users SET tokens = -1 WHERE user_id = '42'")
+        self._fill(10, start=5000)
+        diff_path = self.manager.create_backup("backup_20250102_000000", differential=True)
+        diff_stats = self.manager.last_backup
+
+        self.assertTrue(diff_path.endswith(".dbdiff.gz"))
+        self.assertEqual(diff_stats["type"], "differential")
+        self.assertEqual(diff_stats["base"], os.path.basename(full_path))
+        self.assertLess(diff_stats["changed_pages"] * 20, diff_stats["page_count"])
+        self.assertLess(diff_stats["size_bytes"] * 10, full_stats["size_bytes"])
+        self.assertEqual(self._count(self._materialize(diff_path)), 5010)
+
+        backups = {b["filename"]: b for b in self.manager.list_backups()}
+        self.assertEqual(backups[os.path.basename(diff_path)]["base"], os.path.basename(full_path))
+
+        execute_write("DELETE FROM users")
+        self.assertTrue(self.manager.restore_backup(diff_path, confirm_text="CONFIRM_RESTORE"))
+        self.assertEqual(self._count(), 5010)
+        self.assertEqual(self.manager.get_user("42")["tokens"], -1)
+
+        # Pruning keeps the full backup a kept differential backup needs
+        # (the newest two are the differential and the backup taken before restoring)
+        self.manager.config["max_backups"] = 2
+        self.manager._prune_old_backups()
+        self.assertTrue(os.path.exists(full_path))
+
+        # A differential backup without its full backup cannot be restored
+        os.remove(full_path)
+        with self.assertRaises(FileNotFoundError):
+            self._materialize(diff_path)
+        self.assertFalse(self.manager.restore_backup(diff_path, confirm_text="CONFIRM_RESTORE"))
+        self.assertEqual(self._count(), 5010)
+
+        # Without a full backup a differential request makes a full one
+        for backup in self.manager.list_backups():
+            os.remove(backup["path"])
+        self.assertTrue(self.manager.create_backup("fresh", differential=True).endswith("fresh.db.gz"))
+
+    def test_differential_base_is_protected(self):
+        """Test that a differential backup is only applied to the full backup it was made from."""
+        self._fill(2000)
+        nightly_path = self.manager.create_backup("nightly")
+        execute_write("DELETE FROM users WHERE user_id = '7'")
+        self.assertTrue(self.manager.restore_backup(nightly_path, confirm_text="CONFIRM_RESTORE"))
+
+        # The backup taken before restoring is now the newest full backup
+        execute_write("UPDATE users SET tokens = -1 WHERE user_id = '42'")
+        diff_path = self.manager.create_backup("hourly", differential=True)
+        base = self.manager.last_backup["base"]
+        self.assertTrue(base.startswith("backup_pre_restore_"))
+
+        # Restoring takes another, differently named backup before applying the pages
+        self._fill(10, start=2000)
+        self.assertTrue(self.manager.restore_backup(diff_path, confirm_text="CONFIRM_RESTORE"))
+        self.assertEqual(self._count(), 2000)
+        self.assertEqual(self.manager.get_user("42")["tokens"], -1)
+        self.assertEqual(
+            self.manager.execute_query("PRAGMA integrity_check", fetch="one", cacheable=False)[0], "ok"
+        )
+
+        # Full backups that a differential backup needs are not overwritten
+        with self.assertRaises(FileExistsError):
+            self.manager.create_backup(base[:-len(".db.gz")])
+
+        # A changed full backup is detected instead of being patched into a corrupt database
+        base_path = os.path.join(self.manager.backup_dir, base)
+        shutil.copyfile(nightly_path, base_path)
+        with self.assertRaises(ValueError):
+            self._materialize(diff_path)
+        execute_write("UPDATE users SET tokens = -2 WHERE user_id = '42'")
+        self.assertFalse(self.manager.restore_backup(diff_path, confirm_text="CONFIRM_RESTORE"))
+        tokens = self.manager.execute_query(
+            "SELECT tokens FROM users WHERE user_id = '42'", fetch="one", cacheable=False
+        )[0]
+        self.assertEqual(tokens, -2)
+
+    def test_legacy_backup(self):
+        """Test that backups made by the old file copy restore and serve as differential bases."""
+        self._fill(1000)
+        configure_pool("default")
+        legacy_path = legacy_create_backup(
+            self.db_path, os.path.join(self.manager.backup_dir, "backup_20250101_000000.db")
+        )
+        self.assertEqual(self._count(self._materialize(legacy_path)), 1000)
+
+        # A full backup that cannot be read is skipped as a base
+        time.sleep(0.01)
+        with open(os.path.join(self.manager.backup_dir, "backup_20250102_000000.db.gz"), "wb") as f:
+            f.write(b"not a backup")
+
+        execute_write("UPDATE users SET tokens = -1 WHERE user_id = '42'")
+        diff_path = self.manager.create_backup("hourly", differential=True)
+        self.assertEqual(self.manager.last_backup["type"], "differential")
+        self.assertEqual(self.manager.last_backup["base"], os.path.basename(legacy_path))
+
+        execute_write("DELETE FROM users")
+        self.assertTrue(self.manager.restore_backup(legacy_path, confirm_text="CONFIRM_RESTORE"))
+        self.assertEqual(self._count(), 1000)
+        self.assertEqual(self.manager.get_user("42")["tokens"], 42)
+        self.assertTrue(self.manager.restore_backup(diff_path, confirm_text="CONFIRM_RESTORE"))
+        self.assertEqual(self.manager.get_user("42")["tokens"], -1)
+
+    def test_damaged_differential_backup(self):
+        """Test that a damaged differential backup does not break listing or creating backups."""
+        self._fill(100)
+        self.manager.create_backup("backup_20250101_000000")
+        diff_path = self.manager.create_backup("backup_20250102_000000", differential=True)
+        with open(diff_path, "rb") as f:
+            data = f.read()
+        with open(diff_path, "wb") as f:
+            f.write(data[:12])
+        with gzip.open(os.path.join(self.manager.backup_dir, "bad_header.dbdiff.gz"), "wb") as f:
+            f.write(b"VERAMON-DIFF 1\n[]\n")
+
+        backups = {b["filename"]: b for b in self.manager.list_backups()}
+        self.assertIsNone(backups[os.path.basename(diff_path)]["base"])
+        self.assertIsNone(backups["bad_header.dbdiff.gz"]["base"])
+        self.assertTrue(self.manager.create_backup("hourly", differential=True).endswith(".dbdiff.gz"))
+
+    def test_backup_benchmark(self):
+        """Benchmark memory use and write stalls against the old file copy backup."""
+        # Filled before switching to write-ahead logging, so the file copy sees every row
+        self._fill(60000)
+        configure_pool("wal")
+        db_size = os.path.getsize(self.db_path)
+
+        def peak_memory(func, *args):
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            tracemalloc.start()
+            try:
+                func(*args)
+                return tracemalloc.get_traced_memory()[1], resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+            finally:
+                tracemalloc.stop()
+
+        # Streamed first, as peak RSS only ever grows
+        streamed_peak, streamed_rss = peak_memory(self.manager.create_backup, "streamed")
+        legacy_peak, legacy_rss = peak_memory(
+            legacy_create_backup, self.db_path, os.path.join(self.manager.backup_dir, "legacy.db")
+        )
+
+        async def write_stall(backup):
+            """Run commands that write every few ms during a backup, and get the longest gap between writes."""
+            completed = []
+            done = asyncio.Event()
+
+            async def commands():
+                i = 0
+                while not done.is_set():
+                    await run_in_db_executor(
+                        execute_write, "UPDATE users SET tokens = tokens + 1 WHERE user_id = ?", (str(i % 1000),)
+                    )
+                    completed.append(time.perf_counter())
+                    i += 1
+                    await asyncio.sleep(0.002)
+
+            task = asyncio.create_task(commands())
+            await asyncio.sleep(0.05)
+            del completed[:-1]
+            await backup()
+            await asyncio.sleep(0.05)
+            done.set()
+            await task
+            return max(later - earlier for earlier, later in zip(completed, completed[1:]))
+
+        async def legacy():
+            # The old cog called the blocking backup on the event loop
+            legacy_create_backup(self.db_path, os.path.join(self.manager.backup_dir, "legacy2.db"))
+
+        async def streamed():
+            await self.manager.create_backup_async("streamed2")
+
+        legacy_stall = asyncio.run(write_stall(legacy))
+        streamed_stall = asyncio.run(write_stall(streamed))
+
+        print(f"\n{db_size / 2 ** 20:.0f} MB database: legacy copy peak {legacy_peak / 2 ** 20:.1f} MiB "
+              f"(RSS +{legacy_rss / 1024:.0f} MiB), max write stall {legacy_stall * 1000:.0f} ms; "
+              f"online streamed peak {streamed_peak / 2 ** 20:.1f} MiB (RSS +{streamed_rss / 1024:.0f} MiB), "
+              f"max write stall {streamed_stall * 1000:.0f} ms, "
+              f"{self.manager.last_backup['steps']} steps in {self.manager.last_backup['seconds']:.2f}s")
+
+        self.assertGreater(legacy_peak, db_size)
+        self.assertLess(streamed_peak * 10, legacy_peak)
+
+
+if __name__ == '__main__':
+    unittest.main()
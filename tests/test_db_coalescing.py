@@ -0,0 +1,198 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db import tiered_cache
+from src.db import cache_manager as cache_manager_module
+from src.db.db import get_connection
+from src.db.async_db import run_in_db_executor
+from src.db.tiered_cache import TieredCache
+from src.db.cache_manager import CacheManager, SingleFlight
+from src.db.db_manager import DatabaseManager
+
+USER_QUERY = "SELECT * FROM users WHERE user_id = ?"
+
+
+class TestQueryCoalescing(unittest.TestCase):
+    """
+    Test cases for coalesced and negatively cached database reads.
+
+    Validates that concurrent identical reads share one execution in threads
+    and on the event loop, that errors reach every waiter, that missing rows
+    are cached briefly and dropped by writes, and that 500 concurrent
+    lookups of one user run one query instead of 500.
+    """
+
+    def setUp(self):
+        """Use a temporary database and a fresh cache for each test."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        for target, name, value in (
+            (tiered_cache, "_tiered_cache", TieredCache(memory_bytes=10 ** 7)),
+            (cache_manager_module, "_cache_manager", None),
+            (CacheManager, "_maintenance_loop", lambda self: None),
+            (DatabaseManager, "_check_auto_maintenance", lambda self: None),
+        ):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        with patch("src.db.db_manager.os.makedirs"):
+            self.manager = DatabaseManager()
+
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("CREATE TABLE users (user_id TEXT PRIMARY KEY, tokens INTEGER DEFAULT 0)")
+        cursor.execute("INSERT INTO users (user_id, tokens) VALUES ('1', 100)")
+        conn.commit()
+        conn.close()
+
+        # Count the queries that reach SQLite
+        self.executions = 0
+        timed_execute = self.manager._timed_execute
+        def counting_execute(*args):
+            self.executions += 1
+            time.sleep(0.005)
+            return timed_execute(*args)
+        self.manager._timed_execute = counting_execute
+
+    def tearDown(self):
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def test_single_flight(self):
+        """Test that concurrent callers share one call, its result and its error."""
+        flights = SingleFlight()
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+        def slow(value):
+            calls.append(value)
+            started.set()
+            release.wait(5)
+            if value == "fail":
+                raise ValueError(value)
+            return value
+
+        for value in ("ok", "fail"):
+            results = []
+            def call():
+                try:
+                    results.append(flights.do(value, slow, value))
+                except ValueError as e:
+                    results.append(type(e))
+            leader = threading.Thread(target=call)
+            leader.start()
+            started.wait(5)
+            followers = [threading.Thread(target=call) for _ in range(5)]
+            for thread in followers:
+                thread.start()
+            while flights.get_stats()["shared"] < 5 * len(calls):
+                time.sleep(0.001)
+            release.set()
+            for thread in [leader] + followers:
+                thread.join()
+            started.clear()
+            release.clear()
+
+            expected = "ok" if value == "ok" else ValueError
+            self.assertEqual(results, [expected] * 6)
+
+        self.assertEqual(calls, ["ok", "fail"])
+        self.assertEqual(flights.get_stats(), {"calls": 2, "shared": 10, "in_flight": 0})
+
+    def test_threads_share_one_read(self):
+        """Test that threads reading the same user run one query."""
+        results = []
+        barrier = threading.Barrier(20)
+        def read():
+            barrier.wait()
+            results.append(self.manager.execute_query(USER_QUERY, ("1",), "one", True, ["users"]))
+        threads = [threading.Thread(target=read) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.executions, 1)
+        self.assertEqual({row["tokens"] for row in results}, {100})
+        self.assertEqual(self.manager.get_user("1"), {"user_id": "1", "tokens": 100})
+
+    def test_negative_caching(self):
+        """Test that missing rows are cached briefly and dropped by writes."""
+        self.assertIsNone(self.manager.get_user("2"))
+        self.assertIsNone(self.manager.get_user("2"))
+        self.assertEqual(self.executions, 1)
+        self.assertEqual(self.manager.execute_query("SELECT * FROM users WHERE tokens > ?", (500,),
+                                                    cacheable=True, tables=["users"]), [])
+        self.assertEqual(self.manager.execute_query("SELECT * FROM users WHERE tokens > ?", (500,),
+                                                    cacheable=True, tables=["users"]), [])
+        self.assertEqual(self.executions, 2)
+
+        # Empty results expire sooner than rows
+        with patch("src.db.tiered_cache.time.time", return_value=time.time() + 60):
+            self.assertIsNone(self.manager.get_user("2"))
+            self.assertEqual(self.executions, 3)
+
+        # Writes through execute_query commit and invalidate the cached reads
+        self.manager.execute_query("INSERT INTO users (user_id, tokens) VALUES (?, ?)", ("2", 5),
+                                   fetch=None, tables=["users"])
+        self.assertEqual(self.manager.get_user("2"), {"user_id": "2", "tokens": 5})
+
+        # A TTL of 0 turns negative caching off
+        self.executions = 0
+        with patch.dict(self.manager.config, {"negative_cache_ttl_seconds": 0}):
+            self.assertIsNone(self.manager.get_user("3"))
+            self.assertIsNone(self.manager.get_user("3"))
+        self.assertEqual(self.executions, 2)
+
+    def test_async_herd_benchmark(self):
+        """Benchmark 500 concurrent lookups of one user against uncoalesced reads."""
+        readers = 500
+
+        async def uncoalesced():
+            return await asyncio.gather(*(
+                run_in_db_executor(self.manager.execute_query, USER_QUERY, ("1",), "one")
+                for _ in range(readers)
+            ))
+
+        async def coalesced():
+            return await asyncio.gather(*(self.manager.get_user_async("1") for _ in range(readers)))
+
+        start_time = time.perf_counter()
+        rows = asyncio.run(uncoalesced())
+        uncoalesced_time = time.perf_counter() - start_time
+        uncoalesced_executions = self.executions
+        self.assertEqual({row["tokens"] for row in rows}, {100})
+
+        self.executions = 0
+        start_time = time.perf_counter()
+        users = asyncio.run(coalesced())
+        coalesced_time = time.perf_counter() - start_time
+        self.assertEqual(users, [{"user_id": "1", "tokens": 100}] * readers)
+
+        stats = self.manager.get_cache_stats()["coalescing"]["async"]
+        print(f"\n{readers} concurrent reads of one user: uncoalesced {uncoalesced_executions} queries "
+              f"in {uncoalesced_time * 1000:.1f} ms, coalesced {self.executions} in {coalesced_time * 1000:.1f} ms")
+
+        self.assertEqual(uncoalesced_executions, readers)
+        self.assertEqual(self.executions, 1)
+        self.assertEqual((stats["calls"], stats["shared"], stats["in_flight"]), (1, readers - 1, 0))
+        self.assertLess(coalesced_time, uncoalesced_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
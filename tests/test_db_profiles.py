@@ -0,0 +1,178 @@
+import unittest
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db.db import configure_pool, get_write_queue, run_write, execute_write
+from src.core.security_manager import SecurityManager
+
+
+class TestConnectionProfiles(unittest.TestCase):
+    """
+    Test cases for database connection profiles.
+
+    Validates the WAL profile and its single-writer group commit queue, and
+    compares write throughput against the default profile under the
+    audit-log traffic every command generates.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "test.db")
+
+        configure_pool("default")
+        patcher = patch.object(db, "DB_PATH", self.db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Restore the default profile and release pooled connections."""
+        configure_pool("default")
+        self.temp_dir.cleanup()
+
+    def _run_command_traffic(self, threads: int = 8, commands_per_thread: int = 150) -> float:
+        """Simulate concurrent commands and return committed writes per second."""
+        SecurityManager()  # Creates the transaction_log table
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(commands_per_thread):
+                    # One committed transaction_log row per command, written inline
+                    execute_write(
+                        "INSERT INTO transaction_log (user_id, action_type, details, timestamp) "
+                        "VALUES (?, ?, ?, ?)",
+                        (f"user_{n}_{i % 10}", "EXPLORE", f'{{"command": {i}}}', str(time.time()))
+                    )
+            except Exception as e:
+                errors.append(e)
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        start_time = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        duration = time.perf_counter() - start_time
+
+        self.assertEqual(errors, [])
+
+        conn = sqlite3.connect(self.db_path)
+        logged = conn.execute("SELECT COUNT(*) FROM transaction_log").fetchone()[0]
+        conn.close()
+        self.assertEqual(logged, threads * commands_per_thread)
+
+        return (threads * commands_per_thread) / duration
+
+    def test_wal_profile_applies_pragmas(self):
+        """Test that pooled connections pick up the profile's PRAGMAs."""
+        configure_pool("wal")
+        conn = db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0].lower(), "wal")
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+        finally:
+            conn.close()
+
+        self.assertIsNotNone(get_write_queue())
+        configure_pool("default")
+        self.assertIsNone(get_write_queue())
+
+    def test_unknown_profile(self):
+        """Test that an unknown profile name is rejected."""
+        with self.assertRaises(ValueError):
+            configure_pool("turbo")
+
+    def test_failed_job_only_rolls_back_itself(self):
+        """Test that one failing write job does not undo the rest of its batch."""
+        configure_pool("wal")
+        execute_write("CREATE TABLE items (name TEXT PRIMARY KEY)")
+
+        def failing_job(conn):
+            conn.cursor().execute("INSERT INTO items VALUES ('lost')")
+            raise RuntimeError("boom")
+
+        queue = get_write_queue()
+        futures = [
+            queue.submit(db._execute_write, "INSERT INTO items VALUES (?)", ("first",)),
+            queue.submit(failing_job),
+            queue.submit(db._execute_write, "INSERT INTO items VALUES (?)", ("second",))
+        ]
+
+        self.assertEqual(futures[0].result(), 1)
+        with self.assertRaises(RuntimeError):
+            futures[1].result()
+        self.assertEqual(futures[2].result(), 1)
+
+        def read_names(conn):
+            return [row[0] for row in conn.cursor().execute("SELECT name FROM items ORDER BY name")]
+
+        names = run_write(read_names)
+        self.assertEqual(names, ["first", "second"])
+        self.assertEqual(queue.get_stats()["failed_jobs"], 1)
+
+    def test_broken_savepoint_fails_whole_batch(self):
+        """Test that a failing transaction statement resolves every future and keeps the writer alive."""
+        configure_pool("wal")
+        execute_write("CREATE TABLE items (name TEXT PRIMARY KEY)")
+
+        def release_early(conn):
+            # Releasing the job's savepoint makes the writer's own RELEASE fail
+            conn.execute("INSERT INTO items VALUES ('early')")
+            conn.execute("RELEASE write_job")
+
+        # Hold the writer so the next three jobs share one batch
+        queue = get_write_queue()
+        started, release = threading.Event(), threading.Event()
+        blocker = queue.submit(lambda conn: started.set() or release.wait(5))
+        self.assertTrue(started.wait(5))
+        futures = [
+            queue.submit(db._execute_write, "INSERT INTO items VALUES (?)", ("first",)),
+            queue.submit(release_early),
+            queue.submit(db._execute_write, "INSERT INTO items VALUES (?)", ("second",))
+        ]
+        release.set()
+        self.assertTrue(blocker.result(timeout=5))
+        for future in futures:
+            with self.assertRaises(sqlite3.Error):
+                future.result(timeout=5)
+
+        # Nothing from the batch was committed and later writes still go through
+        self.assertEqual(execute_write("INSERT INTO items VALUES ('after')"), 1)
+        names = run_write(lambda conn: [row[0] for row in conn.cursor().execute("SELECT name FROM items")])
+        self.assertEqual(names, ["after"])
+
+    def test_audit_write_throughput(self):
+        """Benchmark writes/sec of per-command audit-log traffic per profile."""
+        default_rate = self._run_command_traffic()
+
+        # Start the WAL run from an empty database as well
+        self.db_path = os.path.join(self.temp_dir.name, "test_wal.db")
+        with patch.object(db, "DB_PATH", self.db_path):
+            configure_pool("wal")
+            wal_rate = self._run_command_traffic()
+            stats = get_write_queue().get_stats()
+            configure_pool("default")
+
+        print(f"Default profile: {default_rate:.0f} writes/sec")
+        print(f"WAL + single writer: {wal_rate:.0f} writes/sec "
+              f"(avg batch {stats['avg_batch']:.1f}, max batch {stats['max_batch']})")
+
+        # Group commit should never be slower than one fsync per write
+        self.assertGreater(wal_rate, default_rate)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -25,7 +25,7 @@ class TestFactionEconomy(unittest.TestCase):
     def setUp(self):
         """Set up an in-memory database for testing."""
         # Create a test database connection
-        self.original_get_connection = get_connection
+        self.original_get_connection_code = get_connection.__code__
         
         # Mock the database connection to use an in-memory database
         def mock_get_connection():
@@ -199,7 +199,7 @@ class TestFactionEconomy(unittest.TestCase):
         
     def tearDown(self):
         """Restore the original connection function."""
-        get_connection.__code__ = self.original_get_connection.__code__
+        get_connection.__code__ = self.original_get_connection_code
     
     async def test_get_faction_level(self):
         """Test getting a faction's level and XP."""
@@ -0,0 +1,212 @@
+import unittest
+import sys
+import os
+import json
+import math
+import time
+import random
+import threading
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import performance_monitor
+from src.utils.latency_sketch import LatencySketch, LatencyHistograms, OVERFLOW_SERIES
+from src.utils.performance_monitor import PerformanceMonitor, fingerprint_query, get_performance_stats
+from src.utils.battle_metrics import BattleMetrics
+
+
+def exact_quantile(values, q):
+    """The value at the rank a sketch estimates, from sorted values."""
+    return values[int(q * (len(values) - 1))]
+
+
+class TestLatencySketch(unittest.TestCase):
+    """
+    Test cases for the streaming latency sketches.
+
+    Validates the relative error of quantiles, fixed memory, merging and
+    series limits, concurrent recording, the PerformanceMonitor and
+    BattleMetrics summaries built on them, and their cost against raw
+    sample lists.
+    """
+
+    def test_quantile_accuracy(self):
+        """Test that quantiles are within the relative accuracy of exact ones."""
+        rng = random.Random(3)
+        values = [rng.lognormvariate(2, 1.5) for _ in range(50000)] + [0.0] * 100
+        sketch = LatencySketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        values.sort()
+
+        for q in (0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 0.999):
+            exact = exact_quantile(values, q)
+            self.assertLessEqual(abs(sketch.quantile(q) - exact), 0.01 * exact + 1e-12, q)
+        self.assertEqual(sketch.quantile(0.0001), 0.0)
+
+        summary = sketch.to_dict()
+        self.assertEqual(summary["count"], len(values))
+        self.assertEqual((summary["min"], summary["max"]), (values[0], values[-1]))
+        self.assertAlmostEqual(summary["average"], sum(values) / len(values))
+        self.assertEqual(LatencySketch().to_dict(), {"count": 0})
+        self.assertIsNone(LatencySketch().quantile(0.5))
+
+        # A single value is returned exactly
+        single = LatencySketch()
+        single.add(12.5)
+        self.assertEqual(single.to_dict()["p99"], 12.5)
+
+    def test_fixed_memory_and_merge(self):
+        """Test that buckets stay bounded and sketches merge exactly."""
+        rng = random.Random(5)
+        first, second, both = LatencySketch(), LatencySketch(), LatencySketch()
+        for i in range(100000):
+            value = 10 ** rng.uniform(-12, 12)
+            (first if i % 2 else second).add(value)
+            both.add(value)
+        # Values are clamped to [1e-9, 1e9], which bounds the bucket count
+        bound = math.ceil(math.log(1e18) / math.log(first.gamma)) + 2
+        self.assertLessEqual(len(first.buckets), bound)
+
+        first.merge(second)
+        self.assertEqual(first.buckets, both.buckets)
+        self.assertEqual(first.to_dict()["p95"], both.to_dict()["p95"])
+        with self.assertRaises(ValueError):
+            first.merge(LatencySketch(relative_accuracy=0.05))
+
+        histograms = LatencyHistograms(max_series=3)
+        for name in ("a", "b", "c", "d", "e"):
+            histograms.record(name, 1.0)
+        self.assertEqual(len(histograms), 4)
+        self.assertEqual(histograms.get(OVERFLOW_SERIES).count, 2)
+        self.assertEqual(histograms.combined().count, 5)
+
+    def test_concurrent_recording(self):
+        """Test that values recorded from many threads are all counted."""
+        histograms = LatencyHistograms()
+        def record(offset):
+            for i in range(5000):
+                histograms.record(f"cmd{i % 10}", offset + i % 100)
+        threads = [threading.Thread(target=record, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = histograms.snapshot()
+        self.assertEqual(len(snapshot), 10)
+        self.assertEqual(sum(stats["count"] for stats in snapshot.values()), 40000)
+
+    def test_performance_monitor(self):
+        """Test command and query summaries and the exported snapshot."""
+        monitor = PerformanceMonitor()
+        for i in range(100):
+            monitor.record_command_execution("catch", 10 + i)
+            monitor.record_query_execution(f"SELECT * FROM users WHERE user_id = '{i}'", 2.0)
+            monitor.record_query_execution(f"SELECT id FROM captures WHERE id IN ({i}, {i + 1})", 4.0)
+        monitor.record_command_execution("shop", 1000)
+        monitor.record_battle_operation("start", 0.5)
+
+        self.assertEqual(fingerprint_query("SELECT *\n  FROM users WHERE user_id = 'x' AND xp > 10.5"),
+                         "SELECT * FROM users WHERE user_id = ? AND xp > ?")
+        self.assertEqual(fingerprint_query("DELETE FROM t1 WHERE id in (?,?, ?)"), "DELETE FROM t1 WHERE id IN (?)")
+
+        snapshot = monitor.get_latency_snapshot()
+        self.assertEqual(set(snapshot["queries"]), {
+            "SELECT * FROM users WHERE user_id = ?",
+            "SELECT id FROM captures WHERE id IN (?)"
+        })
+        catch = snapshot["commands"]["catch"]
+        self.assertEqual((catch["count"], catch["max"]), (100, 109))
+        self.assertAlmostEqual(catch["p50"], 59, delta=59 * 0.01)
+        self.assertEqual(snapshot["custom"]["battle_start"]["count"], 1)
+
+        self.assertEqual(monitor.get_top_commands(1), [("catch", 59.5, 100)])
+        self.assertEqual(monitor.get_slowest_commands(1), [("shop", 1000, 1)])
+        self.assertAlmostEqual(monitor.get_average_command_time(), (5950 + 1000) / 101)
+        self.assertAlmostEqual(monitor.get_average_query_time(), 3.0)
+
+        with patch.object(performance_monitor, "_performance_monitor", monitor):
+            stats = json.loads(json.dumps(get_performance_stats()))
+        self.assertEqual(stats["response_times"]["count"], 101)
+        self.assertEqual(stats["response_times"]["max"], 1000)
+
+        monitor.reset_statistics()
+        self.assertEqual(monitor.get_latency_snapshot()["commands"], {})
+        self.assertEqual(monitor.get_average_command_time(), 0)
+
+    def test_battle_metrics(self):
+        """Test that finished battles leave the active set and feed the summaries."""
+        metrics = BattleMetrics(max_active_battles=5, recent_battle_limit=3)
+        metrics.performance_monitor = PerformanceMonitor()
+        for battle_id in range(10):
+            metrics.record_battle_start(battle_id, "pvp")
+        self.assertEqual(sorted(metrics.active_battles), [5, 6, 7, 8, 9])
+
+        for battle_id in range(5, 10):
+            for _ in range(battle_id):
+                metrics.record_turn(battle_id)
+            metrics.record_battle_end(battle_id, "completed")
+            metrics.record_operation_time("execute_move", 0.2)
+        metrics.record_move_calculation(0.01)
+
+        summary = metrics.get_metrics_summary()
+        self.assertEqual(summary["active_battles"], 0)
+        self.assertEqual(summary["battle_stats"]["count"], 5)
+        self.assertEqual((summary["battle_stats"]["min_turns"], summary["battle_stats"]["max_turns"]), (5, 9))
+        self.assertEqual(summary["operation_stats"]["execute_move"]["count"], 5)
+        self.assertEqual(summary["move_calculation_stats"]["p99"], 0.01)
+        self.assertEqual(summary["status_effect_stats"], {"count": 0})
+        self.assertEqual([battle["battle_id"] for battle in metrics.get_recent_battles()], [9, 8, 7])
+
+        bottlenecks = metrics.get_performance_bottlenecks()
+        self.assertEqual([b["component"] for b in bottlenecks], ["execute_move"])
+        self.assertEqual(bottlenecks[0]["severity"], "medium")
+
+        metrics.clear_metrics()
+        self.assertEqual(metrics.get_metrics_summary()["operation_stats"], {})
+
+    def test_summary_cost_benchmark(self):
+        """Benchmark recording and summaries against raw sample lists."""
+        samples = 200000
+        rng = random.Random(11)
+        values = [rng.expovariate(1 / 20) for _ in range(samples)]
+
+        raw = []
+        start_time = time.perf_counter()
+        for value in values:
+            raw.append(value)
+        list_record_rate = samples / (time.perf_counter() - start_time)
+        start_time = time.perf_counter()
+        ordered = sorted(raw)
+        list_summary = {q: exact_quantile(ordered, q) for q in (0.5, 0.95, 0.99)}
+        list_summary_time = time.perf_counter() - start_time
+        list_bytes = sys.getsizeof(raw) + sum(sys.getsizeof(value) for value in raw)
+
+        sketch = LatencySketch()
+        start_time = time.perf_counter()
+        for value in values:
+            sketch.add(value)
+        sketch_record_rate = samples / (time.perf_counter() - start_time)
+        start_time = time.perf_counter()
+        summary = sketch.to_dict()
+        sketch_summary_time = time.perf_counter() - start_time
+        sketch_bytes = sys.getsizeof(sketch.buckets) + sum(
+            sys.getsizeof(index) + sys.getsizeof(count) for index, count in sketch.buckets.items()
+        )
+
+        print(f"\n{samples} samples: list {list_record_rate:.0f} records/sec, "
+              f"percentiles in {list_summary_time * 1000:.1f} ms, {list_bytes / 1024:.0f} KiB; "
+              f"sketch {sketch_record_rate:.0f} records/sec, percentiles in {sketch_summary_time * 1000:.2f} ms, "
+              f"{sketch_bytes / 1024:.1f} KiB ({len(sketch.buckets)} buckets)")
+
+        for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            self.assertLessEqual(abs(summary[name] - list_summary[q]), 0.01 * list_summary[q])
+        self.assertLess(sketch_summary_time, list_summary_time)
+        self.assertLess(sketch_bytes * 50, list_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+import unittest
+import sys
+import os
+import time
+import heapq
+import random
+import asyncio
+import sqlite3
+import tempfile
+import statistics
+from unittest.mock import patch, MagicMock
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db.db import get_connection
+from src.utils import leaderboard_index
+from src.utils.leaderboard_index import RankedScores, StatRanking, LeaderboardIndex, _top_key
+from src.cogs.social.leaderboard_cog import LeaderboardCog
+
+
+def insert_stats(rows):
+    """Insert (user_id, stat_name, stat_value) rows."""
+    conn = get_connection()
+    conn.cursor().executemany("""
+        INSERT INTO leaderboard_stats (user_id, stat_name, stat_value, last_updated)
+        VALUES (?, ?, ?, '2025-01-01T00:00:00')
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+class TestLeaderboardIndex(unittest.TestCase):
+    """
+    Test cases for the in-memory leaderboard rankings.
+
+    Validates ranks and cached top lists against brute force, score writes
+    through the leaderboard cog, updates during a reload, and rank query
+    latency.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database with the leaderboard tables."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.index = LeaderboardIndex(top_size=10)
+        index_patcher = patch.object(leaderboard_index, "_leaderboard_index", self.index)
+        index_patcher.start()
+        self.addCleanup(index_patcher.stop)
+        self.cog = LeaderboardCog(MagicMock())
+
+    def tearDown(self):
+        """Release pooled connections."""
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def test_ranks_and_top_match_brute_force(self):
+        """Test ranks and top lists through random score changes."""
+        rng = random.Random(3)
+        with patch.object(RankedScores, "LOAD", 4):
+            ranking = StatRanking([(str(i), rng.randint(0, 40)) for i in range(300)], top_size=10)
+
+            for step in range(5000):
+                ranking.set(str(rng.randrange(350)), rng.randint(0, 50))
+                if step % 10 == 0:
+                    value = rng.randint(-1, 51)
+                    self.assertEqual(ranking.rank(value),
+                                     1 + sum(1 for v in ranking.scores.values() if v > value))
+                    self.assertEqual(ranking.top(10),
+                                     heapq.nsmallest(10, ranking.scores.items(), key=_top_key))
+
+        scores = RankedScores([5, 5, 1])
+        self.assertEqual(scores.count_greater(1), 2)
+        scores.remove(5)
+        self.assertEqual(scores.count_greater(1), 1)
+        with self.assertRaises(ValueError):
+            scores.remove(7)
+
+    def test_update_stat_and_ranks(self):
+        """Test that cog writes keep the database and the rankings in step."""
+        insert_stats([("1", "xp", 100), ("2", "xp", 300), ("3", "xp", 200)])
+
+        # Loaded before the writes, so the writes must update it
+        self.assertEqual(self.index.rank("xp", 100), 3)
+
+        self.assertEqual(asyncio.run(self.cog.update_stat("1", "xp", 250)), 350)
+        self.assertEqual(asyncio.run(self.cog.update_stat("4", "xp", 5)), 5)
+        self.assertEqual(asyncio.run(self.cog.update_stat("2", "xp", 10, mode="set")), 10)
+
+        self.assertEqual(self.index.top("xp", 3), [("1", 350), ("3", 200), ("2", 10)])
+        conn = get_connection()
+        ranks = self.cog._load_stats_with_ranks(conn, "3")
+        conn.close()
+        self.assertEqual(ranks, [("xp", 200, 2)])
+
+        # Reloading finds nothing out of sync
+        self.index.reconcile()
+        self.assertEqual(self.index.stats["drift"], 0)
+        self.assertEqual(self.index.top("xp", 4), [("1", 350), ("3", 200), ("2", 10), ("4", 5)])
+
+    def test_failed_write_keeps_rankings(self):
+        """Test that rankings only change once a stat write is committed."""
+        insert_stats([("1", "xp", 100), ("2", "xp", 300)])
+        self.index.load("xp")
+
+        write_stat = self.cog._write_stat
+        def failing_write(conn, *args):
+            write_stat(conn, *args)
+            raise sqlite3.OperationalError("disk I/O error")
+        with patch.object(self.cog, "_write_stat", failing_write):
+            with self.assertRaises(sqlite3.OperationalError):
+                asyncio.run(self.cog.update_stat("1", "xp", 500))
+        self.assertEqual(self.index.top("xp", 2), [("2", 300), ("1", 100)])
+
+        # A value from an earlier write does not replace a later one
+        self.assertEqual(asyncio.run(self.cog.update_stat("1", "xp", 50)), 150)
+        self.cog._applied_writes[("1", "xp")] += 10
+        asyncio.run(self.cog.update_stat("1", "xp", 50))
+        self.assertEqual(self.index.top("xp", 2), [("2", 300), ("1", 150)])
+
+    def test_updates_during_reload(self):
+        """Test that scores written while a stat reloads are kept."""
+        insert_stats([("1", "tokens", 10), ("2", "tokens", 20)])
+        self.index.load("tokens")
+        original_init = StatRanking.__init__
+
+        def write_during_load(ranking, rows, top_size):
+            asyncio.run(self.cog.update_stat("1", "tokens", 50, mode="set"))
+            original_init(ranking, rows, top_size)
+
+        with patch.object(StatRanking, "__init__", write_during_load):
+            self.index.reconcile(["tokens"])
+
+        self.assertEqual(self.index.top("tokens", 2), [("1", 50), ("2", 20)])
+        self.assertEqual(self.index.rank("tokens", 20), 2)
+
+    def test_rank_query_benchmark(self):
+        """Benchmark rank queries against COUNT(*) queries."""
+        rng = random.Random(11)
+        db_users = 200000
+        insert_stats([(str(i), "xp", rng.randint(0, 1000000)) for i in range(db_users)])
+        probes = [rng.randint(0, 1000000) for _ in range(200)]
+
+        def query_count(value):
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*) FROM leaderboard_stats
+                WHERE stat_name = ? AND stat_value > ?
+            """, ("xp", value))
+            count = cursor.fetchone()[0]
+            conn.close()
+            return count + 1
+
+        def timings(rank):
+            samples = []
+            for value in probes:
+                start_time = time.perf_counter()
+                rank(value)
+                samples.append(time.perf_counter() - start_time)
+            return samples
+
+        count_times = timings(query_count)
+        index_times = timings(lambda value: self.index.rank("xp", value))
+        for value in probes[:20]:
+            self.assertEqual(self.index.rank("xp", value), query_count(value))
+
+        # One stat of a million users, held in memory only
+        users = 1000000
+        ranking = StatRanking(((str(i), rng.randint(0, 1000000)) for i in range(users)), top_size=100)
+        ranking.top(10)
+        large_times = []
+        update_times = []
+        for value in probes:
+            start_time = time.perf_counter()
+            ranking.rank(value)
+            large_times.append(time.perf_counter() - start_time)
+            start_time = time.perf_counter()
+            ranking.set(str(rng.randrange(users)), value)
+            update_times.append(time.perf_counter() - start_time)
+
+        count_p50 = statistics.median(count_times) * 1000
+        index_p50 = statistics.median(index_times) * 1000
+        print(f"\nRank at {db_users} users: COUNT(*) p50 {count_p50:.2f} ms, index p50 {index_p50:.4f} ms; "
+              f"at {users} users: rank p50 {statistics.median(large_times) * 1000:.4f} ms, "
+              f"p99 {sorted(large_times)[int(len(large_times) * 0.99)] * 1000:.4f} ms, "
+              f"update p50 {statistics.median(update_times) * 1000:.4f} ms")
+
+        self.assertLess(index_p50, count_p50)
+        self.assertLess(statistics.median(large_times), 0.001)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+import importlib.util
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import tiered_cache
+from src.db.tiered_cache import TieredCache
+from src.utils import performance_monitor, battle_metrics
+from src.utils.performance_monitor import PerformanceMonitor
+from src.utils.battle_metrics import BattleMetrics
+from src.utils.metrics_exporter import MetricsExporter, LoopLagMonitor, register_gauge, unregister_gauge
+
+HEALTHCHECK_PATH = os.path.join(os.path.dirname(__file__), '..', 'docker', 'healthcheck.py')
+
+
+def load_healthcheck():
+    """Import docker/healthcheck.py, which is not part of a package."""
+    spec = importlib.util.spec_from_file_location("healthcheck", HEALTHCHECK_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestMetricsExporter(unittest.TestCase):
+    """
+    Test cases for the OpenMetrics endpoint.
+
+    Validates the exposition text built from the performance monitor,
+    battle metrics, pool, cache and registered gauges, event loop lag
+    measurement, and the HTTP listener as read by docker/healthcheck.py,
+    all without a Discord connection.
+    """
+
+    def setUp(self):
+        """Use fresh monitors and caches for the collectors."""
+        self.monitor = PerformanceMonitor()
+        self.battles = BattleMetrics()
+        self.battles.performance_monitor = self.monitor
+        self.cache = TieredCache(memory_bytes=10 ** 6)
+        for target, name, value in (
+            (performance_monitor, "_performance_monitor", self.monitor),
+            (battle_metrics, "_battle_metrics", self.battles),
+            (tiered_cache, "_tiered_cache", self.cache),
+        ):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_render(self):
+        """Test that subsystem metrics are exported in OpenMetrics form."""
+        for elapsed in (3, 8, 40, 40, 700):
+            self.monitor.record_command_execution("catch", elapsed)
+        self.battles.record_battle_start(1, "pvp")
+        self.battles.record_operation_time("execute_move", 0.02)
+        namespace = self.cache.namespace("users")
+        namespace.put("1", {"tokens": 5})
+        namespace.get("1")
+        namespace.get("2")
+        register_gauge("veramon_active_trades", "Trades with an open trade view", lambda: 3)
+        register_gauge("veramon_broken", "Raises", lambda: 1 / 0)
+        self.addCleanup(unregister_gauge, "veramon_active_trades")
+        self.addCleanup(unregister_gauge, "veramon_broken")
+
+        text = MetricsExporter().render()
+        lines = text.splitlines()
+        samples = dict(line.rsplit(" ", 1) for line in lines if not line.startswith("#"))
+
+        self.assertEqual(lines[-1], "# EOF")
+        self.assertIn("# TYPE veramon_command_duration_seconds histogram", lines)
+        buckets = [int(samples[f'veramon_command_duration_seconds_bucket{{command="catch",le="{le}"}}'])
+                   for le in ("0.005", "0.01", "0.05", "0.5", "1.0", "+Inf")]
+        self.assertEqual(buckets, [1, 2, 4, 4, 5, 5])
+        self.assertAlmostEqual(float(samples['veramon_command_duration_seconds_sum{command="catch"}']), 0.791)
+        self.assertEqual(samples['veramon_battle_operation_duration_seconds_count{operation="execute_move"}'], "1")
+        self.assertEqual(samples["veramon_active_battles"], "1")
+        self.assertEqual(samples['veramon_cache_hit_ratio{namespace="users"}'], "0.5")
+        self.assertEqual(samples['veramon_cache_hits_total{namespace="users"}'], "1")
+        self.assertIn('veramon_db_pool_connections{state="in_use"}', samples)
+        self.assertEqual(samples["veramon_active_trades"], "3")
+        self.assertNotIn("veramon_broken", samples)
+        self.assertEqual(samples["veramon_metrics_collector_errors_total"], "1")
+        self.assertEqual(samples["veramon_event_loop_monitored"], "0")
+
+        # Label values are escaped
+        self.monitor.record_command_execution('say "hi"\\', 1)
+        self.assertIn('command="say \\"hi\\"\\\\"', MetricsExporter().render())
+
+    def test_loop_lag(self):
+        """Test that a blocked event loop shows up as lag."""
+        monitor = LoopLagMonitor(interval=0.02)
+
+        async def block_loop():
+            monitor.start()
+            await asyncio.sleep(0.05)
+            time.sleep(0.2)
+            await asyncio.sleep(0.05)
+            self.assertTrue(monitor.running)
+            monitor.stop()
+
+        asyncio.run(block_loop())
+        self.assertGreaterEqual(monitor.lag.max, 0.15)
+        self.assertLess(monitor.heartbeat_age, 0.2)
+        self.assertFalse(monitor.running)
+
+    def test_endpoint_and_healthcheck(self):
+        """Test that the healthcheck reads the endpoint and notices a stalled loop."""
+        healthcheck = load_healthcheck()
+        exporter = MetricsExporter(port=0, loop_monitor=LoopLagMonitor(interval=0.02))
+        self.addCleanup(exporter.stop)
+
+        def check(delay=0):
+            time.sleep(delay)
+            return healthcheck.check_bot_metrics("127.0.0.1", exporter.port)
+
+        async def serve():
+            exporter.start()
+            await asyncio.sleep(0.05)
+            healthy = await asyncio.to_thread(check)
+            # Block the event loop while the healthcheck runs
+            with ThreadPoolExecutor(1) as executor:
+                stalled = executor.submit(check, 0.3)
+                time.sleep(0.5)
+            return healthy, stalled.result()
+
+        with patch.object(healthcheck, "MAX_LOOP_HEARTBEAT_AGE", 0.2), \
+             self.assertLogs("veramon-healthcheck", level="INFO") as logs:
+            healthy, stalled = asyncio.run(serve())
+        self.assertTrue(healthy)
+        self.assertFalse(stalled)
+        self.assertTrue(any("stalled" in line for line in logs.output))
+
+        url = f"http://127.0.0.1:{exporter.port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.assertTrue(response.headers["Content-Type"].startswith("application/openmetrics-text"))
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/other", timeout=5)
+        self.assertGreaterEqual(exporter.scrapes, 3)
+
+        # The loop monitor stopped with its event loop
+        self.assertFalse(healthcheck.check_bot_metrics("127.0.0.1", exporter.port))
+        exporter.stop()
+        self.assertFalse(healthcheck.check_bot_metrics("127.0.0.1", exporter.port))
+
+
+if __name__ == '__main__':
+    unittest.main()
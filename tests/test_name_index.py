@@ -0,0 +1,225 @@
+import unittest
+import sys
+import os
+import time
+import random
+import asyncio
+import tempfile
+import statistics
+from unittest.mock import patch, MagicMock
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db.db import get_connection, initialize_db
+from src.utils import name_index
+from src.utils.name_index import TrigramIndex, UserCaptureIndex, CaptureNameIndex
+from src.utils.autocomplete import AutocompleteHandlers
+
+SPECIES = ["Flameling", "Flarewing", "Aquafin", "Voltmouse", "Leafkit", "Pebblit", "Frostfang", "Gloomoth"]
+
+
+def insert_captures(rows):
+    """Insert (user_id, veramon_name, nickname, level, shiny) rows."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT INTO captures (user_id, veramon_name, nickname, level, shiny, caught_at, biome)
+        VALUES (?, ?, ?, ?, ?, '2025-01-01T00:00:00', 'forest')
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+class TestNameIndex(unittest.TestCase):
+    """
+    Test cases for the autocomplete name indexes.
+
+    Validates trigram search, level ordering of capture matches, in-place
+    updates for catches, nicknames, evolutions and trades, and the
+    least-recently-used cache of user indexes.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        initialize_db()
+
+    def tearDown(self):
+        """Release pooled connections."""
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def test_trigram_search(self):
+        """Test substring search with prefix matches first."""
+        index = TrigramIndex((name, name) for name in SPECIES)
+
+        self.assertEqual(index.search("fl"), ["Flameling", "Flarewing"])
+        self.assertEqual(index.search("FANG"), ["Frostfang"])
+        self.assertEqual(index.search("in"), ["Aquafin", "Flameling", "Flarewing"])
+        self.assertEqual(index.search("ling"), ["Flameling"])
+        self.assertEqual(index.search("xyz"), [])
+        self.assertEqual(len(index.search("", limit=3)), 3)
+
+        index.remove("Flameling")
+        self.assertEqual(index.search("ling"), [])
+        self.assertNotIn("Flameling", index)
+
+    def test_capture_ordering_and_updates(self):
+        """Test level ordering and updates for nicknames and evolutions."""
+        index = UserCaptureIndex([
+            (1, "Flameling", None, 5, 0),
+            (2, "Flameling", "Sparky", 30, 1),
+            (3, "Aquafin", "Flamey", 12, 0)
+        ])
+
+        self.assertEqual([c["id"] for c in index.search("flam")], [2, 3, 1])
+        self.assertEqual([c["id"] for c in index.search("spark")], [2])
+        self.assertEqual([c["id"] for c in index.search("fla", limit=1)], [2])
+
+        self.assertTrue(index.update(1, veramon_name="Flarewing", level=40))
+        self.assertEqual([c["id"] for c in index.search("fla")], [1, 2, 3])
+        self.assertEqual([c["id"] for c in index.search("flam")], [2, 3])
+
+        index.update(2, nickname=None)
+        self.assertEqual(index.search("spark"), [])
+        self.assertFalse(index.update(99, level=1))
+
+    def test_cache_loads_and_updates(self):
+        """Test that a cached index follows catches and trades."""
+        insert_captures([
+            ("1", "Flameling", None, 10, 0),
+            ("1", "Aquafin", None, 20, 0),
+            ("2", "Voltmouse", None, 5, 1)
+        ])
+        cache = CaptureNameIndex()
+
+        self.assertEqual([c["veramon_name"] for c in cache.search("1", "a")], ["Aquafin", "Flameling"])
+        self.assertTrue(cache.is_warm("1"))
+        self.assertEqual(cache.stats["loads"], 1)
+
+        cache.add_capture("1", 100, "Flarewing", level=1)
+        self.assertEqual([c["id"] for c in cache.search("1", "flarew")], [100])
+
+        # Trades pass capture IDs as strings
+        aquafin = cache.search("1", "aqua")[0]["id"]
+        cache.search("2", "volt")
+        cache.transfer_capture(str(aquafin), "1", "2")
+        self.assertEqual(cache.search("1", "aqua"), [])
+        self.assertEqual([c["id"] for c in cache.search("2", "aqua")], [aquafin])
+        self.assertEqual(cache.stats["loads"], 2)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used index is evicted."""
+        insert_captures([(str(user), "Leafkit", None, 1, 0) for user in range(3)])
+        cache = CaptureNameIndex(max_users=2)
+
+        cache.search("0", "leaf")
+        cache.search("1", "leaf")
+        cache.search("0", "leaf")
+        cache.search("2", "leaf")
+
+        self.assertTrue(cache.is_warm("0"))
+        self.assertFalse(cache.is_warm("1"))
+        self.assertEqual(cache.get_stats()["evicted"], 1)
+
+        # Changes to users that are not cached need no work
+        cache.add_capture("1", 50, "Pebblit")
+        self.assertFalse(cache.is_warm("1"))
+
+    def test_change_during_load_not_cached(self):
+        """Test that an index that changed while loading is not kept."""
+        insert_captures([("1", "Leafkit", None, 1, 0)])
+        cache = CaptureNameIndex()
+        original_init = UserCaptureIndex.__init__
+
+        def catch_during_load(index, rows):
+            cache.add_capture("1", 99, "Pebblit")
+            original_init(index, rows)
+
+        with patch.object(UserCaptureIndex, "__init__", catch_during_load):
+            cache.search("1", "leaf")
+
+        self.assertFalse(cache.is_warm("1"))
+
+    def test_autocomplete_handlers(self):
+        """Test the autocomplete handlers that use the indexes."""
+        insert_captures([("1", "Flameling", "Sparky", 12, 1)])
+        interaction = MagicMock()
+        interaction.user.id = 1
+
+        with patch.object(name_index, "_capture_index", CaptureNameIndex()):
+            choices = asyncio.run(AutocompleteHandlers.user_veramon(interaction, "spa"))
+            self.assertEqual([choice.name for choice in choices], ["✨ Sparky (Lvl 12)"])
+            # Second keystroke is served from memory
+            asyncio.run(AutocompleteHandlers.user_veramon(interaction, "spar"))
+            self.assertEqual(name_index.get_capture_index().stats["hits"], 1)
+
+        items = asyncio.run(AutocompleteHandlers.item_name(interaction, "capsule"))
+        self.assertTrue(items)
+        self.assertTrue(all("capsule" in choice.name.lower() for choice in items))
+
+    def test_capture_search_benchmark(self):
+        """Benchmark capture autocomplete for a user with 50,000 captures."""
+        captures = 50000
+        rng = random.Random(7)
+        insert_captures([
+            ("1", rng.choice(SPECIES), f"Pet{i}" if i % 10 == 0 else None, rng.randint(1, 100), 0)
+            for i in range(captures)
+        ])
+        keystrokes = ["f", "fl", "fla", "flam", "flame", "a", "aq", "aqu", "pet1", "fang", "zzz"]
+
+        def query_like(current):
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.id, c.veramon_name, c.nickname, c.level, c.shiny
+                FROM captures c
+                WHERE c.user_id = ? AND (
+                    c.nickname LIKE ? OR c.veramon_name LIKE ?
+                )
+                ORDER BY c.level DESC
+                LIMIT 25
+            """, ("1", f"%{current}%", f"%{current}%"))
+            rows = cursor.fetchall()
+            conn.close()
+            return rows
+
+        def timings(search):
+            samples = []
+            for _ in range(5):
+                for current in keystrokes:
+                    start_time = time.perf_counter()
+                    search(current)
+                    samples.append(time.perf_counter() - start_time)
+            return samples
+
+        cache = CaptureNameIndex()
+        start_time = time.perf_counter()
+        cache.search("1", "")
+        load_time = time.perf_counter() - start_time
+
+        like_times = timings(query_like)
+        index_times = timings(lambda current: cache.search("1", current))
+
+        like_p50 = statistics.median(like_times) * 1000
+        index_p50 = statistics.median(index_times) * 1000
+        print(f"\nCapture autocomplete at {captures} captures: LIKE query p50 {like_p50:.2f} ms, "
+              f"index p50 {index_p50:.3f} ms, p99 {max(index_times) * 1000:.3f} ms, "
+              f"cold load {load_time * 1000:.0f} ms")
+
+        # Matching ordering: the top level of both results is the same
+        for current in keystrokes:
+            expected = [row["level"] for row in query_like(current)]
+            self.assertEqual([c["level"] for c in cache.search("1", current)], expected)
+
+        self.assertLess(index_p50, like_p50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,12 +6,14 @@ import asyncio
 import json
 from unittest.mock import patch, MagicMock
 import random
+import subprocess
 
 # Add the src directory to the system path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.models.veramon import Veramon
 from src.cogs.gameplay.catching_cog import CatchingCog, WeatherType, TimeOfDay
+from src.utils.helpers import weighted_choice
 
 class TestSystemPerformance(unittest.TestCase):
     """Performance and stress tests for the Veramon Reunited system."""
@@ -355,6 +357,120 @@ class TestSystemPerformance(unittest.TestCase):
             # The test passes if it completes within a reasonable time
             self.assertLess(duration/iterations, 0.05)  # 50ms per spawn table processing is reasonable
 
+    
+    def test_compiled_spawn_table_performance(self):
+        """Test encounter sampling from compiled spawn tables in a 10k-species biome."""
+        types = ["Fire", "Water", "Electric", "Ground", "Flying", "Bug", "Dark", "Ghost", "Normal"]
+        rarities = ["common", "uncommon", "rare", "legendary", "mythic"]
+        
+        # Build a stress biome with 10,000 species spread over every rarity tier
+        veramon_data = {}
+        spawn_table = {rarity: [] for rarity in rarities}
+        for i in range(10000):
+            name = f"StressMon{i}"
+            veramon_data[name] = {
+                "name": name,
+                "type": [types[i % len(types)], types[(i * 7) % len(types)]],
+                "shiny_rate": 0.01
+            }
+            spawn_table[rarities[i % len(rarities)]].append(name)
+            
+        biomes = self.get_test_biomes()
+        biomes["stress_test_biome"]["spawn_table"] = spawn_table
+        self.cog.biomes = biomes
+        self.cog.veramon_data = veramon_data
+        
+        biome_data = biomes["stress_test_biome"]
+        weather = "sunny"
+        time_of_day = "night"
+        iterations = 200
+        
+        # Previous approach: rebuild the weighted list and scan it on every encounter
+        start_time = time.time()
+        for _ in range(iterations):
+            spawn_modifiers = dict(biome_data["weather_effects"][weather]["spawn_modifiers"])
+            for type_name, modifier in biome_data["time_effects"][time_of_day]["spawn_modifiers"].items():
+                spawn_modifiers[type_name] = spawn_modifiers.get(type_name, 1.0) * modifier
+                
+            choices = []
+            for rarity, names in spawn_table.items():
+                weight = self.cog.RARITY_WEIGHTS.get(rarity, 1)
+                for name in names:
+                    type_modifier = 1.0
+                    for vtype in veramon_data[name]["type"]:
+                        if vtype in spawn_modifiers:
+                            type_modifier *= spawn_modifiers[vtype]
+                    choices.append((name, weight * type_modifier))
+            weighted_choice(choices)
+        rebuild_duration = time.time() - start_time
+        
+        # Compiled tables: first call compiles, later calls only sample
+        self.cog.spawn_tables.update_sources(self.cog.biomes, self.cog.veramon_data)
+        start_time = time.time()
+        table = self.cog.spawn_tables.encounter_table("stress_test_biome", None, weather, time_of_day)
+        compile_duration = time.time() - start_time
+        
+        sample_iterations = 100000
+        start_time = time.time()
+        for _ in range(sample_iterations):
+            self.cog.spawn_tables.encounter_table("stress_test_biome", None, weather, time_of_day).sample()
+        sample_duration = time.time() - start_time
+        
+        # Random spawns use the two-stage rarity tables
+        start_time = time.time()
+        for _ in range(iterations):
+            self.cog._generate_spawn("stress_test_biome")
+        generate_duration = time.time() - start_time
+        
+        print(f"Rebuilt spawn table (10k species): {(rebuild_duration/iterations)*1000:.4f} ms per encounter")
+        print(f"Compiled spawn table: {compile_duration*1000:.4f} ms to compile, "
+              f"{(sample_duration/sample_iterations)*1e6:.4f} us per encounter")
+        print(f"_generate_spawn (10k species): {(generate_duration/iterations)*1000:.4f} ms per spawn")
+        
+        self.assertEqual(len(table), 10000)
+        self.assertEqual(self.cog.spawn_tables.compile_count, 2)
+        self.assertLess(sample_duration/sample_iterations, rebuild_duration/iterations / 100)
+
+    def test_species_registry_startup(self):
+        """Benchmark startup time and memory of per-consumer loading against the shared registry."""
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        # Each script loads the data for the three consumers that used to parse the file
+        # at startup (CatchingCog, battle_cog and trading_cog), then looks up 50 species
+        # the way Veramon(name) and autocomplete did
+        prelude = (
+            "import json, time, resource, sys, tracemalloc; sys.path.insert(0, %r); "
+            "from src.utils.species_registry import DATABASE_PATH, SpeciesRegistry; "
+            "tracemalloc.start(); start = time.perf_counter(); " % root
+        )
+        per_consumer = prelude + (
+            "copies = [json.load(open(DATABASE_PATH)) for _ in range(3)]; "
+            "[json.load(open(DATABASE_PATH)).get(name) for name in list(copies[0])[:50]]; "
+        )
+        shared = prelude + (
+            "registry = SpeciesRegistry(); copies = [registry.all() for _ in range(3)]; "
+            "[registry.get(name) for name in list(copies[0])[:50]]; "
+        )
+        report = (
+            "elapsed = time.perf_counter() - start; "
+            "print(json.dumps([elapsed, tracemalloc.get_traced_memory()[0], "
+            "resource.getrusage(resource.RUSAGE_SELF).ru_maxrss]))"
+        )
+
+        def run(script):
+            output = subprocess.run([sys.executable, "-c", script + report], capture_output=True, text=True, check=True)
+            return json.loads(output.stdout)
+
+        old_time, old_retained, old_rss = run(per_consumer)
+        new_time, new_retained, new_rss = run(shared)
+
+        print(f"Per-consumer loading: {old_time*1000:.1f} ms, {old_retained/1024:.0f} KB retained, "
+              f"peak RSS {old_rss/1024:.1f} MB")
+        print(f"Shared registry: {new_time*1000:.1f} ms, {new_retained/1024:.0f} KB retained, "
+              f"peak RSS {new_rss/1024:.1f} MB")
+
+        self.assertLess(new_time, old_time)
+        self.assertLess(new_retained, old_retained)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+import sys
+import os
+import json
+import time
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db.cache_manager import QueryCache
+
+USER_QUERY = """
+    SELECT tokens, xp
+    FROM users
+    WHERE user_id = ?
+"""
+JOIN_QUERY = "SELECT c.id FROM captures c JOIN users u ON u.user_id = c.user_id WHERE u.user_id = ?"
+
+
+def json_key(query, params):
+    """The previous key: whitespace normalization and JSON parameters on every call."""
+    normalized_query = " ".join(query.split())
+    if params:
+        return f"{normalized_query}:{json.dumps(params, sort_keys=True)}"
+    return normalized_query
+
+
+class TestQueryCache(unittest.TestCase):
+    """
+    Test cases for the generation-based query cache.
+
+    Validates invalidation by table generation, results read before a
+    concurrent invalidation, reverse index cleanup on eviction and expiry,
+    key normalization, memory statistics, and get/put/invalidate rates at
+    100k entries.
+    """
+
+    def test_generation_invalidation(self):
+        """Test that invalidating a table skips and drops only its entries."""
+        cache = QueryCache(max_size=100)
+        cache.put(USER_QUERY, ("1",), [(10, 5)], tables=["users"])
+        cache.put(JOIN_QUERY, ("1",), [(7,)], tables=["captures", "users"])
+        cache.put("SELECT * FROM items", None, [("potion",)], tables=["items"])
+
+        self.assertEqual(cache.get(USER_QUERY, ("1",)), [(10, 5)])
+        self.assertEqual(cache.invalidate_table("users"), 2)
+        self.assertIsNone(cache.get(USER_QUERY, ("1",)))
+        self.assertIsNone(cache.get(JOIN_QUERY, ("1",)))
+        self.assertEqual(cache.get("SELECT * FROM items"), [("potion",)])
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["stale"], 2)
+        self.assertEqual(stats["total_items"], 1)
+        self.assertEqual(stats["table_dependencies"], {"items": 1})
+        self.assertEqual(len(cache.dependents), 1)
+
+        # New results are current again
+        cache.put(USER_QUERY, ("1",), [(20, 5)], tables=["users"])
+        self.assertEqual(cache.get(USER_QUERY, ("1",)), [(20, 5)])
+        self.assertEqual(cache.invalidate_tables(["users", "battles"]), 1)
+        self.assertEqual(cache.invalidate_all(), 2)
+        self.assertEqual(cache.get_stats()["table_dependencies"], {})
+
+    def test_read_before_invalidation_is_not_served(self):
+        """Test that a result read before a table changed is never returned."""
+        cache = QueryCache()
+        generations = cache.snapshot(["users"])
+        # A write commits and invalidates while the read is in flight
+        cache.invalidate_table("users")
+        cache.put(USER_QUERY, ("1",), [(10, 5)], tables=["users"], generations=generations)
+        self.assertIsNone(cache.get(USER_QUERY, ("1",)))
+
+        cache.put(USER_QUERY, ("1",), [(11, 5)], tables=["users"], generations=cache.snapshot(["users"]))
+        self.assertEqual(cache.get(USER_QUERY, ("1",)), [(11, 5)])
+
+    def test_reverse_index_cleanup(self):
+        """Test that evicted, expired and replaced entries leave the reverse index."""
+        cache = QueryCache(max_size=10)
+        for user_id in range(1000):
+            cache.put(USER_QUERY, (user_id,), [(user_id, 0)], tables=["users", "captures"])
+            cache.put(USER_QUERY, (user_id,), [(user_id, 1)], tables=["users"])
+        stats = cache.get_stats()
+        self.assertEqual(stats["total_items"], 10)
+        self.assertEqual(stats["table_dependencies"], {"users": 10})
+        self.assertEqual(stats["evictions"], 990)
+        self.assertEqual(cache.get(USER_QUERY, (999,)), [(999, 1)])
+
+        with patch("src.db.tiered_cache.time.time", return_value=time.time() + 3600):
+            self.assertEqual(cache.cleanup(), 10)
+        self.assertEqual(cache.get_stats()["table_dependencies"], {})
+
+    def test_keys(self):
+        """Test that equivalent queries and parameters share a key."""
+        cache = QueryCache()
+        cache.put(USER_QUERY, ["1"], "list params")
+        self.assertEqual(cache.get("SELECT tokens, xp FROM users WHERE user_id = ?", ("1",)), "list params")
+        self.assertIsNone(cache.get(USER_QUERY, ("2",)))
+
+        cache.put("SELECT * FROM users WHERE user_id = :id", {"id": "1", "x": 2}, "named")
+        self.assertEqual(cache.get("SELECT * FROM users WHERE user_id = :id", {"x": 2, "id": "1"}), "named")
+
+        # Unhashable parameters still work
+        cache.put(USER_QUERY, (["a", "b"],), "unhashable")
+        self.assertEqual(cache.get(USER_QUERY, (["a", "b"],)), "unhashable")
+
+        key = cache._make_key(USER_QUERY, ("1",))
+        self.assertIs(key[0], cache._make_key(" SELECT tokens, xp FROM users WHERE user_id = ? ", None)[0])
+        self.assertEqual(cache.get_stats()["normalized_queries"], 4)
+
+    def test_benchmark_100k_entries(self):
+        """Benchmark get, put and invalidate with 100k cached entries."""
+        entries = 100000
+        cache = QueryCache(max_size=entries)
+        rows = [(10, 5)]
+
+        start_time = time.perf_counter()
+        for user_id in range(entries):
+            cache.put(USER_QUERY, (user_id,), rows, tables=["users"])
+        put_rate = entries / (time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        for user_id in range(entries):
+            cache.get(USER_QUERY, (user_id,))
+        get_rate = entries / (time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        for user_id in range(entries):
+            cache._make_key(USER_QUERY, (user_id,))
+        key_rate = entries / (time.perf_counter() - start_time)
+        start_time = time.perf_counter()
+        for user_id in range(entries):
+            json_key(USER_QUERY, (user_id,))
+        json_key_rate = entries / (time.perf_counter() - start_time)
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["hits"], entries)
+
+        # Deleting every dependent key, as the previous invalidation did
+        keys = {json_key(USER_QUERY, (user_id,)): rows for user_id in range(entries)}
+        start_time = time.perf_counter()
+        for key in list(keys):
+            del keys[key]
+        delete_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        self.assertEqual(cache.invalidate_table("users"), entries)
+        invalidate_time = time.perf_counter() - start_time
+        self.assertIsNone(cache.get(USER_QUERY, (0,)))
+
+        print(f"\nQuery cache at {entries} entries: put {put_rate:.0f}/sec, get {get_rate:.0f}/sec, "
+              f"keys {key_rate:.0f}/sec (JSON keys {json_key_rate:.0f}/sec), "
+              f"invalidate {invalidate_time * 1000:.3f} ms (deleting each key {delete_time * 1000:.1f} ms), "
+              f"~{stats['avg_entry_bytes']:.0f} bytes/entry")
+
+        self.assertGreater(key_rate, json_key_rate)
+        self.assertLess(invalidate_time, delete_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,268 @@
+import unittest
+import sys
+import os
+import json
+import time
+import asyncio
+import tempfile
+from unittest.mock import patch, MagicMock
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db.db import get_connection
+from src.models import quest_engine
+from src.models.quest_engine import QuestEngine, ActiveQuest, UserQuestIndex, RARITY_LEVELS
+from src.cogs.economy.economy_cog import EconomyCog
+
+
+def insert_quests(user_id, quests):
+    """Insert (quest_id, requirements, token_reward, item_rewards) quests and assign them to a user."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("INSERT OR IGNORE INTO users (user_id, tokens, xp) VALUES (?, 0, 0)", (user_id,))
+    for quest_id, requirements, token_reward, item_rewards in quests:
+        cursor.execute("""
+            INSERT OR IGNORE INTO quests (quest_id, title, description, requirements,
+                                          token_reward, xp_reward, item_rewards, difficulty)
+            VALUES (?, ?, '', ?, ?, 10, ?, 'easy')
+        """, (quest_id, quest_id, json.dumps(requirements), token_reward, json.dumps(item_rewards)))
+        cursor.execute("""
+            INSERT INTO user_quests (user_id, quest_id, progress, completed)
+            VALUES (?, ?, '{"current": 0}', 0)
+        """, (user_id, quest_id))
+    conn.commit()
+    conn.close()
+
+
+def scan_matches(rows, quest_type, count=1, **kwargs):
+    """The previous matching: parse every active quest and check it against the event."""
+    updates = []
+    for quest_id, requirements_json, progress_json in rows:
+        requirements = json.loads(requirements_json)
+        progress = json.loads(progress_json)
+        if requirements.get("type") != quest_type:
+            continue
+        if "min_rarity" in requirements and "rarity" in kwargs:
+            if RARITY_LEVELS.index(kwargs["rarity"]) < RARITY_LEVELS.index(requirements["min_rarity"]):
+                continue
+        if "biome" in requirements and "biome" in kwargs and requirements["biome"] != kwargs["biome"]:
+            continue
+        progress["current"] = progress.get("current", 0) + count
+        updates.append((json.dumps(progress), quest_id))
+    return updates
+
+
+def scan_update(user_id, quest_type, count=1, **kwargs):
+    """The previous update path: scan the active quests and update each match on its own."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT q.quest_id, q.requirements, uq.progress
+        FROM quests q
+        JOIN user_quests uq ON q.quest_id = uq.quest_id
+        WHERE uq.user_id = ? AND uq.completed = 0
+    """, (user_id,))
+    for progress_json, quest_id in scan_matches(cursor.fetchall(), quest_type, count, **kwargs):
+        cursor.execute("""
+            UPDATE user_quests SET progress = ?
+            WHERE user_id = ? AND quest_id = ?
+        """, (progress_json, user_id, quest_id))
+    conn.commit()
+    conn.close()
+
+
+def load_progress(user_id):
+    """Get {quest_id: (progress, completed)} for a user."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT quest_id, progress, completed FROM user_quests WHERE user_id = ?", (user_id,))
+    rows = {quest_id: (json.loads(progress), completed) for quest_id, progress, completed in cursor.fetchall()}
+    conn.close()
+    return rows
+
+
+class TestQuestEngine(unittest.TestCase):
+    """
+    Test cases for the indexed quest engine.
+
+    Validates the compiled requirement matchers, progress, completions and
+    rewards written through the economy cog, reloading after assignments
+    and failed writes, and event throughput with 50 active quests.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database with the economy tables."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.engine = QuestEngine()
+        engine_patcher = patch.object(quest_engine, "_quest_engine", self.engine)
+        engine_patcher.start()
+        self.addCleanup(engine_patcher.stop)
+        self.cog = EconomyCog(MagicMock())
+
+    def tearDown(self):
+        """Release pooled connections."""
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def test_matchers(self):
+        """Test that compiled checks follow the quest criteria rules."""
+        rare = ActiveQuest("q", {"type": "catch_rarity", "min_rarity": "rare"}, {})
+        self.assertTrue(rare.matches({"rarity": "legendary"}))
+        self.assertFalse(rare.matches({"rarity": "uncommon"}))
+        self.assertFalse(rare.matches({"rarity": "unknown"}))
+        # Criteria the event does not report are not checked
+        self.assertTrue(rare.matches({}))
+
+        typed = ActiveQuest("q", {"type": "catch_type", "type_name": "fire", "biome": "volcano"}, {})
+        self.assertTrue(typed.matches({"type_name": "fire", "biome": "volcano"}))
+        self.assertFalse(typed.matches({"type_name": "water", "biome": "volcano"}))
+        self.assertFalse(typed.matches({"type_name": "fire", "biome": "forest"}))
+        self.assertTrue(ActiveQuest("q", {"type": "catch_type", "type_name": "random"}, {})
+                        .matches({"type_name": "water"}))
+
+        pvp = ActiveQuest("q", {"type": "battle_win", "battle_type": "pvp"}, {})
+        self.assertFalse(pvp.matches({"battle_type": None}))
+
+        with self.assertRaises(ValueError):
+            ActiveQuest("q", {"type": "catch", "min_rarity": "ultra"}, {})
+
+    def test_progress_and_rewards(self):
+        """Test that events update only matching quests and pay out completions once."""
+        insert_quests("1", [
+            (1, {"type": "catch", "count": 2}, 50, [{"item_id": "xp_booster", "quantity": 2}]),
+            (2, {"type": "catch", "count": 5, "min_rarity": "rare"}, 100, []),
+            (3, {"type": "catch", "count": 3}, 25,
+             [{"item_id": "xp_booster", "quantity": 1}, {"item_id": "not_an_item", "quantity": 1}]),
+            (4, {"type": "explore_unique_biomes", "count": 2}, 10, []),
+            (5, {"type": "battle_win", "count": 1, "battle_type": "pvp"}, 10, []),
+        ])
+
+        completed = asyncio.run(self.cog.update_quest_progress("1", "catch", 1, rarity="common"))
+        self.assertEqual(completed, [])
+        completed = asyncio.run(self.cog.update_quest_progress("1", "catch", 1, rarity="rare"))
+        self.assertEqual([quest["quest_id"] for quest in completed], [1])
+        completed = asyncio.run(self.cog.update_quest_progress("1", "catch", 1, rarity="rare"))
+        self.assertEqual([quest["quest_id"] for quest in completed], [3])
+
+        asyncio.run(self.cog.update_quest_progress("1", "explore_unique_biomes", biome="forest"))
+        asyncio.run(self.cog.update_quest_progress("1", "explore_unique_biomes", biome="forest"))
+        self.assertEqual(asyncio.run(self.cog.update_quest_progress("1", "battle_win", battle_type="pve")), [])
+
+        progress = load_progress("1")
+        self.assertEqual(progress[1], ({"current": 2}, 1))
+        self.assertEqual(progress[2], ({"current": 2}, 0))
+        self.assertEqual(progress[3], ({"current": 3}, 1))
+        self.assertEqual(progress[4], ({"current": 1, "biomes": ["forest"]}, 0))
+        self.assertEqual(progress[5], ({"current": 0}, 0))
+
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT tokens, xp FROM users WHERE user_id = '1'")
+        self.assertEqual(tuple(cursor.fetchone()), (75, 20))
+        cursor.execute("SELECT item_id, quantity FROM inventory WHERE user_id = '1'")
+        self.assertEqual([tuple(row) for row in cursor.fetchall()], [("xp_booster", 3)])
+        conn.close()
+
+        # Only the first event loaded the index
+        self.assertEqual(self.engine.stats["loads"], 1)
+        self.assertEqual(self.engine.get_stats()["cached_users"], 1)
+
+    def test_reload_after_assignment_and_failure(self):
+        """Test that new assignments and failed writes make the index reload."""
+        insert_quests("2", [(1, {"type": "trade", "count": 5}, 0, [])])
+        asyncio.run(self.cog.update_quest_progress("2", "trade"))
+
+        # New quests are picked up once the assignment invalidates the index
+        insert_quests("2", [(2, {"type": "trade", "count": 1}, 0, [])])
+        asyncio.run(self.cog._initialize_quests_for_user("2"))
+        completed = asyncio.run(self.cog.update_quest_progress("2", "trade"))
+        self.assertEqual([quest["quest_id"] for quest in completed], [2])
+
+        # A failed write leaves the rows as they were and drops the index
+        def failing_write(func, *args):
+            conn = get_connection()
+            try:
+                func(conn, *args)
+                raise RuntimeError("disk full")
+            finally:
+                conn.rollback()
+                conn.close()
+
+        with patch("src.db.async_db.run_write", failing_write):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(self.cog.update_quest_progress("2", "trade"))
+        self.assertEqual(self.engine.get_stats()["cached_users"], 0)
+
+        asyncio.run(self.cog.update_quest_progress("2", "trade"))
+        self.assertEqual(load_progress("2")[1], ({"current": 3}, 0))
+
+    def test_event_throughput_benchmark(self):
+        """Benchmark events per second with 50 active quests per user."""
+        biomes = ["forest", "volcano", "lake", "cave", "tundra"]
+        event_types = ["catch", "battle_win", "trade", "evolve", "explore"]
+        quests = []
+        for i in range(50):
+            requirements = {"type": event_types[i % 5], "count": 1000000}
+            if i % 3 == 0:
+                requirements["biome"] = biomes[i % 5]
+            if i % 4 == 0:
+                requirements["min_rarity"] = RARITY_LEVELS[i % 3]
+            quests.append((i + 1, requirements, 0, []))
+        users = [str(user_id) for user_id in range(20)]
+        for user_id in users:
+            insert_quests(user_id, quests)
+
+        events = [(users[i % len(users)], event_types[i % 5],
+                   {"biome": biomes[i % 4], "rarity": RARITY_LEVELS[i % 5]}) for i in range(1000)]
+
+        start_time = time.perf_counter()
+        for user_id, event_type, criteria in events:
+            scan_update(user_id, event_type, 1, **criteria)
+        scan_rate = len(events) / (time.perf_counter() - start_time)
+        expected = {user_id: load_progress(user_id) for user_id in users}
+
+        conn = get_connection()
+        conn.cursor().execute("UPDATE user_quests SET progress = '{\"current\": 0}'")
+        conn.commit()
+        conn.close()
+
+        async def run_events():
+            for user_id, event_type, criteria in events:
+                await self.cog.update_quest_progress(user_id, event_type, 1, **criteria)
+
+        start_time = time.perf_counter()
+        asyncio.run(run_events())
+        engine_rate = len(events) / (time.perf_counter() - start_time)
+
+        self.assertEqual({user_id: load_progress(user_id) for user_id in users}, expected)
+
+        # Matching alone, without the commit each event pays
+        rows = [(i + 1, json.dumps(requirements), '{"current": 0}') for i, (_, requirements, _, _) in enumerate(quests)]
+        index = UserQuestIndex(ActiveQuest(quest_id, json.loads(requirements), json.loads(progress))
+                               for quest_id, requirements, progress in rows)
+        start_time = time.perf_counter()
+        for _, event_type, criteria in events:
+            scan_matches(rows, event_type, 1, **criteria)
+        scan_match_rate = len(events) / (time.perf_counter() - start_time)
+        start_time = time.perf_counter()
+        for _, event_type, criteria in events:
+            index.apply(event_type, 1, criteria)
+        index_match_rate = len(events) / (time.perf_counter() - start_time)
+
+        print(f"\nQuest events with 50 active quests per user: scan and update {scan_rate:.0f} events/sec, "
+              f"quest engine {engine_rate:.0f} events/sec; matching only: scan {scan_match_rate:.0f} events/sec, "
+              f"index {index_match_rate:.0f} events/sec")
+
+        # Both paths commit once per event, which dominates the end-to-end rates
+        self.assertGreater(index_match_rate, scan_match_rate * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,344 @@
+import unittest
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db import quest_store
+from src.db import user_data_store
+from src.db.db import get_connection
+from src.db.quest_store import UserQuestStore
+from src.models.quest_manager import QuestManager
+
+
+def user_quests(quest_count=1, amount=10):
+    """Create quest data in the format QuestManager stores per user."""
+    return {
+        "active_quests": [f"daily_{i}" for i in range(quest_count)],
+        "quest_data": {
+            f"daily_{i}": {
+                "requirements": [{"type": "catch", "amount": amount, "progress": 0,
+                                  "constraints": {"biome": "forest"} if i % 2 else {}}]
+            } for i in range(quest_count)
+        },
+        "achievements": {
+            "catch_master": {"requirements": [{"type": "catch", "amount": 1000, "progress": 0}]}
+        }
+    }
+
+
+def load_rows():
+    """Get {user_id: data} from the quest data table."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT user_id, data FROM user_quest_data")
+    rows = {user_id: json.loads(data) for user_id, data in cursor.fetchall()}
+    conn.close()
+    return rows
+
+
+class TestUserQuestStore(unittest.TestCase):
+    """
+    Test cases for the SQLite-backed user quest store.
+
+    Validates progress updates through QuestManager and its per-type index
+    of incomplete quests, write-behind flushes of dirty users only, retries
+    after failed flushes, loads and progress updates that don't hold the
+    store lock while reading, reads that only create the table through the
+    write queue, users pinned in memory while they are written, migration
+    of the old per-user JSON files, and update throughput against file
+    rewrites.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database and use a fresh store."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.quest_dir = os.path.join(self.temp_dir.name, "quests")
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.store = UserQuestStore(flush_interval=60)
+        store_patcher = patch.object(quest_store, "_quest_store", self.store)
+        store_patcher.start()
+        self.addCleanup(store_patcher.stop)
+
+    def tearDown(self):
+        """Stop the flush thread and release pooled connections."""
+        self.store.stop()
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def test_update_progress(self):
+        """Test that progress updates are kept in memory and written on flush."""
+        manager = QuestManager(self.quest_dir)
+        self.store.put("1", user_quests(quest_count=2, amount=2))
+        self.store.flush()
+
+        self.assertEqual(manager.update_progress("1", "catch", 1, {"biome": "lake"}),
+                         ["daily_0", "catch_master"])
+        self.assertEqual(manager.update_progress("1", "catch", 1, {"biome": "forest"}),
+                         ["daily_0", "daily_1", "catch_master"])
+        self.assertEqual(manager.update_progress("1", "battle_win"), [])
+        self.assertIsNone(manager.update_progress("2", "catch"))
+
+        # Nothing is written until the flush
+        self.assertEqual(load_rows()["1"]["quest_data"]["daily_0"]["requirements"][0]["progress"], 0)
+        self.assertEqual(self.store.flush(), 1)
+        saved = load_rows()["1"]
+        self.assertTrue(saved["quest_data"]["daily_0"]["completed"])
+        self.assertEqual(saved["quest_data"]["daily_1"]["requirements"][0]["progress"], 1)
+        self.assertEqual(saved["achievements"]["catch_master"]["requirements"][0]["progress"], 2)
+        self.assertEqual([name for name in os.listdir(self.quest_dir) if name.endswith(".json")], [])
+
+        # A new store reads the saved progress
+        self.assertEqual(UserQuestStore().get("1"), saved)
+
+    def test_progress_index(self):
+        """Test that events only check quests of their type and the index follows new data."""
+        manager = QuestManager(self.quest_dir)
+        data = user_quests(quest_count=40, amount=2)
+        data["quest_data"]["daily_0"]["requirements"][0]["type"] = "battle_win"
+        self.store.put("1", data)
+
+        with patch.object(manager, "_check_metadata_constraints", wraps=manager._check_metadata_constraints) as check:
+            self.assertEqual(manager.update_progress("1", "battle_win", 1, {"opponent": "npc"}), ["daily_0"])
+        self.assertEqual(check.call_count, 1)
+
+        # Completed quests leave the index
+        self.assertEqual(manager.update_progress("1", "battle_win", 5), ["daily_0"])
+        self.assertTrue(data["quest_data"]["daily_0"]["completed"])
+        self.assertEqual(manager.update_progress("1", "battle_win"), [])
+
+        # Replacing the data rebuilds the index
+        self.store.put("1", user_quests(amount=2))
+        self.assertEqual(manager.update_progress("1", "catch"), ["daily_0", "catch_master"])
+
+    def test_flush_writes_dirty_users_and_retries(self):
+        """Test that only changed users are written and failed flushes are retried."""
+        for user_id in ("1", "2", "3"):
+            self.store.put(user_id, user_quests())
+        self.assertEqual(self.store.flush(), 3)
+        self.assertEqual(self.store.flush(), 0)
+
+        QuestManager(self.quest_dir).update_progress("2", "catch")
+        with patch("src.db.user_data_store.run_write", side_effect=RuntimeError("disk full")):
+            self.assertEqual(self.store.flush(), 0)
+        self.assertEqual(self.store.get_stats()["dirty_users"], 1)
+
+        self.assertEqual(self.store.flush(), 1)
+        self.assertEqual(load_rows()["2"]["quest_data"]["daily_0"]["requirements"][0]["progress"], 1)
+
+        # Dirty users are not evicted before they are written
+        small = UserQuestStore(max_users=2)
+        for user_id in ("4", "5", "6"):
+            small.put(user_id, user_quests())
+        self.assertEqual(small.get_stats()["cached_users"], 3)
+        small.stop()
+        self.assertEqual(small.get_stats()["cached_users"], 2)
+        self.assertEqual(len(load_rows()), 6)
+
+    def test_load_outside_lock(self):
+        """Test that a slow load neither blocks cached users nor replaces newer data."""
+        self.store.put("1", user_quests())
+        self.store.put("2", user_quests(amount=1))
+        self.store.flush()
+        self.store._data.pop("2")
+
+        reading = threading.Event()
+        release = threading.Event()
+        real_get_connection = user_data_store.get_connection
+
+        def slow_get_connection():
+            reading.set()
+            release.wait(5)
+            return real_get_connection()
+
+        results = {}
+        with patch.object(user_data_store, "get_connection", slow_get_connection):
+            loader = threading.Thread(target=lambda: results.setdefault("2", self.store.get("2")))
+            loader.start()
+            self.assertTrue(reading.wait(5))
+
+            # The store lock is free while the row is read
+            self.assertEqual(self.store.get("1"), user_quests())
+            newer = user_quests(amount=5)
+            self.store.put("2", newer)
+            release.set()
+            loader.join()
+
+        self.assertIs(results["2"], newer)
+        self.assertIs(self.store.get("2"), newer)
+
+    def test_update_progress_loads_outside_lock(self):
+        """Test that progress for an uncached user neither holds the store lock nor lands on replaced data."""
+        manager = QuestManager(self.quest_dir)
+        self.store.put("1", user_quests())
+        self.store.put("2", user_quests(amount=1))
+        self.store.flush()
+        self.store._data.pop("2")
+
+        reading = threading.Event()
+        release = threading.Event()
+        real_get_connection = user_data_store.get_connection
+
+        def slow_get_connection():
+            reading.set()
+            release.wait(5)
+            return real_get_connection()
+
+        results = {}
+        with patch.object(user_data_store, "get_connection", slow_get_connection):
+            updater = threading.Thread(
+                target=lambda: results.setdefault("2", manager.update_progress("2", "catch")))
+            updater.start()
+            self.assertTrue(reading.wait(5))
+
+            # Other users progress while the row is read
+            self.assertEqual(manager.update_progress("1", "catch"), ["daily_0", "catch_master"])
+            newer = user_quests(amount=5)
+            self.store.put("2", newer)
+            release.set()
+            updater.join()
+
+        # The progress went to the data that replaced the loaded row
+        self.assertEqual(results["2"], ["daily_0", "catch_master"])
+        self.assertIs(self.store.get("2"), newer)
+        self.assertEqual(newer["quest_data"]["daily_0"]["requirements"][0]["progress"], 1)
+        self.assertEqual(self.store.flush(), 2)
+
+    def test_reads_do_not_write(self):
+        """Test that the table is created once through the write queue and reads commit nothing."""
+        real_get_connection = user_data_store.get_connection
+        real_run_write = user_data_store.run_write
+        writes = []
+        commits = []
+
+        class ReadConnection:
+            def __init__(self, conn):
+                self.conn = conn
+            def __getattr__(self, name):
+                return getattr(self.conn, name)
+            def commit(self):
+                commits.append(self)
+                self.conn.commit()
+
+        def recording_write(func, *args):
+            writes.append(func)
+            return real_run_write(func, *args)
+
+        with patch.object(user_data_store, "get_connection", lambda: ReadConnection(real_get_connection())), \
+                patch.object(user_data_store, "run_write", recording_write):
+            self.assertEqual(self.store.get("1"), {})
+            self.assertEqual(self.store.get("2"), {})
+            self.assertEqual(self.store.preload(), 0)
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(commits, [])
+
+    def test_users_pinned_while_written(self):
+        """Test that a user being written is neither evicted nor reloaded from its old row."""
+        store = UserQuestStore(flush_interval=60, max_users=1)
+        self.addCleanup(store.stop)
+        store.put("1", {"v": 1})
+        store.flush()
+        newer = {"v": 2}
+        store.put("1", newer)
+
+        writing = threading.Event()
+        release = threading.Event()
+        real_run_write = user_data_store.run_write
+
+        def slow_run_write(func, *args):
+            writing.set()
+            release.wait(5)
+            return real_run_write(func, *args)
+
+        with patch.object(user_data_store, "run_write", slow_run_write):
+            flusher = threading.Thread(target=store.flush)
+            flusher.start()
+            self.assertTrue(writing.wait(5))
+
+            # Loading another user goes over the limit, but the user being written stays
+            self.assertEqual(store.get("2"), {})
+            self.assertIs(store.get("1"), newer)
+            release.set()
+            flusher.join()
+
+        self.assertEqual(load_rows()["1"], {"v": 2})
+        store._data.pop("1", None)
+        self.assertEqual(store.get("1"), {"v": 2})
+
+    def test_migrate_json_files(self):
+        """Test that old per-user files are imported once without replacing rows."""
+        os.makedirs(self.quest_dir)
+        for user_id in ("10", "11"):
+            with open(os.path.join(self.quest_dir, f"{user_id}.json"), "w") as f:
+                json.dump(user_quests(amount=int(user_id)), f, indent=2)
+        with open(os.path.join(self.quest_dir, "12.json"), "w") as f:
+            f.write("{not json")
+        self.store.put("11", user_quests(amount=99))
+        self.store.flush()
+
+        manager = QuestManager(self.quest_dir)
+        rows = load_rows()
+        self.assertEqual(rows["10"], user_quests(amount=10))
+        self.assertEqual(rows["11"], user_quests(amount=99))
+        self.assertNotIn("12", rows)
+        self.assertEqual(sorted(os.listdir(self.quest_dir))[:3], ["10.json.migrated", "11.json.migrated", "12.json"])
+
+        self.assertEqual(manager.update_progress("10", "catch"), ["daily_0", "catch_master"])
+        self.assertEqual(self.store.migrate_json_files(self.quest_dir), 0)
+
+    def test_update_throughput_benchmark(self):
+        """Benchmark progress updates against rewriting a JSON file per update."""
+        users = [str(user_id) for user_id in range(50)]
+        updates = 2000
+
+        def file_update(user_id):
+            path = os.path.join(file_dir, f"{user_id}.json")
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for quest in data["quest_data"].values():
+                quest["requirements"][0]["progress"] += 1
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+
+        os.makedirs(self.quest_dir)
+        file_dir = os.path.join(self.temp_dir.name, "files")
+        os.makedirs(file_dir)
+        for user_id in users:
+            with open(os.path.join(file_dir, f"{user_id}.json"), "w") as f:
+                json.dump(user_quests(quest_count=20), f, indent=2)
+            self.store.put(user_id, user_quests(quest_count=20, amount=1000000))
+        self.store.flush()
+
+        start_time = time.perf_counter()
+        for i in range(updates):
+            file_update(users[i % len(users)])
+        file_rate = updates / (time.perf_counter() - start_time)
+
+        manager = QuestManager(self.quest_dir)
+        start_time = time.perf_counter()
+        for i in range(updates):
+            manager.update_progress(users[i % len(users)], "catch")
+        written = self.store.flush()
+        store_rate = updates / (time.perf_counter() - start_time)
+
+        print(f"\nQuest progress updates for {len(users)} users with 20 quests each: "
+              f"JSON file rewrites {file_rate:.0f} updates/sec, store {store_rate:.0f} updates/sec "
+              f"({written} rows in one flush)")
+
+        self.assertEqual(written, len(users))
+        self.assertGreater(store_rate, file_rate)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db.audit_writer import get_audit_writer
+from src.core.rate_limiter import RateLimiter
+from src.core.security_manager import SecurityManager, ActionType
+
+
+class TestRateLimiter(unittest.TestCase):
+    """
+    Test cases for the in-memory rate limiter.
+
+    Validates token bucket behaviour, idle eviction, snapshots and the
+    SecurityManager.check_rate_limit API built on top of it.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Release pooled connections."""
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def test_burst_then_block(self):
+        """Test that max_actions are allowed at once and the next is blocked."""
+        limiter = RateLimiter(maintenance_interval=0)
+
+        results = [limiter.check("1", "EXPLORE", 10, 60)[0] for _ in range(13)]
+
+        self.assertEqual(results, [True] * 10 + [False] * 3)
+        self.assertEqual(limiter.check("1", "EXPLORE", 10, 60), (False, 4))
+        # Other users and actions have their own buckets
+        self.assertTrue(limiter.check("2", "EXPLORE", 10, 60)[0])
+        self.assertTrue(limiter.check("1", "CATCH", 10, 60)[0])
+
+    def test_refill(self):
+        """Test that tokens refill over the window."""
+        limiter = RateLimiter(maintenance_interval=0)
+
+        for _ in range(5):
+            limiter.check("1", "CATCH", 5, 0.1)
+        self.assertFalse(limiter.check("1", "CATCH", 5, 0.1)[0])
+
+        time.sleep(0.05)
+        self.assertTrue(limiter.check("1", "CATCH", 5, 0.1)[0])
+
+    def test_eviction(self):
+        """Test that idle buckets are evicted and memory stays bounded."""
+        limiter = RateLimiter(max_entries=100, maintenance_interval=0)
+
+        for i in range(500):
+            limiter.check(str(i), "EXPLORE", 3, 60)
+        self.assertEqual(limiter.get_stats()["buckets"], 100)
+
+        limiter.check("fast", "EXPLORE", 3, 0.01)
+        time.sleep(0.02)
+        self.assertEqual(limiter.evict_idle(), 1)
+        self.assertEqual(limiter.get_stats()["buckets"], 99)
+
+    def test_snapshot_restore(self):
+        """Test that limits survive a restart when snapshots are enabled."""
+        security = SecurityManager()
+        for _ in range(3):
+            security.check_rate_limit("1", ActionType.TRADE_CREATE, 3, 3600)
+        security.rate_limiter.snapshot()
+
+        restored = RateLimiter(snapshot_interval=300, maintenance_interval=0)
+        self.assertFalse(restored.check("1", "TRADE_CREATE", 3, 3600)[0])
+        self.assertTrue(restored.check("2", "TRADE_CREATE", 3, 3600)[0])
+
+    def test_security_manager_api(self):
+        """Test check_rate_limit, abuse alerts and reset_rate_limits."""
+        security = SecurityManager()
+
+        results = [security.check_rate_limit("1", ActionType.EXPLORE, 2, 60) for _ in range(6)]
+        self.assertEqual(results, [True, True, False, False, False, False])
+
+        get_audit_writer().flush()
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM security_alerts WHERE alert_type = 'rate_limit_abuse'")
+        self.assertEqual(cursor.fetchone()[0], 1)
+        conn.close()
+
+        security.reset_rate_limits("1")
+        self.assertTrue(security.check_rate_limit("1", ActionType.EXPLORE, 2, 60))
+
+    def test_check_throughput(self):
+        """Benchmark in-memory checks against the previous database-backed check."""
+        checks = 5000
+        db_path = os.path.join(self.temp_dir.name, "legacy.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+        CREATE TABLE rate_limits (user_id TEXT, action_type TEXT, count INTEGER,
+                                  first_action_time TEXT, last_action_time TEXT,
+                                  PRIMARY KEY (user_id, action_type))
+        """)
+
+        def database_check(user_id):
+            # SELECT then INSERT/UPDATE and commit, as every check used to do
+            row = conn.execute(
+                "SELECT count FROM rate_limits WHERE user_id = ? AND action_type = ?",
+                (user_id, "EXPLORE")
+            ).fetchone()
+            if row is None:
+                conn.execute("INSERT INTO rate_limits VALUES (?, 'EXPLORE', 1, '', '')", (user_id,))
+            else:
+                conn.execute(
+                    "UPDATE rate_limits SET count = count + 1 WHERE user_id = ? AND action_type = ?",
+                    (user_id, "EXPLORE")
+                )
+            conn.commit()
+
+        start_time = time.perf_counter()
+        for i in range(checks):
+            database_check(str(i % 500))
+        database_rate = checks / (time.perf_counter() - start_time)
+        conn.close()
+
+        limiter = RateLimiter(maintenance_interval=0)
+        start_time = time.perf_counter()
+        for i in range(checks * 20):
+            limiter.check(str(i % 500), "EXPLORE", 1000000, 60)
+        memory_rate = checks * 20 / (time.perf_counter() - start_time)
+
+        print(f"Database-backed: {database_rate:.0f} checks/sec")
+        print(f"In-memory: {memory_rate:.0f} checks/sec")
+
+        self.assertGreater(memory_rate, database_rate * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
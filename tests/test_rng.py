@@ -0,0 +1,160 @@
+import unittest
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import rng as rng_module
+from src.utils.rng import RNGService, NUMPY_AVAILABLE
+from src.core.catch_security import CatchSecurity
+from src.models.battle import Battle, BattleType, BattleStatus, ParticipantStatus
+
+
+class BattleVeramon:
+    """Minimal battle-ready Veramon with fixed stats."""
+
+    def __init__(self, veramon_id: str, hp: int = 120):
+        self.id = veramon_id
+        self.hp = hp
+        self.current_hp = hp
+        self.speed = 50
+        self.moves = ["Tackle"]
+
+    def to_dict(self):
+        return {"id": self.id, "hp": self.hp, "current_hp": self.current_hp}
+
+
+def create_battle(battle_id: int, seed: int = None) -> Battle:
+    """Create a started 1v1 battle."""
+    battle = Battle(battle_id, BattleType.PVP, "1", seed=seed)
+    battle.add_participant("2", team_id=1, status=ParticipantStatus.JOINED)
+    battle.participants["1"]["status"] = ParticipantStatus.JOINED
+    battle.add_veramon("1", BattleVeramon(f"{battle_id}-a"), 0)
+    battle.add_veramon("2", BattleVeramon(f"{battle_id}-b"), 0)
+    asyncio.run(battle.start_battle())
+    return battle
+
+
+def play(battle: Battle, max_turns: int = 100) -> list:
+    """Play Tackle until the battle ends, returning every move result."""
+    async def run():
+        results = []
+        for _ in range(max_turns):
+            if battle.status != BattleStatus.ACTIVE:
+                break
+            target = "2" if battle.current_turn == "1" else "1"
+            outcome = await battle.execute_move(battle.current_turn, "Tackle", [target])
+            results.append(outcome["results"][0]["result"])
+        return results
+    return asyncio.run(run())
+
+
+class TestRNGService(unittest.TestCase):
+    """
+    Test cases for the deterministic RNG service.
+
+    Validates that derived generators are reproducible and independent, that
+    catch rolls no longer reseed the random module, and that battles can be
+    replayed from their seed.
+    """
+
+    def test_derived_streams(self):
+        """Test that the same master seed and key give the same numbers."""
+        first = RNGService(42)
+        second = RNGService(42)
+
+        battle = [first.for_battle(7).random() for _ in range(5)]
+        self.assertEqual(battle, [second.for_battle(7).random() for _ in range(5)])
+        self.assertEqual(first.for_spawn("abc").random(), second.for_spawn("abc").random())
+        self.assertEqual(first.for_user("1", 100).random(), second.for_user("1", 100).random())
+
+        # Different keys, namespaces and master seeds give different streams
+        self.assertNotEqual(first.for_battle(7).random(), first.for_battle(8).random())
+        self.assertNotEqual(first.seed_for("battle", 7), first.seed_for("spawn", 7))
+        self.assertNotEqual(first.seed_for("battle", 7), RNGService(43).seed_for("battle", 7))
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "numpy is not installed")
+    def test_numpy_generator(self):
+        """Test that numpy generators are reproducible from a seed."""
+        first = RNGService.numpy_generator("battle:7").random(5)
+        second = RNGService.numpy_generator("battle:7").random(5)
+        self.assertEqual(list(first), list(second))
+
+    def test_catch_roll_leaves_global_state(self):
+        """Test that verifying a catch does not reseed the random module."""
+        random.seed(1234)
+        state = random.getstate()
+
+        for i in range(10):
+            CatchSecurity.verify_catch_success(0.5, f"seed{i}")
+
+        self.assertEqual(random.getstate(), state)
+        # The roll is the same one the global reseed used to produce
+        random.seed("seed0")
+        self.assertEqual(
+            CatchSecurity.verify_catch_success(0.5, "seed0"),
+            random.random() <= 0.5
+        )
+
+    def test_catch_seed_reproducible(self):
+        """Test that catch seeds can be regenerated for an audit."""
+        with patch.object(rng_module, "_rng_service", RNGService(42)):
+            seed = CatchSecurity.generate_catch_seed("1", "spawn", "2025-01-01T00:00:00")
+            self.assertEqual(len(seed), 16)
+            self.assertEqual(seed, CatchSecurity.generate_catch_seed("1", "spawn", "2025-01-01T00:00:00"))
+            self.assertNotEqual(seed, CatchSecurity.generate_catch_seed("2", "spawn", "2025-01-01T00:00:00"))
+
+    def test_battle_replay(self):
+        """Test that a battle replays identically from its seed."""
+        original = create_battle(1)
+        original_results = play(original)
+
+        random.seed(99)
+        state = random.getstate()
+        replayed = create_battle(2, seed=original.rng_seed)
+
+        self.assertEqual(play(replayed), original_results)
+        self.assertEqual(random.getstate(), state)
+
+    def test_battle_resume(self):
+        """Test that a saved battle continues with the same rolls."""
+        uninterrupted = play(create_battle(1, seed=5))
+
+        battle = create_battle(1, seed=5)
+        results = play(battle, max_turns=2)
+        saved = json.loads(json.dumps({
+            "rng_seed": battle.to_dict()["rng_seed"],
+            "rng_draws": battle.to_dict()["rng_draws"]
+        }))
+        self.assertGreater(saved["rng_draws"], 0)
+        self.assertNotIn("rng_state", battle.to_dict())
+
+        # Throw the generator off, then restore it from the saved state
+        battle.rng.seed(0)
+        battle.restore_from_dict({**battle.to_dict(), **saved})
+        results += play(battle)
+
+        self.assertEqual(results, uninterrupted)
+
+    def test_bulk_replay(self):
+        """Benchmark replaying battles in bulk and check they are deterministic."""
+        battles = 200
+
+        start_time = time.perf_counter()
+        recorded = [play(create_battle(i, seed=i)) for i in range(battles)]
+        replayed = [play(create_battle(i, seed=i)) for i in range(battles)]
+        duration = time.perf_counter() - start_time
+
+        print(f"Replayed {battles} battles twice at {battles * 2 / duration:.0f} battles/sec")
+
+        self.assertEqual(recorded, replayed)
+
+
+if __name__ == '__main__':
+    unittest.main()
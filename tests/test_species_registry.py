@@ -0,0 +1,126 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.species_registry import SpeciesRegistry
+from src.utils.spawn_tables import SpawnTableCompiler
+
+SPECIES = {
+    "Flameling": {"name": "Flameling", "type": ["Fire"], "rarity": "common", "biomes": ["volcano"],
+                  "base_stats": {"hp": 40, "atk": 50, "def": 30}, "catch_rate": 0.8},
+    "Flarewing": {"name": "Flarewing", "type": ["Fire", "Flying"], "rarity": "Rare", "biomes": ["volcano", "sky"],
+                  "base_stats": {"hp": 60, "atk": 80, "def": 50}, "evolution": {"evolves_to": "Infernox"}},
+    "Aquafin": {"name": "Aquafin", "type": ["Water"], "rarity": "common", "biomes": ["ocean"],
+                "base_stats": {"hp": 45, "atk": 40, "def": 45}}
+}
+
+
+class TestSpeciesRegistry(unittest.TestCase):
+    """
+    Test cases for the shared species registry.
+
+    Validates lazy loading, secondary indexes, name search and reloading
+    when the database file changes.
+    """
+
+    def setUp(self):
+        """Write a small species database to a temporary file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "veramon_database.json")
+        self._write(SPECIES)
+
+    def tearDown(self):
+        """Remove the temporary database."""
+        self.temp_dir.cleanup()
+
+    def _write(self, data, mtime=None):
+        """Write species data, optionally forcing the file modification time."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_lazy_load_and_indexes(self):
+        """Test that data loads on first use and is indexed."""
+        registry = SpeciesRegistry(self.path)
+        self.assertEqual(registry.version, 0)
+
+        self.assertEqual(registry.get("flareWING")["name"], "Flarewing")
+        self.assertEqual(registry.version, 1)
+        self.assertIsNone(registry.get("Missingno"))
+        self.assertEqual(registry.canonical_name("aquafin"), "Aquafin")
+
+        self.assertEqual(sorted(registry.by_type("fire")), ["Flameling", "Flarewing"])
+        self.assertEqual(registry.by_type("Flying"), ["Flarewing"])
+        self.assertEqual(sorted(registry.by_rarity("COMMON")), ["Aquafin", "Flameling"])
+        self.assertEqual(registry.by_rarity("rare"), ["Flarewing"])
+        self.assertEqual(sorted(registry.by_biome("volcano")), ["Flameling", "Flarewing"])
+
+        derived = registry.derived("Flarewing")
+        self.assertEqual(derived["types"], ("fire", "flying"))
+        self.assertEqual(derived["base_stat_total"], 190)
+        self.assertEqual(derived["evolves_to"], "Infernox")
+
+    def test_search(self):
+        """Test prefix search and substring search."""
+        registry = SpeciesRegistry(self.path)
+
+        self.assertEqual(registry.search_prefix("fl"), ["Flameling", "Flarewing"])
+        self.assertEqual(registry.search_prefix("FLA", limit=1), ["Flameling"])
+        self.assertEqual(registry.search_prefix("z"), [])
+        # Prefix matches come before other matches
+        self.assertEqual(registry.search("a"), ["Aquafin", "Flameling", "Flarewing"])
+        self.assertEqual(registry.search("ling"), ["Flameling"])
+        self.assertEqual(registry.names(), ["Aquafin", "Flameling", "Flarewing"])
+
+    def test_hot_reload(self):
+        """Test that a changed file is reloaded into the same dict."""
+        registry = SpeciesRegistry(self.path, check_interval=0)
+        data = registry.all()
+        self.assertEqual(len(data), 3)
+
+        updated = dict(SPECIES)
+        updated["Voltmouse"] = {"name": "Voltmouse", "type": ["Electric"], "rarity": "uncommon"}
+        self._write(updated, mtime=os.stat(self.path).st_mtime + 10)
+
+        self.assertIs(registry.all(), data)
+        self.assertIn("Voltmouse", data)
+        self.assertEqual(registry.by_type("electric"), ["Voltmouse"])
+        self.assertEqual(registry.version, 2)
+
+    def test_bad_file_keeps_data(self):
+        """Test that a broken file does not wipe the loaded data."""
+        registry = SpeciesRegistry(self.path, check_interval=0)
+        registry.all()
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        os.utime(self.path, (os.stat(self.path).st_mtime + 10,) * 2)
+
+        self.assertEqual(len(registry.all()), 3)
+
+    def test_spawn_tables_follow_reload(self):
+        """Test that compiled spawn tables are dropped when the registry reloads."""
+        registry = SpeciesRegistry(self.path, check_interval=0)
+        biomes = {"volcano": {"spawn_table": {"common": ["Flameling"]}}}
+        compiler = SpawnTableCompiler(biomes, registry.all(), {"common": 1})
+        compiler.update_sources(biomes, registry.all(), registry.refresh())
+        self.assertEqual(compiler.encounter_table("volcano").items, ["Flameling"])
+
+        # Same species count, so only the version shows the change
+        updated = dict(SPECIES)
+        updated["Flameling"] = dict(SPECIES["Flameling"], type=["Water"])
+        self._write(updated, mtime=os.stat(self.path).st_mtime + 10)
+        compiler.update_sources(biomes, registry.all(), registry.refresh())
+        compiler.encounter_table("volcano")
+
+        self.assertEqual(compiler.compile_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+import unittest
+import sys
+import os
+import time
+import random
+import tempfile
+import threading
+from collections import OrderedDict
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import tiered_cache
+from src.db.tiered_cache import TieredCache, CacheNamespace
+from src.db.cache_manager import CacheManager
+from src.utils import cache as utils_cache
+
+
+class TestTieredCache(unittest.TestCase):
+    """
+    Test cases for the tiered cache.
+
+    Validates byte budgets and segmented LRU eviction, TTLs, invalidation and
+    removal listeners, the disk tier across restarts, the namespaces shared
+    by CacheManager and src/utils/cache.py, and hit rates under scans
+    against a plain LRU.
+    """
+
+    def setUp(self):
+        """Use a temporary directory for disk tiers."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.disk_path = os.path.join(self.temp_dir.name, "cache.db")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_byte_budget_and_segments(self):
+        """Test that entries read twice survive a burst of new entries."""
+        namespace = CacheNamespace("test", max_bytes=1000)
+        for key in ("hot1", "hot2"):
+            namespace.put(key, "x", size=100)
+            namespace.get(key)
+        for i in range(50):
+            namespace.put(f"scan{i}", "x", size=100)
+
+        stats = namespace.get_stats()
+        self.assertLessEqual(stats["bytes"], 1000)
+        self.assertEqual(stats["total_items"], 10)
+        self.assertEqual(stats["evictions"], 42)
+        self.assertEqual(namespace.get("hot1"), "x")
+        self.assertIsNone(namespace.get("scan0"))
+
+        # Values larger than the budget are not stored
+        self.assertFalse(namespace.put("huge", "x", size=2000))
+        self.assertEqual(namespace.get_stats()["rejected"], 1)
+
+        # The entry limit applies as well
+        limited = CacheNamespace("limited", max_bytes=10 ** 6, max_entries=3)
+        for i in range(5):
+            limited.put(i, [i] * 10)
+        self.assertEqual(len(limited), 3)
+        self.assertGreater(limited.get_stats()["bytes"], 3 * sys.getsizeof([0] * 10))
+
+    def test_ttl_invalidation_and_listeners(self):
+        """Test expiry, explicit invalidation and removal notifications."""
+        namespace = CacheNamespace("test", max_bytes=10 ** 6, default_ttl=60)
+        removed = []
+        namespace.add_listener(lambda key, value, reason: removed.append((key, reason)))
+
+        namespace.put("battle:1", 1)
+        namespace.put("battle:2", 2, ttl=0)
+        namespace.put("user:1", 3)
+        with patch("src.db.tiered_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(namespace.get("battle:1"))
+            self.assertEqual(namespace.get("battle:2"), 2)
+            self.assertEqual(namespace.cleanup_expired(), 1)
+
+        self.assertEqual(namespace.invalidate_pattern("battle:"), 1)
+        self.assertTrue(namespace.invalidate("missing") is False)
+        self.assertEqual(namespace.pop("gone", "default"), "default")
+        namespace.put("user:2", 4)
+        namespace.put("user:2", 5)
+        self.assertEqual(namespace.clear(), 1)
+        self.assertEqual(removed, [("battle:1", "expired"), ("user:1", "expired"), ("battle:2", "invalidated"),
+                                   ("user:2", "replaced"), ("user:2", "cleared")])
+
+        calls = []
+        def compute():
+            calls.append(1)
+            time.sleep(0.01)
+            return None
+        threads = [threading.Thread(target=namespace.get_or_set, args=("shared", compute)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # A cached None is a hit, so it is computed once
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(namespace._key_locks, {})
+
+    def test_disk_tier(self):
+        """Test that persistent namespaces survive restarts and serve evicted entries."""
+        cache = TieredCache(memory_bytes=10 ** 6, disk_path=self.disk_path)
+        shop = cache.namespace("shop", persistent=True)
+        memory_only = cache.namespace("memory")
+        shop.put("items", {"potion": 50})
+        shop.put("expiring", 1, ttl=60)
+        shop.put("gone", 2)
+        shop.put("unpicklable", threading.Lock())
+        memory_only.put("items", 1)
+        shop.invalidate("gone")
+        cache.close()
+
+        restarted = TieredCache(memory_bytes=1000, disk_path=self.disk_path)
+        shop = restarted.namespace("shop", share=0.5, persistent=True)
+        self.assertIsNone(restarted.namespace("memory").get("items"))
+        self.assertEqual(shop.get("items"), {"potion": 50})
+        self.assertIsNone(shop.get("gone"))
+        self.assertIsNone(shop.get("unpicklable"))
+        with patch("src.db.tiered_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(shop.get("expiring"))
+
+        # Entries pushed out of memory are read back from disk
+        for i in range(20):
+            shop.put(f"filler{i}", "x" * 50)
+        self.assertNotIn("items", shop)
+        self.assertEqual(shop.get("items"), {"potion": 50})
+        stats = restarted.get_stats()
+        self.assertEqual(stats["namespaces"]["shop"]["disk_hits"], 2)
+        self.assertGreater(stats["namespaces"]["shop"]["evictions"], 0)
+        self.assertEqual(stats["disk"]["errors"], 0)
+
+        shop.clear()
+        self.assertIsNone(shop.get("items"))
+        restarted.close()
+
+    def test_shared_namespaces(self):
+        """Test that both cache front ends report through one tiered cache."""
+        shared = TieredCache(memory_bytes=10 ** 6)
+        with patch.object(tiered_cache, "_tiered_cache", shared):
+            with patch.object(CacheManager, "_maintenance_loop"):
+                manager = CacheManager()
+            general = utils_cache.Cache()
+
+            manager.cache_object("item:potion", {"price": 50})
+            manager.cache_user_data("1", {"tokens": 10})
+            manager.cache_query_result("SELECT * FROM users", None, [(1,)], tables=["users"])
+            self.assertEqual(manager.get_query_result("SELECT * FROM users"), [(1,)])
+            self.assertEqual(general.get_or_set("vip:shop_items", lambda: ["crown"]), ["crown"])
+            self.assertIsNone(general.get("missing"))
+
+            stats = utils_cache.get_cache_stats()
+            self.assertEqual(set(stats["namespaces"]), {"queries", "objects", "users", "veramon", "general"})
+            self.assertEqual(stats["cached_items"], 4)
+            self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+            self.assertAlmostEqual(stats["hit_rate"], 100 / 3)
+            self.assertGreater(stats["memory_usage"], 0)
+            self.assertEqual(manager.get_cache_stats()["object_cache"]["total_items"], 1)
+
+            manager.reset_cache_stats()
+            self.assertEqual(utils_cache.get_cache_stats()["hits"], 0)
+            self.assertEqual(utils_cache.clear_cache(), 4)
+            self.assertIsNone(manager.get_user_data("1"))
+
+    def test_scan_hit_rate_benchmark(self):
+        """Compare hit rates against a plain LRU when scans mix with hot keys."""
+        rng = random.Random(7)
+        hot = [f"hot{i}" for i in range(80)]
+        requests = []
+        for i in range(20000):
+            if i % 1000 < 300:
+                requests.append(f"scan{i}")  # One-off keys, e.g. a full leaderboard walk
+            else:
+                requests.append(rng.choice(hot))
+
+        def run_lru(capacity):
+            entries, hits = OrderedDict(), 0
+            for key in requests:
+                if key in entries:
+                    entries.move_to_end(key)
+                    hits += 1
+                else:
+                    entries[key] = True
+                    if len(entries) > capacity:
+                        entries.popitem(last=False)
+            return hits / len(requests)
+
+        namespace = CacheNamespace("bench", max_bytes=100 * 100)
+        start_time = time.perf_counter()
+        for key in requests:
+            if namespace.get(key) is None:
+                namespace.put(key, True, size=100)
+        elapsed = time.perf_counter() - start_time
+        slru_rate = namespace.get_stats()["hit_rate"]
+        lru_rate = run_lru(100)
+
+        print(f"\nHot keys mixed with scans, 100 entries: LRU hit rate {lru_rate:.1%}, "
+              f"segmented LRU {slru_rate:.1%} ({len(requests) / elapsed:.0f} requests/sec)")
+
+        self.assertGreater(slru_rate, lru_rate)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+import sys
+import os
+import time
+import itertools
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.type_registry import (
+    TypeRegistry, DEFAULT_TYPE_CHART, UNKNOWN_TYPE, NUMPY_AVAILABLE, get_type_registry
+)
+from src.utils.species_registry import get_species_registry
+from src.models.battle import Battle, BattleType, _get_abilities_data
+
+
+def chart_multiplier(move_type: str, defender_types) -> float:
+    """Compute effectiveness the old way, one chart lookup per defending type."""
+    multiplier = 1.0
+    for defender_type in defender_types:
+        multiplier *= DEFAULT_TYPE_CHART.get(move_type.lower(), {}).get(defender_type.lower(), 1.0)
+    return multiplier
+
+
+class TestTypeRegistry(unittest.TestCase):
+    """
+    Test cases for the type registry.
+
+    Validates interned codes, precomputed dual-type effectiveness against the
+    chart, codes on species and move data, and lookup speed.
+    """
+
+    def test_codes(self):
+        """Test that types get stable codes and unknown types are neutral."""
+        registry = TypeRegistry()
+
+        fire = registry.code("Fire")
+        self.assertNotEqual(fire, UNKNOWN_TYPE)
+        self.assertEqual(registry.code("fire"), fire)
+        self.assertEqual(registry.name(fire), "fire")
+        self.assertEqual(registry.code("Sound"), UNKNOWN_TYPE)
+        self.assertEqual(registry.code(None), UNKNOWN_TYPE)
+
+        self.assertEqual(registry.multiplier("Sound", ["Ghost"]), 1.0)
+        self.assertEqual(registry.multiplier("Fire", ["Sound"]), 1.0)
+
+        # New types are neutral and keep existing codes
+        sound = registry.intern("Sound")
+        self.assertEqual(registry.code("sound"), sound)
+        self.assertEqual(registry.code("fire"), fire)
+        self.assertEqual(registry.multiplier("Sound", ["Water", "Sound"]), 1.0)
+        self.assertEqual(registry.multiplier("Fire", ["Grass", "Sound"]), 2.0)
+
+        # Combination codes handed out before a type is interned keep their meaning
+        grass = registry.code("grass")
+        fire_water = registry.combo(["Fire", "Water"])
+        fire_cosmic = registry.combo(["Fire", "Cosmic"])
+        before = registry.effectiveness(grass, fire_water)
+        cosmic = registry.intern("Cosmic")
+        self.assertEqual(registry.combo(["Fire", "Water"]), fire_water)
+        self.assertEqual(registry.combo_types(fire_water), tuple(sorted((fire, registry.code("water")))))
+        self.assertEqual(registry.effectiveness(grass, fire_water), before)
+        self.assertEqual(registry.effectiveness(cosmic, fire_water), 1.0)
+        self.assertNotEqual(registry.combo(["Fire", "Cosmic"]), fire_cosmic)
+        self.assertEqual(registry.combo_types(registry.combo(["Fire", "Cosmic"])), (fire, cosmic))
+
+    def test_combinations_match_chart(self):
+        """Test every move type against every single and dual type combination."""
+        registry = TypeRegistry()
+        types = [name.title() for name in DEFAULT_TYPE_CHART]
+        combos = [(t,) for t in types] + list(itertools.permutations(types, 2))
+
+        for defender_types in combos:
+            combo = registry.combo(defender_types)
+            self.assertEqual(combo, registry.combo(reversed(defender_types)))
+            for move_type in types:
+                self.assertEqual(
+                    registry.effectiveness(registry.code(move_type), combo),
+                    chart_multiplier(move_type, defender_types),
+                    f"{move_type} against {defender_types}"
+                )
+
+        self.assertEqual(registry.multiplier("Electric", ["Water", "Flying"]), 4.0)
+        self.assertEqual(registry.multiplier("Ground", ["Flying", "Fire"]), 0.0)
+        self.assertEqual(registry.multiplier("Fire", []), 1.0)
+
+        if NUMPY_AVAILABLE:
+            table = registry.as_numpy()
+            self.assertEqual(table.shape, (registry.get_stats()["combinations"], registry.type_count))
+
+    def test_species_and_moves_carry_codes(self):
+        """Test that species and move data hold interned codes."""
+        type_registry = get_type_registry()
+        species = get_species_registry()
+
+        for name in species.names()[:50]:
+            derived = species.derived(name)
+            self.assertEqual(derived["type_codes"],
+                             tuple(type_registry.code(t) for t in derived["types"]))
+            self.assertEqual(type_registry.combo_types(derived["type_combo"]),
+                             tuple(sorted(set(derived["type_codes"]))))
+
+        abilities = _get_abilities_data()
+        for ability in list(abilities.values())[:50]:
+            self.assertEqual(ability["type_code"], type_registry.code(ability.get("type")))
+
+    def test_battle_uses_registry(self):
+        """Test that battles get the same multipliers as the chart."""
+        battle = Battle(1, BattleType.PVP, "1")
+
+        class Defender:
+            types = ["Water", "Ground"]
+
+        self.assertEqual(battle._get_type_multiplier("Grass", Defender()), 4.0)
+        self.assertEqual(battle._get_type_multiplier(get_type_registry().code("electric"), Defender()), 0.0)
+        self.assertEqual(battle._calculate_type_effectiveness("Fire", "Water"), 0.5)
+        self.assertEqual(battle._calculate_type_effectiveness("Fire", None), 1.0)
+
+    def test_lookup_benchmark(self):
+        """Benchmark dual-type lookups against the per-type chart lookups."""
+        registry = TypeRegistry()
+        types = [name.title() for name in DEFAULT_TYPE_CHART]
+        pairs = [(move, defender) for move in types
+                 for defender in itertools.combinations(types, 2)]
+        coded = [(registry.code(move), registry.combo(defender)) for move, defender in pairs]
+        rounds = 20
+
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            for move_type, defender_types in pairs:
+                chart_multiplier(move_type, defender_types)
+        chart_time = time.perf_counter() - start_time
+
+        effectiveness = registry.effectiveness
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            for move_code, combo in coded:
+                effectiveness(move_code, combo)
+        coded_time = time.perf_counter() - start_time
+
+        lookups = rounds * len(pairs)
+        print(f"\nType effectiveness: chart {lookups / chart_time:.0f} lookups/sec, "
+              f"interned codes {lookups / coded_time:.0f} lookups/sec")
+
+        self.assertLess(coded_time, chart_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
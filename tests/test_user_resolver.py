@@ -0,0 +1,187 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+import tempfile
+from unittest.mock import patch, MagicMock
+
+import discord
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.utils.user_resolver import UserResolver
+
+
+class FakeUser:
+    def __init__(self, user_id: int, display_name: str):
+        self.id = user_id
+        self.display_name = display_name
+
+
+class FakeBot:
+    """Client with a gateway cache and an API that takes `latency` seconds per user."""
+
+    def __init__(self, cached=(), latency: float = 0.01, missing=()):
+        self.cached = {user_id: FakeUser(user_id, f"Cached{user_id}") for user_id in cached}
+        self.latency = latency
+        self.missing = set(missing)
+        self.fetches = []
+        self.active = 0
+        self.max_active = 0
+
+    def get_user(self, user_id: int):
+        return self.cached.get(user_id)
+
+    async def fetch_user(self, user_id: int):
+        self.fetches.append(user_id)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.active -= 1
+        if user_id in self.missing:
+            raise discord.NotFound(MagicMock(status=404), "Unknown User")
+        return FakeUser(user_id, f"Fetched{user_id}")
+
+
+class TestUserResolver(unittest.TestCase):
+    """
+    Test cases for the bulk user resolver.
+
+    Validates the gateway, memory, database and API tiers, coalescing and
+    bounded concurrency of API fetches, expiry of saved names, and the
+    number of API requests a leaderboard needs.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Release pooled connections."""
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def test_tiers(self):
+        """Test that each tier is only used when the ones before it miss."""
+        bot = FakeBot(cached=[1], missing=[4])
+        resolver = UserResolver(bot)
+
+        names = asyncio.run(resolver.resolve_many(["1", 2, "3", "4", "2"]))
+        self.assertEqual(names, {"1": "Cached1", "2": "Fetched2", "3": "Fetched3"})
+        self.assertEqual(sorted(bot.fetches), [2, 3, 4])
+
+        asyncio.run(resolver.resolve_many(["2", "3"]))
+        self.assertEqual(resolver.stats["memory"], 2)
+
+        # A restarted bot reads the saved names instead of fetching them
+        restarted = FakeBot()
+        names = asyncio.run(UserResolver(restarted).resolve_many(["2", "3"]))
+        self.assertEqual(names, {"2": "Fetched2", "3": "Fetched3"})
+        self.assertEqual(restarted.fetches, [])
+
+        users = asyncio.run(resolver.fetch_many(["1", "5"]))
+        self.assertEqual(users["1"].display_name, "Cached1")
+        self.assertEqual(users["5"].id, 5)
+
+    def test_expired_names(self):
+        """Test that expired names are fetched again but kept if the fetch fails."""
+        bot = FakeBot()
+        asyncio.run(UserResolver(bot, ttl=60).resolve_many(["7", "8"]))
+
+        failing = FakeBot(missing=[8])
+        resolver = UserResolver(failing, ttl=60)
+        with patch("src.utils.user_resolver.time.time", return_value=time.time() + 120):
+            names = asyncio.run(resolver.resolve_many(["7", "8"]))
+
+        self.assertEqual(sorted(failing.fetches), [7, 8])
+        self.assertEqual(names, {"7": "Fetched7", "8": "Fetched8"})
+        self.assertEqual(resolver.stats["failed"], 1)
+
+    def test_reads_do_not_write(self):
+        """Test that the table is created once and names read from the database write nothing."""
+        resolver = UserResolver(FakeBot())
+        create_table = UserResolver._create_table
+        created = []
+        def recording_create(cursor):
+            created.append(cursor)
+            create_table(cursor)
+        with patch.object(UserResolver, "_create_table", staticmethod(recording_create)):
+            asyncio.run(resolver.resolve_many(["1", "2"]))
+            asyncio.run(resolver.resolve_many(["3"]))
+        self.assertEqual(len(created), 1)
+
+        writes = []
+        async def recording_write(func, *args):
+            writes.append(func)
+        resolver._names.clear()
+        with patch("src.utils.user_resolver.run_write_async", recording_write):
+            names = asyncio.run(resolver.resolve_many(["1", "2"]))
+        self.assertEqual(names, {"1": "Fetched1", "2": "Fetched2"})
+        self.assertEqual(resolver.stats["database"], 2)
+        self.assertEqual(writes, [])
+
+    def test_coalescing_and_concurrency(self):
+        """Test that simultaneous requests share fetches and stay under the limit."""
+        bot = FakeBot(latency=0.02)
+        resolver = UserResolver(bot, max_concurrency=3)
+
+        async def run():
+            return await asyncio.gather(
+                resolver.resolve_many(range(1, 11)),
+                resolver.resolve_many(range(5, 16)),
+                resolver.fetch_many(range(1, 4))
+            )
+
+        first, second, users = asyncio.run(run())
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(second), 11)
+        self.assertEqual(len(users), 3)
+        self.assertEqual(sorted(bot.fetches), list(range(1, 16)))
+        self.assertLessEqual(bot.max_active, 3)
+        self.assertEqual(resolver.stats["coalesced"], 9)
+        self.assertEqual(resolver.get_stats()["inflight"], 0)
+
+    def test_leaderboard_benchmark(self):
+        """Benchmark resolving a 10-entry leaderboard against one fetch per row."""
+        rows = [str(user_id) for user_id in range(100, 110)]
+
+        async def per_row(bot):
+            names = {}
+            for user_id in rows:
+                names[user_id] = (await bot.fetch_user(int(user_id))).display_name
+            return names
+
+        bot = FakeBot(latency=0.02)
+        start_time = time.perf_counter()
+        expected = asyncio.run(per_row(bot))
+        per_row_time = time.perf_counter() - start_time
+
+        bot = FakeBot(latency=0.02)
+        resolver = UserResolver(bot)
+        start_time = time.perf_counter()
+        self.assertEqual(asyncio.run(resolver.resolve_many(rows)), expected)
+        cold_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        for _ in range(20):
+            asyncio.run(resolver.resolve_many(rows))
+        warm_time = (time.perf_counter() - start_time) / 20
+
+        print(f"\nLeaderboard names at 20 ms per API call: per-row fetches {per_row_time * 1000:.0f} ms, "
+              f"resolve_many cold {cold_time * 1000:.0f} ms, warm {warm_time * 1000:.2f} ms; "
+              f"API calls over 21 leaderboards: {len(bot.fetches)} vs {21 * len(rows)}")
+
+        self.assertEqual(len(bot.fetches), len(rows))
+        self.assertLess(cold_time, per_row_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+import unittest
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Add the src directory to the system path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db import db
+from src.db import user_data_store
+from src.db.db import get_connection
+from src.utils import user_settings
+from src.utils import ui_theme
+from src.utils.user_settings import SettingsService, UserSettings, DEFAULT_SETTINGS, get_user_settings
+from src.utils.ui_theme import ThemeManager, create_themed_embed
+
+
+def load_rows():
+    """Get {user_id: data} from the settings table."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT user_id, data FROM user_settings_data")
+    rows = {user_id: json.loads(data) for user_id, data in cursor.fetchall()}
+    conn.close()
+    return rows
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+class TestSettingsService(unittest.TestCase):
+    """
+    Test cases for the cached settings service.
+
+    Validates settings changes without file writes, write-behind flushes,
+    saves of evicted users, changes that don't hold the lock while loading,
+    change notifications that refresh cached themes, migration of both old
+    file layouts, and themed embed throughput against per-embed file reads.
+    """
+
+    def setUp(self):
+        """Point the connection pool at a temporary database and use a fresh service."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db.close_all_connections()
+        patcher = patch.object(db, "DB_PATH", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.service = SettingsService(flush_interval=60)
+        service_patcher = patch.object(user_settings, "_settings_service", self.service)
+        service_patcher.start()
+        self.addCleanup(service_patcher.stop)
+
+        self.theme_manager = ThemeManager(os.path.join(self.temp_dir.name, "themes.json"))
+        self.addCleanup(self.service.unsubscribe, self.theme_manager._on_settings_changed)
+        theme_patcher = patch.object(ui_theme, "theme_manager", self.theme_manager)
+        theme_patcher.start()
+        self.addCleanup(theme_patcher.stop)
+
+    def tearDown(self):
+        """Stop the flush thread and release pooled connections."""
+        self.service.stop()
+        db.close_all_connections()
+        self.temp_dir.cleanup()
+
+    def test_settings_are_cached_and_flushed(self):
+        """Test that changes stay in memory until a flush writes them."""
+        settings = get_user_settings("1")
+        self.assertEqual(settings.to_dict(), DEFAULT_SETTINGS)
+        self.assertTrue(settings.set("compact_mode", True))
+        self.assertFalse(settings.set("not_a_setting", 1))
+        settings.from_dict({"show_tips": False, "unknown": 1})
+        self.assertFalse(get_user_settings("1").get("show_tips"))
+        self.assertEqual(load_rows(), {})
+
+        self.assertEqual(self.service.flush(), 1)
+        self.assertEqual(self.service.flush(), 0)
+        saved = load_rows()["1"]
+        self.assertTrue(saved["compact_mode"])
+        self.assertNotIn("unknown", saved)
+
+        # A new service reads the saved settings
+        restarted = SettingsService()
+        self.assertTrue(UserSettings("1", restarted).get("compact_mode"))
+        self.assertEqual(UserSettings("2", restarted).to_dict(), DEFAULT_SETTINGS)
+
+        settings.reset()
+        self.assertEqual(settings.to_dict(), DEFAULT_SETTINGS)
+        self.assertEqual(self.service.flush(), 1)
+        self.assertFalse(load_rows()["1"]["compact_mode"])
+
+    def test_evicted_users(self):
+        """Test that saving an evicted user neither breaks flushes nor uses stale settings."""
+        service = SettingsService(flush_interval=60, max_users=1)
+        first = UserSettings("1", service)
+        first.set("compact_mode", True)
+        service.flush()
+
+        # Loading another user evicts the first one
+        UserSettings("2", service).set("show_tips", False)
+        self.assertNotIn("1", service._data)
+
+        service.update("2", {"theme": "dark"})
+        self.assertTrue(first.save())
+        service._dirty.add("4")
+        self.assertEqual(service.flush(), 2)
+        self.assertEqual(service.get_stats()["dirty_users"], 0)
+        self.assertEqual(load_rows()["2"]["theme"], "dark")
+
+        # A view of an evicted user reads the current settings
+        service.update("1", {"compact_mode": False})
+        self.assertFalse(first.get("compact_mode"))
+        self.assertFalse(first.to_dict()["compact_mode"])
+        service.stop()
+
+    def test_update_loads_outside_lock(self):
+        """Test that changing an uncached user's settings doesn't hold the lock while reading them."""
+        self.service.update("1", {"compact_mode": True})
+        self.service.update("2", {"show_tips": False})
+        self.service.flush()
+        self.service._data.pop("2")
+
+        reading = threading.Event()
+        release = threading.Event()
+        real_get_connection = user_data_store.get_connection
+
+        def slow_get_connection():
+            reading.set()
+            release.wait(5)
+            return real_get_connection()
+
+        results = {}
+        with patch.object(user_data_store, "get_connection", slow_get_connection):
+            updater = threading.Thread(
+                target=lambda: results.setdefault("2", self.service.update("2", {"theme": "dark"})))
+            updater.start()
+            self.assertTrue(reading.wait(5))
+
+            # Other users' changes and saves don't wait for the row
+            self.assertTrue(self.service.lock.acquire(timeout=1))
+            self.service.lock.release()
+            self.assertEqual(self.service.update("1", {"theme": "nature"}), {"theme": "nature"})
+            self.assertTrue(UserSettings("1", self.service).save())
+            release.set()
+            updater.join()
+
+        self.assertEqual(results["2"], {"theme": "dark"})
+        self.assertEqual(self.service.flush(), 2)
+        saved = load_rows()
+        self.assertEqual((saved["1"]["theme"], saved["2"]["theme"]), ("nature", "dark"))
+        self.assertFalse(saved["2"]["show_tips"])
+
+    def test_change_notifications(self):
+        """Test that listeners hear about changes and cached themes follow them."""
+        changes = []
+        self.service.subscribe(lambda user_id, changed: changes.append((user_id, changed)))
+
+        self.assertEqual(self.theme_manager.get_user_theme("5").id, "default")
+        self.assertTrue(self.theme_manager.set_user_theme("5", "dark"))
+        self.assertFalse(self.theme_manager.set_user_theme("5", "no_such_theme"))
+        self.assertEqual(self.theme_manager.get_user_theme("5").id, "dark")
+
+        # Unchanged values do not notify
+        get_user_settings("5").set("theme", "dark")
+        get_user_settings("5").set("theme", "nature")
+        self.assertEqual(changes, [("5", {"theme": "dark"}), ("5", {"theme": "nature"})])
+
+        embed = create_themed_embed("5", title="Hi")
+        self.assertEqual(embed.color, self.theme_manager.get_theme("nature").get_color(ui_theme.ThemeColorType.PRIMARY))
+        self.assertEqual(self.service.flush(), 1)
+        self.assertEqual(load_rows()["5"]["theme"], "nature")
+
+        # Replaced settings, e.g. after a restore, drop every cached theme
+        self.theme_manager.get_user_theme("5")
+        self.service.invalidate_all()
+        self.assertEqual(changes[-1], (None, {}))
+        self.assertEqual(self.theme_manager._user_theme_cache, {})
+
+    def test_migrate_legacy_files(self):
+        """Test that both file layouts and the theme map are merged and imported once."""
+        settings_dir = os.path.join(self.temp_dir.name, "user_settings")
+        preferences_dir = os.path.join(self.temp_dir.name, "user_preferences")
+        themes_file = os.path.join(self.temp_dir.name, "user_themes.json")
+        write_json(os.path.join(settings_dir, "1.json"), {**DEFAULT_SETTINGS, "compact_mode": True, "stale": 1})
+        write_json(os.path.join(settings_dir, "2.json"), {"show_tips": False})
+        write_json(os.path.join(preferences_dir, "1.json"), {"theme": "dark", "sort_order": "level"})
+        write_json(os.path.join(preferences_dir, "3.json"), {"theme": "ocean"})
+        write_json(themes_file, {"2": "nature", "3": "retro"})
+
+        self.assertEqual(self.service.migrate_legacy_files(settings_dir, preferences_dir, themes_file), 3)
+        self.assertEqual(sorted(os.listdir(settings_dir)), ["1.json.migrated", "2.json.migrated"])
+        self.assertFalse(os.path.exists(themes_file))
+
+        one = self.service.settings("1")
+        self.assertTrue(one["compact_mode"])
+        self.assertEqual((one["theme"], one["sort_order"]), ("dark", "level"))
+        self.assertNotIn("stale", one)
+        self.assertEqual((self.service.value("2", "theme"), self.service.value("2", "show_tips")), ("nature", False))
+        self.assertEqual(self.service.value("3", "theme"), "retro")
+
+        self.assertEqual(self.service.migrate_legacy_files(settings_dir, preferences_dir, themes_file), 0)
+
+    def test_embed_throughput_benchmark(self):
+        """Benchmark themed embeds against reading the settings file for each one."""
+        users = [str(user_id) for user_id in range(200)]
+        embeds = 5000
+        settings_dir = os.path.join(self.temp_dir.name, "user_settings")
+        for i, user_id in enumerate(users):
+            theme = ["default", "dark", "nature"][i % 3]
+            write_json(os.path.join(settings_dir, f"{user_id}.json"), {**DEFAULT_SETTINGS, "theme": theme})
+            self.service.update(user_id, {"theme": theme})
+        self.service.flush()
+
+        def file_embed(user_id):
+            with open(os.path.join(settings_dir, f"{user_id}.json"), "r") as f:
+                settings = json.load(f)
+            theme = self.theme_manager.get_theme(settings.get("theme", "default"))
+            return theme.create_embed("Title", "Description", ui_theme.ThemeColorType.PRIMARY)
+
+        start_time = time.perf_counter()
+        for i in range(embeds):
+            file_embed(users[i % len(users)])
+        file_rate = embeds / (time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        for i in range(embeds):
+            user_id = users[i % len(users)]
+            get_user_settings(user_id).get("compact_mode")
+            create_themed_embed(user_id, "Title", "Description")
+        cached_rate = embeds / (time.perf_counter() - start_time)
+
+        print(f"\nThemed embeds for {len(users)} users: settings file read per embed {file_rate:.0f} embeds/sec, "
+              f"settings service {cached_rate:.0f} embeds/sec")
+
+        self.assertGreater(cached_rate, file_rate)
+
+
+if __name__ == '__main__':
+    unittest.main()